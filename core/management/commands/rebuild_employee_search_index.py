@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.employee_search import install_search_backend, rebuild_employee_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the employee search index (after bulk employee imports or updates)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Employees inserted per query")
+
+    def handle(self, *args, **options):
+        backend = install_search_backend()
+        count = rebuild_employee_search_index(options['batch_size'])
+        self.stdout.write(
+            f"Indexed {count} employees ({'full-text index' if backend else 'token matching'})"
+        )
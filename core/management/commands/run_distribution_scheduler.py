@@ -0,0 +1,34 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.reports.bulletin_management import (
+    DISTRIBUTION_LEASE_TIMEOUT, DistributionScheduler, run_distribution_schedulers
+)
+
+
+class Command(BaseCommand):
+    help = "Run payslip distribution schedulers delivering due distributions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Number of scheduler processes")
+        parser.add_argument('--batch-size', type=int, default=50, help="Distributions claimed per batch")
+        parser.add_argument('--poll-interval', type=float, default=60.0,
+                            help="Seconds between two reloads of the due distributions")
+        parser.add_argument('--lease-timeout', type=int, default=DISTRIBUTION_LEASE_TIMEOUT,
+                            help="Seconds before distributions of a stopped scheduler are released")
+        parser.add_argument('--once', action='store_true', help="Deliver the distributions due now and exit")
+
+    def handle(self, *args, **options):
+        scheduler_options = {
+            'batch_size': options['batch_size'],
+            'poll_interval': options['poll_interval'],
+            'lease_timeout': options['lease_timeout'],
+        }
+        if options['once']:
+            result = DistributionScheduler(**scheduler_options).process_due()
+            self.stdout.write(f"Delivered {result['success_count']}/{result['processed_count']} distributions")
+            self.stdout.write(json.dumps(result['metrics'], indent=2))
+            return
+        self.stdout.write(f"Starting {options['processes']} distribution schedulers")
+        run_distribution_schedulers(options['processes'], **scheduler_options)
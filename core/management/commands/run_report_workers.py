@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.report_jobs import DEFAULT_LEASE_TIMEOUT, ReportJobWorker, run_report_workers
+
+
+class Command(BaseCommand):
+    help = "Run report job workers polling the ReportJob queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Number of worker processes")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle")
+        parser.add_argument('--lease-timeout', type=int, default=DEFAULT_LEASE_TIMEOUT,
+                            help="Seconds before a silent running job is requeued")
+        parser.add_argument('--once', action='store_true', help="Run the queued jobs in this process and exit")
+
+    def handle(self, *args, **options):
+        worker_options = {'poll_interval': options['poll_interval'], 'lease_timeout': options['lease_timeout']}
+        if options['once']:
+            count = ReportJobWorker(**worker_options).run(exit_when_idle=True)
+            self.stdout.write(f"Ran {count} report jobs")
+            return
+        self.stdout.write(f"Starting {options['processes']} report workers")
+        run_report_workers(options['processes'], **worker_options)
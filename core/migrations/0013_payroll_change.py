@@ -0,0 +1,76 @@
+# Generated by Django 5.2.5 on 2025-08-20 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_accounting_integration"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollChange",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("period", models.DateField(blank=True, null=True)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("line_item", "Rubrique"),
+                            ("worked_days", "Jours travaillés"),
+                            ("installment", "Tranche retenue"),
+                            ("employee", "Salarié"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("changed_fields", models.CharField(blank=True, max_length=500)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payroll_changes",
+                        to="core.employee",
+                    ),
+                ),
+                (
+                    "motif",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payroll_changes",
+                        to="core.payrollmotif",
+                    ),
+                ),
+                (
+                    "payroll_element",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payroll_changes",
+                        to="core.payrollelement",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Payroll Change",
+                "verbose_name_plural": "Payroll Changes",
+                "db_table": "changementpaie",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["processed_at", "period"],
+                        name="changementpaie_proc_per_idx",
+                    )
+                ],
+            },
+        ),
+    ]
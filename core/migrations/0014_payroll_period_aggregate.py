@@ -0,0 +1,305 @@
+# Generated by Django 5.2.5 on 2025-08-21 09:40
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce
+
+AGGREGATE_FIELDS = (
+    "gross_taxable",
+    "gross_non_taxable",
+    "net_salary",
+    "cnss_employee",
+    "cnam_employee",
+    "its_total",
+    "rcnss",
+    "rcnam",
+    "rits",
+    "gross_deductions",
+    "net_deductions",
+    "worked_days",
+    "overtime_hours",
+)
+
+
+def populate_period_aggregates(apps, schema_editor):
+    Payroll = apps.get_model("core", "Payroll")
+    PayrollPeriodAggregate = apps.get_model("core", "PayrollPeriodAggregate")
+
+    aggregates = {"payroll_count": Count("id")}
+    for field in AGGREGATE_FIELDS:
+        amount = Coalesce(field, Value(Decimal("0")))
+        aggregates[f"total_{field}"] = Sum(amount)
+        aggregates[f"min_{field}"] = Min(amount)
+        aggregates[f"max_{field}"] = Max(amount)
+
+    groups = (
+        Payroll.objects.order_by()
+        .values(
+            "period",
+            "motif_id",
+            "employee__department_id",
+            "employee__direction_id",
+            "employee__is_expatriate",
+        )
+        .annotate(**aggregates)
+    )
+    rows = []
+    for group in groups:
+        rows.append(
+            PayrollPeriodAggregate(
+                period=group["period"],
+                motif_id=group["motif_id"],
+                department_id=group["employee__department_id"],
+                direction_id=group["employee__direction_id"],
+                is_expatriate=group["employee__is_expatriate"],
+                **{name: group[name] or 0 for name in aggregates},
+            )
+        )
+    PayrollPeriodAggregate.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_payroll_change"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayrollPeriodAggregate",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("period", models.DateField()),
+                ("is_expatriate", models.BooleanField(default=False)),
+                ("payroll_count", models.IntegerField(default=0)),
+                (
+                    "total_gross_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_gross_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_gross_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_gross_non_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_gross_non_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_gross_non_taxable",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_net_salary",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_net_salary",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_net_salary",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_cnss_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_cnss_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_cnss_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_cnam_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_cnam_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_cnam_employee",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_its_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_its_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_its_total",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_rcnss",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_rcnss",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_rcnss",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_rcnam",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_rcnam",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_rcnam",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_rits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_rits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_rits",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_gross_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_gross_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_gross_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_net_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_net_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_net_deductions",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_worked_days",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_worked_days",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_worked_days",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "total_overtime_hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "min_overtime_hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                (
+                    "max_overtime_hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=22),
+                ),
+                ("refreshed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="period_aggregates",
+                        to="core.department",
+                    ),
+                ),
+                (
+                    "direction",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="period_aggregates",
+                        to="core.direction",
+                    ),
+                ),
+                (
+                    "motif",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="period_aggregates",
+                        to="core.payrollmotif",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Payroll Period Aggregate",
+                "verbose_name_plural": "Payroll Period Aggregates",
+                "db_table": "cumulpaiemois",
+                "ordering": ["period", "motif"],
+                "indexes": [
+                    models.Index(
+                        fields=["period", "department", "direction"],
+                        name="cumulpaiemois_per_dep_dir_idx",
+                    ),
+                    models.Index(
+                        fields=["motif", "period"],
+                        name="cumulpaiemois_motif_per_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "motif", "department", "direction", "is_expatriate"),
+                        name="cumulpaiemois_dimensions_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("department__isnull", True)),
+                        fields=("period", "motif", "direction", "is_expatriate"),
+                        name="cumulpaiemois_no_dep_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("direction__isnull", True)),
+                        fields=("period", "motif", "department", "is_expatriate"),
+                        name="cumulpaiemois_no_dir_uniq",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(
+                            ("department__isnull", True), ("direction__isnull", True)
+                        ),
+                        fields=("period", "motif", "is_expatriate"),
+                        name="cumulpaiemois_no_dep_dir_uniq",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(populate_period_aggregates, migrations.RunPython.noop),
+    ]
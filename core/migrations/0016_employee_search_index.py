@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2025-08-21 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.utils.employee_search import (
+    SEARCH_FIELDS, install_search_backend, search_document, uninstall_search_backend
+)
+
+
+def populate_search_index(apps, schema_editor):
+    Employee = apps.get_model("core", "Employee")
+    EmployeeSearchIndex = apps.get_model("core", "EmployeeSearchIndex")
+
+    db_alias = schema_editor.connection.alias
+    EmployeeSearchIndex.objects.using(db_alias).bulk_create(
+        (
+            EmployeeSearchIndex(employee_id=values["id"], content=search_document(values))
+            for values in Employee.objects.using(db_alias).values("id", *SEARCH_FIELDS).iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+def create_search_backend(apps, schema_editor):
+    install_search_backend(schema_editor.connection)
+
+
+def drop_search_backend(apps, schema_editor):
+    uninstall_search_backend(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0015_report_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmployeeSearchIndex",
+            fields=[
+                (
+                    "employee",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="core.employee",
+                    ),
+                ),
+                ("content", models.TextField(blank=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Employee Search Entry",
+                "verbose_name_plural": "Employee Search Index",
+                "db_table": "rechercheemploye",
+            },
+        ),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+        migrations.RunPython(create_search_backend, drop_search_backend),
+    ]
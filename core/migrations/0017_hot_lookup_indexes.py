@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2025-08-21 11:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_line_item_period(apps, schema_editor):
+    Payroll = apps.get_model("core", "Payroll")
+    PayrollLineItem = apps.get_model("core", "PayrollLineItem")
+
+    db_alias = schema_editor.connection.alias
+    PayrollLineItem.objects.using(db_alias).filter(period__isnull=True).update(
+        period=Subquery(
+            Payroll.objects.using(db_alias).filter(pk=OuterRef("payroll_id")).values("period")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0016_employee_search_index"),
+    ]
+
+    operations = [
+        # rubriquepaie is looked up by (employe, periode, motif): the column
+        # is filled from the line's payroll before it is indexed.
+        migrations.AddField(
+            model_name="payrolllineitem",
+            name="period",
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(populate_line_item_period, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="payrolllineitem",
+            name="period",
+            field=models.DateField(),
+        ),
+        migrations.AddIndex(
+            model_name="payrolllineitem",
+            index=models.Index(fields=["employee", "period", "motif"], name="rubriquepaie_emp_per_mot_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payroll",
+            index=models.Index(fields=["period", "motif"], name="paie_period_motif_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="timeclockdata",
+            index=models.Index(
+                fields=["employee", "timestamp", "is_imported"], name="donneespointeuse_emp_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="document",
+            index=models.Index(fields=["expiry_date", "employee"], name="document_expiry_emp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="employee",
+            index=models.Index(fields=["national_id"], name="employe_nni_idx"),
+        ),
+    ]
@@ -0,0 +1,235 @@
+# Generated by Django 5.2.5 on 2025-08-21 12:05
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+PAYSLIP_TEMPLATE_CHOICES = [
+    ("standard", "standard"),
+    ("executive", "executive"),
+    ("contractor", "contractor"),
+    ("intern", "intern"),
+    ("government", "government"),
+    ("custom", "custom"),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0017_hot_lookup_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PayslipTemplate",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("description", models.TextField(blank=True)),
+                (
+                    "template_type",
+                    models.CharField(choices=PAYSLIP_TEMPLATE_CHOICES, max_length=20),
+                ),
+                ("html_template", models.TextField()),
+                ("css_styles", models.TextField(blank=True)),
+                ("header_template", models.TextField(blank=True)),
+                ("footer_template", models.TextField(blank=True)),
+                ("supports_arabic", models.BooleanField(default=True)),
+                ("supports_french", models.BooleanField(default=True)),
+                ("default_language", models.CharField(default="fr", max_length=5)),
+                ("page_size", models.CharField(default="A4", max_length=20)),
+                ("orientation", models.CharField(default="portrait", max_length=20)),
+                (
+                    "margins",
+                    models.TextField(
+                        default='{"top": 20, "bottom": 20, "left": 20, "right": 20}'
+                    ),
+                ),
+                ("company_logo_path", models.CharField(blank=True, max_length=500)),
+                (
+                    "company_colors",
+                    models.TextField(
+                        default='{"primary": "#0066cc", "secondary": "#f5f5f5"}'
+                    ),
+                ),
+                ("font_family", models.CharField(default="Arial", max_length=100)),
+                ("default_password_protect", models.BooleanField(default=False)),
+                ("watermark_text", models.CharField(blank=True, max_length=100)),
+                ("is_active", models.BooleanField(default=True)),
+                ("is_default", models.BooleanField(default=False)),
+                ("version", models.CharField(default="1.0", max_length=20)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="core.user",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "payslip_template",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.CreateModel(
+            name="PayslipDistributionRecord",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[
+                            ("email", "email"),
+                            ("print", "print"),
+                            ("portal", "portal"),
+                            ("sms", "sms"),
+                            ("pickup", "pickup"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("queued", "queued"),
+                            ("sending", "sending"),
+                            ("sent", "sent"),
+                            ("delivered", "delivered"),
+                            ("failed", "failed"),
+                            ("bounced", "bounced"),
+                            ("retry", "retry"),
+                            ("cancelled", "cancelled"),
+                            ("archived", "archived"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "template",
+                    models.CharField(
+                        choices=PAYSLIP_TEMPLATE_CHOICES,
+                        default="standard",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "format",
+                    models.CharField(
+                        choices=[
+                            ("pdf", "pdf"),
+                            ("html", "html"),
+                            ("excel", "excel"),
+                            ("text", "text"),
+                        ],
+                        default="pdf",
+                        max_length=10,
+                    ),
+                ),
+                ("file_path", models.CharField(blank=True, max_length=500)),
+                ("file_size", models.PositiveIntegerField(default=0)),
+                ("file_hash", models.CharField(blank=True, max_length=64)),
+                ("scheduled_time", models.DateTimeField(blank=True, null=True)),
+                ("sent_time", models.DateTimeField(blank=True, null=True)),
+                ("delivered_time", models.DateTimeField(blank=True, null=True)),
+                ("opened_time", models.DateTimeField(blank=True, null=True)),
+                ("downloaded_time", models.DateTimeField(blank=True, null=True)),
+                ("recipient_email", models.EmailField(blank=True, max_length=254)),
+                ("recipient_phone", models.CharField(blank=True, max_length=20)),
+                ("delivery_message_id", models.CharField(blank=True, max_length=255)),
+                ("delivery_response", models.TextField(blank=True)),
+                ("retry_count", models.PositiveIntegerField(default=0)),
+                ("last_retry_time", models.DateTimeField(blank=True, null=True)),
+                ("next_retry_time", models.DateTimeField(blank=True, null=True)),
+                ("priority", models.PositiveSmallIntegerField(default=2)),
+                ("due_time", models.DateTimeField(blank=True, null=True)),
+                ("lease_owner", models.CharField(blank=True, max_length=100)),
+                ("lease_expires_at", models.DateTimeField(blank=True, null=True)),
+                ("error_message", models.TextField(blank=True)),
+                ("error_code", models.CharField(blank=True, max_length=50)),
+                ("access_token", models.CharField(blank=True, max_length=255)),
+                ("access_count", models.PositiveIntegerField(default=0)),
+                ("last_access_time", models.DateTimeField(blank=True, null=True)),
+                ("access_ip_addresses", models.TextField(blank=True)),
+                ("generation_options", models.TextField(blank=True)),
+                ("distribution_options", models.TextField(blank=True)),
+                ("metadata", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="created_distributions",
+                        to="core.user",
+                    ),
+                ),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="payslip_distributions",
+                        to="core.employee",
+                    ),
+                ),
+                (
+                    "payroll",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="distributions",
+                        to="core.payroll",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "payslip_distribution",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["employee", "payroll"],
+                        name="payslip_dis_employe_e7152f_idx",
+                    ),
+                    models.Index(
+                        fields=["status", "channel"],
+                        name="payslip_dis_status_dc3343_idx",
+                    ),
+                    models.Index(
+                        fields=["scheduled_time"],
+                        name="payslip_dis_schedul_b51bbc_idx",
+                    ),
+                    models.Index(
+                        fields=["created_at"],
+                        name="payslip_dis_created_e9d727_idx",
+                    ),
+                    # Due records are claimed by status, then due time
+                    models.Index(
+                        fields=["status", "due_time"],
+                        name="payslip_dis_status_c4a5cf_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -26,7 +26,7 @@ from .time_attendance import TimeClockData, DailyWork, WeeklyOvertime, WorkWeek
 from .system_config import SystemParameters, User
 
 # Group 9: Payroll Processing
-from .payroll_processing import Payroll, PayrollLineItem, WorkedDays
+from .payroll_processing import Payroll, PayrollLineItem, WorkedDays, PayrollChange, PayrollPeriodAggregate
 
 # Group 10: Deductions & Benefits
 from .deductions_benefits import InstallmentDeduction, InstallmentTranche
@@ -35,4 +35,10 @@ from .deductions_benefits import InstallmentDeduction, InstallmentTranche
 from .compliance_reporting import CNSSDeclaration, CNAMDeclaration
 
 # Group 12: Accounting Integration
-from .accounting_integration import ExportFormat, MasterPiece, DetailPiece, AccountGenerator
\ No newline at end of file
+from .accounting_integration import ExportFormat, MasterPiece, DetailPiece, AccountGenerator
+# Group 13: Report Jobs
+from .report_jobs import ReportJob
+# Group 14: Employee Search
+from .employee_search import EmployeeSearchIndex
+# Group 15: Payslip Distribution
+from .payslip_distribution import PayslipTemplate, PayslipDistributionRecord
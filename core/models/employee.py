@@ -193,6 +193,9 @@ class Employee(models.Model):
     class Meta:
         db_table = 'employe'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['national_id'], name='employe_nni_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -208,4 +211,16 @@ class Employee(models.Model):
         return self.is_expatriate or bool(
             self.passport_number or self.visa_start_date or 
             self.work_permit_number or self.residence_card_number
-        )
\ No newline at end of file
+        )
+    
+    def is_subject_to_cnss(self):
+        """Check if employee contributes to CNSS (not detached)"""
+        return not self.cnss_detached
+    
+    def is_subject_to_cnam(self):
+        """Check if employee contributes to CNAM (not detached)"""
+        return not self.cnam_detached
+    
+    def is_subject_to_its(self):
+        """Check if employee is subject to ITS (not exempt)"""
+        return not self.its_exempt
\ No newline at end of file
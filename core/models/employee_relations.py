@@ -151,6 +151,9 @@ class Document(models.Model):
     class Meta:
         db_table = 'Document'  # Keeping original capitalization
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expiry_date', 'employee'], name='document_expiry_emp_idx'),
+        ]
     
     def __str__(self):
         return f"{self.document_name} ({self.employee.full_name})"
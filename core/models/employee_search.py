@@ -0,0 +1,31 @@
+from django.db import models
+from .employee import Employee
+
+
+class EmployeeSearchIndex(models.Model):
+    """
+    Search document of an employee
+
+    One row per employee holding the normalized tokens of the searchable
+    columns (names in Latin and Arabic script, NNI, CNSS/CNAM numbers, phone,
+    email), maintained by core.utils.employee_search when an employee is
+    saved. On SQLite the rows are mirrored into an FTS5 table by triggers;
+    other backends match the tokens of `content` directly.
+    """
+
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_entry'
+    )
+    content = models.TextField(blank=True)  # ' token1 token2 ... '
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rechercheemploye'
+        verbose_name = 'Employee Search Entry'
+        verbose_name_plural = 'Employee Search Index'
+
+    def __str__(self):
+        return f"{self.employee_id}: {self.content.strip()[:80]}"
@@ -171,6 +171,21 @@ class PayrollElementFormula(models.Model):
             raise ValidationError("Only one of text_value or numeric_value should be populated")
         if not self.text_value and self.numeric_value is None:
             raise ValidationError("Either text_value or numeric_value must be populated")
+        if self.component_type == 'R' and self.payroll_element_id:
+            self._validate_no_circular_reference()
+    
+    def _validate_no_circular_reference(self):
+        """Reject rubrique references creating a dependency cycle"""
+        from core.utils.formula_engine import find_formula_cycle
+        
+        try:
+            reference = int(self.text_value)
+        except (TypeError, ValueError):
+            return
+        cycle = find_formula_cycle(self.payroll_element_id, {reference})
+        if cycle:
+            path = ' -> '.join(f"R{element_id}" for element_id in cycle)
+            raise ValidationError(f"Circular rubrique reference: {path}")
     
     @property
     def value(self):
@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Q
 from .employee import Employee
+from .organizational import Department, Direction
 from .reference import PayrollMotif
 from .payroll_elements import PayrollElement
 from .system_config import SystemParameters, User
@@ -117,6 +119,9 @@ class Payroll(models.Model):
         ordering = ['-period', 'employee__last_name', 'employee__first_name']
         verbose_name = 'Payroll'
         verbose_name_plural = 'Payrolls'
+        indexes = [
+            models.Index(fields=['period', 'motif'], name='paie_period_motif_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.full_name} - {self.period.strftime('%Y-%m')} ({self.motif.name})"
@@ -267,6 +272,9 @@ class PayrollLineItem(models.Model):
         ordering = ['period', 'employee__last_name', 'payroll_element__label']
         verbose_name = 'Payroll Line Item'
         verbose_name_plural = 'Payroll Line Items'
+        indexes = [
+            models.Index(fields=['employee', 'period', 'motif'], name='rubriquepaie_emp_per_mot_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.full_name} - {self.payroll_element.label} ({self.period.strftime('%Y-%m')}): {self.calculated_amount}"
@@ -281,6 +289,11 @@ class PayrollLineItem(models.Model):
         """Check if this line item is a deduction"""
         return self.payroll_element.type == 'D'
     
+    @property
+    def amount(self):
+        """Calculated amount, as read by PayrollCalculator.calculate_payroll"""
+        return self.calculated_amount
+    
     @property
     def payroll(self):
         """
@@ -390,4 +403,198 @@ class WorkedDays(models.Model):
         """
         if self.worked_days:
             return float(self.worked_days) / 22.0
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+
+class PayrollChange(models.Model):
+    """
+    Change tracking entry for incremental payroll recalculation
+    
+    Recorded by signal handlers when a line item, worked days record,
+    installment tranche or payroll-relevant employee field changes, and
+    consumed by IncrementalPayrollRecalculator.
+    """
+    
+    SOURCE_LINE_ITEM = 'line_item'
+    SOURCE_WORKED_DAYS = 'worked_days'
+    SOURCE_INSTALLMENT = 'installment'
+    SOURCE_EMPLOYEE = 'employee'
+    SOURCE_CHOICES = [
+        (SOURCE_LINE_ITEM, 'Rubrique'),
+        (SOURCE_WORKED_DAYS, 'Jours travaillés'),
+        (SOURCE_INSTALLMENT, 'Tranche retenue'),
+        (SOURCE_EMPLOYEE, 'Salarié'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='payroll_changes'
+    )
+    motif = models.ForeignKey(
+        PayrollMotif,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='payroll_changes'
+    )
+    # Null for employee changes: applies to the employee's payroll being recalculated
+    period = models.DateField(blank=True, null=True)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    payroll_element = models.ForeignKey(
+        PayrollElement,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='payroll_changes'
+    )
+    changed_fields = models.CharField(max_length=500, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'changementpaie'
+        ordering = ['id']
+        verbose_name = 'Payroll Change'
+        verbose_name_plural = 'Payroll Changes'
+        indexes = [
+            models.Index(fields=['processed_at', 'period'], name='changementpaie_proc_per_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.employee_id} - {self.source} ({self.period}): {self.changed_fields}"
+    
+    @property
+    def changed_field_names(self):
+        """Changed field names as a list"""
+        return [name for name in self.changed_fields.split(',') if name]
+
+
+class PayrollPeriodAggregate(models.Model):
+    """
+    Monthly payroll rollup for reporting
+    
+    One row per period, motif, department, direction and expatriate flag
+    with the count, sums, minimums and maximums of the Payroll amounts.
+    Maintained by core.utils.period_aggregates when Payroll rows are saved
+    or deleted and when a period is closed.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    period = models.DateField()
+    motif = models.ForeignKey(
+        PayrollMotif,
+        on_delete=models.CASCADE,
+        related_name='period_aggregates'
+    )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='period_aggregates'
+    )
+    direction = models.ForeignKey(
+        Direction,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='period_aggregates'
+    )
+    is_expatriate = models.BooleanField(default=False)
+    
+    payroll_count = models.IntegerField(default=0)
+    
+    total_gross_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_gross_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_gross_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_gross_non_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_gross_non_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_gross_non_taxable = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_net_salary = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_net_salary = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_net_salary = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_cnss_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_cnss_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_cnss_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_cnam_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_cnam_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_cnam_employee = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_its_total = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_its_total = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_its_total = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_rcnss = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_rcnss = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_rcnss = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_rcnam = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_rcnam = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_rcnam = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_rits = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_rits = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_rits = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_gross_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_gross_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_gross_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_net_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_net_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_net_deductions = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_worked_days = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_worked_days = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_worked_days = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    total_overtime_hours = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    min_overtime_hours = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    max_overtime_hours = models.DecimalField(max_digits=22, decimal_places=2, default=0)
+    
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'cumulpaiemois'
+        ordering = ['period', 'motif']
+        verbose_name = 'Payroll Period Aggregate'
+        verbose_name_plural = 'Payroll Period Aggregates'
+        indexes = [
+            models.Index(fields=['period', 'department', 'direction'], name='cumulpaiemois_per_dep_dir_idx'),
+            models.Index(fields=['motif', 'period'], name='cumulpaiemois_motif_per_idx'),
+        ]
+        # One row per dimension set; NULL department or direction needs its own
+        # partial constraint since NULLs never compare equal
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'motif', 'department', 'direction', 'is_expatriate'],
+                name='cumulpaiemois_dimensions_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'motif', 'direction', 'is_expatriate'],
+                condition=Q(department__isnull=True),
+                name='cumulpaiemois_no_dep_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'motif', 'department', 'is_expatriate'],
+                condition=Q(direction__isnull=True),
+                name='cumulpaiemois_no_dir_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['period', 'motif', 'is_expatriate'],
+                condition=Q(department__isnull=True, direction__isnull=True),
+                name='cumulpaiemois_no_dep_dir_uniq'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.period.strftime('%Y-%m')} - {self.motif_id} ({self.payroll_count})"
@@ -0,0 +1,222 @@
+import json
+import uuid
+from enum import Enum
+from typing import Dict
+
+from django.db import models
+from django.utils import timezone
+
+from .employee import Employee
+from .payroll_processing import Payroll
+from .system_config import User
+
+# Distribution priorities, most urgent first (DistributionOptions.priority)
+DISTRIBUTION_PRIORITIES = {'urgent': 0, 'high': 1, 'normal': 2, 'low': 3}
+
+
+class DistributionStatus(Enum):
+    """Enumeration for payslip distribution status"""
+    PENDING = "pending"
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    DELIVERED = "delivered"
+    FAILED = "failed"
+    BOUNCED = "bounced"
+    RETRY = "retry"
+    CANCELLED = "cancelled"
+    ARCHIVED = "archived"
+
+
+class DistributionChannel(Enum):
+    """Enumeration for distribution channels"""
+    EMAIL = "email"
+    PRINT = "print"
+    PORTAL = "portal"
+    SMS = "sms"
+    PICKUP = "pickup"
+
+
+class PayslipTemplateType(Enum):
+    """Enumeration for payslip templates"""
+    STANDARD = "standard"
+    EXECUTIVE = "executive"
+    CONTRACTOR = "contractor"
+    INTERN = "intern"
+    GOVERNMENT = "government"
+    CUSTOM = "custom"
+
+
+class PayslipFormat(Enum):
+    """Enumeration for payslip formats"""
+    PDF = "pdf"
+    HTML = "html"
+    EXCEL = "excel"
+    TEXT = "text"
+
+
+class PayslipDistributionRecord(models.Model):
+    """Model to track payslip distribution status and history"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payslip_distributions')
+    payroll = models.ForeignKey(Payroll, on_delete=models.CASCADE, related_name='distributions')
+    
+    # Distribution details
+    channel = models.CharField(max_length=20, choices=[(c.value, c.value) for c in DistributionChannel])
+    status = models.CharField(max_length=20, choices=[(s.value, s.value) for s in DistributionStatus], default=DistributionStatus.PENDING.value)
+    template = models.CharField(max_length=20, choices=[(t.value, t.value) for t in PayslipTemplateType], default=PayslipTemplateType.STANDARD.value)
+    format = models.CharField(max_length=10, choices=[(f.value, f.value) for f in PayslipFormat], default=PayslipFormat.PDF.value)
+    
+    # File information
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveIntegerField(default=0)
+    file_hash = models.CharField(max_length=64, blank=True)
+    
+    # Distribution tracking
+    scheduled_time = models.DateTimeField(null=True, blank=True)
+    sent_time = models.DateTimeField(null=True, blank=True)
+    delivered_time = models.DateTimeField(null=True, blank=True)
+    opened_time = models.DateTimeField(null=True, blank=True)
+    downloaded_time = models.DateTimeField(null=True, blank=True)
+    
+    # Delivery details
+    recipient_email = models.EmailField(blank=True)
+    recipient_phone = models.CharField(max_length=20, blank=True)
+    delivery_message_id = models.CharField(max_length=255, blank=True)
+    delivery_response = models.TextField(blank=True)
+    
+    # Retry tracking
+    retry_count = models.PositiveIntegerField(default=0)
+    last_retry_time = models.DateTimeField(null=True, blank=True)
+    next_retry_time = models.DateTimeField(null=True, blank=True)
+    
+    # Delivery queue: when the record is next due, and the scheduler holding it
+    priority = models.PositiveSmallIntegerField(default=DISTRIBUTION_PRIORITIES['normal'])
+    due_time = models.DateTimeField(null=True, blank=True)
+    lease_owner = models.CharField(max_length=100, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    
+    # Error tracking
+    error_message = models.TextField(blank=True)
+    error_code = models.CharField(max_length=50, blank=True)
+    
+    # Security and audit
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_distributions')
+    access_token = models.CharField(max_length=255, blank=True)
+    access_count = models.PositiveIntegerField(default=0)
+    last_access_time = models.DateTimeField(null=True, blank=True)
+    access_ip_addresses = models.TextField(blank=True)  # JSON array
+    
+    # Metadata
+    generation_options = models.TextField(blank=True)  # JSON
+    distribution_options = models.TextField(blank=True)  # JSON
+    metadata = models.TextField(blank=True)  # JSON
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'payslip_distribution'
+        indexes = [
+            models.Index(fields=['employee', 'payroll']),
+            models.Index(fields=['status', 'channel']),
+            models.Index(fields=['scheduled_time']),
+            models.Index(fields=['created_at']),
+            models.Index(fields=['status', 'due_time']),
+        ]
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.employee.full_name} - {self.payroll.period.strftime('%Y-%m')} - {self.channel} ({self.status})"
+    
+    @property
+    def is_delivered(self) -> bool:
+        """Check if distribution was successfully delivered"""
+        return self.status in [DistributionStatus.DELIVERED.value, DistributionStatus.SENT.value]
+    
+    @property
+    def can_retry(self) -> bool:
+        """Check if distribution can be retried"""
+        return (self.status in [DistributionStatus.FAILED.value, DistributionStatus.BOUNCED.value] and 
+                self.retry_count < 10)
+    
+    def mark_opened(self, ip_address: str = ""):
+        """Mark payslip as opened by employee"""
+        self.opened_time = timezone.now()
+        self.access_count += 1
+        self.last_access_time = timezone.now()
+        
+        # Track IP addresses
+        ip_list = json.loads(self.access_ip_addresses) if self.access_ip_addresses else []
+        if ip_address and ip_address not in ip_list:
+            ip_list.append(ip_address)
+            self.access_ip_addresses = json.dumps(ip_list)
+        
+        self.save(update_fields=['opened_time', 'access_count', 'last_access_time', 'access_ip_addresses'])
+
+
+class PayslipTemplate(models.Model):
+    """Model for managing payslip templates"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=100, unique=True)
+    description = models.TextField(blank=True)
+    template_type = models.CharField(max_length=20, choices=[(t.value, t.value) for t in PayslipTemplateType])
+    
+    # Template content
+    html_template = models.TextField()
+    css_styles = models.TextField(blank=True)
+    header_template = models.TextField(blank=True)
+    footer_template = models.TextField(blank=True)
+    
+    # Configuration
+    supports_arabic = models.BooleanField(default=True)
+    supports_french = models.BooleanField(default=True)
+    default_language = models.CharField(max_length=5, default='fr')
+    
+    # Layout settings
+    page_size = models.CharField(max_length=20, default='A4')
+    orientation = models.CharField(max_length=20, default='portrait')
+    margins = models.TextField(default='{"top": 20, "bottom": 20, "left": 20, "right": 20}')  # JSON
+    
+    # Branding
+    company_logo_path = models.CharField(max_length=500, blank=True)
+    company_colors = models.TextField(default='{"primary": "#0066cc", "secondary": "#f5f5f5"}')  # JSON
+    font_family = models.CharField(max_length=100, default='Arial')
+    
+    # Security
+    default_password_protect = models.BooleanField(default=False)
+    watermark_text = models.CharField(max_length=100, blank=True)
+    
+    # Metadata
+    is_active = models.BooleanField(default=True)
+    is_default = models.BooleanField(default=False)
+    version = models.CharField(max_length=20, default='1.0')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'payslip_template'
+        ordering = ['name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.template_type})"
+    
+    def get_margins(self) -> Dict[str, int]:
+        """Get margins as dictionary"""
+        try:
+            return json.loads(self.margins)
+        except (json.JSONDecodeError, TypeError):
+            return {"top": 20, "bottom": 20, "left": 20, "right": 20}
+    
+    def get_company_colors(self) -> Dict[str, str]:
+        """Get company colors as dictionary"""
+        try:
+            return json.loads(self.company_colors)
+        except (json.JSONDecodeError, TypeError):
+            return {"primary": "#0066cc", "secondary": "#f5f5f5"}
@@ -0,0 +1,92 @@
+from django.db import models
+from django.db.models import Q
+from .system_config import User
+
+
+class ReportJob(models.Model):
+    """
+    Queued report generation job
+
+    Created by core.utils.report_jobs.submit_report_job and run by report
+    worker processes polling this table, so heavy reports do not run inside
+    web requests. A job is claimed with a conditional UPDATE on its status,
+    reports its progress while it runs and stores its result as a file
+    artifact. Identical in-flight requests share one job: dedup_key is
+    unique among pending and running jobs.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'En attente'),
+        (STATUS_RUNNING, 'En cours'),
+        (STATUS_SUCCEEDED, 'Terminé'),
+        (STATUS_FAILED, 'Échec'),
+        (STATUS_CANCELLED, 'Annulé'),
+    ]
+    ACTIVE_STATUSES = (STATUS_PENDING, STATUS_RUNNING)
+
+    id = models.BigAutoField(primary_key=True)
+
+    job_type = models.CharField(max_length=100)
+    params = models.JSONField(default=dict, blank=True)
+    dedup_key = models.CharField(max_length=64)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField(default=0)  # percent
+    progress_message = models.CharField(max_length=255, blank=True)
+    cancel_requested = models.BooleanField(default=False)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    available_at = models.DateTimeField()  # not claimed before (retry backoff)
+    error = models.TextField(blank=True)
+
+    artifact_path = models.CharField(max_length=500, blank=True)
+    artifact_size = models.BigIntegerField(default=0)
+
+    worker_id = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='report_jobs',
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'tacherapport'
+        ordering = ['id']
+        verbose_name = 'Report Job'
+        verbose_name_plural = 'Report Jobs'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='tacherapport_stat_avail_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=Q(status__in=['pending', 'running']),
+                name='tacherapport_active_dedup_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} #{self.id} ({self.status}, {self.progress}%)"
+
+    @property
+    def is_active(self):
+        """Job is still waiting or running"""
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def is_finished(self):
+        """Job reached a final status"""
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED, self.STATUS_CANCELLED)
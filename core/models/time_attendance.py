@@ -41,6 +41,9 @@ class TimeClockData(models.Model):
     class Meta:
         db_table = 'donneespointeuse'
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['employee', 'timestamp', 'is_imported'], name='donneespointeuse_emp_ts_idx'),
+        ]
         
     def __str__(self):
         return f"{self.employee.full_name} - {self.timestamp.strftime('%Y-%m-%d %H:%M')} ({self.get_punch_type_display()})"
@@ -15,6 +15,7 @@ This package provides:
 10. Regulatory compliance tracking and reporting
 11. Multi-format accounting exports (Sage, Ciel, UNL, Generic)
 12. Employee lifecycle and document compliance reporting
+13. Streaming CSV, JSON Lines and XML exports of large reports
 
 Usage:
     from core.reports import PayrollSummaryManager, CumulativeReportManager, FilterCriteria
@@ -116,6 +117,14 @@ from .employee_reports import (
     get_hr_dashboard_summary_for_admin,
 )
 
+from .streaming_exports import (
+    PayrollStateExport,
+    STREAMING_FORMATS,
+    iter_export,
+    write_export,
+    streaming_response,
+)
+
 __all__ = [
     # Basic payroll reporting
     'PayrollSummaryAnalytics',
@@ -177,4 +186,11 @@ __all__ = [
     'get_contract_expiry_report_for_admin',
     'get_document_compliance_report_for_admin',
     'get_hr_dashboard_summary_for_admin',
+    
+    # Streaming exports for large reports
+    'PayrollStateExport',
+    'STREAMING_FORMATS',
+    'iter_export',
+    'write_export',
+    'streaming_response',
 ]
\ No newline at end of file
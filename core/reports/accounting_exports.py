@@ -35,11 +35,9 @@ from django.utils import timezone
 from ..models.accounting_integration import MasterPiece, DetailPiece, ExportFormat, AccountGenerator
 from ..models.payroll_processing import Payroll
 from ..models.employee import Employee
-from ..models.organizational import Bank
+from ..models.reference import Bank
 from ..models.reference import PayrollMotif
 from ..models.payroll_elements import PayrollElement
-from ..utils.validators import validate_decimal_precision
-from ..utils.date_utils import format_date_for_export
 
 
 # Configure logging
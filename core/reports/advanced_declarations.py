@@ -21,7 +21,7 @@ from django.core.exceptions import ValidationError
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import Dict, List, Optional, Union, Tuple, Any
+from typing import Dict, List, Optional, Union, Tuple, Any, Callable
 import json
 import csv
 import xml.etree.ElementTree as ET
@@ -32,7 +32,7 @@ import warnings
 from ..models.compliance_reporting import CNSSDeclaration, CNAMDeclaration, ITSDeclaration
 from ..models.employee import Employee
 from ..models.payroll_processing import Payroll
-from ..utils.tax_calculations import CNSSCalculator, CNAMCalculator, ITSCalculator, TaxUtilities, TaxCalculationService
+from ..utils.tax_calculations import CNSSCalculator, CNAMCalculator, ITSCalculator, ITSBracketTable, TaxUtilities, TaxCalculationService
 from ..utils.business_rules import PayrollBusinessRules, BusinessRulesEngine
 from ..utils.date_utils import DateCalculator
 from ..utils.report_utils import ReportGenerator
@@ -67,7 +67,8 @@ class AdvancedDeclarationEngine:
                                                  declaration_period: date,
                                                  declaration_types: List[str] = None,
                                                  employee_filter: Dict[str, Any] = None,
-                                                 export_formats: List[str] = None) -> Dict[str, Any]:
+                                                 export_formats: List[str] = None,
+                                                 progress_callback: Callable[[int, int, str], None] = None) -> Dict[str, Any]:
         """
         Generate comprehensive declaration package for all or specified tax types
         
@@ -76,6 +77,7 @@ class AdvancedDeclarationEngine:
             declaration_types: List of declaration types ['cnss', 'cnam', 'its', 'ta']
             employee_filter: Filters for employee selection
             export_formats: Export formats ['pdf', 'xml', 'csv', 'excel']
+            progress_callback: Called with (done, total, message) before each declaration type
             
         Returns:
             Complete declaration package with all formats and validations
@@ -102,7 +104,9 @@ class AdvancedDeclarationEngine:
         }
         
         # Process each declaration type
-        for decl_type in declaration_types:
+        for index, decl_type in enumerate(declaration_types):
+            if progress_callback:
+                progress_callback(index, len(declaration_types), f"Déclaration {decl_type.upper()}")
             try:
                 if decl_type == 'cnss':
                     result = self.cnss_processor.generate_enhanced_cnss_declarations(
@@ -157,6 +161,8 @@ class AdvancedDeclarationEngine:
         package['compliance_summary'] = self.compliance_validator.generate_compliance_summary(
             package['declarations'], package['validations']
         )
+        if progress_callback:
+            progress_callback(len(declaration_types), len(declaration_types), "Synthèse de conformité")
         
         return package
     
@@ -978,6 +984,11 @@ class ComprehensiveITSProcessor:
             tax_mode=its_mode
         )
         
+        # Tranche bases and rates from the same bracket table as the ITS amounts
+        its_table = ITSBracketTable.for_year(period.year, employee.is_expatriate, its_mode)
+        tranche_bases = self._get_tranche_bases(its_table, its_result.get('taxable_income', Decimal('0')))
+        tranche_rates = self._get_tranche_rates(its_table)
+        
         return {
             'employee_id': employee.employee_id,
             'employee_name': f"{employee.first_name} {employee.last_name}",
@@ -989,14 +1000,14 @@ class ComprehensiveITSProcessor:
             'cnam_deduction': cnam_deduction if deduct_cnam else Decimal('0'),
             'abatement': abatement,
             'taxable_income': its_result.get('taxable_income', Decimal('0')),
-            'tranche1_base': self._calculate_tranche_base(its_result.get('taxable_income', Decimal('0')), 1),
-            'tranche1_rate': Decimal('7.5') if employee.is_expatriate else Decimal('15.0'),
+            'tranche1_base': tranche_bases[0],
+            'tranche1_rate': tranche_rates[0],
             'tranche1_tax': its_result.get('tranche1', Decimal('0')),
-            'tranche2_base': self._calculate_tranche_base(its_result.get('taxable_income', Decimal('0')), 2),
-            'tranche2_rate': self._get_tranche2_rate(employee.is_expatriate, its_mode),
+            'tranche2_base': tranche_bases[1],
+            'tranche2_rate': tranche_rates[1],
             'tranche2_tax': its_result.get('tranche2', Decimal('0')),
-            'tranche3_base': self._calculate_tranche_base(its_result.get('taxable_income', Decimal('0')), 3),
-            'tranche3_rate': self._get_tranche3_rate(employee.is_expatriate, its_mode),
+            'tranche3_base': tranche_bases[2],
+            'tranche3_rate': tranche_rates[2],
             'tranche3_tax': its_result.get('tranche3', Decimal('0')),
             'total_its_tax': its_result.get('total', Decimal('0')),
             'total_reimbursement': reimbursement,
@@ -1006,36 +1017,15 @@ class ComprehensiveITSProcessor:
             'status': 'processed'
         }
     
-    def _calculate_tranche_base(self, taxable_income: Decimal, tranche_number: int) -> Decimal:
-        """Calculate the taxable base for a specific tranche"""
-        if tranche_number == 1:
-            return min(taxable_income, Decimal('9000'))
-        elif tranche_number == 2:
-            if taxable_income <= Decimal('9000'):
-                return Decimal('0')
-            else:
-                return min(taxable_income - Decimal('9000'), Decimal('12000'))  # 21000 - 9000
-        elif tranche_number == 3:
-            if taxable_income <= Decimal('21000'):
-                return Decimal('0')
-            else:
-                return taxable_income - Decimal('21000')
-        else:
-            return Decimal('0')
-    
-    def _get_tranche2_rate(self, is_expatriate: bool, its_mode: str) -> Decimal:
-        """Get tranche 2 tax rate based on expatriate status and ITS mode"""
-        if its_mode == 'T':  # Territorial mode
-            return Decimal('10.0') if is_expatriate else Decimal('20.0')
-        else:  # General mode
-            return Decimal('12.5') if is_expatriate else Decimal('25.0')
+    def _get_tranche_bases(self, its_table: ITSBracketTable, taxable_income: Decimal) -> List[Decimal]:
+        """Get the taxable base of tranches 1 to 3"""
+        bases = its_table.tranche_bases(taxable_income)
+        return (bases + [Decimal('0')] * 3)[:3]
     
-    def _get_tranche3_rate(self, is_expatriate: bool, its_mode: str) -> Decimal:
-        """Get tranche 3 tax rate based on expatriate status and ITS mode"""
-        if its_mode == 'T':  # Territorial mode
-            return Decimal('10.0') if is_expatriate else Decimal('20.0')
-        else:  # General mode
-            return Decimal('20.0') if is_expatriate else Decimal('40.0')
+    def _get_tranche_rates(self, its_table: ITSBracketTable) -> List[Decimal]:
+        """Get the rates of tranches 1 to 3 as percentages"""
+        rates = [(rate * 100).quantize(Decimal('0.1')) for rate in its_table.rates]
+        return (rates + [Decimal('0')] * 3)[:3]
     
     def _generate_tranche_analysis(self, employee_declarations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate analysis of ITS by tranche"""
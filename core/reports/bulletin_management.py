@@ -20,7 +20,7 @@ Key Features:
 - Storage optimization and archiving
 
 Integrates with:
-- Django models (Employee, Payroll, User)
+- Django models (Employee, Payroll, User, PayslipTemplate, PayslipDistributionRecord)
 - Email systems with delivery confirmation
 - File processing utilities for PDF security
 - Notification systems for alerts
@@ -33,6 +33,7 @@ import os
 import io
 import json
 import uuid
+import calendar
 import logging
 import hashlib
 import smtplib
@@ -42,36 +43,42 @@ from pathlib import Path
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import Dict, List, Optional, Union, Tuple, Any, Set, Callable
-from dataclasses import dataclass, field
-from enum import Enum
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
-from collections import defaultdict, OrderedDict
+from collections import defaultdict, deque, OrderedDict
+from itertools import chain
 import queue
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import heapq
+import random
+import socket
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Django imports
 from django.db import models, transaction
-from django.db.models import Q, Count, Sum, Avg, Max, Min
+from django.db.models import F, Q, Count, Sum, Avg, Max, Min, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.template import Template, Context
 from django.template.loader import get_template, render_to_string
 from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
 from django.core.cache import cache
+from django.core import signing
 from django.core.exceptions import ValidationError
 
 # PDF generation
 try:
     from reportlab.lib import colors
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.pagesizes import letter, A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, Frame
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
+    from reportlab.lib.units import inch, mm
     from reportlab.pdfgen import canvas
+    from reportlab.lib.pdfencrypt import StandardEncryption
     from reportlab.lib.utils import ImageReader
     from reportlab.pdfbase import pdfmetrics
     from reportlab.pdfbase.ttfonts import TTFont
@@ -86,68 +93,90 @@ try:
 except ImportError:
     EMAIL_VALIDATOR_AVAILABLE = False
 
+# Security audit log (core.utils.security needs PyJWT)
+try:
+    from ..utils.security import log_security_event
+    SECURITY_AUDIT_AVAILABLE = True
+except ImportError:
+    SECURITY_AUDIT_AVAILABLE = False
+
 # Internal imports
 from ..models.employee import Employee
 from ..models.payroll_processing import Payroll, PayrollLineItem
 from ..models.system_config import User, SystemParameters
+from ..models.payslip_distribution import (
+    DISTRIBUTION_PRIORITIES, DistributionChannel, DistributionStatus, PayslipDistributionRecord, PayslipFormat,
+    PayslipTemplate, PayslipTemplateType
+)
 from ..utils.file_processors import (
     FileUploadValidator, DocumentProcessor, FileStorageManager, 
     FileSecurityManager, FileProcessingError
 )
-from ..utils.security import SecurityManager, AuditLogger
 from ..utils.text_utils import TextFormatter, ArabicTextUtils
 from ..utils.report_utils import ReportFormatter, ExportUtilities
 from ..utils.date_utils import DateCalculator
 from ..utils.validators import ValidationResult, DataSanitizer
+from ..utils.email_dispatch import EmailDispatcher
+from ..utils.worker_pools import initialize_worker_django, prepare_worker_pool, worker_pool_context
 
 logger = logging.getLogger(__name__)
 
+# Payrolls whose payslip data is read together in bulk generation
+PAYSLIP_DATA_BATCH_SIZE = 500
+
+# Payslips rendered per worker task in bulk generation
+PAYSLIP_RENDER_CHUNK_SIZE = 25
+
+# Payslips per merged PDF document: larger periods are split into several
+# documents so no single canvas grows with the headcount
+MERGED_PAYSLIPS_PER_FILE = 500
+
+# Version of the payslip layouts, part of every payslip fingerprint:
+# bump it when rendering changes so stored payslips are rendered again
+PAYSLIP_RENDER_VERSION = 1
+
+# Salt of the signed tokens of payslip access URLs
+PAYSLIP_ACCESS_TOKEN_SALT = "payslip_access"
+
+# Cache key prefix of the size and SHA-256 of stored payslip files
+PAYSLIP_FILE_CACHE_PREFIX = "payslip_file"
 
-class DistributionStatus(Enum):
-    """Enumeration for payslip distribution status"""
-    PENDING = "pending"
-    QUEUED = "queued"
-    SENDING = "sending"
-    SENT = "sent"
-    DELIVERED = "delivered"
-    FAILED = "failed"
-    BOUNCED = "bounced"
-    RETRY = "retry"
-    CANCELLED = "cancelled"
-    ARCHIVED = "archived"
+# Threads sending payslip emails, each over one persistent SMTP connection
+EMAIL_DISPATCH_WORKERS = 4
 
+# Payslip emails sent per minute to each recipient domain ('default' for the
+# others), overridden by settings.PAYSLIP_EMAIL_RATE_LIMITS
+EMAIL_DOMAIN_RATE_LIMITS = {'default': 60}
 
-class DistributionChannel(Enum):
-    """Enumeration for distribution channels"""
-    EMAIL = "email"
-    PRINT = "print"
-    PORTAL = "portal"
-    SMS = "sms"
-    PICKUP = "pickup"
+# Distribution records written per bulk update of email statuses
+EMAIL_STATUS_BATCH_SIZE = 500
 
+# Distribution fields changed by sending an email
+EMAIL_STATUS_FIELDS = (
+    'status', 'sent_time', 'error_message', 'delivery_message_id',
+    'file_path', 'file_size', 'file_hash'
+)
+
+# Seconds a batch of distributions claimed by a scheduler stays leased to it
+DISTRIBUTION_LEASE_TIMEOUT = 600
 
-class PayslipTemplate(Enum):
-    """Enumeration for payslip templates"""
-    STANDARD = "standard"
-    EXECUTIVE = "executive"
-    CONTRACTOR = "contractor"
-    INTERN = "intern"
-    GOVERNMENT = "government"
-    CUSTOM = "custom"
+# Upper bound in seconds of the backoff between two delivery attempts
+DISTRIBUTION_MAX_RETRY_DELAY = 6 * 3600
 
+# Seconds between two logs of the scheduler metrics
+DISTRIBUTION_METRICS_INTERVAL = 300
 
-class PayslipFormat(Enum):
-    """Enumeration for payslip formats"""
-    PDF = "pdf"
-    HTML = "html"
-    EXCEL = "excel"
-    TEXT = "text"
+# Payroll amounts summed into the year-to-date section of a payslip
+YTD_FIELDS = (
+    'gross_taxable', 'gross_non_taxable', 'net_salary', 'cnss_employee',
+    'cnam_employee', 'its_total', 'worked_days'
+)
 
 
 @dataclass
 class PayslipGenerationOptions:
     """Configuration options for payslip generation"""
-    template: PayslipTemplate = PayslipTemplate.STANDARD
+    template: PayslipTemplateType = PayslipTemplateType.STANDARD
     format: PayslipFormat = PayslipFormat.PDF
     language: str = "fr"  # fr, ar, or both
     include_details: bool = True
@@ -157,6 +186,7 @@ class PayslipGenerationOptions:
     password_protect: bool = False
     password: str = ""
     custom_fields: Dict[str, Any] = field(default_factory=dict)
+    reuse_existing: bool = True  # Reuse the stored file of an unchanged payslip
     
     def validate(self) -> ValidationResult:
         """Validate generation options"""
@@ -171,6 +201,10 @@ class PayslipGenerationOptions:
         if self.password and len(self.password) < 8:
             result.add_error('password', 'Mot de passe trop court (minimum 8 caractères)', 'WEAK_PASSWORD')
         
+        if self.password_protect and self.format != PayslipFormat.PDF:
+            result.add_error('password_protect', 'La protection par mot de passe nécessite le format PDF',
+                             'UNSUPPORTED_PROTECTION')
+        
         return result
 
 
@@ -211,174 +245,18 @@ class DistributionOptions:
         return result
 
 
-class PayslipDistributionRecord(models.Model):
-    """Model to track payslip distribution status and history"""
-    
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='payslip_distributions')
-    payroll = models.ForeignKey(Payroll, on_delete=models.CASCADE, related_name='distributions')
-    
-    # Distribution details
-    channel = models.CharField(max_length=20, choices=[(c.value, c.value) for c in DistributionChannel])
-    status = models.CharField(max_length=20, choices=[(s.value, s.value) for s in DistributionStatus], default=DistributionStatus.PENDING.value)
-    template = models.CharField(max_length=20, choices=[(t.value, t.value) for t in PayslipTemplate], default=PayslipTemplate.STANDARD.value)
-    format = models.CharField(max_length=10, choices=[(f.value, f.value) for f in PayslipFormat], default=PayslipFormat.PDF.value)
-    
-    # File information
-    file_path = models.CharField(max_length=500, blank=True)
-    file_size = models.PositiveIntegerField(default=0)
-    file_hash = models.CharField(max_length=64, blank=True)
-    
-    # Distribution tracking
-    scheduled_time = models.DateTimeField(null=True, blank=True)
-    sent_time = models.DateTimeField(null=True, blank=True)
-    delivered_time = models.DateTimeField(null=True, blank=True)
-    opened_time = models.DateTimeField(null=True, blank=True)
-    downloaded_time = models.DateTimeField(null=True, blank=True)
-    
-    # Delivery details
-    recipient_email = models.EmailField(blank=True)
-    recipient_phone = models.CharField(max_length=20, blank=True)
-    delivery_message_id = models.CharField(max_length=255, blank=True)
-    delivery_response = models.TextField(blank=True)
-    
-    # Retry tracking
-    retry_count = models.PositiveIntegerField(default=0)
-    last_retry_time = models.DateTimeField(null=True, blank=True)
-    next_retry_time = models.DateTimeField(null=True, blank=True)
-    
-    # Error tracking
-    error_message = models.TextField(blank=True)
-    error_code = models.CharField(max_length=50, blank=True)
-    
-    # Security and audit
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_distributions')
-    access_token = models.CharField(max_length=255, blank=True)
-    access_count = models.PositiveIntegerField(default=0)
-    last_access_time = models.DateTimeField(null=True, blank=True)
-    access_ip_addresses = models.TextField(blank=True)  # JSON array
-    
-    # Metadata
-    generation_options = models.TextField(blank=True)  # JSON
-    distribution_options = models.TextField(blank=True)  # JSON
-    metadata = models.TextField(blank=True)  # JSON
-    
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        db_table = 'payslip_distribution'
-        indexes = [
-            models.Index(fields=['employee', 'payroll']),
-            models.Index(fields=['status', 'channel']),
-            models.Index(fields=['scheduled_time']),
-            models.Index(fields=['created_at']),
-        ]
-        ordering = ['-created_at']
-    
-    def __str__(self):
-        return f"{self.employee.full_name} - {self.payroll.period.strftime('%Y-%m')} - {self.channel} ({self.status})"
-    
-    @property
-    def is_delivered(self) -> bool:
-        """Check if distribution was successfully delivered"""
-        return self.status in [DistributionStatus.DELIVERED.value, DistributionStatus.SENT.value]
-    
-    @property
-    def can_retry(self) -> bool:
-        """Check if distribution can be retried"""
-        return (self.status in [DistributionStatus.FAILED.value, DistributionStatus.BOUNCED.value] and 
-                self.retry_count < 10)
-    
-    def mark_opened(self, ip_address: str = ""):
-        """Mark payslip as opened by employee"""
-        self.opened_time = timezone.now()
-        self.access_count += 1
-        self.last_access_time = timezone.now()
-        
-        # Track IP addresses
-        ip_list = json.loads(self.access_ip_addresses) if self.access_ip_addresses else []
-        if ip_address and ip_address not in ip_list:
-            ip_list.append(ip_address)
-            self.access_ip_addresses = json.dumps(ip_list)
-        
-        self.save(update_fields=['opened_time', 'access_count', 'last_access_time', 'access_ip_addresses'])
-
-
-class PayslipTemplate(models.Model):
-    """Model for managing payslip templates"""
-    
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    name = models.CharField(max_length=100, unique=True)
-    description = models.TextField(blank=True)
-    template_type = models.CharField(max_length=20, choices=[(t.value, t.value) for t in PayslipTemplate])
-    
-    # Template content
-    html_template = models.TextField()
-    css_styles = models.TextField(blank=True)
-    header_template = models.TextField(blank=True)
-    footer_template = models.TextField(blank=True)
-    
-    # Configuration
-    supports_arabic = models.BooleanField(default=True)
-    supports_french = models.BooleanField(default=True)
-    default_language = models.CharField(max_length=5, default='fr')
-    
-    # Layout settings
-    page_size = models.CharField(max_length=20, default='A4')
-    orientation = models.CharField(max_length=20, default='portrait')
-    margins = models.TextField(default='{"top": 20, "bottom": 20, "left": 20, "right": 20}')  # JSON
-    
-    # Branding
-    company_logo_path = models.CharField(max_length=500, blank=True)
-    company_colors = models.TextField(default='{"primary": "#0066cc", "secondary": "#f5f5f5"}')  # JSON
-    font_family = models.CharField(max_length=100, default='Arial')
-    
-    # Security
-    default_password_protect = models.BooleanField(default=False)
-    watermark_text = models.CharField(max_length=100, blank=True)
-    
-    # Metadata
-    is_active = models.BooleanField(default=True)
-    is_default = models.BooleanField(default=False)
-    version = models.CharField(max_length=20, default='1.0')
-    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    
-    # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    
-    class Meta:
-        db_table = 'payslip_template'
-        ordering = ['name']
-    
-    def __str__(self):
-        return f"{self.name} ({self.template_type})"
-    
-    def get_margins(self) -> Dict[str, int]:
-        """Get margins as dictionary"""
-        try:
-            return json.loads(self.margins)
-        except (json.JSONDecodeError, TypeError):
-            return {"top": 20, "bottom": 20, "left": 20, "right": 20}
-    
-    def get_company_colors(self) -> Dict[str, str]:
-        """Get company colors as dictionary"""
-        try:
-            return json.loads(self.company_colors)
-        except (json.JSONDecodeError, TypeError):
-            return {"primary": "#0066cc", "secondary": "#f5f5f5"}
-
-
 class PayslipGenerator:
     """Advanced payslip generation with template support and security features"""
     
-    def __init__(self):
-        self.security_manager = SecurityManager()
+    def __init__(self, workers: Optional[int] = None):
         self.text_formatter = TextFormatter()
         self.arabic_utils = ArabicTextUtils()
         self.date_calculator = DateCalculator()
+        # Bulk rendering is CPU-bound: one process per core by default
+        self.workers = workers or os.cpu_count() or 1
+        self._templates = {}
+        self._pdf_layouts = {}
+        self._html_templates = {}
         
     def generate_payslip(self, payroll: Payroll, options: PayslipGenerationOptions = None) -> Dict[str, Any]:
         """
@@ -402,81 +280,160 @@ class PayslipGenerator:
                 'file_path': None
             }
         
+        # Get template
+        template = self._get_template(options.template)
+        if not template:
+            result = self._new_generation_result(options)
+            result['success'] = False
+            result['errors'].append('Template non trouvé')
+            return result
+        
+        try:
+            # Prepare payslip data
+            payslip_data = self._prepare_payslip_data(payroll, options)
+        except Exception as e:
+            logger.error(f"Payslip generation error: {str(e)}")
+            result = self._new_generation_result(options)
+            result['success'] = False
+            result['errors'].append(f'Erreur de génération: {str(e)}')
+            return result
+        
+        return self._render_payslip(payslip_data, template, options)
+    
+    def generate_bulk_payslips(self, payrolls: List[Payroll], 
+                              options: PayslipGenerationOptions = None,
+                              progress_callback: Callable = None,
+                              workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Generate payslips for multiple payroll records
+        
+        The data of each batch of payrolls is read with a few queries, then
+        rendered in chunks by a process pool whose workers load the template
+        and its fonts, logo and styles once. Payslips whose fingerprint did
+        not change since they were last rendered keep their stored file.
+        
+        Args:
+            payrolls: List of payroll records
+            options: Generation options
+            progress_callback: Optional callback for progress updates
+            workers: Number of rendering processes (defaults to self.workers)
+            
+        Returns:
+            Dictionary with bulk generation results
+        """
+        options = options or PayslipGenerationOptions()
+        workers = workers or self.workers
+        
         result = {
             'success': True,
-            'file_path': None,
-            'file_size': 0,
-            'file_hash': None,
+            'total_requested': len(payrolls),
+            'generated_count': 0,
+            'reused_count': 0,
+            'failed_count': 0,
+            'generated_files': [],
+            'failed_records': [],
+            'total_size': 0,
             'generation_time': None,
-            'template_used': options.template.value,
-            'format': options.format.value,
             'errors': []
         }
         
         start_time = time.time()
         
         try:
-            # Get template
-            template = self._get_template(options.template)
-            if not template:
-                result['success'] = False
-                result['errors'].append('Template non trouvé')
-                return result
+            payrolls_by_id = {payroll.id: payroll for payroll in payrolls}
             
-            # Prepare payslip data
-            payslip_data = self._prepare_payslip_data(payroll, options)
+            def record(payroll_id: int, generation_result: Dict[str, Any]):
+                self._record_bulk_generation(result, payrolls_by_id[payroll_id], generation_result)
+                if progress_callback:
+                    progress_callback(result['generated_count'] + result['failed_count'], len(payrolls))
             
-            # Generate based on format
-            if options.format == PayslipFormat.PDF:
-                file_path = self._generate_pdf_payslip(payslip_data, template, options)
-            elif options.format == PayslipFormat.HTML:
-                file_path = self._generate_html_payslip(payslip_data, template, options)
-            elif options.format == PayslipFormat.EXCEL:
-                file_path = self._generate_excel_payslip(payslip_data, template, options)
-            else:
-                file_path = self._generate_text_payslip(payslip_data, template, options)
+            validation_result = options.validate()
+            template = self._get_template(options.template) if validation_result.is_valid else None
+            
+            chunks = self._iter_payslip_chunks(payrolls, options)
+            pooled = template is not None and workers > 1 and len(payrolls) > PAYSLIP_RENDER_CHUNK_SIZE
+            if pooled:
+                # The first batch is read before the workers are started by the
+                # first submission, so that they fork without an open connection
+                chunks = chain([next(chunks)], chunks)
+                pooled = prepare_worker_pool()
+            
+            if not validation_result.is_valid or not template:
+                errors = validation_result.errors if not validation_result.is_valid else ['Template non trouvé']
+                for payroll in payrolls:
+                    record(payroll.id, {'success': False, 'errors': errors})
+            
+            elif pooled:
+                with ProcessPoolExecutor(max_workers=min(workers, -(-len(payrolls) // PAYSLIP_RENDER_CHUNK_SIZE)),
+                                         mp_context=worker_pool_context(),
+                                         initializer=_initialize_payslip_worker,
+                                         initargs=(template, options)) as executor:
+                    # Later batches are read while earlier chunks render
+                    futures = {}
+                    for chunk in chunks:
+                        futures[executor.submit(_render_payslip_chunk, chunk)] = chunk
+                    
+                    for future in as_completed(futures):
+                        try:
+                            chunk_results = future.result()
+                        except Exception as e:
+                            # The worker itself failed: report every payslip of the chunk
+                            logger.error(f"Bulk generation worker error: {str(e)}")
+                            chunk_results = [
+                                (payroll_id, {'success': False, 'errors': [str(e)]})
+                                for payroll_id, _ in futures[future]
+                            ]
+                        for payroll_id, generation_result in chunk_results:
+                            record(payroll_id, generation_result)
             
-            if file_path:
-                # Get file information
-                file_stats = default_storage.stat(file_path)
-                result['file_path'] = file_path
-                result['file_size'] = file_stats.st_size
-                
-                # Calculate file hash
-                with default_storage.open(file_path, 'rb') as f:
-                    result['file_hash'] = hashlib.sha256(f.read()).hexdigest()
-                
-                # Apply password protection if requested
-                if options.password_protect and options.format == PayslipFormat.PDF:
-                    self._apply_pdf_security(file_path, options.password)
-                
-                result['generation_time'] = time.time() - start_time
-                
-                logger.info(f"Payslip generated: {payroll.employee.full_name} - {payroll.period}")
             else:
+                for chunk in chunks:
+                    for payroll_id, generation_result in self._render_payslip_chunk(chunk, template, options):
+                        record(payroll_id, generation_result)
+            
+            result['generation_time'] = time.time() - start_time
+            
+            # Determine overall success
+            if result['failed_count'] == len(payrolls):
                 result['success'] = False
-                result['errors'].append('Échec de la génération du fichier')
+                result['errors'].append('Échec de la génération de tous les bulletins')
+            elif result['failed_count'] > 0:
+                result['errors'].append(f'{result["failed_count"]} bulletins ont échoué')
+            
+            logger.info(f"Bulk payslip generation completed: {result['generated_count']}/{len(payrolls)} generated")
         
         except Exception as e:
-            logger.error(f"Payslip generation error: {str(e)}")
+            logger.error(f"Bulk payslip generation error: {str(e)}")
             result['success'] = False
-            result['errors'].append(f'Erreur de génération: {str(e)}')
+            result['errors'].append(f'Erreur de génération en lot: {str(e)}')
         
         return result
     
-    def generate_bulk_payslips(self, payrolls: List[Payroll], 
-                              options: PayslipGenerationOptions = None,
-                              progress_callback: Callable = None) -> Dict[str, Any]:
+    def generate_merged_payslips(self, payrolls: List[Payroll],
+                                 options: PayslipGenerationOptions = None,
+                                 payslips_per_file: int = MERGED_PAYSLIPS_PER_FILE,
+                                 file_name: str = None,
+                                 progress_callback: Callable = None) -> Dict[str, Any]:
         """
-        Generate payslips for multiple payroll records
+        Generate the payslips of several payroll records into merged PDF documents
+        
+        Payslips are drawn one after the other on the pages of a single
+        document, with an outline entry per employee and an index page
+        (employee, page) at the end, instead of one file per employee. Only
+        the payslip being drawn is held as flowables, each document is
+        written to a temporary file and streamed to storage, and periods
+        with more than payslips_per_file payslips are split into several
+        numbered documents.
         
         Args:
-            payrolls: List of payroll records
-            options: Generation options
+            payrolls: Payroll records, in document order
+            options: Generation options (PDF format)
+            payslips_per_file: Maximum payslips per document
+            file_name: Base file name, without extension
             progress_callback: Optional callback for progress updates
             
         Returns:
-            Dictionary with bulk generation results
+            Dictionary with the generated documents and their page index
         """
         options = options or PayslipGenerationOptions()
         
@@ -485,7 +442,7 @@ class PayslipGenerator:
             'total_requested': len(payrolls),
             'generated_count': 0,
             'failed_count': 0,
-            'generated_files': [],
+            'files': [],
             'failed_records': [],
             'total_size': 0,
             'generation_time': None,
@@ -494,92 +451,557 @@ class PayslipGenerator:
         
         start_time = time.time()
         
+        validation_result = options.validate()
+        if not validation_result.is_valid:
+            result['success'] = False
+            result['errors'].extend(validation_result.errors)
+            return result
+        
+        if options.format != PayslipFormat.PDF or not REPORTLAB_AVAILABLE:
+            result['success'] = False
+            result['errors'].append('Les bulletins fusionnés nécessitent le format PDF (ReportLab)')
+            return result
+        
+        template = self._get_template(options.template)
+        if not template:
+            result['success'] = False
+            result['errors'].append('Template non trouvé')
+            return result
+        
+        if not payrolls:
+            return result
+        
+        if payslips_per_file < 1:
+            result['success'] = False
+            result['errors'].append('Le nombre de bulletins par document doit être positif')
+            return result
+        
+        document = None
         try:
-            # Use thread pool for parallel generation
-            max_workers = min(5, len(payrolls))  # Limit concurrent generations
-            
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all generation tasks
-                future_to_payroll = {
-                    executor.submit(self.generate_payslip, payroll, options): payroll 
-                    for payroll in payrolls
-                }
-                
-                # Process completed tasks
-                for future in as_completed(future_to_payroll):
-                    payroll = future_to_payroll[future]
+            layout = self._get_pdf_layout(template)
+            payrolls_by_id = {payroll.id: payroll for payroll in payrolls}
+            file_name = file_name or f"bulletins_paie_{payrolls[0].period.strftime('%Y_%m')}"
+            split = len(payrolls) > payslips_per_file
+            
+            for chunk in self._iter_payslip_chunks(payrolls, options):
+                for payroll_id, payslip_data in chunk:
+                    payroll = payrolls_by_id[payroll_id]
                     
-                    try:
-                        generation_result = future.result()
-                        
-                        if generation_result['success']:
-                            result['generated_count'] += 1
-                            result['generated_files'].append({
-                                'employee_id': payroll.employee.id,
-                                'employee_name': payroll.employee.full_name,
-                                'payroll_id': payroll.id,
-                                'period': payroll.period.strftime('%Y-%m'),
-                                'file_path': generation_result['file_path'],
-                                'file_size': generation_result['file_size'],
-                                'file_hash': generation_result['file_hash']
-                            })
-                            result['total_size'] += generation_result['file_size']
-                        else:
-                            result['failed_count'] += 1
-                            result['failed_records'].append({
-                                'employee_id': payroll.employee.id,
-                                'employee_name': payroll.employee.full_name,
-                                'payroll_id': payroll.id,
-                                'period': payroll.period.strftime('%Y-%m'),
-                                'errors': generation_result['errors']
-                            })
-                        
-                        # Report progress
-                        if progress_callback:
-                            progress_callback(result['generated_count'] + result['failed_count'], len(payrolls))
+                    if document and len(document['index']) >= payslips_per_file:
+                        finished, document = document, None
+                        result['files'].append(self._finish_merged_document(finished, layout, options))
+                    
+                    if document is None:
+                        part = len(result['files']) + 1
+                        suffix = f"_{part:03d}" if split else ""
+                        document = self._start_merged_document(
+                            f"payroll/bulletins/{payroll.period.strftime('%Y/%m')}/{file_name}{suffix}.pdf",
+                            layout, options
+                        )
                     
+                    try:
+                        if isinstance(payslip_data, Exception):
+                            raise payslip_data
+                        self._draw_merged_payslip(document, payslip_data, layout, options)
+                        result['generated_count'] += 1
                     except Exception as e:
-                        logger.error(f"Bulk generation error for payroll {payroll.id}: {str(e)}")
-                        result['failed_count'] += 1
-                        result['failed_records'].append({
-                            'employee_id': payroll.employee.id,
-                            'employee_name': payroll.employee.full_name,
-                            'payroll_id': payroll.id,
-                            'period': payroll.period.strftime('%Y-%m'),
-                            'errors': [str(e)]
+                        logger.error(f"Merged payslip error for payroll {payroll_id}: {str(e)}")
+                        self._record_bulk_generation(result, payroll, {
+                            'success': False, 'errors': [f'Erreur de génération: {str(e)}']
                         })
+                    
+                    if progress_callback:
+                        progress_callback(result['generated_count'] + result['failed_count'], len(payrolls))
+            
+            if document and document['index']:
+                finished, document = document, None
+                result['files'].append(self._finish_merged_document(finished, layout, options))
             
+            result['total_size'] = sum(merged['file_size'] for merged in result['files'])
             result['generation_time'] = time.time() - start_time
             
-            # Determine overall success
             if result['failed_count'] == len(payrolls):
                 result['success'] = False
                 result['errors'].append('Échec de la génération de tous les bulletins')
             elif result['failed_count'] > 0:
                 result['errors'].append(f'{result["failed_count"]} bulletins ont échoué')
             
-            logger.info(f"Bulk payslip generation completed: {result['generated_count']}/{len(payrolls)} generated")
+            logger.info(
+                f"Merged payslip generation completed: {result['generated_count']}/{len(payrolls)} "
+                f"payslips in {len(result['files'])} documents"
+            )
         
         except Exception as e:
-            logger.error(f"Bulk payslip generation error: {str(e)}")
+            logger.error(f"Merged payslip generation error: {str(e)}")
             result['success'] = False
-            result['errors'].append(f'Erreur de génération en lot: {str(e)}')
+            result['errors'].append(f'Erreur de génération fusionnée: {str(e)}')
+        
+        finally:
+            if document:
+                document['file'].close()
         
         return result
     
-    def _get_template(self, template_type: PayslipTemplate) -> Optional['PayslipTemplate']:
-        """Get template by type"""
+    def _start_merged_document(self, file_path: str, layout: Dict[str, Any],
+                               options: PayslipGenerationOptions) -> Dict[str, Any]:
+        """Open a merged payslip document drawn on a canvas saved to a temporary file"""
+        output = tempfile.TemporaryFile()
+        pdf_canvas = canvas.Canvas(output, pagesize=layout['pagesize'], pageCompression=1,
+                                   encrypt=self._pdf_encryption(options))
+        pdf_canvas.setTitle(os.path.splitext(os.path.basename(file_path))[0])
+        pdf_canvas.showOutline()
+        return {'file_path': file_path, 'file': output, 'canvas': pdf_canvas, 'index': []}
+    
+    def _draw_frames(self, pdf_canvas, story: List[Any], layout: Dict[str, Any]):
+        """Draw flowables on as many new pages as they need, splitting those across pages"""
+        page_width, page_height = layout['pagesize']
+        margins = layout['margins']
+        story = list(story)
+        
+        while story:
+            frame = Frame(
+                margins['leftMargin'], margins['bottomMargin'],
+                page_width - margins['leftMargin'] - margins['rightMargin'],
+                page_height - margins['topMargin'] - margins['bottomMargin']
+            )
+            page_empty = True
+            
+            while story:
+                if frame.add(story[0], pdf_canvas, trySplit=0):
+                    del story[0]
+                else:
+                    # Draw what fits on this page, the rest goes on the next one
+                    parts = frame.split(story[0], pdf_canvas)
+                    if not parts or not frame.add(parts[0], pdf_canvas, trySplit=0):
+                        if page_empty:
+                            raise FileProcessingError("Élément trop grand pour une page du bulletin", "LAYOUT_ERROR")
+                        break
+                    story[0:1] = parts[1:]
+                page_empty = False
+            
+            pdf_canvas.showPage()
+    
+    def _draw_merged_payslip(self, document: Dict[str, Any], data: Dict[str, Any], layout: Dict[str, Any],
+                             options: PayslipGenerationOptions):
+        """Draw one payslip from a new page, with its outline entry and index row"""
+        pdf_canvas = document['canvas']
+        employee_info = data['employee_info']
+        key = f"payroll_{data['payroll'].id}"
+        story = self._build_pdf_story(data, layout, options)
+        first_page = pdf_canvas.getPageNumber()
+        
+        pdf_canvas.bookmarkPage(key)
+        pdf_canvas.addOutlineEntry(employee_info['full_name'], key, level=0)
+        self._draw_frames(pdf_canvas, story, layout)
+        
+        document['index'].append({
+            'payroll_id': data['payroll'].id,
+            'employee_id': employee_info['employee_id'],
+            'employee_name': employee_info['full_name'],
+            'department': employee_info['department'],
+            'page': first_page,
+            'page_count': pdf_canvas.getPageNumber() - first_page,
+        })
+    
+    def _finish_merged_document(self, document: Dict[str, Any], layout: Dict[str, Any],
+                                options: PayslipGenerationOptions) -> Dict[str, Any]:
+        """Append the page index, then save the merged document"""
+        pdf_canvas = document['canvas']
+        index = document['index']
+        
+        pdf_canvas.bookmarkPage('index')
+        pdf_canvas.addOutlineEntry('Index', 'index', level=0)
+        index_table = Table(
+            [['Employé', 'Matricule', 'Département', 'Page']] + [
+                [row['employee_name'], str(row['employee_id']), row['department'], str(row['page'])]
+                for row in index
+            ],
+            colWidths=[2.5*inch, 1*inch, 2*inch, 0.75*inch],
+            repeatRows=1
+        )
+        index_table.setStyle(layout['gains_style'])
+        self._draw_frames(pdf_canvas, [Paragraph('INDEX', layout['title_style']), index_table], layout)
+        
+        page_count = pdf_canvas.getPageNumber() - 1
+        pdf_canvas.save()
+        with document['file'] as output:
+            saved = self._save_payslip_file(document['file_path'], output)
+        
+        saved.update({'page_count': page_count, 'payslip_count': len(index), 'index': index})
+        return saved
+    
+    def _record_bulk_generation(self, result: Dict[str, Any], payroll: Payroll,
+                                generation_result: Dict[str, Any]):
+        """Add one payslip generation result to the bulk result"""
+        record = {
+            'employee_id': payroll.employee.id,
+            'employee_name': payroll.employee.full_name,
+            'payroll_id': payroll.id,
+            'period': payroll.period.strftime('%Y-%m'),
+        }
+        
+        if generation_result['success']:
+            result['generated_count'] += 1
+            if generation_result.get('reused'):
+                result['reused_count'] += 1
+            record.update({
+                'file_path': generation_result['file_path'],
+                'file_size': generation_result['file_size'],
+                'file_hash': generation_result['file_hash']
+            })
+            result['generated_files'].append(record)
+            result['total_size'] += generation_result['file_size']
+        else:
+            result['failed_count'] += 1
+            record['errors'] = generation_result['errors']
+            result['failed_records'].append(record)
+    
+    def _iter_payslip_chunks(self, payrolls: List[Payroll], options: PayslipGenerationOptions):
+        """Yield chunks of (payroll id, payslip data), reading the data of a batch at a time"""
+        for start in range(0, len(payrolls), PAYSLIP_DATA_BATCH_SIZE):
+            batch = payrolls[start:start + PAYSLIP_DATA_BATCH_SIZE]
+            try:
+                data_by_payroll = self._prepare_bulk_payslip_data(batch, options)
+            except Exception as e:
+                logger.error(f"Payslip data preparation error: {str(e)}")
+                data_by_payroll = {payroll.id: e for payroll in batch}
+            
+            items = [(payroll.id, data_by_payroll[payroll.id]) for payroll in batch]
+            for chunk_start in range(0, len(items), PAYSLIP_RENDER_CHUNK_SIZE):
+                yield items[chunk_start:chunk_start + PAYSLIP_RENDER_CHUNK_SIZE]
+    
+    def _render_payslip_chunk(self, chunk: List[Tuple[int, Any]], template: 'PayslipTemplate',
+                              options: PayslipGenerationOptions) -> List[Tuple[int, Dict[str, Any]]]:
+        """Render a chunk of payslips, data preparation errors included"""
+        results = []
+        for payroll_id, payslip_data in chunk:
+            if isinstance(payslip_data, Exception):
+                generation_result = self._new_generation_result(options)
+                generation_result['success'] = False
+                generation_result['errors'].append(f'Erreur de génération: {str(payslip_data)}')
+            else:
+                generation_result = self._render_payslip(payslip_data, template, options)
+            results.append((payroll_id, generation_result))
+        return results
+    
+    def _new_generation_result(self, options: PayslipGenerationOptions) -> Dict[str, Any]:
+        """Empty result of a payslip generation"""
+        return {
+            'success': True,
+            'file_path': None,
+            'file_size': 0,
+            'file_hash': None,
+            'generation_time': None,
+            'template_used': options.template.value,
+            'format': options.format.value,
+            'reused': False,
+            'errors': []
+        }
+    
+    def _render_payslip(self, payslip_data: Dict[str, Any], template: 'PayslipTemplate',
+                        options: PayslipGenerationOptions) -> Dict[str, Any]:
+        """Render prepared payslip data to a stored file"""
+        result = self._new_generation_result(options)
+        start_time = time.time()
+        
         try:
-            return PayslipTemplate.objects.filter(
+            # Unchanged payslips keep their stored file
+            fingerprint = self._payslip_fingerprint(payslip_data, template, options)
+            stored = self._find_stored_payslip(fingerprint, payslip_data['period'], options)
+            if stored:
+                result.update(stored)
+                result['generation_time'] = time.time() - start_time
+                return result
+            
+            # Generate based on format
+            if options.format == PayslipFormat.PDF:
+                content = self._generate_pdf_payslip(payslip_data, template, options)
+            elif options.format == PayslipFormat.HTML:
+                content = self._generate_html_payslip(payslip_data, template, options)
+            elif options.format == PayslipFormat.EXCEL:
+                content = self._generate_excel_payslip(payslip_data, template, options)
+            else:
+                content = self._generate_text_payslip(payslip_data, template, options)
+            
+            if content:
+                # Stored under its fingerprint; size and hash come from the rendered bytes
+                file_path = self._stored_payslip_path(fingerprint, payslip_data['period'], options)
+                if default_storage.exists(file_path):
+                    default_storage.delete(file_path)
+                result.update(self._save_payslip(file_path, content))
+                cache.set(f"{PAYSLIP_FILE_CACHE_PREFIX}:{result['file_path']}",
+                          (result['file_size'], result['file_hash']), None)
+                
+                result['generation_time'] = time.time() - start_time
+                
+                logger.info(f"Payslip generated: {payslip_data['employee_info']['full_name']} - {payslip_data['period']}")
+            else:
+                result['success'] = False
+                result['errors'].append('Échec de la génération du fichier')
+        
+        except Exception as e:
+            logger.error(f"Payslip generation error: {str(e)}")
+            result['success'] = False
+            result['errors'].append(f'Erreur de génération: {str(e)}')
+        
+        return result
+    
+    def _payslip_fingerprint(self, data: Dict[str, Any], template: 'PayslipTemplate',
+                             options: PayslipGenerationOptions) -> str:
+        """
+        SHA-256 of everything a rendered payslip depends on
+        
+        Covers the payroll and employee columns (audit timestamps aside), the
+        line items and year-to-date amounts, the labels, the template version
+        and the generation options; the generation date is left out so an
+        unchanged payslip keeps its fingerprint.
+        """
+        def columns(instance):
+            return {
+                field.attname: getattr(instance, field.attname)
+                for field in instance._meta.concrete_fields
+                if field.attname not in ('created_at', 'updated_at')
+            }
+        
+        payload = {
+            'version': PAYSLIP_RENDER_VERSION,
+            'payroll': columns(data['payroll']),
+            'employee': columns(data['employee']),
+            'employee_info': data['employee_info'],
+            'payroll_info': data['payroll_info'],
+            'line_items': {
+                kind: [
+                    (item.payroll_element_id, item.payroll_element.label, item.base_amount,
+                     item.quantity, item.calculated_amount)
+                    for item in items
+                ]
+                for kind, items in data.get('line_items', {}).items()
+            },
+            'ytd_info': data.get('ytd_info'),
+            'labels': data['labels'],
+            'custom_fields': data['custom_fields'],
+            'template': (str(template.pk), template.version, template.updated_at),
+            'options': {
+                'format': options.format.value,
+                'language': options.language,
+                'include_details': options.include_details,
+                'include_ytd': options.include_ytd,
+                'include_logo': options.include_logo,
+                'watermark': options.watermark,
+                'password': hashlib.sha256(options.password.encode()).hexdigest() if options.password_protect else '',
+            },
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode()).hexdigest()
+    
+    def _stored_payslip_path(self, fingerprint: str, period: date, options: PayslipGenerationOptions) -> str:
+        """Content-addressed storage path of a payslip"""
+        extension = 'txt' if options.format == PayslipFormat.TEXT else options.format.value
+        return f"payroll/bulletins/{period.strftime('%Y/%m')}/{fingerprint}.{extension}"
+    
+    def _find_stored_payslip(self, fingerprint: str, period: date,
+                             options: PayslipGenerationOptions) -> Optional[Dict[str, Any]]:
+        """Stored file of a payslip with this fingerprint, if any"""
+        if not options.reuse_existing:
+            return None
+        
+        file_path = self._stored_payslip_path(fingerprint, period, options)
+        if not default_storage.exists(file_path):
+            return None
+        
+        cache_key = f"{PAYSLIP_FILE_CACHE_PREFIX}:{file_path}"
+        stored = cache.get(cache_key)
+        if stored is None:
+            # Stored by another process: hash it once
+            with default_storage.open(file_path, 'rb') as stored_file:
+                content = stored_file.read()
+            stored = (len(content), hashlib.sha256(content).hexdigest())
+            cache.set(cache_key, stored, None)
+        
+        file_size, file_hash = stored
+        return {'file_path': file_path, 'file_size': file_size, 'file_hash': file_hash, 'reused': True}
+    
+    def _save_payslip(self, file_path: str, content: bytes) -> Dict[str, Any]:
+        """Store rendered payslip bytes, returning the stored path, size and SHA-256"""
+        saved_path = default_storage.save(file_path, ContentFile(content))
+        return {
+            'file_path': saved_path,
+            'file_size': len(content),
+            'file_hash': hashlib.sha256(content).hexdigest()
+        }
+    
+    def _save_payslip_file(self, file_path: str, output) -> Dict[str, Any]:
+        """Store a rendered payslip file, streamed from its open handle, returning the stored path, size and SHA-256"""
+        digest = hashlib.sha256()
+        output.seek(0)
+        for block in iter(lambda: output.read(File.DEFAULT_CHUNK_SIZE), b''):
+            digest.update(block)
+        file_size = output.tell()
+        saved_path = default_storage.save(file_path, File(output))
+        return {'file_path': saved_path, 'file_size': file_size, 'file_hash': digest.hexdigest()}
+    
+    def _get_template(self, template_type: PayslipTemplateType) -> Optional['PayslipTemplate']:
+        """Get template by type, read once per generator"""
+        if template_type in self._templates:
+            return self._templates[template_type]
+        
+        try:
+            template = PayslipTemplate.objects.filter(
                 template_type=template_type.value,
                 is_active=True
             ).first()
         except Exception as e:
             logger.error(f"Template retrieval error: {str(e)}")
             return None
+        
+        if template:
+            self._templates[template_type] = template
+        return template
+    
+    def _get_pdf_layout(self, template: 'PayslipTemplate') -> Dict[str, Any]:
+        """Page setup, fonts, logo and styles of a template, built once per generator"""
+        layout = self._pdf_layouts.get(template.pk)
+        if layout is not None:
+            return layout
+        
+        pagesize = letter if template.page_size.upper() == 'LETTER' else A4
+        if template.orientation == 'landscape':
+            pagesize = landscape(pagesize)
+        
+        margins = template.get_margins()
+        
+        # A TrueType file as font family is registered once per process;
+        # other families keep the built-in Helvetica
+        font_name, bold_font_name = 'Helvetica', 'Helvetica-Bold'
+        font_path = Path(template.font_family)
+        if font_path.suffix.lower() == '.ttf' and font_path.exists():
+            font_name = bold_font_name = font_path.stem
+            if font_name not in pdfmetrics.getRegisteredFontNames():
+                pdfmetrics.registerFont(TTFont(font_name, str(font_path)))
+        
+        logo = None
+        if template.company_logo_path:
+            try:
+                with default_storage.open(template.company_logo_path, 'rb') as logo_file:
+                    logo = logo_file.read()
+            except Exception as e:
+                logger.warning(f"Payslip logo unavailable ({template.company_logo_path}): {str(e)}")
+        
+        styles = getSampleStyleSheet()
+        company_colors = template.get_company_colors()
+        
+        layout = {
+            'pagesize': pagesize,
+            'margins': {
+                'topMargin': margins.get('top', 20) * mm,
+                'bottomMargin': margins.get('bottom', 20) * mm,
+                'leftMargin': margins.get('left', 20) * mm,
+                'rightMargin': margins.get('right', 20) * mm,
+            },
+            'logo': logo,
+            'styles': styles,
+            'title_style': ParagraphStyle(
+                'CustomTitle',
+                parent=styles['Heading1'],
+                fontName=bold_font_name,
+                fontSize=16,
+                spaceAfter=30,
+                alignment=1,  # Center
+                textColor=colors.HexColor(company_colors.get('primary', '#0066cc'))
+            ),
+            'employee_style': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), font_name),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            'gains_style': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), bold_font_name),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            'deductions_style': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), bold_font_name),
+                ('FONTSIZE', (0, 0), (-1, -1), 9),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+            'summary_style': TableStyle([
+                ('BACKGROUND', (0, -1), (-1, -1), colors.green),
+                ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+                ('FONTNAME', (0, -1), (-1, -1), bold_font_name),
+                ('FONTSIZE', (0, 0), (-1, -1), 11),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black)
+            ]),
+        }
+        
+        self._pdf_layouts[template.pk] = layout
+        return layout
     
     def _prepare_payslip_data(self, payroll: Payroll, options: PayslipGenerationOptions) -> Dict[str, Any]:
         """Prepare comprehensive payslip data for rendering"""
+        return self._prepare_bulk_payslip_data([payroll], options)[payroll.id]
+    
+    def _prepare_bulk_payslip_data(self, payrolls: List[Payroll],
+                                   options: PayslipGenerationOptions) -> Dict[int, Dict[str, Any]]:
+        """
+        Prepare the payslip data of several payrolls with a fixed number of queries
+        
+        Employees with their position and department, line items and
+        year-to-date payrolls are each read once for the whole list.
+        
+        Returns:
+            Payslip data by payroll id
+        """
+        prefetch_related_objects(payrolls, 'employee__position', 'employee__department')
+        employee_ids = {payroll.employee_id for payroll in payrolls}
+        
+        # Line items of each (employee, period, motif)
+        line_items = defaultdict(list)
+        if options.include_details and payrolls:
+            keys = {(payroll.employee_id, payroll.period, payroll.motif_id) for payroll in payrolls}
+            items = PayrollLineItem.objects.filter(
+                employee_id__in=employee_ids,
+                period__in={payroll.period for payroll in payrolls},
+                motif_id__in={payroll.motif_id for payroll in payrolls}
+            ).select_related('payroll_element').order_by('payroll_element__label')
+            for item in items:
+                key = (item.employee_id, item.period, item.motif_id)
+                if key in keys:
+                    line_items[key].append(item)
+        
+        # Payrolls of each employee from the first year start to the last period
+        ytd_rows = defaultdict(list)
+        if options.include_ytd and payrolls:
+            rows = Payroll.objects.filter(
+                employee_id__in=employee_ids,
+                period__gte=date(min(payroll.period for payroll in payrolls).year, 1, 1),
+                period__lte=max(payroll.period for payroll in payrolls)
+            ).order_by().values('employee_id', 'period', *YTD_FIELDS)
+            for row in rows:
+                ytd_rows[row['employee_id']].append(row)
+        
+        return {
+            payroll.id: self._build_payslip_data(
+                payroll, options,
+                line_items[(payroll.employee_id, payroll.period, payroll.motif_id)],
+                [row for row in ytd_rows[payroll.employee_id]
+                 if row['period'].year == payroll.period.year and row['period'] <= payroll.period]
+            )
+            for payroll in payrolls
+        }
+    
+    def _build_payslip_data(self, payroll: Payroll, options: PayslipGenerationOptions,
+                            line_items: List[PayrollLineItem], ytd_rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Assemble the payslip data of a payroll from its line items and year-to-date payrolls"""
         employee = payroll.employee
         
         # Basic information
@@ -624,7 +1046,6 @@ class PayslipGenerator:
         
         # Line items if details requested
         if options.include_details:
-            line_items = payroll.line_items.select_related('payroll_element').order_by('payroll_element__label')
             data['line_items'] = {
                 'gains': [item for item in line_items if item.is_gain],
                 'deductions': [item for item in line_items if item.is_deduction]
@@ -632,21 +1053,9 @@ class PayslipGenerator:
         
         # Year-to-date calculations if requested
         if options.include_ytd:
-            year_start = date(payroll.period.year, 1, 1)
-            ytd_payrolls = Payroll.objects.filter(
-                employee=employee,
-                period__gte=year_start,
-                period__lte=payroll.period
-            )
-            
             data['ytd_info'] = {
-                'gross_taxable': sum(p.gross_taxable for p in ytd_payrolls),
-                'gross_non_taxable': sum(p.gross_non_taxable for p in ytd_payrolls),
-                'net_salary': sum(p.net_salary for p in ytd_payrolls),
-                'cnss_employee': sum(p.cnss_employee for p in ytd_payrolls),
-                'cnam_employee': sum(p.cnam_employee for p in ytd_payrolls),
-                'its_total': sum(p.its_total for p in ytd_payrolls),
-                'worked_days': sum(p.worked_days for p in ytd_payrolls)
+                field_name: sum(row[field_name] for row in ytd_rows)
+                for field_name in YTD_FIELDS
             }
         
         # Localized labels
@@ -660,188 +1069,136 @@ class PayslipGenerator:
                 'ar': self._get_arabic_labels()
             }
         
-        return data
-    
-    def _generate_pdf_payslip(self, data: Dict[str, Any], template: 'PayslipTemplate', 
-                             options: PayslipGenerationOptions) -> str:
-        """Generate PDF payslip using ReportLab"""
-        if not REPORTLAB_AVAILABLE:
-            raise FileProcessingError("ReportLab not available for PDF generation", "MISSING_DEPENDENCY")
-        
-        # Create filename
-        employee = data['employee']
-        period = data['period']
-        filename = f"bulletin_paie_{employee.id}_{period.strftime('%Y_%m')}.pdf"
-        file_path = f"payroll/bulletins/{period.strftime('%Y/%m')}/{filename}"
-        
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            try:
-                # Create PDF document
-                doc = SimpleDocTemplate(
-                    temp_file.name,
-                    pagesize=A4,
-                    **template.get_margins()
-                )
-                
-                # Build PDF content
-                story = []
-                styles = getSampleStyleSheet()
-                
-                # Custom styles
-                title_style = ParagraphStyle(
-                    'CustomTitle',
-                    parent=styles['Heading1'],
-                    fontSize=16,
-                    spaceAfter=30,
-                    alignment=1  # Center
-                )
-                
-                # Header
-                if options.include_logo and template.company_logo_path:
-                    # Add company logo (implementation depends on logo availability)
-                    pass
-                
-                # Title
-                if options.language == 'ar':
-                    title = "بيان الراتب"
-                else:
-                    title = "BULLETIN DE PAIE"
-                
-                story.append(Paragraph(title, title_style))
-                story.append(Spacer(1, 20))
-                
-                # Employee information table
-                emp_data = [
-                    ['Nom/Prénom:', data['employee_info']['full_name']],
-                    ['Matricule:', str(data['employee_info']['employee_id'])],
-                    ['Poste:', data['employee_info']['position']],
-                    ['Département:', data['employee_info']['department']],
-                    ['Période:', data['period'].strftime('%B %Y')],
-                ]
-                
-                emp_table = Table(emp_data, colWidths=[2*inch, 4*inch])
-                emp_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, -1), colors.lightgrey),
-                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(emp_table)
-                story.append(Spacer(1, 20))
-                
-                # Payroll details table
-                if options.include_details and 'line_items' in data:
-                    # Gains table
-                    gains_data = [['GAINS', 'Base', 'Quantité', 'Montant']]
-                    for item in data['line_items']['gains']:
-                        gains_data.append([
-                            item.payroll_element.label,
-                            f"{item.base_amount:.2f}" if item.base_amount else "",
-                            f"{item.quantity:.2f}" if item.quantity else "",
-                            f"{item.calculated_amount:.2f}"
-                        ])
-                    
-                    gains_table = Table(gains_data, colWidths=[2.5*inch, 1*inch, 1*inch, 1.5*inch])
-                    gains_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-                    
-                    story.append(gains_table)
-                    story.append(Spacer(1, 10))
-                    
-                    # Deductions table
-                    deductions_data = [['RETENUES', 'Base', 'Taux', 'Montant']]
-                    for item in data['line_items']['deductions']:
-                        deductions_data.append([
-                            item.payroll_element.label,
-                            f"{item.base_amount:.2f}" if item.base_amount else "",
-                            f"{item.quantity:.2f}%" if item.quantity else "",
-                            f"{item.calculated_amount:.2f}"
-                        ])
-                    
-                    deductions_table = Table(deductions_data, colWidths=[2.5*inch, 1*inch, 1*inch, 1.5*inch])
-                    deductions_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.darkred),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, -1), 9),
-                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                    ]))
-                    
-                    story.append(deductions_table)
-                    story.append(Spacer(1, 20))
-                
-                # Summary table
-                summary_data = [
-                    ['Brut Imposable:', f"{data['payroll_info']['gross_taxable']:.2f} MRU"],
-                    ['Brut Non Imposable:', f"{data['payroll_info']['gross_non_taxable']:.2f} MRU"],
-                    ['Total Brut:', f"{data['payroll_info']['total_gross']:.2f} MRU"],
-                    ['Total Retenues:', f"{data['payroll_info']['total_deductions']:.2f} MRU"],
-                    ['NET À PAYER:', f"{data['payroll_info']['net_salary']:.2f} MRU"],
-                ]
-                
-                summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-                summary_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, -1), (-1, -1), colors.green),
-                    ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-                    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 11),
-                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                
-                story.append(summary_table)
-                
-                # Net in words
-                if data['payroll_info']['net_in_words']:
-                    story.append(Spacer(1, 20))
-                    net_words = Paragraph(
-                        f"<b>Arrêté le présent bulletin à la somme de:</b><br/>{data['payroll_info']['net_in_words']}",
-                        styles['Normal']
-                    )
-                    story.append(net_words)
-                
-                # Watermark
-                if options.watermark:
-                    # Add watermark implementation
-                    pass
-                
-                # Build PDF
-                doc.build(story)
-                
-                # Save to storage
-                with open(temp_file.name, 'rb') as pdf_file:
-                    saved_path = default_storage.save(file_path, ContentFile(pdf_file.read()))
-                
-                return saved_path
+        return data
+    
+    def _generate_pdf_payslip(self, data: Dict[str, Any], template: 'PayslipTemplate', 
+                             options: PayslipGenerationOptions) -> bytes:
+        """Generate PDF payslip using ReportLab"""
+        if not REPORTLAB_AVAILABLE:
+            raise FileProcessingError("ReportLab not available for PDF generation", "MISSING_DEPENDENCY")
+        
+        layout = self._get_pdf_layout(template)
+        
+        # Create PDF document in memory
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(
+            buffer,
+            pagesize=layout['pagesize'],
+            encrypt=self._pdf_encryption(options),
+            **layout['margins']
+        )
+        
+        # Build PDF
+        doc.build(self._build_pdf_story(data, layout, options))
+        
+        return buffer.getvalue()
+    
+    def _build_pdf_story(self, data: Dict[str, Any], layout: Dict[str, Any],
+                         options: PayslipGenerationOptions) -> List[Any]:
+        """Flowables of one payslip"""
+        story = []
+        styles = layout['styles']
+        
+        # Header
+        if options.include_logo and layout['logo']:
+            story.append(Image(io.BytesIO(layout['logo']), width=1.5*inch, height=0.75*inch, kind='proportional'))
+        
+        # Title
+        if options.language == 'ar':
+            title = "بيان الراتب"
+        else:
+            title = "BULLETIN DE PAIE"
+        
+        story.append(Paragraph(title, layout['title_style']))
+        story.append(Spacer(1, 20))
+        
+        # Employee information table
+        emp_data = [
+            ['Nom/Prénom:', data['employee_info']['full_name']],
+            ['Matricule:', str(data['employee_info']['employee_id'])],
+            ['Poste:', data['employee_info']['position']],
+            ['Département:', data['employee_info']['department']],
+            ['Période:', data['period'].strftime('%B %Y')],
+        ]
+        
+        emp_table = Table(emp_data, colWidths=[2*inch, 4*inch])
+        emp_table.setStyle(layout['employee_style'])
+        
+        story.append(emp_table)
+        story.append(Spacer(1, 20))
+        
+        # Payroll details table
+        if options.include_details and 'line_items' in data:
+            # Gains table
+            gains_data = [['GAINS', 'Base', 'Quantité', 'Montant']]
+            for item in data['line_items']['gains']:
+                gains_data.append([
+                    item.payroll_element.label,
+                    f"{item.base_amount:.2f}" if item.base_amount else "",
+                    f"{item.quantity:.2f}" if item.quantity else "",
+                    f"{item.calculated_amount:.2f}"
+                ])
+            
+            gains_table = Table(gains_data, colWidths=[2.5*inch, 1*inch, 1*inch, 1.5*inch])
+            gains_table.setStyle(layout['gains_style'])
+            
+            story.append(gains_table)
+            story.append(Spacer(1, 10))
+            
+            # Deductions table
+            deductions_data = [['RETENUES', 'Base', 'Taux', 'Montant']]
+            for item in data['line_items']['deductions']:
+                deductions_data.append([
+                    item.payroll_element.label,
+                    f"{item.base_amount:.2f}" if item.base_amount else "",
+                    f"{item.quantity:.2f}%" if item.quantity else "",
+                    f"{item.calculated_amount:.2f}"
+                ])
             
-            finally:
-                # Cleanup temporary file
-                if os.path.exists(temp_file.name):
-                    os.unlink(temp_file.name)
+            deductions_table = Table(deductions_data, colWidths=[2.5*inch, 1*inch, 1*inch, 1.5*inch])
+            deductions_table.setStyle(layout['deductions_style'])
+            
+            story.append(deductions_table)
+            story.append(Spacer(1, 20))
+        
+        # Summary table
+        summary_data = [
+            ['Brut Imposable:', f"{data['payroll_info']['gross_taxable']:.2f} MRU"],
+            ['Brut Non Imposable:', f"{data['payroll_info']['gross_non_taxable']:.2f} MRU"],
+            ['Total Brut:', f"{data['payroll_info']['total_gross']:.2f} MRU"],
+            ['Total Retenues:', f"{data['payroll_info']['total_deductions']:.2f} MRU"],
+            ['NET À PAYER:', f"{data['payroll_info']['net_salary']:.2f} MRU"],
+        ]
+        
+        summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+        summary_table.setStyle(layout['summary_style'])
+        
+        story.append(summary_table)
+        
+        # Net in words
+        if data['payroll_info']['net_in_words']:
+            story.append(Spacer(1, 20))
+            net_words = Paragraph(
+                f"<b>Arrêté le présent bulletin à la somme de:</b><br/>{data['payroll_info']['net_in_words']}",
+                styles['Normal']
+            )
+            story.append(net_words)
+        
+        # Watermark
+        if options.watermark:
+            # Add watermark implementation
+            pass
+        
+        return story
     
     def _generate_html_payslip(self, data: Dict[str, Any], template: 'PayslipTemplate', 
-                              options: PayslipGenerationOptions) -> str:
+                              options: PayslipGenerationOptions) -> bytes:
         """Generate HTML payslip"""
-        # Create filename
-        employee = data['employee']
-        period = data['period']
-        filename = f"bulletin_paie_{employee.id}_{period.strftime('%Y_%m')}.html"
-        file_path = f"payroll/bulletins/{period.strftime('%Y/%m')}/{filename}"
-        
         try:
-            # Render template
-            html_template = Template(template.html_template)
+            # Render template, compiled once per generator
+            html_template = self._html_templates.get(template.pk)
+            if html_template is None:
+                html_template = self._html_templates[template.pk] = Template(template.html_template)
             context = Context(data)
             html_content = html_template.render(context)
             
@@ -849,29 +1206,22 @@ class PayslipGenerator:
             if template.css_styles:
                 html_content = f"<style>{template.css_styles}</style>\n{html_content}"
             
-            # Save to storage
-            saved_path = default_storage.save(file_path, ContentFile(html_content.encode('utf-8')))
-            return saved_path
+            return html_content.encode('utf-8')
         
         except Exception as e:
             logger.error(f"HTML payslip generation error: {str(e)}")
             raise
     
     def _generate_excel_payslip(self, data: Dict[str, Any], template: 'PayslipTemplate', 
-                               options: PayslipGenerationOptions) -> str:
+                               options: PayslipGenerationOptions) -> bytes:
         """Generate Excel payslip"""
         # Implementation would use openpyxl or xlsxwriter
         # For now, return None to indicate unsupported
         raise NotImplementedError("Excel payslip generation not yet implemented")
     
     def _generate_text_payslip(self, data: Dict[str, Any], template: 'PayslipTemplate', 
-                              options: PayslipGenerationOptions) -> str:
+                              options: PayslipGenerationOptions) -> bytes:
         """Generate plain text payslip"""
-        employee = data['employee']
-        period = data['period']
-        filename = f"bulletin_paie_{employee.id}_{period.strftime('%Y_%m')}.txt"
-        file_path = f"payroll/bulletins/{period.strftime('%Y/%m')}/{filename}"
-        
         try:
             # Create simple text payslip
             lines = []
@@ -897,19 +1247,17 @@ class PayslipGenerator:
             
             content = "\n".join(lines)
             
-            # Save to storage
-            saved_path = default_storage.save(file_path, ContentFile(content.encode('utf-8')))
-            return saved_path
+            return content.encode('utf-8')
         
         except Exception as e:
             logger.error(f"Text payslip generation error: {str(e)}")
             raise
     
-    def _apply_pdf_security(self, file_path: str, password: str):
-        """Apply password protection to PDF (placeholder)"""
-        # This would require a PDF manipulation library like PyPDF2 or pdftk
-        # For now, log the intention
-        logger.info(f"Password protection requested for {file_path}")
+    def _pdf_encryption(self, options: PayslipGenerationOptions) -> Optional['StandardEncryption']:
+        """Encryption of a password protected PDF payslip, applied while it is drawn (None without protection)"""
+        if not options.password_protect:
+            return None
+        return StandardEncryption(options.password, canModify=0, canAnnotate=0, strength=128)
     
     def _get_french_labels(self) -> Dict[str, str]:
         """Get French labels for payslip"""
@@ -954,13 +1302,55 @@ class PayslipGenerator:
         }
 
 
+# Per-process state of payslip rendering workers
+_payslip_worker_state = {}
+
+
+def _initialize_payslip_worker(template, options):
+    """Set up a payslip worker process: Django ready, template resources loaded once"""
+    initialize_worker_django()
+    
+    generator = PayslipGenerator(workers=1)
+    if options.format == PayslipFormat.PDF and REPORTLAB_AVAILABLE:
+        generator._get_pdf_layout(template)
+    
+    _payslip_worker_state.update({
+        'generator': generator,
+        'template': template,
+        'options': options,
+    })
+
+
+def _render_payslip_chunk(chunk):
+    """Render a chunk of prepared payslips in a worker process"""
+    state = _payslip_worker_state
+    return state['generator']._render_payslip_chunk(chunk, state['template'], state['options'])
+
+
+class DistributionAuditLogger:
+    """Audit trail of payslip distributions, also kept in the security audit log when available"""
+    
+    def log_payslip_distribution(self, employee: Employee, payroll: Payroll, action: str,
+                                 details: Dict[str, Any] = None):
+        event = {
+            'action': action,
+            'employee_id': employee.id,
+            'payroll_id': payroll.id,
+            'period': payroll.period.strftime('%Y-%m'),
+            **(details or {})
+        }
+        logger.info(f"Payslip distribution {action}: {json.dumps(event, default=str)}")
+        if SECURITY_AUDIT_AVAILABLE:
+            log_security_event('DATA_ACCESS', additional_data=event)
+
+
 class DistributionManager:
     """Advanced distribution manager with multi-channel support and tracking"""
     
     def __init__(self):
-        self.security_manager = SecurityManager()
-        self.audit_logger = AuditLogger()
+        self.audit_logger = DistributionAuditLogger()
         self.file_storage = FileStorageManager()
+        self.payslip_generator = PayslipGenerator()
         
     def distribute_payslips(self, payrolls: List[Payroll], 
                            distribution_options: DistributionOptions = None) -> Dict[str, Any]:
@@ -1021,6 +1411,9 @@ class DistributionManager:
                                 channel=channel.value,
                                 status=DistributionStatus.PENDING.value,
                                 scheduled_time=distribution_options.schedule_time,
+                                priority=DISTRIBUTION_PRIORITIES.get(distribution_options.priority,
+                                                                     DISTRIBUTION_PRIORITIES['normal']),
+                                due_time=distribution_options.schedule_time or timezone.now(),
                                 recipient_email=payroll.employee.email if channel == DistributionChannel.EMAIL else '',
                                 recipient_phone=payroll.employee.phone if channel == DistributionChannel.SMS else '',
                                 distribution_options=json.dumps({
@@ -1052,7 +1445,9 @@ class DistributionManager:
             
             # Process distributions if not scheduled for later
             if not distribution_options.schedule_time or distribution_options.schedule_time <= timezone.now():
-                self._process_pending_distributions(distribution_options)
+                # Claimed like any due delivery, so a running scheduler cannot send them too
+                scheduler = DistributionScheduler(self, batch_size=distribution_options.batch_size)
+                scheduler.process_due([record['distribution_id'] for record in result['created_records']])
                 
                 # Update results with processing outcomes
                 for record in result['created_records']:
@@ -1061,7 +1456,7 @@ class DistributionManager:
                     
                     if distribution.status in [DistributionStatus.SENT.value, DistributionStatus.DELIVERED.value]:
                         result['distributions_sent'] += 1
-                    elif distribution.status == DistributionStatus.QUEUED.value:
+                    elif distribution.status in [DistributionStatus.QUEUED.value, DistributionStatus.RETRY.value]:
                         result['distributions_scheduled'] += 1
             else:
                 result['distributions_scheduled'] = result['distributions_created']
@@ -1076,44 +1471,15 @@ class DistributionManager:
         return result
     
     def process_scheduled_distributions(self) -> Dict[str, Any]:
-        """Process distributions scheduled for current time"""
-        current_time = timezone.now()
-        
-        # Get pending distributions that are due
-        pending_distributions = PayslipDistributionRecord.objects.filter(
-            status=DistributionStatus.PENDING.value,
-            scheduled_time__lte=current_time
-        ).select_related('employee', 'payroll')
-        
-        result = {
-            'processed_count': 0,
-            'success_count': 0,
-            'failed_count': 0,
-            'errors': []
-        }
-        
-        try:
-            # Group by channel for efficient processing
-            distributions_by_channel = defaultdict(list)
-            for dist in pending_distributions:
-                distributions_by_channel[dist.channel].append(dist)
-            
-            # Process each channel
-            for channel, distributions in distributions_by_channel.items():
-                if channel == DistributionChannel.EMAIL.value:
-                    self._process_email_distributions(distributions, result)
-                elif channel == DistributionChannel.PRINT.value:
-                    self._process_print_distributions(distributions, result)
-                elif channel == DistributionChannel.SMS.value:
-                    self._process_sms_distributions(distributions, result)
-                # Add other channels as needed
-            
-            logger.info(f"Scheduled distributions processed: {result['success_count']}/{result['processed_count']}")
-        
-        except Exception as e:
-            logger.error(f"Scheduled distribution processing error: {str(e)}")
-            result['errors'].append(str(e))
+        """
+        Deliver every distribution due now and return
         
+        For callers running it periodically: records are claimed with a lease
+        like in the scheduler process (see DistributionScheduler), so both
+        can run at the same time without sending a payslip twice.
+        """
+        result = DistributionScheduler(self).process_due()
+        logger.info(f"Scheduled distributions processed: {result['success_count']}/{result['processed_count']}")
         return result
     
     def retry_failed_distributions(self, max_retries: int = None) -> Dict[str, Any]:
@@ -1125,8 +1491,7 @@ class DistributionManager:
         query &= Q(next_retry_time__lte=current_time) | Q(next_retry_time__isnull=True)
         if max_retries is not None:
             query &= Q(retry_count__lt=max_retries)
-        
-        failed_distributions = PayslipDistributionRecord.objects.filter(query).select_related('employee', 'payroll')
+        query &= Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=current_time)
         
         result = {
             'retry_count': 0,
@@ -1136,44 +1501,23 @@ class DistributionManager:
         }
         
         try:
-            for distribution in failed_distributions:
-                result['retry_count'] += 1
-                
-                # Update retry tracking
-                distribution.retry_count += 1
-                distribution.last_retry_time = current_time
-                distribution.status = DistributionStatus.RETRY.value
-                distribution.save()
-                
-                # Attempt redistribution
-                try:
-                    if distribution.channel == DistributionChannel.EMAIL.value:
-                        success = self._send_email_distribution(distribution)
-                    elif distribution.channel == DistributionChannel.PRINT.value:
-                        success = self._send_print_distribution(distribution)
-                    elif distribution.channel == DistributionChannel.SMS.value:
-                        success = self._send_sms_distribution(distribution)
-                    else:
-                        success = False
-                    
-                    if success:
-                        result['success_count'] += 1
-                    else:
-                        result['failed_count'] += 1
-                        # Schedule next retry if attempts remaining
-                        if distribution.retry_count < 10:
-                            distribution.next_retry_time = current_time + timedelta(seconds=300 * distribution.retry_count)
-                            distribution.status = DistributionStatus.FAILED.value
-                        else:
-                            distribution.status = DistributionStatus.CANCELLED.value
-                        distribution.save()
-                
-                except Exception as e:
-                    logger.error(f"Retry distribution error: {str(e)}")
-                    result['failed_count'] += 1
-                    distribution.status = DistributionStatus.FAILED.value
-                    distribution.error_message = str(e)
-                    distribution.save()
+            # Queue them as due now and deliver them through the scheduler
+            failed_ids = list(PayslipDistributionRecord.objects.filter(query).values_list('id', flat=True))
+            for batch_start in range(0, len(failed_ids), 500):
+                batch_ids = failed_ids[batch_start:batch_start + 500]
+                result['retry_count'] += PayslipDistributionRecord.objects.filter(id__in=batch_ids).update(
+                    status=DistributionStatus.RETRY.value,
+                    retry_count=F('retry_count') + 1,
+                    last_retry_time=current_time,
+                    next_retry_time=current_time,
+                    due_time=current_time
+                )
+            
+            if failed_ids:
+                delivery_result = DistributionScheduler(self).process_due(failed_ids)
+                result['success_count'] = delivery_result['success_count']
+                result['failed_count'] = delivery_result['failed_count']
+                result['errors'].extend(delivery_result['errors'])
             
             logger.info(f"Distribution retries processed: {result['success_count']}/{result['retry_count']}")
         
@@ -1196,57 +1540,98 @@ class DistributionManager:
         else:
             return False
     
-    def _process_pending_distributions(self, options: DistributionOptions):
-        """Process pending distributions immediately"""
-        pending = PayslipDistributionRecord.objects.filter(
-            status=DistributionStatus.PENDING.value
-        ).select_related('employee', 'payroll')
+    def _process_email_distributions(self, distributions: List[PayslipDistributionRecord], 
+                                   result: Dict[str, Any]):
+        """
+        Send email distributions through the email dispatcher
         
-        # Group by channel for batch processing
-        distributions_by_channel = defaultdict(list)
-        for dist in pending:
-            distributions_by_channel[dist.channel].append(dist)
+        Payslips are generated in bulk first (unchanged ones keep their stored
+        file), then messages are built as the dispatcher's threads send them
+        over a few persistent connections, within the per-domain rate limits.
+        Status changes are written back with bulk updates.
+        """
+        status_updates = []
+        
+        def update_status(distribution: PayslipDistributionRecord, flush: bool = False):
+            if distribution is not None:
+                status_updates.append(distribution)
+            if status_updates and (flush or len(status_updates) >= EMAIL_STATUS_BATCH_SIZE):
+                PayslipDistributionRecord.objects.bulk_update(
+                    status_updates, EMAIL_STATUS_FIELDS, batch_size=EMAIL_STATUS_BATCH_SIZE
+                )
+                status_updates.clear()
         
-        # Process each channel
-        result = {'processed_count': 0, 'success_count': 0, 'failed_count': 0}
+        def fail(distribution: PayslipDistributionRecord, error_message: str):
+            result['failed_count'] += 1
+            distribution.status = DistributionStatus.FAILED.value
+            distribution.error_message = error_message
+            update_status(distribution)
         
-        for channel, distributions in distributions_by_channel.items():
-            if channel == DistributionChannel.EMAIL.value:
-                self._process_email_distributions(distributions, result)
-            elif channel == DistributionChannel.PRINT.value:
-                self._process_print_distributions(distributions, result)
-            # Add other channels as needed
-    
-    def _process_email_distributions(self, distributions: List[PayslipDistributionRecord], 
-                                   result: Dict[str, Any]):
-        """Process email distributions with rate limiting"""
         try:
-            # Get email configuration
-            email_backend = get_connection()
-            
             for distribution in distributions:
-                result['processed_count'] += 1
-                
-                try:
-                    success = self._send_email_distribution(distribution)
-                    if success:
-                        result['success_count'] += 1
-                    else:
-                        result['failed_count'] += 1
+                distribution.status = DistributionStatus.SENDING.value
+                update_status(distribution)
+            update_status(None, flush=True)
+            
+            # Point at the current payslip files: unchanged payslips reuse their stored file
+            payrolls = list({distribution.payroll_id: distribution.payroll for distribution in distributions}.values())
+            generation_result = self.payslip_generator.generate_bulk_payslips(payrolls)
+            generated_files = {record['payroll_id']: record for record in generation_result['generated_files']}
+            
+            def messages():
+                for distribution in distributions:
+                    result['processed_count'] += 1
+                    generated_file = generated_files.get(distribution.payroll_id)
+                    if not generated_file:
+                        fail(distribution, "Échec de génération du bulletin")
+                        continue
                     
-                    # Rate limiting
-                    time.sleep(6)  # 10 emails per minute max
+                    self._point_at_payslip_file(distribution, generated_file)
+                    try:
+                        yield distribution, self._build_distribution_email(distribution)
+                    except Exception as e:
+                        logger.error(f"Email build error: {str(e)}")
+                        fail(distribution, str(e))
+            
+            dispatcher = EmailDispatcher(
+                max_workers=EMAIL_DISPATCH_WORKERS,
+                rate_limits=getattr(settings, 'PAYSLIP_EMAIL_RATE_LIMITS', EMAIL_DOMAIN_RATE_LIMITS)
+            )
+            for delivery in dispatcher.dispatch(messages()):
+                distribution = delivery.key
+                distribution.delivery_message_id = delivery.message_id
+                if not delivery.sent:
+                    fail(distribution, delivery.error)
+                    continue
                 
-                except Exception as e:
-                    logger.error(f"Email distribution error: {str(e)}")
-                    result['failed_count'] += 1
-                    distribution.status = DistributionStatus.FAILED.value
-                    distribution.error_message = str(e)
-                    distribution.save()
+                result['success_count'] += 1
+                distribution.status = DistributionStatus.SENT.value
+                distribution.sent_time = delivery.sent_time
+                distribution.error_message = ''
+                update_status(distribution)
+                
+                self.audit_logger.log_payslip_distribution(
+                    distribution.employee,
+                    distribution.payroll,
+                    'email_sent',
+                    {'recipient': distribution.recipient_email}
+                )
+            
+            logger.info(
+                f"Email distributions sent over {dispatcher.connections_opened} connections: "
+                f"{result['success_count']}/{result['processed_count']}"
+            )
         
         except Exception as e:
             logger.error(f"Email processing error: {str(e)}")
             result['errors'].append(str(e))
+            # Nothing is left marked as being sent
+            for distribution in distributions:
+                if distribution.status == DistributionStatus.SENDING.value:
+                    fail(distribution, str(e))
+        
+        finally:
+            update_status(None, flush=True)
     
     def _send_email_distribution(self, distribution: PayslipDistributionRecord) -> bool:
         """Send individual email distribution"""
@@ -1255,56 +1640,18 @@ class DistributionManager:
             distribution.status = DistributionStatus.SENDING.value
             distribution.save()
             
-            # Generate payslip if not already generated
-            if not distribution.file_path:
-                generator = PayslipGenerator()
-                generation_result = generator.generate_payslip(distribution.payroll)
-                
-                if not generation_result['success']:
-                    distribution.status = DistributionStatus.FAILED.value
-                    distribution.error_message = "Échec de génération du bulletin"
-                    distribution.save()
-                    return False
-                
-                distribution.file_path = generation_result['file_path']
-                distribution.file_size = generation_result['file_size']
-                distribution.file_hash = generation_result['file_hash']
-            
-            # Prepare email
-            subject = f"Bulletin de paie - {distribution.payroll.period.strftime('%B %Y')}"
-            
-            # Get distribution options
-            dist_options = json.loads(distribution.distribution_options) if distribution.distribution_options else {}
-            custom_message = dist_options.get('custom_message', '')
-            
-            # Email body
-            context = {
-                'employee': distribution.employee,
-                'payroll': distribution.payroll,
-                'custom_message': custom_message,
-                'access_url': self._generate_secure_access_url(distribution)
-            }
+            # Point at the current payslip file: an unchanged payslip reuses its stored file
+            generation_result = self.payslip_generator.generate_payslip(distribution.payroll)
             
-            html_body = render_to_string('payroll/email/payslip_notification.html', context)
-            text_body = render_to_string('payroll/email/payslip_notification.txt', context)
+            if not generation_result['success']:
+                distribution.status = DistributionStatus.FAILED.value
+                distribution.error_message = "Échec de génération du bulletin"
+                distribution.save()
+                return False
             
-            # Create email
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=text_body,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[distribution.recipient_email]
-            )
-            email.attach_alternative(html_body, "text/html")
-            
-            # Attach payslip file
-            if distribution.file_path and default_storage.exists(distribution.file_path):
-                with default_storage.open(distribution.file_path, 'rb') as file:
-                    email.attach(
-                        f"bulletin_paie_{distribution.payroll.period.strftime('%Y_%m')}.pdf",
-                        file.read(),
-                        'application/pdf'
-                    )
+            self._point_at_payslip_file(distribution, generation_result)
+            
+            email = self._build_distribution_email(distribution)
             
             # Send email
             email.send()
@@ -1331,6 +1678,65 @@ class DistributionManager:
             distribution.save()
             return False
     
+    def _point_at_payslip_file(self, distribution: PayslipDistributionRecord, generated_file: Dict[str, Any]):
+        """
+        Point a distribution at its current payslip file
+        
+        A corrected payroll is rendered to a new content-addressed file; the
+        file it replaces is deleted once no other distribution uses it.
+        """
+        previous_path = distribution.file_path
+        distribution.file_path = generated_file['file_path']
+        distribution.file_size = generated_file['file_size']
+        distribution.file_hash = generated_file['file_hash']
+        
+        if not previous_path or previous_path == distribution.file_path:
+            return
+        shared = PayslipDistributionRecord.objects.filter(file_path=previous_path).exclude(pk=distribution.pk).exists()
+        if not shared and default_storage.exists(previous_path):
+            default_storage.delete(previous_path)
+            cache.delete(f"{PAYSLIP_FILE_CACHE_PREFIX}:{previous_path}")
+    
+    def _build_distribution_email(self, distribution: PayslipDistributionRecord) -> EmailMultiAlternatives:
+        """Build the payslip email of a distribution, with its payslip file attached"""
+        # Prepare email
+        subject = f"Bulletin de paie - {distribution.payroll.period.strftime('%B %Y')}"
+        
+        # Get distribution options
+        dist_options = json.loads(distribution.distribution_options) if distribution.distribution_options else {}
+        custom_message = dist_options.get('custom_message', '')
+        
+        # Email body
+        context = {
+            'employee': distribution.employee,
+            'payroll': distribution.payroll,
+            'custom_message': custom_message,
+            'access_url': self._generate_secure_access_url(distribution)
+        }
+        
+        html_body = render_to_string('payroll/email/payslip_notification.html', context)
+        text_body = render_to_string('payroll/email/payslip_notification.txt', context)
+        
+        # Create email
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=text_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[distribution.recipient_email]
+        )
+        email.attach_alternative(html_body, "text/html")
+        
+        # Attach payslip file
+        if distribution.file_path and default_storage.exists(distribution.file_path):
+            with default_storage.open(distribution.file_path, 'rb') as file:
+                email.attach(
+                    f"bulletin_paie_{distribution.payroll.period.strftime('%Y_%m')}.pdf",
+                    file.read(),
+                    'application/pdf'
+                )
+        
+        return email
+    
     def _process_print_distributions(self, distributions: List[PayslipDistributionRecord], 
                                    result: Dict[str, Any]):
         """Process print distributions by creating print queue"""
@@ -1339,21 +1745,17 @@ class DistributionManager:
                 result['processed_count'] += 1
                 
                 try:
-                    # Generate payslip if not already generated
-                    if not distribution.file_path:
-                        generator = PayslipGenerator()
-                        generation_result = generator.generate_payslip(distribution.payroll)
-                        
-                        if not generation_result['success']:
-                            distribution.status = DistributionStatus.FAILED.value
-                            distribution.error_message = "Échec de génération du bulletin"
-                            distribution.save()
-                            result['failed_count'] += 1
-                            continue
-                        
-                        distribution.file_path = generation_result['file_path']
-                        distribution.file_size = generation_result['file_size']
-                        distribution.file_hash = generation_result['file_hash']
+                    # Point at the current payslip file: an unchanged payslip reuses its stored file
+                    generation_result = self.payslip_generator.generate_payslip(distribution.payroll)
+                    
+                    if not generation_result['success']:
+                        distribution.status = DistributionStatus.FAILED.value
+                        distribution.error_message = "Échec de génération du bulletin"
+                        distribution.save()
+                        result['failed_count'] += 1
+                        continue
+                    
+                    self._point_at_payslip_file(distribution, generation_result)
                     
                     # Add to print queue (implementation depends on print system)
                     distribution.status = DistributionStatus.QUEUED.value
@@ -1415,7 +1817,7 @@ class DistributionManager:
             'timestamp': timezone.now().timestamp()
         }
         
-        access_token = self.security_manager.generate_secure_token(token_data)
+        access_token = signing.dumps(token_data, salt=PAYSLIP_ACCESS_TOKEN_SALT, compress=True)
         distribution.access_token = access_token
         distribution.save(update_fields=['access_token'])
         
@@ -1423,6 +1825,371 @@ class DistributionManager:
         return f"https://payroll.company.com/payslip/view/{access_token}"
 
 
+def distribution_retry_delay(retry_count: int, base_delay: float,
+                             max_delay: float = DISTRIBUTION_MAX_RETRY_DELAY) -> float:
+    """
+    Seconds before the next attempt of a failed distribution
+    
+    Exponential backoff from base_delay, capped at max_delay, with jitter:
+    the delay is drawn in its upper half so that deliveries failing together
+    (e.g. when the mail server is down) are not all retried at once.
+    """
+    delay = min(max_delay, base_delay * 2 ** retry_count)
+    return random.uniform(delay / 2, delay)
+
+
+class DistributionMetrics:
+    """Throughput and latency of the distributions delivered by a scheduler, per channel"""
+    
+    # Latencies kept per channel for the percentiles
+    LATENCY_SAMPLES = 1000
+    
+    def __init__(self):
+        self.started = time.monotonic()
+        self.channels: Dict[str, Dict[str, Any]] = {}
+    
+    def _channel(self, channel: str) -> Dict[str, Any]:
+        if channel not in self.channels:
+            self.channels[channel] = {
+                'processed': 0, 'sent': 0, 'failed': 0, 'retried': 0, 'busy_time': 0.0,
+                'latencies': deque(maxlen=self.LATENCY_SAMPLES)
+            }
+        return self.channels[channel]
+    
+    def record(self, channel: str, outcomes: List[Tuple[str, Optional[float]]], busy_time: float):
+        """
+        Record a delivered batch of a channel
+        
+        Args:
+            channel: Distribution channel
+            outcomes: (status, latency) of each distribution, the latency
+                being the seconds from its due time to its delivery
+            busy_time: Seconds spent delivering the batch
+        """
+        metrics = self._channel(channel)
+        metrics['busy_time'] += busy_time
+        for status, latency in outcomes:
+            metrics['processed'] += 1
+            if status == DistributionStatus.RETRY.value:
+                metrics['retried'] += 1
+            elif status == DistributionStatus.FAILED.value:
+                metrics['failed'] += 1
+            else:
+                metrics['sent'] += 1
+                if latency is not None:
+                    metrics['latencies'].append(latency)
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Counts, throughput (per minute) and latency percentiles (seconds) per channel"""
+        elapsed_minutes = max(time.monotonic() - self.started, 1e-6) / 60
+        snapshot = {}
+        for channel, metrics in self.channels.items():
+            latencies = sorted(metrics['latencies'])
+            
+            def percentile(fraction: float) -> Optional[float]:
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))], 3)
+            
+            snapshot[channel] = {
+                'processed': metrics['processed'],
+                'sent': metrics['sent'],
+                'failed': metrics['failed'],
+                'retried': metrics['retried'],
+                'throughput_per_minute': round(metrics['sent'] / elapsed_minutes, 2),
+                'delivery_rate_per_minute': round(
+                    metrics['processed'] * 60 / metrics['busy_time'], 2
+                ) if metrics['busy_time'] else None,
+                'latency_avg': round(sum(latencies) / len(latencies), 3) if latencies else None,
+                'latency_p50': percentile(0.5),
+                'latency_p95': percentile(0.95),
+                'latency_max': round(latencies[-1], 3) if latencies else None,
+            }
+        return snapshot
+
+
+class DistributionScheduler:
+    """
+    Delivers due payslip distributions from the PayslipDistributionRecord queue
+    
+    Pending and retrying records carry a due_time and a priority. The
+    scheduler keeps the records due within the next lookahead seconds in a
+    heap, sleeps until the earliest one is due and reloads the heap with an
+    indexed range query every poll_interval, instead of rescanning the table.
+    
+    Due records are claimed in batches, most urgent first, by setting a lease
+    with a conditional UPDATE: several scheduler processes can run together
+    and a record is only delivered by the one holding it. Failed deliveries
+    are queued again with exponential backoff and jitter until they used
+    the retry_attempts of their distribution options.
+    """
+    
+    QUEUE_STATUSES = [DistributionStatus.PENDING.value, DistributionStatus.RETRY.value]
+    
+    def __init__(self, manager: 'DistributionManager' = None, worker_id: Optional[str] = None,
+                 batch_size: int = 50, lease_timeout: int = DISTRIBUTION_LEASE_TIMEOUT,
+                 poll_interval: float = 60.0, lookahead: int = 300):
+        self.manager = manager or DistributionManager()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout
+        self.poll_interval = poll_interval
+        self.lookahead = lookahead
+        self.metrics = DistributionMetrics()
+        self._heap: List[Tuple[datetime, int, Any]] = []
+        self._refreshed_at: Optional[datetime] = None
+        self._channel_handlers = {
+            DistributionChannel.EMAIL.value: self.manager._process_email_distributions,
+            DistributionChannel.PRINT.value: self.manager._process_print_distributions,
+            DistributionChannel.SMS.value: self.manager._process_sms_distributions,
+        }
+    
+    def _queue(self, now: datetime):
+        """Queued records of the delivered channels that no scheduler holds"""
+        return PayslipDistributionRecord.objects.filter(
+            status__in=self.QUEUE_STATUSES,
+            channel__in=list(self._channel_handlers),
+            due_time__isnull=False
+        ).filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now))
+    
+    def release_stale(self) -> int:
+        """
+        Settle the records of schedulers that stopped while delivering them
+        
+        A record left sending may have been sent: it is marked failed for a
+        manual retry instead of being sent again. Records still pending or
+        retrying are claimable again once their lease expired. Pending records
+        created without a due time are queued at their scheduled time.
+        
+        Returns:
+            Number of records marked failed
+        """
+        now = timezone.now()
+        PayslipDistributionRecord.objects.filter(
+            status=DistributionStatus.PENDING.value, due_time__isnull=True
+        ).update(due_time=Coalesce('scheduled_time', 'created_at'))
+        
+        released = PayslipDistributionRecord.objects.filter(
+            status=DistributionStatus.SENDING.value, lease_expires_at__lt=now
+        ).update(
+            status=DistributionStatus.FAILED.value, error_code='LEASE_EXPIRED',
+            error_message="Envoi interrompu, état de livraison inconnu",
+            lease_owner='', lease_expires_at=None, due_time=None
+        )
+        if released:
+            logger.warning(f"Released {released} interrupted payslip distributions")
+        return released
+    
+    def refresh(self, now: Optional[datetime] = None):
+        """Reload the heap with the records due within the lookahead window"""
+        now = now or timezone.now()
+        self._heap = list(
+            self._queue(now).filter(due_time__lte=now + timedelta(seconds=self.lookahead))
+            .order_by('due_time').values_list('due_time', 'priority', 'id')[:self.batch_size * 20]
+        )
+        heapq.heapify(self._heap)
+        self._refreshed_at = now
+    
+    def next_wakeup(self, now: datetime) -> float:
+        """Seconds until the next record is due or the heap is reloaded"""
+        wakeup = self._refreshed_at + timedelta(seconds=self.poll_interval)
+        if self._heap:
+            wakeup = min(wakeup, self._heap[0][0])
+        return max(0.0, (wakeup - now).total_seconds())
+    
+    def _pop_due(self, now: datetime) -> List[Any]:
+        """Ids of the most urgent records due now, at most batch_size"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        due.sort(key=lambda entry: (entry[1], entry[0]))
+        for entry in due[self.batch_size:]:
+            heapq.heappush(self._heap, entry)
+        return [entry[2] for entry in due[:self.batch_size]]
+    
+    def claim_batch(self, distribution_ids: Optional[List[Any]] = None) -> List[PayslipDistributionRecord]:
+        """
+        Lease a batch of due records to this scheduler
+        
+        Args:
+            distribution_ids: Only claim among these records, read from the
+                table instead of the heap
+        """
+        while True:
+            now = timezone.now()
+            if distribution_ids is not None:
+                candidates = list(
+                    self._queue(now).filter(id__in=distribution_ids, due_time__lte=now)
+                    .order_by('priority', 'due_time').values_list('id', flat=True)[:self.batch_size]
+                )
+            else:
+                candidates = self._pop_due(now)
+            if not candidates:
+                return []
+            
+            # Records claimed by another scheduler meanwhile are skipped
+            if self._queue(now).filter(id__in=candidates, due_time__lte=now).update(
+                lease_owner=self.worker_id, lease_expires_at=now + timedelta(seconds=self.lease_timeout)
+            ):
+                return list(
+                    PayslipDistributionRecord.objects.filter(id__in=candidates, lease_owner=self.worker_id)
+                    .select_related('employee', 'payroll').order_by('priority', 'due_time')
+                )
+    
+    def _held(self, distribution_ids: List[Any]):
+        return PayslipDistributionRecord.objects.filter(id__in=distribution_ids, lease_owner=self.worker_id)
+    
+    def deliver(self, distributions: List[PayslipDistributionRecord]) -> Dict[str, Any]:
+        """Deliver claimed records by channel, queue the failed ones again and release the batch"""
+        result = {'processed_count': 0, 'success_count': 0, 'failed_count': 0, 'errors': []}
+        
+        distributions_by_channel = defaultdict(list)
+        for distribution in distributions:
+            distributions_by_channel[distribution.channel].append(distribution)
+        
+        for channel, channel_distributions in distributions_by_channel.items():
+            channel_ids = [distribution.id for distribution in channel_distributions]
+            due_times = {distribution.id: distribution.due_time for distribution in channel_distributions}
+            
+            # The lease covers the whole batch from the start of each channel
+            self._held(channel_ids).update(
+                lease_expires_at=timezone.now() + timedelta(seconds=self.lease_timeout)
+            )
+            
+            start_time = time.monotonic()
+            self._channel_handlers[channel](channel_distributions, result)
+            busy_time = time.monotonic() - start_time
+            
+            outcomes = []
+            for distribution in channel_distributions:
+                if distribution.status in self.QUEUE_STATUSES:
+                    # Left untouched by a handler error: retried like a failure
+                    distribution.status = DistributionStatus.FAILED.value
+                if distribution.status == DistributionStatus.FAILED.value:
+                    self._schedule_retry(distribution)
+                sent_time = distribution.sent_time or timezone.now()
+                latency = (sent_time - due_times[distribution.id]).total_seconds() if due_times[distribution.id] else None
+                outcomes.append((distribution.status, latency))
+            self.metrics.record(channel, outcomes, busy_time)
+            
+            self._held(channel_ids).update(lease_owner='', lease_expires_at=None)
+        
+        return result
+    
+    def _schedule_retry(self, distribution: PayslipDistributionRecord):
+        """Queue a failed record again after its backoff, or leave it failed"""
+        options = json.loads(distribution.distribution_options) if distribution.distribution_options else {}
+        defaults = DistributionOptions()
+        now = timezone.now()
+        
+        if distribution.retry_count < options.get('retry_attempts', defaults.retry_attempts):
+            delay = distribution_retry_delay(distribution.retry_count, options.get('retry_delay', defaults.retry_delay))
+            distribution.status = DistributionStatus.RETRY.value
+            distribution.retry_count += 1
+            distribution.last_retry_time = now
+            distribution.next_retry_time = distribution.due_time = now + timedelta(seconds=delay)
+        else:
+            distribution.next_retry_time = distribution.due_time = None
+        
+        self._held([distribution.id]).update(
+            status=distribution.status, retry_count=distribution.retry_count,
+            last_retry_time=distribution.last_retry_time, next_retry_time=distribution.next_retry_time,
+            due_time=distribution.due_time
+        )
+    
+    def run_once(self, distribution_ids: Optional[List[Any]] = None) -> Optional[Dict[str, Any]]:
+        """Claim and deliver one batch; returns None when nothing is due"""
+        distributions = self.claim_batch(distribution_ids)
+        if not distributions:
+            return None
+        return self.deliver(distributions)
+    
+    def process_due(self, distribution_ids: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Deliver the records due now, batch after batch, and return
+        
+        Args:
+            distribution_ids: Only deliver these records
+            
+        Returns:
+            Dictionary with the counts of all batches and the metrics
+        """
+        result = {'processed_count': 0, 'success_count': 0, 'failed_count': 0, 'errors': []}
+        
+        try:
+            if distribution_ids is None:
+                self.release_stale()
+                self.refresh()
+            
+            while True:
+                batch_result = self.run_once(distribution_ids)
+                if batch_result is None:
+                    # Records that became due while the heap was delivered
+                    if distribution_ids is None and self._refreshed_at < timezone.now() - timedelta(seconds=1):
+                        self.refresh()
+                        if self._heap and self._heap[0][0] <= timezone.now():
+                            continue
+                    break
+                for key in ('processed_count', 'success_count', 'failed_count'):
+                    result[key] += batch_result[key]
+                result['errors'].extend(batch_result['errors'])
+        
+        except Exception as e:
+            logger.error(f"Distribution scheduler error: {str(e)}")
+            result['errors'].append(str(e))
+        
+        result['metrics'] = self.metrics.snapshot()
+        return result
+    
+    def run(self, stop_event=None, max_batches: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Deliver distributions as they become due until stopped
+        
+        Args:
+            stop_event: threading/multiprocessing Event ending the loop
+            max_batches: Stop after this many batches
+            
+        Returns:
+            Metrics per channel
+        """
+        from django.db import close_old_connections
+        
+        batches = 0
+        metrics_logged = time.monotonic()
+        
+        while stop_event is None or not stop_event.is_set():
+            close_old_connections()
+            now = timezone.now()
+            
+            try:
+                if self._refreshed_at is None or now >= self._refreshed_at + timedelta(seconds=self.poll_interval):
+                    self.release_stale()
+                    self.refresh(now)
+                
+                if self.run_once() is not None:
+                    batches += 1
+                    if max_batches is not None and batches >= max_batches:
+                        break
+                    continue
+            
+            except Exception as e:
+                # The database may be briefly unavailable: wait for the next poll
+                logger.error(f"Distribution scheduler error: {str(e)}")
+                self._heap = []
+            
+            if time.monotonic() - metrics_logged >= DISTRIBUTION_METRICS_INTERVAL:
+                metrics_logged = time.monotonic()
+                logger.info(f"Distribution scheduler metrics: {json.dumps(self.metrics.snapshot())}")
+            
+            delay = self.next_wakeup(timezone.now()) if self._refreshed_at else self.poll_interval
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+        
+        return self.metrics.snapshot()
+
+
 class BulletinArchiveManager:
     """Manager for payslip archiving and storage optimization"""
     
@@ -1456,9 +2223,13 @@ class BulletinArchiveManager:
                 result['errors'].append('Aucun bulletin trouvé pour cette période')
                 return result
             
-            # Collect file paths
+            # Collect file paths, once per file shared by several distributions
             file_paths = []
+            file_paths_seen = set()
             for dist in distributions:
+                if dist.file_path in file_paths_seen:
+                    continue
+                file_paths_seen.add(dist.file_path)
                 if dist.file_path and default_storage.exists(dist.file_path):
                     file_paths.append(dist.file_path)
                     try:
@@ -1512,7 +2283,12 @@ class BulletinArchiveManager:
             
             for distribution in old_distributions:
                 try:
-                    if distribution.file_path and default_storage.exists(distribution.file_path):
+                    # Payslip files are shared by the distributions of an unchanged payslip
+                    shared = PayslipDistributionRecord.objects.filter(file_path=distribution.file_path).exclude(
+                        status=DistributionStatus.ARCHIVED.value, created_at__lt=cutoff_date
+                    ).exists()
+                    
+                    if distribution.file_path and not shared and default_storage.exists(distribution.file_path):
                         # Get file size before deletion
                         file_stats = default_storage.stat(distribution.file_path)
                         file_size = file_stats.st_size
@@ -1766,6 +2542,36 @@ def generate_and_distribute_payslips(period: date, employee_ids: List[int] = Non
     return result
 
 
+def generate_merged_period_payslips(period: date, department_ids: List[int] = None,
+                                    generation_options: PayslipGenerationOptions = None,
+                                    payslips_per_file: int = MERGED_PAYSLIPS_PER_FILE) -> Dict[str, Any]:
+    """
+    Generate the payslips of a period into merged PDF documents for printing and archiving
+    
+    Args:
+        period: Payroll period
+        department_ids: Optional list of departments to include
+        generation_options: Payslip generation configuration (PDF format)
+        payslips_per_file: Maximum payslips per document
+        
+    Returns:
+        Dictionary with the generated documents and their page index
+    """
+    payroll_query = Payroll.objects.filter(period=period).select_related(
+        'employee__position', 'employee__department'
+    ).order_by('employee__department__name', 'employee__last_name', 'employee__first_name', 'id')
+    
+    file_name = f"bulletins_paie_{period.strftime('%Y_%m')}"
+    if department_ids:
+        payroll_query = payroll_query.filter(employee__department_id__in=department_ids)
+        file_name += '_dep_' + '_'.join(str(department_id) for department_id in sorted(department_ids))
+    
+    generator = PayslipGenerator()
+    return generator.generate_merged_payslips(
+        list(payroll_query), generation_options, payslips_per_file=payslips_per_file, file_name=file_name
+    )
+
+
 def get_payslip_distribution_status(period: date, employee_id: int = None) -> Dict[str, Any]:
     """
     Get distribution status for payslips in a period
@@ -1826,23 +2632,96 @@ def get_payslip_distribution_status(period: date, employee_id: int = None) -> Di
 
 
 def schedule_monthly_payslip_distribution(distribution_day: int = 28,
-                                        distribution_options: DistributionOptions = None) -> Dict[str, Any]:
+                                        distribution_options: DistributionOptions = None,
+                                        period: date = None) -> Dict[str, Any]:
     """
-    Schedule automatic monthly payslip distribution
+    Schedule the distribution of a payroll period on a day of its month
+    
+    Distribution records are created due at 08:00 on distribution_day (the
+    last day of shorter months), or now when that time has passed, and are
+    delivered by the distribution scheduler (run_distribution_schedulers()).
+    Payrolls already distributed on a channel are skipped.
     
     Args:
         distribution_day: Day of month to send payslips
         distribution_options: Distribution configuration
+        period: Payroll period (defaults to the latest one)
         
     Returns:
         Dictionary with scheduling result
     """
-    # This would integrate with a task scheduler like Celery
-    # For now, return a placeholder implementation
+    distribution_options = distribution_options or DistributionOptions()
+    period = period or Payroll.objects.aggregate(latest=Max('period'))['latest']
+    
+    if period is None:
+        return {
+            'success': False,
+            'message': 'Aucune période de paie à distribuer',
+            'distribution_day': distribution_day,
+            'next_run': None
+        }
+    
+    day = min(max(distribution_day, 1), calendar.monthrange(period.year, period.month)[1])
+    next_run = max(
+        timezone.make_aware(datetime(period.year, period.month, day, 8)),
+        timezone.now()
+    )
+    
+    channels = [channel.value for channel in distribution_options.channels]
+    payrolls = list(
+        Payroll.objects.filter(period=period).select_related('employee').exclude(
+            distributions__channel__in=channels,
+            distributions__status__in=[
+                status.value for status in DistributionStatus if status != DistributionStatus.CANCELLED
+            ]
+        ).distinct()
+    )
+    
+    distribution_result = DistributionManager().distribute_payslips(
+        payrolls, replace(distribution_options, schedule_time=next_run)
+    )
     
     return {
-        'success': True,
-        'message': f'Distribution automatique programmée pour le {distribution_day} de chaque mois',
+        'success': distribution_result['success'],
+        'message': f'Distribution de la période {period.strftime("%m/%Y")} programmée le {next_run.strftime("%d/%m/%Y %H:%M")}',
         'distribution_day': distribution_day,
-        'next_run': 'À implémenter avec le planificateur de tâches'
-    }
\ No newline at end of file
+        'period': period.strftime('%Y-%m'),
+        'next_run': next_run.isoformat(),
+        'distributions_created': distribution_result['distributions_created'],
+        'errors': distribution_result['errors']
+    }
+
+
+def _scheduler_main(options: Dict[str, Any], stop_event):
+    import django
+    
+    django.setup()
+    try:
+        DistributionScheduler(**options).run(stop_event=stop_event)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_distribution_schedulers(processes: int = 1, **options):
+    """
+    Run distribution schedulers in separate processes until interrupted
+    
+    Args:
+        processes: Number of scheduler processes
+        **options: DistributionScheduler options
+    """
+    import multiprocessing
+    
+    context = multiprocessing.get_context('spawn')
+    stop_event = context.Event()
+    schedulers = [context.Process(target=_scheduler_main, args=(options, stop_event), daemon=True)
+                  for _ in range(processes)]
+    for scheduler in schedulers:
+        scheduler.start()
+    try:
+        for scheduler in schedulers:
+            scheduler.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for scheduler in schedulers:
+            scheduler.join(timeout=30)
@@ -38,10 +38,51 @@ from ..utils.date_utils import (
 )
 from ..utils.business_rules import PayrollBusinessRules
 from ..utils.report_utils import ReportFormatter, ReportContext, ExportUtilities
+from ..utils.payroll_snapshots import (
+    NUMPY_AVAILABLE as SNAPSHOTS_AVAILABLE, FILTER_COLUMNS as SNAPSHOT_FILTER_COLUMNS,
+    PayrollSnapshotStore
+)
+from ..utils.period_aggregates import PERIOD_TRUNCATIONS, aggregate_totals, supports_aggregate_filters
+from ..utils.report_cache import report_cache
+from .streaming_exports import DEFAULT_CHUNK_SIZE, PayrollStateExport, export_rows
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
 
 
 logger = logging.getLogger(__name__)
 
+# Time series metrics summed from a Payroll field
+TIME_SERIES_AMOUNTS = {
+    'net_salary': 'net_salary',
+    'gross_taxable': 'gross_taxable',
+    'gross_non_taxable': 'gross_non_taxable',
+    'cnss_employee': 'cnss_employee',
+    'cnam_employee': 'cnam_employee',
+    'its': 'its_total',
+    'working_days': 'worked_days',
+}
+
+# Counted time series metrics: payroll records and distinct employees
+TIME_SERIES_COUNTS = ('employee_count', 'headcount')
+
+# Every time series metric; productivity is the average net salary per payroll
+TIME_SERIES_METRICS = (*TIME_SERIES_AMOUNTS, *TIME_SERIES_COUNTS, 'productivity')
+
+# Snapshot totals keys of the counted metrics
+SNAPSHOT_SERIES_KEYS = {'employee_count': 'record_count', 'headcount': 'total_employees'}
+
+# Months per time series bucket
+BUCKET_MONTHS = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def _to_decimal(value, places: int = 2) -> Decimal:
+    """Convert a NumPy/float result to a report Decimal"""
+    return Decimal(str(round(float(value), places)))
+
 
 @dataclass
 class PeriodSummary:
@@ -82,6 +123,31 @@ class TrendData:
     forecast_next_period: Decimal
 
 
+@dataclass
+class PayrollTimeSeries:
+    """Dense payroll time series: one value per bucket, empty buckets as zeros"""
+    periods: List[date]  # bucket start dates
+    per: str  # month, quarter, year
+    values: Dict[str, Any]  # metric -> float64 array aligned with periods
+    
+    def __len__(self) -> int:
+        return len(self.periods)
+    
+    def __getitem__(self, metric: str):
+        return self.values[metric]
+    
+    def to_records(self, metric: str) -> List[Dict[str, Any]]:
+        """Points of a metric as {'period', 'value', 'period_formatted'} dicts"""
+        return [
+            {
+                'period': period,
+                'value': _to_decimal(value),
+                'period_formatted': ReportFormatter.format_date_for_report(period, "period"),
+            }
+            for period, value in zip(self.periods, self.values[metric].tolist())
+        ]
+
+
 class CumulativeReportPeriodType:
     """Period types for cumulative reporting"""
     MONTHLY = "monthly"
@@ -99,15 +165,24 @@ class CumulativeDataAggregator:
     Handles complex queries and data preparation with performance optimization
     """
     
-    def __init__(self, cache_timeout: int = 3600):
+    def __init__(self, cache_timeout: Optional[int] = None, snapshot_store: Optional[PayrollSnapshotStore] = None,
+                 use_snapshots: bool = True, use_period_aggregates: bool = True):
         """
         Initialize aggregator with caching configuration
         
         Args:
-            cache_timeout: Cache timeout in seconds (default 1 hour)
+            cache_timeout: Cache timeout in seconds (default None: until the
+                payroll data of the report months changes, 0 disables caching)
+            snapshot_store: Columnar store of closed periods (default store when NumPy is available)
+            use_snapshots: Read closed periods from snapshots instead of the ORM
+            use_period_aggregates: Read period totals from the PayrollPeriodAggregate rollup
         """
         self.cache_timeout = cache_timeout
         self.cache_prefix = "cumulative_reports"
+        self.use_period_aggregates = use_period_aggregates
+        if snapshot_store is None and use_snapshots and SNAPSHOTS_AVAILABLE:
+            snapshot_store = PayrollSnapshotStore()
+        self.snapshot_store = snapshot_store if use_snapshots else None
     
     def get_ytd_summary(self, year: int, filters: Dict[str, Any] = None) -> Dict[str, Any]:
         """
@@ -120,11 +195,15 @@ class CumulativeDataAggregator:
         Returns:
             Dictionary with YTD summary data and detailed breakdowns
         """
-        cache_key = f"{self.cache_prefix}:ytd_summary:{year}:{hash(str(filters))}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
+        start_date = date(year, 1, 1)
+        end_date = min(date(year, 12, 31), date.today())
+        return self._cached_report(
+            'ytd_summary', start_date, end_date, {'year': year, 'end_date': end_date, 'filters': filters},
+            lambda: self._build_ytd_summary(year, filters),
+        )
+    
+    def _build_ytd_summary(self, year: int, filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Compute the year-to-date summary"""
         try:
             from ..models.payroll_processing import Payroll
             from ..models.employee import Employee
@@ -134,37 +213,68 @@ class CumulativeDataAggregator:
             current_date = date.today()
             end_date = min(date(year, 12, 31), current_date)
             
-            # Base queryset with filters
-            payroll_qs = Payroll.objects.filter(
-                period__gte=start_date,
-                period__lte=end_date
-            ).select_related('employee', 'employee__department', 'employee__direction')
-            
-            # Apply additional filters
-            payroll_qs = self._apply_filters(payroll_qs, filters)
-            
-            # Aggregate YTD totals
-            ytd_aggregates = payroll_qs.aggregate(
-                total_employees=Count('employee', distinct=True),
-                total_gross_taxable=Sum('gross_taxable'),
-                total_gross_non_taxable=Sum('gross_non_taxable'),
-                total_net_salary=Sum('net_salary'),
-                total_cnss_employee=Sum('cnss_employee'),
-                total_cnam_employee=Sum('cnam_employee'),
-                total_its=Sum('its_total'),
-                total_working_days=Sum('worked_days'),
-                total_overtime_hours=Sum('overtime_hours'),
-                total_gross_deductions=Sum('gross_deductions'),
-                total_net_deductions=Sum('net_deductions'),
-                average_net_salary=Avg('net_salary'),
-                max_net_salary=Sum('net_salary'),  # Will be corrected below
-                min_net_salary=Sum('net_salary'),  # Will be corrected below
-            )
-            
-            # Handle None values
-            for key, value in ytd_aggregates.items():
-                if value is None:
-                    ytd_aggregates[key] = Decimal('0') if 'total_' in key or 'average_' in key else 0
+            # Closed periods are read from the columnar snapshots when available
+            snapshot = self._snapshot_frame(start_date, end_date, filters)
+            if snapshot is not None:
+                ytd_aggregates = self._snapshot_aggregates(snapshot)
+                monthly_breakdown = self._get_monthly_breakdown(year, filters)
+                department_breakdown = self._get_snapshot_breakdown(snapshot, 'department_name', 'employee__department__name')
+                direction_breakdown = self._get_snapshot_breakdown(snapshot, 'direction_name', 'employee__direction__name')
+                top_earners = snapshot.employee_totals(limit=10)
+                compliance_metrics = self._calculate_snapshot_compliance_metrics(snapshot)
+            else:
+                # Base queryset with filters
+                payroll_qs = Payroll.objects.filter(
+                    period__gte=start_date,
+                    period__lte=end_date
+                ).select_related('employee', 'employee__department', 'employee__direction')
+                
+                # Apply additional filters
+                payroll_qs = self._apply_filters(payroll_qs, filters)
+                
+                # Aggregate YTD totals
+                if self._rollup_applies(filters):
+                    ytd_aggregates = self._rollup_aggregates(
+                        aggregate_totals(start_date, end_date, filters)[0],
+                        self._count_employees(start_date, end_date, filters)
+                    )
+                else:
+                    ytd_aggregates = payroll_qs.aggregate(
+                        total_employees=Count('employee', distinct=True),
+                        total_gross_taxable=Sum('gross_taxable'),
+                        total_gross_non_taxable=Sum('gross_non_taxable'),
+                        total_net_salary=Sum('net_salary'),
+                        total_cnss_employee=Sum('cnss_employee'),
+                        total_cnam_employee=Sum('cnam_employee'),
+                        total_its=Sum('its_total'),
+                        total_working_days=Sum('worked_days'),
+                        total_overtime_hours=Sum('overtime_hours'),
+                        total_gross_deductions=Sum('gross_deductions'),
+                        total_net_deductions=Sum('net_deductions'),
+                        average_net_salary=Avg('net_salary'),
+                        max_net_salary=Sum('net_salary'),  # Will be corrected below
+                        min_net_salary=Sum('net_salary'),  # Will be corrected below
+                    )
+                    
+                    # Handle None values
+                    for key, value in ytd_aggregates.items():
+                        if value is None:
+                            ytd_aggregates[key] = Decimal('0') if 'total_' in key or 'average_' in key else 0
+                
+                # Monthly breakdown
+                monthly_breakdown = self._get_monthly_breakdown(year, filters)
+                
+                # Department breakdown
+                department_breakdown = self._get_department_breakdown(payroll_qs)
+                
+                # Direction breakdown
+                direction_breakdown = self._get_direction_breakdown(payroll_qs)
+                
+                # Top earning employees YTD
+                top_earners = self._get_top_earners_ytd(payroll_qs, limit=10)
+                
+                # Compliance metrics
+                compliance_metrics = self._calculate_compliance_metrics(payroll_qs, year)
             
             # Calculate additional metrics
             total_employees = ytd_aggregates['total_employees']
@@ -174,21 +284,6 @@ class CumulativeDataAggregator:
             employer_cnss = ytd_aggregates['total_cnss_employee'] * Decimal('1.5')  # Employer pays 1.5x employee
             employer_cnam = ytd_aggregates['total_cnam_employee'] * Decimal('1')    # Employer pays equal amount
             
-            # Monthly breakdown
-            monthly_breakdown = self._get_monthly_breakdown(year, filters)
-            
-            # Department breakdown
-            department_breakdown = self._get_department_breakdown(payroll_qs)
-            
-            # Direction breakdown
-            direction_breakdown = self._get_direction_breakdown(payroll_qs)
-            
-            # Top earning employees YTD
-            top_earners = self._get_top_earners_ytd(payroll_qs, limit=10)
-            
-            # Compliance metrics
-            compliance_metrics = self._calculate_compliance_metrics(payroll_qs, year)
-            
             # Performance indicators
             performance_indicators = {
                 'average_salary_per_employee': ytd_aggregates['total_net_salary'] / max(total_employees, 1),
@@ -223,8 +318,6 @@ class CumulativeDataAggregator:
                 }
             }
             
-            # Cache the result
-            cache.set(cache_key, result, self.cache_timeout)
             return result
             
         except Exception as e:
@@ -248,20 +341,22 @@ class CumulativeDataAggregator:
         Returns:
             Dictionary with comparison analysis and variance calculations
         """
-        cache_key = f"{self.cache_prefix}:multi_period:{start_period}:{end_period}:{comparison_type}:{hash(str(filters))}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
+        return self._cached_report(
+            'multi_period', self._get_period_bounds(start_period, comparison_type)[0],
+            self._get_period_bounds(end_period, comparison_type)[1],
+            {'start': start_period, 'end': end_period, 'comparison_type': comparison_type, 'filters': filters},
+            lambda: self._build_multi_period_comparison(start_period, end_period, comparison_type, filters),
+        )
+    
+    def _build_multi_period_comparison(self, start_period: date, end_period: date, comparison_type: str,
+                                       filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Compute the multi-period comparison analysis"""
         try:
             # Generate period list based on comparison type
             periods = self._generate_period_list(start_period, end_period, comparison_type)
             
             # Get data for each period
-            period_summaries = []
-            for period in periods:
-                summary = self._get_period_summary(period, comparison_type, filters)
-                period_summaries.append(summary)
+            period_summaries = self._get_period_summaries(periods, comparison_type, filters)
             
             # Calculate variance analysis
             variance_analysis = []
@@ -306,8 +401,6 @@ class CumulativeDataAggregator:
                 'summary_insights': self._generate_summary_insights(period_summaries, variance_analysis),
             }
             
-            # Cache the result
-            cache.set(cache_key, result, self.cache_timeout)
             return result
             
         except Exception as e:
@@ -329,11 +422,15 @@ class CumulativeDataAggregator:
         Returns:
             Dictionary with detailed cumulative employee data
         """
-        cache_key = f"{self.cache_prefix}:employee_cumulative:{employee_id}:{start_period}:{end_period}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
+        return self._cached_report(
+            'employee_cumulative', start_period, end_period,
+            {'employee_id': employee_id, 'start': start_period, 'end': end_period},
+            lambda: self._build_employee_cumulative_tracking(employee_id, start_period, end_period),
+        )
+    
+    def _build_employee_cumulative_tracking(self, employee_id: int, start_period: date,
+                                            end_period: date) -> Dict[str, Any]:
+        """Compute the cumulative tracking of an employee"""
         try:
             from ..models.payroll_processing import Payroll
             from ..models.employee import Employee
@@ -405,8 +502,6 @@ class CumulativeDataAggregator:
                 'summary_statistics': self._generate_employee_summary_stats(payroll_records, employee),
             }
             
-            # Cache the result
-            cache.set(cache_key, result, self.cache_timeout)
             return result
             
         except Exception as e:
@@ -430,35 +525,40 @@ class CumulativeDataAggregator:
         Returns:
             Dictionary with trend analysis and forecasting results
         """
-        cache_key = f"{self.cache_prefix}:trend_analysis:{metric}:{start_period}:{end_period}:{hash(str(filters))}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
+        return self._cached_report(
+            'trend_analysis', start_period, end_period,
+            {'metric': metric, 'start': start_period, 'end': end_period, 'filters': filters},
+            lambda: self._build_trend_analysis_and_forecasting(metric, start_period, end_period, filters),
+        )
+    
+    def _build_trend_analysis_and_forecasting(self, metric: str, start_period: date, end_period: date,
+                                              filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Compute the trend analysis and forecasts of a metric"""
         try:
-            # Get time series data
-            time_series_data = self._get_time_series_data(metric, start_period, end_period, filters)
+            # One query for the whole range, shared by every analysis below
+            series = self._query_time_series([metric], start_period, end_period, filters)
+            time_series_data = series.to_records(metric)
             
             # Calculate trend statistics
-            trend_stats = self._calculate_trend_statistics(time_series_data)
+            trend_stats = self._calculate_trend_statistics(series, metric)
             
             # Seasonal decomposition
-            seasonal_decomposition = self._perform_seasonal_decomposition(time_series_data)
+            seasonal_decomposition = self._perform_seasonal_decomposition(series, metric)
             
             # Growth rate analysis
-            growth_analysis = self._analyze_growth_patterns(time_series_data)
+            growth_analysis = self._analyze_growth_patterns(series, metric)
             
             # Volatility analysis
-            volatility_analysis = self._calculate_volatility_metrics(time_series_data)
+            volatility_analysis = self._calculate_volatility_metrics(series, metric)
             
             # Forecasting (simple exponential smoothing and linear trend)
-            forecast_results = self._generate_advanced_forecast(time_series_data, periods_ahead=6)
+            forecast_results = self._generate_advanced_forecast(series, metric, periods_ahead=6)
             
             # Anomaly detection
-            anomalies = self._detect_anomalies(time_series_data)
+            anomalies = self._detect_anomalies(series, metric)
             
             # Business cycle analysis
-            cycle_analysis = self._analyze_business_cycles(time_series_data)
+            cycle_analysis = self._analyze_business_cycles(series, metric)
             
             result = {
                 'metric': metric,
@@ -478,8 +578,6 @@ class CumulativeDataAggregator:
                 'insights': self._generate_trend_insights(trend_stats, seasonal_decomposition, growth_analysis),
             }
             
-            # Cache the result
-            cache.set(cache_key, result, self.cache_timeout)
             return result
             
         except Exception as e:
@@ -496,11 +594,13 @@ class CumulativeDataAggregator:
         Returns:
             Dictionary with compliance metrics and status
         """
-        cache_key = f"{self.cache_prefix}:compliance_tracking:{year}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            return cached_result
-        
+        return self._cached_report(
+            'compliance_tracking', date(year, 1, 1), date(year, 12, 31), {'year': year},
+            lambda: self._build_regulatory_compliance_tracking(year),
+        )
+    
+    def _build_regulatory_compliance_tracking(self, year: int) -> Dict[str, Any]:
+        """Compute the regulatory compliance tracking of a year"""
         try:
             from ..models.payroll_processing import Payroll
             from ..models.employee import Employee
@@ -563,8 +663,6 @@ class CumulativeDataAggregator:
                 'recommendations': self._generate_compliance_recommendations(compliance_score),
             }
             
-            # Cache the result
-            cache.set(cache_key, result, self.cache_timeout)
             return result
             
         except Exception as e:
@@ -573,6 +671,12 @@ class CumulativeDataAggregator:
     
     # Helper methods for data aggregation and calculations
     
+    def _cached_report(self, name: str, start_date: date, end_date: date, params: Dict[str, Any], compute):
+        """Get a report from the version-aware report cache, computing it on a miss"""
+        return report_cache.get_or_compute(
+            f"{self.cache_prefix}:{name}", start_date, end_date, params, compute, timeout=self.cache_timeout
+        )
+    
     def _apply_filters(self, queryset, filters: Dict[str, Any]):
         """Apply filters to queryset"""
         if not filters:
@@ -595,38 +699,148 @@ class CumulativeDataAggregator:
         
         return queryset
     
+    def _snapshot_frame(self, start_date: date, end_date: date, filters: Dict[str, Any] = None):
+        """
+        Get snapshot rows of a fully closed date range
+        
+        Returns:
+            Filtered PayrollSnapshotFrame, or None when the range is not fully
+            snapshotted or a filter needs the ORM (e.g. employee_status)
+        """
+        if not self._snapshots_apply(start_date, end_date, filters):
+            return None
+        return self.snapshot_store.load(start_date, end_date).filter(filters)
+    
+    def _snapshots_apply(self, start_date: date, end_date: date, filters: Dict[str, Any] = None) -> bool:
+        """Check a date range is fully snapshotted and the filters map to snapshot columns"""
+        if self.snapshot_store is None:
+            return False
+        if filters and any(value for key, value in filters.items() if key not in SNAPSHOT_FILTER_COLUMNS):
+            return False
+        return self.snapshot_store.covers(start_date, end_date)
+    
+    def _snapshot_aggregates(self, frame) -> Dict[str, Any]:
+        """Snapshot totals under the keys of the ORM aggregates"""
+        totals = frame.totals()
+        return {
+            'total_employees': totals['total_employees'],
+            'total_gross_taxable': totals['total_gross_taxable'],
+            'total_gross_non_taxable': totals['total_gross_non_taxable'],
+            'total_net_salary': totals['total_net_salary'],
+            'total_cnss_employee': totals['total_cnss_employee'],
+            'total_cnam_employee': totals['total_cnam_employee'],
+            'total_its': totals['total_its_total'],
+            'total_working_days': totals['total_worked_days'],
+            'total_overtime_hours': totals['total_overtime_hours'],
+            'total_gross_deductions': totals['total_gross_deductions'],
+            'total_net_deductions': totals['total_net_deductions'],
+            'average_net_salary': totals['average_net_salary'],
+            'max_net_salary': totals['max_net_salary'],
+            'min_net_salary': totals['min_net_salary'],
+            'record_count': totals['record_count'],
+        }
+    
+    def _rollup_applies(self, filters: Dict[str, Any] = None) -> bool:
+        """Check the PayrollPeriodAggregate rollup can answer the filters"""
+        return self.use_period_aggregates and supports_aggregate_filters(filters)
+    
+    def _rollup_aggregates(self, row: Optional[Dict[str, Any]], total_employees: int) -> Dict[str, Any]:
+        """Rollup totals under the keys of the ORM aggregates"""
+        if row is None:
+            return self._rollup_aggregates({'payroll_count': 0}, total_employees)
+        count = row['payroll_count']
+        
+        def amount(name):
+            return row.get(name, Decimal('0'))
+        
+        return {
+            'total_employees': total_employees,
+            'total_gross_taxable': amount('total_gross_taxable'),
+            'total_gross_non_taxable': amount('total_gross_non_taxable'),
+            'total_net_salary': amount('total_net_salary'),
+            'total_cnss_employee': amount('total_cnss_employee'),
+            'total_cnam_employee': amount('total_cnam_employee'),
+            'total_its': amount('total_its_total'),
+            'total_working_days': amount('total_worked_days'),
+            'total_overtime_hours': amount('total_overtime_hours'),
+            'total_gross_deductions': amount('total_gross_deductions'),
+            'total_net_deductions': amount('total_net_deductions'),
+            'average_net_salary': amount('total_net_salary') / count if count else Decimal('0'),
+            'max_net_salary': amount('max_net_salary'),
+            'min_net_salary': amount('min_net_salary'),
+            'record_count': count,
+        }
+    
+    def _count_employees(self, start_date: date, end_date: date, filters: Dict[str, Any] = None,
+                         per: Optional[str] = None):
+        """
+        Count distinct paid employees, which the rollup cannot sum across motifs
+        
+        Returns:
+            Count for the range, or {bucket start: count} when per is
+            'month', 'quarter' or 'year'
+        """
+        from ..models.payroll_processing import Payroll
+        
+        queryset = self._apply_filters(
+            Payroll.objects.filter(period__gte=start_date, period__lte=end_date), filters
+        ).order_by()
+        if per is None:
+            return queryset.aggregate(total=Count('employee', distinct=True))['total']
+        return {
+            row['bucket']: row['total']
+            for row in queryset.annotate(bucket=PERIOD_TRUNCATIONS[per]('period'))
+            .values('bucket').annotate(total=Count('employee', distinct=True))
+        }
+    
+    def _get_snapshot_breakdown(self, frame, column: str, name_key: str) -> List[Dict[str, Any]]:
+        """Get department/direction breakdown from snapshot rows"""
+        breakdown = [
+            {
+                name_key: name or None,
+                'total_employees': totals['total_employees'],
+                'total_gross_taxable': totals['total_gross_taxable'],
+                'total_net_salary': totals['total_net_salary'],
+                'average_net_salary': totals['average_net_salary'],
+            }
+            for name, totals in frame.totals_by(column).items()
+        ]
+        return sorted(breakdown, key=lambda row: row['total_net_salary'], reverse=True)
+    
+    def _calculate_snapshot_compliance_metrics(self, frame) -> Dict[str, Any]:
+        """Calculate compliance metrics from snapshot rows"""
+        total_records = len(frame)
+        return {
+            'total_payroll_records': total_records,
+            'cnss_compliance_rate': (int(frame['has_cnss_number'].sum()) / max(total_records, 1)) * 100,
+            'cnam_compliance_rate': (int(frame['has_cnam_number'].sum()) / max(total_records, 1)) * 100,
+        }
+    
     def _get_monthly_breakdown(self, year: int, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get monthly breakdown for YTD analysis"""
-        from ..models.payroll_processing import Payroll
+        last_month = min(date.today(), date(year, 12, 31)).replace(day=1)
+        if last_month.year < year:
+            return []
+        
+        breakdown_metrics = {
+            'total_gross_taxable': 'gross_taxable',
+            'total_net_salary': 'net_salary',
+            'total_cnss_employee': 'cnss_employee',
+            'total_cnam_employee': 'cnam_employee',
+            'total_its': 'its',
+        }
+        series = self._query_time_series(
+            ['headcount', *breakdown_metrics.values()], date(year, 1, 1), last_month, filters
+        )
         
         monthly_data = []
-        for month in range(1, 13):
-            period_date = date(year, month, 1)
-            if period_date > date.today():
-                break
-            
-            month_qs = Payroll.objects.filter(
-                period__year=year,
-                period__month=month
-            )
-            month_qs = self._apply_filters(month_qs, filters)
+        for position, period_date in enumerate(series.periods):
+            month_summary = {'total_employees': int(series['headcount'][position])}
+            for key, metric in breakdown_metrics.items():
+                month_summary[key] = _to_decimal(series[metric][position])
             
-            month_summary = month_qs.aggregate(
-                total_employees=Count('employee', distinct=True),
-                total_gross_taxable=Sum('gross_taxable'),
-                total_net_salary=Sum('net_salary'),
-                total_cnss_employee=Sum('cnss_employee'),
-                total_cnam_employee=Sum('cnam_employee'),
-                total_its=Sum('its_total'),
-            )
-            
-            # Handle None values
-            for key, value in month_summary.items():
-                if value is None:
-                    month_summary[key] = Decimal('0') if 'total_' in key else 0
-            
-            month_summary['month'] = month
-            month_summary['period_formatted'] = DateFormatter.format_date_for_report(period_date, "period")
+            month_summary['month'] = period_date.month
+            month_summary['period_formatted'] = ReportFormatter.format_date_for_report(period_date, "period")
             monthly_data.append(month_summary)
         
         return monthly_data
@@ -740,11 +954,8 @@ class CumulativeDataAggregator:
         
         return periods
     
-    def _get_period_summary(self, period: date, period_type: str, filters: Dict[str, Any] = None) -> PeriodSummary:
-        """Get summary for a specific period"""
-        from ..models.payroll_processing import Payroll
-        
-        # Determine period range
+    def _get_period_bounds(self, period: date, period_type: str) -> Tuple[date, date]:
+        """Get the date range covered by a period of a comparison"""
         if period_type == 'month_over_month':
             start_date, end_date = PayrollPeriodUtils.get_period_start_end(period)
         elif period_type == 'quarter_over_quarter':
@@ -755,32 +966,74 @@ class CumulativeDataAggregator:
             end_date = date(period.year, 12, 31)
         else:
             start_date, end_date = PayrollPeriodUtils.get_period_start_end(period)
+        return start_date, end_date
+    
+    def _get_period_summaries(self, periods: List[date], period_type: str,
+                              filters: Dict[str, Any] = None) -> List[PeriodSummary]:
+        """Get summaries for a list of periods, with one rollup query when possible"""
+        if not periods:
+            return []
         
-        # Get payroll data for the period
-        period_qs = Payroll.objects.filter(
-            period__gte=start_date,
-            period__lte=end_date
-        )
-        period_qs = self._apply_filters(period_qs, filters)
-        
-        # Aggregate data
-        aggregates = period_qs.aggregate(
-            total_employees=Count('employee', distinct=True),
-            total_gross_taxable=Sum('gross_taxable'),
-            total_gross_non_taxable=Sum('gross_non_taxable'),
-            total_net_salary=Sum('net_salary'),
-            total_cnss_employee=Sum('cnss_employee'),
-            total_cnam_employee=Sum('cnam_employee'),
-            total_its=Sum('its_total'),
-            total_working_days=Sum('worked_days'),
-            average_net_salary=Avg('net_salary'),
-        )
+        bounds = [self._get_period_bounds(period, period_type) for period in periods]
+        range_start, range_end = bounds[0][0], bounds[-1][1]
+        if self._snapshots_apply(range_start, range_end, filters) or not self._rollup_applies(filters):
+            return [self._get_period_summary(period, period_type, filters) for period in periods]
+        
+        per = {'quarter_over_quarter': 'quarter', 'year_over_year': 'year'}.get(period_type, 'month')
+        totals = {row['bucket']: row for row in aggregate_totals(range_start, range_end, filters, per=per)}
+        employees = self._count_employees(range_start, range_end, filters, per=per)
+        return [
+            self._build_period_summary(
+                period, period_type, self._rollup_aggregates(totals.get(start_date), employees.get(start_date, 0))
+            )
+            for period, (start_date, end_date) in zip(periods, bounds)
+        ]
+    
+    def _get_period_summary(self, period: date, period_type: str, filters: Dict[str, Any] = None) -> PeriodSummary:
+        """Get summary for a specific period"""
+        from ..models.payroll_processing import Payroll
         
-        # Handle None values
-        for key, value in aggregates.items():
-            if value is None:
-                aggregates[key] = Decimal('0') if 'total_' in key or 'average_' in key else 0
+        # Determine period range
+        start_date, end_date = self._get_period_bounds(period, period_type)
+        
+        snapshot = self._snapshot_frame(start_date, end_date, filters)
+        if snapshot is not None:
+            aggregates = self._snapshot_aggregates(snapshot)
+        elif self._rollup_applies(filters):
+            aggregates = self._rollup_aggregates(
+                aggregate_totals(start_date, end_date, filters)[0],
+                self._count_employees(start_date, end_date, filters)
+            )
+        else:
+            # Get payroll data for the period
+            period_qs = Payroll.objects.filter(
+                period__gte=start_date,
+                period__lte=end_date
+            )
+            period_qs = self._apply_filters(period_qs, filters)
+            
+            # Aggregate data
+            aggregates = period_qs.aggregate(
+                total_employees=Count('employee', distinct=True),
+                total_gross_taxable=Sum('gross_taxable'),
+                total_gross_non_taxable=Sum('gross_non_taxable'),
+                total_net_salary=Sum('net_salary'),
+                total_cnss_employee=Sum('cnss_employee'),
+                total_cnam_employee=Sum('cnam_employee'),
+                total_its=Sum('its_total'),
+                total_working_days=Sum('worked_days'),
+                average_net_salary=Avg('net_salary'),
+            )
+            
+            # Handle None values
+            for key, value in aggregates.items():
+                if value is None:
+                    aggregates[key] = Decimal('0') if 'total_' in key or 'average_' in key else 0
         
+        return self._build_period_summary(period, period_type, aggregates)
+    
+    def _build_period_summary(self, period: date, period_type: str, aggregates: Dict[str, Any]) -> PeriodSummary:
+        """Build a PeriodSummary from aggregate totals"""
         return PeriodSummary(
             period=period,
             period_type=period_type,
@@ -793,7 +1046,7 @@ class CumulativeDataAggregator:
             total_its=aggregates['total_its'],
             total_working_days=aggregates['total_working_days'],
             average_salary=aggregates['average_net_salary'],
-            period_formatted=DateFormatter.format_date_for_report(period, "period")
+            period_formatted=ReportFormatter.format_date_for_report(period, "period")
         )
     
     def _calculate_variance_analysis(self, current: PeriodSummary, previous: PeriodSummary) -> VarianceAnalysis:
@@ -1032,7 +1285,7 @@ class CumulativeDataAggregator:
             
             forecasts.append({
                 'period': next_period,
-                'period_formatted': DateFormatter.format_date_for_report(next_period, "period"),
+                'period_formatted': ReportFormatter.format_date_for_report(next_period, "period"),
                 'forecast_net_salary': max(forecast_net_salary, Decimal('0')),
                 'forecast_employees': max(forecast_employees, 0),
                 'confidence_level': max(Decimal('90') - (i * Decimal('10')), Decimal('50')),  # Decreasing confidence
@@ -1340,172 +1593,195 @@ class CumulativeDataAggregator:
     # Advanced analysis helper methods
     
     def _get_time_series_data(self, metric: str, start_period: date, end_period: date, filters: Dict[str, Any] = None) -> List[Dict[str, Any]]:
-        """Get time series data for trend analysis"""
-        from ..models.payroll_processing import Payroll
-        
-        # Generate monthly periods
-        periods = []
-        current_period = start_period.replace(day=1)  # Start at beginning of month
-        end_month = end_period.replace(day=1)
+        """Get monthly time series data for trend analysis"""
+        return self._query_time_series([metric], start_period, end_period, filters).to_records(metric)
+    
+    def _query_time_series(self, metrics: List[str], start_period: date, end_period: date,
+                           filters: Dict[str, Any] = None, per: str = 'month') -> PayrollTimeSeries:
+        """
+        Fetch payroll metrics over a period range as dense series
         
-        while current_period <= end_month:
-            periods.append(current_period)
-            current_period = DateCalculator.add_months(current_period, 1)
+        The range is read once, whatever its length: from the snapshot rows
+        when it is closed, else from the PayrollPeriodAggregate rollup, else
+        with one Payroll query grouped by the truncated period.
         
-        time_series = []
-        for period in periods:
-            month_start, month_end = PayrollPeriodUtils.get_period_start_end(period)
+        Args:
+            metrics: Names from TIME_SERIES_METRICS (unknown metrics are zero series)
+            start_period: First period of the range
+            end_period: Last period of the range (its whole month is included)
+            filters: Optional filters
+            per: Bucket size, 'month', 'quarter' or 'year'
             
-            month_qs = Payroll.objects.filter(
-                period__gte=month_start,
-                period__lte=month_end
-            )
-            month_qs = self._apply_filters(month_qs, filters)
-            
-            # Calculate metric value
-            if metric == 'net_salary':
-                value = month_qs.aggregate(Sum('net_salary'))['net_salary__sum'] or Decimal('0')
-            elif metric == 'employee_count':
-                value = Decimal(str(month_qs.count()))
-            elif metric == 'productivity':
-                avg_salary = month_qs.aggregate(Avg('net_salary'))['net_salary__avg']
-                value = avg_salary or Decimal('0')
-            elif metric == 'gross_taxable':
-                value = month_qs.aggregate(Sum('gross_taxable'))['gross_taxable__sum'] or Decimal('0')
-            elif metric == 'working_days':
-                value = month_qs.aggregate(Sum('worked_days'))['worked_days__sum'] or Decimal('0')
+        Returns:
+            PayrollTimeSeries with one value per bucket, empty buckets as zeros
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for payroll time series")
+        
+        range_start = start_period.replace(day=1)
+        range_end = PayrollPeriodUtils.get_period_start_end(end_period)[1]
+        periods = self._get_series_buckets(range_start, range_end, per)
+        
+        needed = [metric for metric in (*TIME_SERIES_AMOUNTS, *TIME_SERIES_COUNTS)
+                  if metric in metrics or (metric in ('net_salary', 'employee_count') and 'productivity' in metrics)]
+        columns = {metric: np.zeros(len(periods)) for metric in needed}
+        positions = {period: position for position, period in enumerate(periods)}
+        
+        if periods and needed:
+            for bucket, row in self._get_series_rows(needed, periods, range_start, range_end, filters, per):
+                position = positions.get(bucket)
+                if position is not None:
+                    for metric in needed:
+                        columns[metric][position] = float(row.get(metric) or 0)
+        
+        values = {}
+        for metric in metrics:
+            if metric == 'productivity':
+                counts = columns['employee_count']
+                values[metric] = np.divide(columns['net_salary'], counts, out=np.zeros(len(periods)), where=counts > 0)
             else:
-                value = Decimal('0')
-            
-            time_series.append({
-                'period': period,
-                'value': value,
-                'period_formatted': DateFormatter.format_date_for_report(period, "period"),
-            })
+                values[metric] = columns.get(metric, np.zeros(len(periods)))
         
-        return time_series
+        return PayrollTimeSeries(periods=periods, per=per, values=values)
     
-    def _calculate_trend_statistics(self, time_series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Calculate trend statistics"""
-        if len(time_series_data) < 2:
-            return {'error': 'insufficient_data'}
+    def _get_series_buckets(self, start_date: date, end_date: date, per: str) -> List[date]:
+        """Start dates of the month/quarter/year buckets covering a range"""
+        step = BUCKET_MONTHS[per]
+        bucket = date(start_date.year, start_date.month - (start_date.month - 1) % step, 1)
         
-        values = [item['value'] for item in time_series_data]
+        buckets = []
+        while bucket <= end_date:
+            buckets.append(bucket)
+            bucket = DateCalculator.add_months(bucket, step)
+        return buckets
+    
+    def _get_series_rows(self, metrics: List[str], periods: List[date], start_date: date, end_date: date,
+                         filters: Dict[str, Any], per: str) -> List[Tuple[date, Dict[str, Any]]]:
+        """Get (bucket start, {metric: value}) rows from the first source able to answer"""
+        from ..models.payroll_processing import Payroll
         
-        # Basic statistics
-        mean_value = sum(values) / len(values)
-        min_value = min(values)
-        max_value = max(values)
-        value_range = max_value - min_value
+        snapshot = self._snapshot_frame(start_date, end_date, filters)
+        if snapshot is not None:
+            rows = []
+            for bucket in periods:
+                bucket_end = DateCalculator.add_months(bucket, BUCKET_MONTHS[per]) - timedelta(days=1)
+                totals = snapshot.filter(start_period=bucket, end_period=bucket_end).totals()
+                rows.append((bucket, {
+                    metric: totals[SNAPSHOT_SERIES_KEYS.get(metric) or f'total_{TIME_SERIES_AMOUNTS[metric]}']
+                    for metric in metrics
+                }))
+            return rows
+        
+        if self._rollup_applies(filters):
+            headcounts = self._count_employees(start_date, end_date, filters, per=per) if 'headcount' in metrics else {}
+            rows = []
+            for totals in aggregate_totals(start_date, end_date, filters, per=per):
+                row = {metric: totals[f'total_{field}'] for metric, field in TIME_SERIES_AMOUNTS.items() if metric in metrics}
+                row['employee_count'] = totals['payroll_count']
+                row['headcount'] = headcounts.get(totals['bucket'], 0)
+                rows.append((totals['bucket'], row))
+            return rows
+        
+        aggregates = {metric: Sum(field) for metric, field in TIME_SERIES_AMOUNTS.items() if metric in metrics}
+        if 'employee_count' in metrics:
+            aggregates['employee_count'] = Count('id')
+        if 'headcount' in metrics:
+            aggregates['headcount'] = Count('employee', distinct=True)
+        
+        queryset = self._apply_filters(
+            Payroll.objects.filter(period__gte=start_date, period__lte=end_date), filters
+        ).order_by()
+        return [
+            (row.pop('bucket'), row)
+            for row in queryset.annotate(bucket=PERIOD_TRUNCATIONS[per]('period')).values('bucket').annotate(**aggregates)
+        ]
+    
+    def _linear_trend(self, values) -> Tuple[float, float]:
+        """Least-squares slope and intercept of a series against its index"""
+        x_vals = np.arange(len(values))
+        x_centered = x_vals - x_vals.mean()
+        denominator = (x_centered ** 2).sum()
+        slope = (x_centered * (values - values.mean())).sum() / denominator if denominator else 0.0
+        return float(slope), float(values.mean() - slope * x_vals.mean())
+    
+    def _calculate_trend_statistics(self, series: PayrollTimeSeries, metric: str) -> Dict[str, Any]:
+        """Calculate trend statistics"""
+        if len(series) < 2:
+            return {'error': 'insufficient_data'}
         
-        # Calculate variance and standard deviation
-        variance = sum((v - mean_value) ** 2 for v in values) / len(values)
-        std_deviation = variance ** Decimal('0.5')
+        values = series[metric]
+        mean_value = values.mean()
+        std_deviation = values.std()
         
         # Coefficient of variation
         cv = (std_deviation / max(mean_value, 1)) * 100
         
-        # Linear trend calculation
-        n = len(values)
-        x_vals = list(range(n))
-        
-        sum_x = sum(x_vals)
-        sum_y = sum(values)
-        sum_xy = sum(x * y for x, y in zip(x_vals, values))
-        sum_x2 = sum(x * x for x in x_vals)
-        
-        # Linear regression
-        if n * sum_x2 - sum_x * sum_x != 0:
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-            intercept = (sum_y - slope * sum_x) / n
-        else:
-            slope = Decimal('0')
-            intercept = mean_value
-        
-        # R-squared calculation
-        ss_tot = sum((v - mean_value) ** 2 for v in values)
-        ss_res = sum((values[i] - (slope * i + intercept)) ** 2 for i in range(n))
-        r_squared = 1 - (ss_res / max(ss_tot, 1)) if ss_tot > 0 else Decimal('0')
+        # Linear regression and R-squared
+        slope, intercept = self._linear_trend(values)
+        ss_tot = ((values - mean_value) ** 2).sum()
+        ss_res = ((values - (slope * np.arange(len(values)) + intercept)) ** 2).sum()
+        r_squared = 1 - (ss_res / max(ss_tot, 1)) if ss_tot > 0 else 0.0
         
         return {
-            'mean': mean_value,
-            'minimum': min_value,
-            'maximum': max_value,
-            'range': value_range,
-            'standard_deviation': std_deviation,
-            'coefficient_of_variation': cv,
-            'trend_slope': slope,
-            'trend_intercept': intercept,
-            'r_squared': r_squared,
-            'trend_strength': 'strong' if r_squared > Decimal('0.8') else 'moderate' if r_squared > Decimal('0.5') else 'weak',
+            'mean': _to_decimal(mean_value),
+            'minimum': _to_decimal(values.min()),
+            'maximum': _to_decimal(values.max()),
+            'range': _to_decimal(values.max() - values.min()),
+            'standard_deviation': _to_decimal(std_deviation),
+            'coefficient_of_variation': _to_decimal(cv),
+            'trend_slope': _to_decimal(slope),
+            'trend_intercept': _to_decimal(intercept),
+            'r_squared': _to_decimal(r_squared),
+            'trend_strength': 'strong' if r_squared > 0.8 else 'moderate' if r_squared > 0.5 else 'weak',
         }
     
-    def _perform_seasonal_decomposition(self, time_series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _perform_seasonal_decomposition(self, series: PayrollTimeSeries, metric: str) -> Dict[str, Any]:
         """Basic seasonal decomposition"""
-        if len(time_series_data) < 12:
+        if len(series) < 12:
             return {'error': 'insufficient_data_for_seasonal_decomposition'}
         
-        # Group by month to identify seasonal patterns
-        monthly_values = defaultdict(list)
-        for item in time_series_data:
-            month = item['period'].month
-            monthly_values[month].append(item['value'])
-        
-        # Calculate monthly averages
-        seasonal_indices = {}
-        overall_mean = sum(item['value'] for item in time_series_data) / len(time_series_data)
-        
-        for month in range(1, 13):
-            if month in monthly_values and monthly_values[month]:
-                month_mean = sum(monthly_values[month]) / len(monthly_values[month])
-                seasonal_indices[month] = (month_mean / max(overall_mean, 1)) * 100
-            else:
-                seasonal_indices[month] = 100  # No seasonality
+        # Monthly averages relative to the overall mean
+        values = series[metric]
+        months = np.array([period.month for period in series.periods])
+        month_totals = np.bincount(months, weights=values, minlength=13)[1:]
+        month_counts = np.bincount(months, minlength=13)[1:]
+        month_means = np.divide(month_totals, month_counts, out=np.zeros(12), where=month_counts > 0)
+        indices = np.where(month_counts > 0, month_means / max(values.mean(), 1) * 100, 100.0)  # 100 = no seasonality
+        seasonal_indices = {month: _to_decimal(index) for month, index in enumerate(indices.tolist(), start=1)}
         
         # Find peak and trough months
-        peak_month = max(seasonal_indices.items(), key=lambda x: x[1])
-        trough_month = min(seasonal_indices.items(), key=lambda x: x[1])
+        peak_month = int(indices.argmax()) + 1
+        trough_month = int(indices.argmin()) + 1
         
         # Calculate seasonal variation
-        seasonal_variation = (peak_month[1] - trough_month[1]) / max(trough_month[1], 1) * 100
+        seasonal_variation = (indices.max() - indices.min()) / max(indices.min(), 1) * 100
         
         return {
             'seasonal_indices': seasonal_indices,
-            'peak_month': {'month': peak_month[0], 'index': peak_month[1]},
-            'trough_month': {'month': trough_month[0], 'index': trough_month[1]},
-            'seasonal_variation': seasonal_variation,
+            'peak_month': {'month': peak_month, 'index': seasonal_indices[peak_month]},
+            'trough_month': {'month': trough_month, 'index': seasonal_indices[trough_month]},
+            'seasonal_variation': _to_decimal(seasonal_variation),
             'seasonality_strength': 'high' if seasonal_variation > 20 else 'moderate' if seasonal_variation > 10 else 'low',
         }
     
-    def _analyze_growth_patterns(self, time_series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _get_growth_rates(self, values):
+        """Period-over-period growth rates (%) of the periods following a positive value"""
+        previous, current = values[:-1], values[1:]
+        rising = previous > 0
+        return (current[rising] - previous[rising]) / previous[rising] * 100
+    
+    def _analyze_growth_patterns(self, series: PayrollTimeSeries, metric: str) -> Dict[str, Any]:
         """Analyze growth patterns"""
-        if len(time_series_data) < 3:
+        if len(series) < 3:
             return {'error': 'insufficient_data'}
         
-        values = [item['value'] for item in time_series_data]
-        
-        # Calculate period-over-period growth rates
-        growth_rates = []
-        for i in range(1, len(values)):
-            if values[i-1] > 0:
-                growth_rate = ((values[i] - values[i-1]) / values[i-1]) * 100
-                growth_rates.append(growth_rate)
-        
-        if not growth_rates:
+        growth_rates = self._get_growth_rates(series[metric])
+        if not growth_rates.size:
             return {'error': 'unable_to_calculate_growth_rates'}
         
-        # Growth statistics
-        average_growth_rate = sum(growth_rates) / len(growth_rates)
-        min_growth_rate = min(growth_rates)
-        max_growth_rate = max(growth_rates)
-        
-        # Growth volatility
-        growth_variance = sum((gr - average_growth_rate) ** 2 for gr in growth_rates) / len(growth_rates)
-        growth_volatility = growth_variance ** Decimal('0.5')
-        
         # Growth pattern classification
-        positive_periods = len([gr for gr in growth_rates if gr > 0])
-        negative_periods = len([gr for gr in growth_rates if gr < 0])
+        positive_periods = int((growth_rates > 0).sum())
+        negative_periods = int((growth_rates < 0).sum())
         
         if positive_periods > negative_periods * 2:
             growth_pattern = 'consistent_growth'
@@ -1515,40 +1791,30 @@ class CumulativeDataAggregator:
             growth_pattern = 'volatile'
         
         return {
-            'period_growth_rates': growth_rates,
-            'average_growth_rate': average_growth_rate,
-            'minimum_growth_rate': min_growth_rate,
-            'maximum_growth_rate': max_growth_rate,
-            'growth_volatility': growth_volatility,
+            'period_growth_rates': [_to_decimal(rate) for rate in growth_rates.tolist()],
+            'average_growth_rate': _to_decimal(growth_rates.mean()),
+            'minimum_growth_rate': _to_decimal(growth_rates.min()),
+            'maximum_growth_rate': _to_decimal(growth_rates.max()),
+            'growth_volatility': _to_decimal(growth_rates.std()),
             'growth_pattern': growth_pattern,
             'positive_periods': positive_periods,
             'negative_periods': negative_periods,
         }
     
-    def _calculate_volatility_metrics(self, time_series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _calculate_volatility_metrics(self, series: PayrollTimeSeries, metric: str) -> Dict[str, Any]:
         """Calculate volatility metrics"""
-        if len(time_series_data) < 2:
+        if len(series) < 2:
             return {'error': 'insufficient_data'}
         
-        values = [item['value'] for item in time_series_data]
-        mean_value = sum(values) / len(values)
-        
-        # Standard deviation
-        variance = sum((v - mean_value) ** 2 for v in values) / len(values)
-        std_deviation = variance ** Decimal('0.5')
+        values = series[metric]
+        std_deviation = values.std()
         
         # Coefficient of variation
-        cv = (std_deviation / max(mean_value, 1)) * 100
-        
-        # Calculate percentage changes
-        percentage_changes = []
-        for i in range(1, len(values)):
-            if values[i-1] > 0:
-                pct_change = ((values[i] - values[i-1]) / values[i-1]) * 100
-                percentage_changes.append(abs(pct_change))
+        cv = (std_deviation / max(values.mean(), 1)) * 100
         
         # Average absolute percentage change
-        avg_abs_pct_change = sum(percentage_changes) / max(len(percentage_changes), 1)
+        percentage_changes = np.abs(self._get_growth_rates(values))
+        avg_abs_pct_change = percentage_changes.mean() if percentage_changes.size else 0.0
         
         # Volatility classification
         if cv < 10:
@@ -1559,20 +1825,19 @@ class CumulativeDataAggregator:
             volatility_level = 'high'
         
         return {
-            'standard_deviation': std_deviation,
-            'coefficient_of_variation': cv,
-            'average_absolute_percentage_change': avg_abs_pct_change,
+            'standard_deviation': _to_decimal(std_deviation),
+            'coefficient_of_variation': _to_decimal(cv),
+            'average_absolute_percentage_change': _to_decimal(avg_abs_pct_change),
             'volatility_level': volatility_level,
-            'stability_score': max(100 - cv, 0),  # Higher score = more stable
+            'stability_score': _to_decimal(max(100 - cv, 0)),  # Higher score = more stable
         }
     
-    def _generate_advanced_forecast(self, time_series_data: List[Dict[str, Any]], periods_ahead: int = 6) -> Dict[str, Any]:
+    def _generate_advanced_forecast(self, series: PayrollTimeSeries, metric: str, periods_ahead: int = 6) -> Dict[str, Any]:
         """Generate advanced forecast using multiple methods"""
-        if len(time_series_data) < 3:
+        if len(series) < 3:
             return {'error': 'insufficient_data_for_forecasting'}
         
-        values = [item['value'] for item in time_series_data]
-        periods = [item['period'] for item in time_series_data]
+        values = series[metric]
         
         # Method 1: Linear trend extrapolation
         linear_forecast = self._forecast_linear_trend(values, periods_ahead)
@@ -1583,35 +1848,24 @@ class CumulativeDataAggregator:
         # Method 3: Moving average
         moving_average_forecast = self._forecast_moving_average(values, periods_ahead)
         
-        # Generate forecast periods
-        last_period = periods[-1]
-        forecast_periods = []
-        for i in range(1, periods_ahead + 1):
-            next_period = DateCalculator.add_months(last_period, i)
-            forecast_periods.append(next_period)
-        
-        # Combine forecasts (simple average)
-        combined_forecast = []
-        for i in range(periods_ahead):
-            avg_forecast = (linear_forecast[i] + exponential_forecast[i] + moving_average_forecast[i]) / 3
-            combined_forecast.append(max(avg_forecast, Decimal('0')))  # Ensure non-negative
+        # Combine forecasts (simple average), non-negative
+        combined_forecast = np.maximum((linear_forecast + exponential_forecast + moving_average_forecast) / 3, 0)
         
-        # Calculate confidence intervals (simple approach)
-        std_dev = self._calculate_trend_statistics(time_series_data).get('standard_deviation', Decimal('0'))
+        # Confidence intervals (simple approach): 95% from the historical volatility
+        confidence_interval = values.std() * 1.96
         
         forecast_results = []
-        for i, period in enumerate(forecast_periods):
-            confidence_interval = std_dev * Decimal('1.96')  # 95% confidence interval
-            
+        for i in range(periods_ahead):
+            period = DateCalculator.add_months(series.periods[-1], (i + 1) * BUCKET_MONTHS[series.per])
             forecast_results.append({
                 'period': period,
-                'period_formatted': DateFormatter.format_date_for_report(period, "period"),
-                'linear_forecast': linear_forecast[i],
-                'exponential_forecast': exponential_forecast[i],
-                'moving_average_forecast': moving_average_forecast[i],
-                'combined_forecast': combined_forecast[i],
-                'lower_bound': max(combined_forecast[i] - confidence_interval, Decimal('0')),
-                'upper_bound': combined_forecast[i] + confidence_interval,
+                'period_formatted': ReportFormatter.format_date_for_report(period, "period"),
+                'linear_forecast': _to_decimal(linear_forecast[i]),
+                'exponential_forecast': _to_decimal(exponential_forecast[i]),
+                'moving_average_forecast': _to_decimal(moving_average_forecast[i]),
+                'combined_forecast': _to_decimal(combined_forecast[i]),
+                'lower_bound': _to_decimal(max(combined_forecast[i] - confidence_interval, 0)),
+                'upper_bound': _to_decimal(combined_forecast[i] + confidence_interval),
                 'confidence_level': max(95 - (i * 5), 70),  # Decreasing confidence
             })
         
@@ -1622,126 +1876,85 @@ class CumulativeDataAggregator:
             'confidence_note': 'Confidence intervals based on historical volatility',
         }
     
-    def _forecast_linear_trend(self, values: List[Decimal], periods_ahead: int) -> List[Decimal]:
+    def _forecast_linear_trend(self, values, periods_ahead: int):
         """Linear trend forecasting"""
-        n = len(values)
-        x_vals = list(range(n))
-        
-        sum_x = sum(x_vals)
-        sum_y = sum(values)
-        sum_xy = sum(x * y for x, y in zip(x_vals, values))
-        sum_x2 = sum(x * x for x in x_vals)
-        
-        if n * sum_x2 - sum_x * sum_x != 0:
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-            intercept = (sum_y - slope * sum_x) / n
-        else:
-            slope = Decimal('0')
-            intercept = sum_y / n
-        
-        forecasts = []
-        for i in range(periods_ahead):
-            forecast_value = slope * (n + i) + intercept
-            forecasts.append(max(forecast_value, Decimal('0')))
-        
-        return forecasts
+        slope, intercept = self._linear_trend(values)
+        return np.maximum(slope * (len(values) + np.arange(periods_ahead)) + intercept, 0)
     
-    def _forecast_exponential_smoothing(self, values: List[Decimal], periods_ahead: int, alpha: Decimal = Decimal('0.3')) -> List[Decimal]:
+    def _forecast_exponential_smoothing(self, values, periods_ahead: int, alpha: float = 0.3):
         """Exponential smoothing forecast"""
-        if not values:
-            return [Decimal('0')] * periods_ahead
+        if not len(values):
+            return np.zeros(periods_ahead)
         
-        # Simple exponential smoothing
-        smoothed_value = values[0]
-        for value in values[1:]:
-            smoothed_value = alpha * value + (1 - alpha) * smoothed_value
+        # Simple exponential smoothing as one weighted sum: the last value
+        # weighs alpha, each older one (1 - alpha) times less, the first
+        # carries the remaining weight
+        weights = alpha * (1 - alpha) ** np.arange(len(values) - 1, -1, -1)
+        weights[0] = (1 - alpha) ** (len(values) - 1)
         
         # Forecast is the last smoothed value
-        return [smoothed_value] * periods_ahead
+        return np.full(periods_ahead, float(weights @ values))
     
-    def _forecast_moving_average(self, values: List[Decimal], periods_ahead: int, window: int = 3) -> List[Decimal]:
+    def _forecast_moving_average(self, values, periods_ahead: int, window: int = 3):
         """Moving average forecast"""
-        if len(values) < window:
-            window = len(values)
-        
+        window = min(window, len(values))
         if window == 0:
-            return [Decimal('0')] * periods_ahead
+            return np.zeros(periods_ahead)
         
-        # Calculate moving average of last 'window' periods
-        last_values = values[-window:]
-        moving_avg = sum(last_values) / len(last_values)
-        
-        return [moving_avg] * periods_ahead
+        # Moving average of the last 'window' periods
+        return np.full(periods_ahead, float(values[-window:].mean()))
     
-    def _detect_anomalies(self, time_series_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _detect_anomalies(self, series: PayrollTimeSeries, metric: str) -> List[Dict[str, Any]]:
         """Detect anomalies in time series data"""
-        if len(time_series_data) < 5:
+        if len(series) < 5:
             return []
         
-        values = [item['value'] for item in time_series_data]
-        mean_value = sum(values) / len(values)
-        
-        # Calculate standard deviation
-        variance = sum((v - mean_value) ** 2 for v in values) / len(values)
-        std_deviation = variance ** Decimal('0.5')
-        
-        # Define anomaly threshold (2 standard deviations)
-        threshold = 2 * std_deviation
+        values = series[metric]
+        mean_value = values.mean()
+        std_deviation = values.std()
+        deviations = np.abs(values - mean_value)
         
+        # Anomaly threshold: 2 standard deviations
         anomalies = []
-        for item in time_series_data:
-            deviation = abs(item['value'] - mean_value)
-            if deviation > threshold:
-                anomaly_type = 'spike' if item['value'] > mean_value else 'dip'
-                anomalies.append({
-                    'period': item['period'],
-                    'period_formatted': item['period_formatted'],
-                    'value': item['value'],
-                    'expected_value': mean_value,
-                    'deviation': deviation,
-                    'anomaly_type': anomaly_type,
-                    'severity': 'high' if deviation > 3 * std_deviation else 'moderate',
-                })
+        for position in np.flatnonzero(deviations > 2 * std_deviation).tolist():
+            period = series.periods[position]
+            anomalies.append({
+                'period': period,
+                'period_formatted': ReportFormatter.format_date_for_report(period, "period"),
+                'value': _to_decimal(values[position]),
+                'expected_value': _to_decimal(mean_value),
+                'deviation': _to_decimal(deviations[position]),
+                'anomaly_type': 'spike' if values[position] > mean_value else 'dip',
+                'severity': 'high' if deviations[position] > 3 * std_deviation else 'moderate',
+            })
         
         return anomalies
     
-    def _analyze_business_cycles(self, time_series_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _analyze_business_cycles(self, series: PayrollTimeSeries, metric: str) -> Dict[str, Any]:
         """Analyze business cycles in the data"""
-        if len(time_series_data) < 12:
+        if len(series) < 12:
             return {'error': 'insufficient_data_for_cycle_analysis'}
         
-        values = [item['value'] for item in time_series_data]
+        values = series[metric]
         
         # Simple cycle detection using local maxima and minima
-        peaks = []
-        troughs = []
-        
-        for i in range(1, len(values) - 1):
-            if values[i] > values[i-1] and values[i] > values[i+1]:
-                peaks.append({
-                    'period': time_series_data[i]['period'],
-                    'value': values[i],
-                    'index': i
-                })
-            elif values[i] < values[i-1] and values[i] < values[i+1]:
-                troughs.append({
-                    'period': time_series_data[i]['period'],
-                    'value': values[i],
-                    'index': i
-                })
+        inner = values[1:-1]
+        peak_indices = (np.flatnonzero((inner > values[:-2]) & (inner > values[2:])) + 1).tolist()
+        trough_indices = (np.flatnonzero((inner < values[:-2]) & (inner < values[2:])) + 1).tolist()
         
-        # Calculate cycle lengths
-        cycle_lengths = []
-        if len(peaks) > 1:
-            for i in range(1, len(peaks)):
-                cycle_length = peaks[i]['index'] - peaks[i-1]['index']
-                cycle_lengths.append(cycle_length)
+        def turning_points(indices):
+            return [
+                {'period': series.periods[i], 'value': _to_decimal(values[i]), 'index': i}
+                for i in indices
+            ]
         
-        average_cycle_length = sum(cycle_lengths) / max(len(cycle_lengths), 1) if cycle_lengths else 0
+        # Calculate cycle lengths
+        cycle_lengths = np.diff(peak_indices).tolist() if len(peak_indices) > 1 else []
+        average_cycle_length = _to_decimal(np.mean(cycle_lengths)) if cycle_lengths else 0
         
         return {
-            'peaks': peaks,
-            'troughs': troughs,
+            'peaks': turning_points(peak_indices),
+            'troughs': turning_points(trough_indices),
             'cycle_lengths': cycle_lengths,
             'average_cycle_length': average_cycle_length,
             'total_cycles': len(cycle_lengths),
@@ -2184,6 +2397,45 @@ class CumulativeReportManager:
             logger.error(f"Error exporting report data: {str(e)}")
             raise
     
+    def export_payroll_history(self,
+                               start_period: date,
+                               end_period: date,
+                               export_format: str,
+                               destination: Any = None,
+                               filters: Dict[str, Any] = None,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE,
+                               columns: List[str] = None,
+                               element_ids: List[int] = None):
+        """
+        Stream every payroll of a period range with its rubriques, without building the report in memory
+        
+        Args:
+            start_period: Start period
+            end_period: End period
+            export_format: 'csv', 'jsonl', 'xml' or 'xlsx'
+            destination: File path or file object (default: HTTP response)
+            filters: Optional filters
+            chunk_size: Rows fetched per database round trip
+            columns: Base and total columns to export (default: all)
+            element_ids: Rubriques to export (default: all)
+            
+        Returns:
+            Number of rows written, or the HTTP response
+        """
+        from ..models.payroll_processing import Payroll
+        
+        payrolls = self.aggregator._apply_filters(
+            Payroll.objects.filter(period__gte=start_period, period__lte=end_period), filters
+        )
+        export = PayrollStateExport(payrolls, chunk_size, columns=columns, element_ids=element_ids)
+        return export_rows(
+            export.rows(), export_format, destination,
+            filename=f"historique_paie_{start_period.strftime('%Y%m')}_{end_period.strftime('%Y%m')}",
+            fields=export.fields, field_mapping=export.field_mapping,
+            root_element="payroll_history_report", row_element="bulletin",
+            total_fields=export.total_fields, sheet_name="Historique de paie",
+        )
+    
     # Formatting methods
     
     def _format_ytd_summary(self, ytd_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -2191,8 +2443,8 @@ class CumulativeReportManager:
         return {
             'report_type': 'ytd_summary',
             'title': f"Rapport Annuel Cumulé {ytd_data['year']}",
-            'subtitle': f"Période: {DateFormatter.format_date_for_report(ytd_data['period_start'])} - {DateFormatter.format_date_for_report(ytd_data['period_end'])}",
-            'generated_date': DateFormatter.format_date_for_report(date.today()),
+            'subtitle': f"Période: {ReportFormatter.format_date_for_report(ytd_data['period_start'])} - {ReportFormatter.format_date_for_report(ytd_data['period_end'])}",
+            'generated_date': ReportFormatter.format_date_for_report(date.today()),
             'summary_metrics': {
                 'total_employees': ytd_data['ytd_totals']['total_employees'],
                 'total_gross_salary': ReportFormatter.format_currency_for_report(ytd_data['ytd_totals']['total_gross_taxable']),
@@ -2245,8 +2497,8 @@ class CumulativeReportManager:
         return {
             'report_type': 'multi_period_comparison',
             'title': f"Analyse Comparative {comparison_data['comparison_type'].replace('_', ' ').title()}",
-            'subtitle': f"Période: {DateFormatter.format_date_for_report(comparison_data['start_period'])} - {DateFormatter.format_date_for_report(comparison_data['end_period'])}",
-            'generated_date': DateFormatter.format_date_for_report(date.today()),
+            'subtitle': f"Période: {ReportFormatter.format_date_for_report(comparison_data['start_period'])} - {ReportFormatter.format_date_for_report(comparison_data['end_period'])}",
+            'generated_date': ReportFormatter.format_date_for_report(date.today()),
             'comparison_summary': {
                 'total_periods': comparison_data['total_periods'],
                 'comparison_type': comparison_data['comparison_type'],
@@ -2269,14 +2521,14 @@ class CumulativeReportManager:
         return {
             'report_type': 'employee_cumulative',
             'title': f"Rapport Cumulatif - {employee['full_name']}",
-            'subtitle': f"Période: {DateFormatter.format_date_for_report(employee_data['period_info']['start_period'])} - {DateFormatter.format_date_for_report(employee_data['period_info']['end_period'])}",
-            'generated_date': DateFormatter.format_date_for_report(date.today()),
+            'subtitle': f"Période: {ReportFormatter.format_date_for_report(employee_data['period_info']['start_period'])} - {ReportFormatter.format_date_for_report(employee_data['period_info']['end_period'])}",
+            'generated_date': ReportFormatter.format_date_for_report(date.today()),
             'employee_info': {
                 'full_name': employee['full_name'],
                 'employee_number': employee['employee_number'],
                 'department': employee['department'],
                 'position': employee['position'],
-                'hire_date': DateFormatter.format_date_for_report(employee['hire_date']),
+                'hire_date': ReportFormatter.format_date_for_report(employee['hire_date']),
                 'periods_analyzed': employee_data['period_info']['total_periods'],
             },
             'cumulative_earnings': employee_data['cumulative_earnings'],
@@ -2294,8 +2546,8 @@ class CumulativeReportManager:
         return {
             'report_type': 'trend_analysis',
             'title': f"Analyse de Tendance - {trend_data['metric'].replace('_', ' ').title()}",
-            'subtitle': f"Période: {DateFormatter.format_date_for_report(trend_data['analysis_period']['start'])} - {DateFormatter.format_date_for_report(trend_data['analysis_period']['end'])}",
-            'generated_date': DateFormatter.format_date_for_report(date.today()),
+            'subtitle': f"Période: {ReportFormatter.format_date_for_report(trend_data['analysis_period']['start'])} - {ReportFormatter.format_date_for_report(trend_data['analysis_period']['end'])}",
+            'generated_date': ReportFormatter.format_date_for_report(date.today()),
             'analysis_summary': {
                 'metric_analyzed': trend_data['metric'],
                 'total_periods': trend_data['analysis_period']['total_periods'],
@@ -2318,7 +2570,7 @@ class CumulativeReportManager:
             'report_type': 'regulatory_compliance',
             'title': f"Rapport de Conformité Réglementaire {compliance_data['year']}",
             'subtitle': f"Évaluation de la conformité aux lois du travail mauritaniennes",
-            'generated_date': DateFormatter.format_date_for_report(compliance_data['calculation_date']),
+            'generated_date': ReportFormatter.format_date_for_report(compliance_data['calculation_date']),
             'compliance_overview': {
                 'year': compliance_data['year'],
                 'overall_score': f"{compliance_data['compliance_score']['overall_score']:.1f}%",
@@ -2455,7 +2707,7 @@ class CumulativeReportManager:
         csv_data = []
         for period_data in compensation_timeline:
             csv_data.append({
-                'Période': DateFormatter.format_date_for_report(period_data.get('period')),
+                'Période': ReportFormatter.format_date_for_report(period_data.get('period')),
                 'Salaire_Brut_Imposable': period_data.get('gross_taxable', 0),
                 'Salaire_Brut_Non_Imposable': period_data.get('gross_non_taxable', 0),
                 'Salaire_Net': period_data.get('net_salary', 0),
@@ -24,8 +24,11 @@ import csv
 import io
 from collections import defaultdict, OrderedDict
 import calendar
-from django.db.models import Q, Count, Sum, Avg, Max, Min
-from django.db.models.functions import Coalesce
+from django.db.models import (
+    Q, Count, Sum, Avg, Max, Min, Case, When, Value, F, Exists, OuterRef,
+    BooleanField, CharField, DateField, IntegerField, ExpressionWrapper
+)
+from django.db.models.functions import Coalesce, Concat, Trim, ExtractYear, ExtractMonth, ExtractDay
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
@@ -46,6 +49,10 @@ from ..utils.report_utils import (
     ReportFormatter, ReportContext, ReportDataValidator,
     ExportUtilities, MauritanianNumberConverter
 )
+from ..utils.employee_snapshot import NUMPY_AVAILABLE, PROBATION_MONTHS, get_employee_snapshot
+from ..utils.employee_search import search_condition
+from ..utils.keyset_pagination import paginate_keyset
+from .streaming_exports import DEFAULT_CHUNK_SIZE, export_rows
 
 
 class EmployeeStatusType(Enum):
@@ -288,24 +295,9 @@ class EmployeeDataExtractor:
                 Q(national_id__isnull=True) | Q(national_id__exact='')
             )
         
-        # Text search
+        # Text search (prefix and typo-tolerant, on the employee search index)
         if filters.search_text:
-            search_terms = filters.search_text.split()
-            search_query = Q()
-            
-            for term in search_terms:
-                term_query = (
-                    Q(first_name__icontains=term) |
-                    Q(last_name__icontains=term) |
-                    Q(national_id__icontains=term) |
-                    Q(cnss_number__icontains=term) |
-                    Q(cnam_number__icontains=term) |
-                    Q(email__icontains=term) |
-                    Q(phone__icontains=term)
-                )
-                search_query &= term_query
-            
-            queryset = queryset.filter(search_query)
+            queryset = queryset.filter(search_condition(filters.search_text))
         
         return queryset
     
@@ -423,6 +415,94 @@ class EmployeeDataExtractor:
         
         return EmployeeStatusType.ACTIVE.value
 
+    # ========== DATABASE-SIDE COMPUTATIONS ==========
+
+    @staticmethod
+    def probation_hire_cutoff(on_date: date) -> date:
+        """
+        Earliest hire date whose probation (6 months) ends on or after a date
+
+        Probation end grows with the hire date, so "probation end >= on_date"
+        becomes "hire_date >= cutoff", a plain comparison the database can use.
+        """
+        cutoff = DateCalculator.add_months(on_date, -PROBATION_MONTHS)
+        while DateCalculator.add_months(cutoff, PROBATION_MONTHS) < on_date:
+            cutoff += timedelta(days=1)
+        return cutoff
+
+    @staticmethod
+    def employment_status_expression(today: date) -> Case:
+        """SQL expression of _get_employment_status"""
+        return Case(
+            When(is_active=False, termination_date__isnull=False, then=Value(EmployeeStatusType.TERMINATED.value)),
+            When(is_active=False, then=Value(EmployeeStatusType.INACTIVE.value)),
+            When(on_leave=True, then=Value(EmployeeStatusType.ON_LEAVE.value)),
+            When(hire_date__gte=EmployeeDataExtractor.probation_hire_cutoff(today),
+                 then=Value(EmployeeStatusType.PROBATION.value)),
+            default=Value(EmployeeStatusType.ACTIVE.value),
+            output_field=CharField()
+        )
+
+    @staticmethod
+    def seniority_years_expression(today: date):
+        """SQL expression of the complete years since hiring (NULL without hire date)"""
+        before_anniversary = Q(hire_date__month__gt=today.month) | Q(
+            hire_date__month=today.month, hire_date__day__gt=today.day
+        )
+        return ExpressionWrapper(
+            Value(today.year) - ExtractYear('hire_date')
+            - Case(When(before_anniversary, then=Value(1)), default=Value(0)),
+            output_field=IntegerField()
+        )
+
+    @staticmethod
+    def get_report_queryset(filters: EmployeeReportFilter = None, today: date = None):
+        """
+        Filtered employee queryset annotated with the common report columns
+
+        Nothing is prefetched: reports read it with values(), aggregate it and
+        load only the rows of the requested page.
+
+        Returns:
+            Queryset annotated with employee_name, department_name,
+            position_name and employment_status
+        """
+        today = today or date.today()
+        return EmployeeDataExtractor.get_base_employee_queryset(filters).select_related(None).prefetch_related(
+            None
+        ).annotate(
+            employee_name=Trim(Concat('first_name', Value(' '), 'last_name', output_field=CharField())),
+            department_name=Coalesce('department__name', Value(''), output_field=CharField()),
+            position_name=Coalesce('position__name', Value(''), output_field=CharField()),
+            employment_status=EmployeeDataExtractor.employment_status_expression(today),
+        )
+
+    @staticmethod
+    def category_counts(queryset, category: str, categories) -> Dict[str, int]:
+        """Count rows per value of a category annotation with one GROUP BY query"""
+        counts = dict.fromkeys(categories, 0)
+        for row in queryset.order_by().values(category).annotate(count=Count('id')):
+            counts[row[category]] = row['count']
+        return counts
+
+    @staticmethod
+    def category_rank_expression(category: str, categories) -> Case:
+        """Position of a category annotation in the report order, used as a sort key"""
+        return Case(
+            *[When(**{category: name}, then=Value(rank)) for rank, name in enumerate(categories)],
+            default=Value(len(categories)),
+            output_field=IntegerField()
+        )
+
+    @staticmethod
+    def pagination_info(page, page_size: Optional[int]) -> Dict[str, Any]:
+        """Pagination section of a report (cursor to pass back for the next page)"""
+        return {
+            'page_size': page_size,
+            'next_cursor': page.next_cursor,
+            'has_more': page.has_more
+        }
+
 
 class EmployeeDirectoryReports:
     """Employee directory and contact information reports"""
@@ -712,61 +792,69 @@ class EmployeeStatusReports:
         self.system_params = system_params
     
     def generate_employment_status_report(self, filters: EmployeeReportFilter = None,
-                                        locale: str = "fr") -> Dict[str, Any]:
+                                        locale: str = "fr", page_size: int = None,
+                                        cursor: str = None) -> Dict[str, Any]:
         """
         Generate employment status tracking report
-        
+
+        Statuses and seniority are computed by the database; only the rows of
+        the requested page are loaded, ordered by status then name.
+
         Args:
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Employment status report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
-        
-        # Categorize by employment status
-        status_groups = {
-            EmployeeStatusType.ACTIVE.value: [],
-            EmployeeStatusType.INACTIVE.value: [],
-            EmployeeStatusType.ON_LEAVE.value: [],
-            EmployeeStatusType.TERMINATED.value: [],
-            EmployeeStatusType.PROBATION.value: []
-        }
-        
-        for employee in employees:
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            status = summary_data.employment_status
-            
-            employee_data = {
-                'employee_number': summary_data.employee_number,
-                'full_name': summary_data.full_name,
-                'department': summary_data.department_name or '',
-                'position': summary_data.position_name or '',
+        today = date.today()
+        statuses = [
+            EmployeeStatusType.ACTIVE.value,
+            EmployeeStatusType.INACTIVE.value,
+            EmployeeStatusType.ON_LEAVE.value,
+            EmployeeStatusType.TERMINATED.value,
+            EmployeeStatusType.PROBATION.value
+        ]
+        employees = EmployeeDataExtractor.get_report_queryset(filters, today)
+        status_counts = EmployeeDataExtractor.category_counts(employees, 'employment_status', statuses)
+
+        page = paginate_keyset(
+            employees.annotate(
+                status_rank=EmployeeDataExtractor.category_rank_expression('employment_status', statuses),
+                seniority_years=EmployeeDataExtractor.seniority_years_expression(today)
+            ).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'hire_date', 'termination_date',
+                'seniority_years', 'contract_type', 'contract_end_date', 'employment_status', 'status_rank'
+            ),
+            ('status_rank', 'employee_name', 'id'), page_size, cursor
+        )
+
+        # Categorize the page by employment status
+        status_groups = {status: [] for status in statuses}
+        for row in page.rows:
+            status_groups[row['employment_status']].append({
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+                'position': row['position_name'],
                 'hire_date': DateFormatter.format_for_display(
-                    summary_data.hire_date, "french", locale
-                ) if summary_data.hire_date else '',
+                    row['hire_date'], "french", locale
+                ) if row['hire_date'] else '',
                 'termination_date': DateFormatter.format_for_display(
-                    summary_data.termination_date, "french", locale
-                ) if summary_data.termination_date else '',
-                'seniority_years': summary_data.seniority_years or 0,
-                'contract_type': summary_data.contract_type or '',
+                    row['termination_date'], "french", locale
+                ) if row['termination_date'] else '',
+                'seniority_years': row['seniority_years'] or 0,
+                'contract_type': row['contract_type'] or '',
                 'contract_end_date': DateFormatter.format_for_display(
-                    summary_data.contract_end_date, "french", locale
-                ) if summary_data.contract_end_date else '',
-            }
-            
-            if status in status_groups:
-                status_groups[status].append(employee_data)
-        
-        # Sort each group
-        for status_list in status_groups.values():
-            status_list.sort(key=lambda x: x['full_name'])
-        
+                    row['contract_end_date'], "french", locale
+                ) if row['contract_end_date'] else '',
+            })
+
         # Generate summary statistics
-        total_employees = sum(len(group) for group in status_groups.values())
-        status_counts = {status: len(group) for status, group in status_groups.items()}
-        
+        total_employees = sum(status_counts.values())
+
         return {
             'report_type': 'employment_status',
             'generation_date': datetime.now(),
@@ -782,84 +870,91 @@ class EmployeeStatusReports:
                     for status, count in status_counts.items()
                 },
                 'active_percentage': (status_counts[EmployeeStatusType.ACTIVE.value] / total_employees * 100) if total_employees > 0 else 0
-            }
+            },
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
+
     def generate_contract_status_report(self, expiry_within_days: int = 90,
                                       filters: EmployeeReportFilter = None,
-                                      locale: str = "fr") -> Dict[str, Any]:
+                                      locale: str = "fr", page_size: int = None,
+                                      cursor: str = None) -> Dict[str, Any]:
         """
         Generate contract status and expiration tracking report
-        
+
+        Contract categories are computed by the database; only the rows of the
+        requested page are loaded, ordered by category then name (contracts
+        expiring soon by expiry date).
+
         Args:
             expiry_within_days: Alert threshold for contract expiry
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Contract status report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
-        
         today = date.today()
         expiry_threshold = today + timedelta(days=expiry_within_days)
-        
-        contract_categories = {
-            'active': [],          # Active contracts not expiring soon
-            'expiring_soon': [],   # Contracts expiring within threshold
-            'expired': [],         # Expired contracts
-            'indefinite': [],      # CDI contracts (no end date)
-            'terminated': []       # Terminated contracts
-        }
-        
-        for employee in employees:
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            
-            employee_data = {
-                'employee_number': summary_data.employee_number,
-                'full_name': summary_data.full_name,
-                'department': summary_data.department_name or '',
-                'position': summary_data.position_name or '',
-                'contract_type': summary_data.contract_type or 'Non spécifié',
+
+        categories = [
+            'active',          # Active contracts not expiring soon
+            'expiring_soon',   # Contracts expiring within threshold
+            'expired',         # Expired contracts
+            'indefinite',      # CDI contracts (no end date)
+            'terminated'       # Terminated contracts
+        ]
+        employees = EmployeeDataExtractor.get_report_queryset(filters, today).annotate(
+            contract_category=Case(
+                When(termination_date__isnull=False, then=Value('terminated')),
+                When(contract_end_date__isnull=True, then=Value('indefinite')),
+                When(contract_end_date__lt=today, then=Value('expired')),
+                When(contract_end_date__lte=expiry_threshold, then=Value('expiring_soon')),
+                default=Value('active'),
+                output_field=CharField()
+            )
+        )
+        category_counts = EmployeeDataExtractor.category_counts(employees, 'contract_category', categories)
+
+        page = paginate_keyset(
+            employees.annotate(
+                category_rank=EmployeeDataExtractor.category_rank_expression('contract_category', categories),
+                # Contracts expiring soon come by expiry date, the others by name
+                expiry_order=Case(
+                    When(contract_category='expiring_soon', then=F('contract_end_date')),
+                    default=Value(today),
+                    output_field=DateField()
+                )
+            ).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'contract_type', 'hire_date',
+                'contract_end_date', 'employment_status', 'contract_category', 'category_rank', 'expiry_order'
+            ),
+            ('category_rank', 'expiry_order', 'employee_name', 'id'), page_size, cursor
+        )
+
+        contract_categories = {category: [] for category in categories}
+        for row in page.rows:
+            contract_end_date = row['contract_end_date']
+            contract_categories[row['contract_category']].append({
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+                'position': row['position_name'],
+                'contract_type': row['contract_type'] or 'Non spécifié',
                 'hire_date': DateFormatter.format_for_display(
-                    summary_data.hire_date, "french", locale
-                ) if summary_data.hire_date else '',
+                    row['hire_date'], "french", locale
+                ) if row['hire_date'] else '',
                 'contract_end_date': DateFormatter.format_for_display(
-                    summary_data.contract_end_date, "french", locale
-                ) if summary_data.contract_end_date else '',
-                'days_to_expiry': None,
-                'employment_status': self._localize_status(summary_data.employment_status, locale)
-            }
-            
-            # Determine contract category
-            if summary_data.termination_date:
-                contract_categories['terminated'].append(employee_data)
-            elif not summary_data.contract_end_date:
-                contract_categories['indefinite'].append(employee_data)
-            else:
-                days_to_expiry = (summary_data.contract_end_date - today).days
-                employee_data['days_to_expiry'] = days_to_expiry
-                
-                if days_to_expiry < 0:
-                    contract_categories['expired'].append(employee_data)
-                elif days_to_expiry <= expiry_within_days:
-                    contract_categories['expiring_soon'].append(employee_data)
-                else:
-                    contract_categories['active'].append(employee_data)
-        
-        # Sort each category
-        for category in contract_categories.values():
-            category.sort(key=lambda x: x['full_name'])
-        
-        # Sort expiring soon by days to expiry
-        contract_categories['expiring_soon'].sort(
-            key=lambda x: x['days_to_expiry'] if x['days_to_expiry'] is not None else float('inf')
-        )
-        
-        # Generate statistics
-        total_employees = sum(len(group) for group in contract_categories.values())
-        category_counts = {cat: len(employees) for cat, employees in contract_categories.items()}
-        
+                    contract_end_date, "french", locale
+                ) if contract_end_date else '',
+                'days_to_expiry': (
+                    (contract_end_date - today).days
+                    if contract_end_date and row['contract_category'] != 'terminated' else None
+                ),
+                'employment_status': self._localize_status(row['employment_status'], locale)
+            })
+
         return {
             'report_type': 'contract_status',
             'generation_date': datetime.now(),
@@ -870,82 +965,87 @@ class EmployeeStatusReports:
                 for category, employees_list in contract_categories.items()
             },
             'summary_statistics': {
-                'total_employees': total_employees,
+                'total_employees': sum(category_counts.values()),
                 'category_counts': {
                     self._localize_contract_category(cat, locale): count
                     for cat, count in category_counts.items()
                 },
                 'urgent_renewals_needed': category_counts['expiring_soon'] + category_counts['expired'],
                 'contract_types_distribution': self._get_contract_types_distribution(employees)
-            }
+            },
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
+
     def generate_probation_tracking_report(self, filters: EmployeeReportFilter = None,
-                                         locale: str = "fr") -> Dict[str, Any]:
+                                         locale: str = "fr", page_size: int = None,
+                                         cursor: str = None) -> Dict[str, Any]:
         """
         Generate probation period tracking report
-        
+
+        Probation categories are computed by the database from hire date
+        thresholds; only the rows of the requested page are loaded, ordered by
+        category then probation end date.
+
         Args:
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Probation tracking report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
         today = date.today()
-        
-        probation_categories = {
-            'current_probation': [],      # Currently in probation
-            'probation_ending_soon': [],  # Probation ending within 30 days
-            'probation_completed': [],    # Recently completed probation (within 90 days)
-            'probation_overdue': []       # Probation review overdue
-        }
-        
-        for employee in employees:
-            if not employee.hire_date:
-                continue
-            
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            
-            # Calculate probation dates (6 months standard)
-            probation_end_date = DateCalculator.add_months(employee.hire_date, 6)
-            days_to_probation_end = (probation_end_date - today).days
-            
-            employee_data = {
-                'employee_number': summary_data.employee_number,
-                'full_name': summary_data.full_name,
-                'department': summary_data.department_name or '',
-                'position': summary_data.position_name or '',
+        cutoff = EmployeeDataExtractor.probation_hire_cutoff
+
+        categories = [
+            'current_probation',      # Currently in probation
+            'probation_ending_soon',  # Probation ending within 30 days
+            'probation_completed',    # Recently completed probation (within 90 days)
+            'probation_overdue'       # Probation review overdue
+        ]
+        employees = EmployeeDataExtractor.get_report_queryset(filters, today).filter(
+            hire_date__isnull=False
+        ).annotate(
+            probation_category=Case(
+                When(hire_date__gte=cutoff(today + timedelta(days=31)), then=Value('current_probation')),
+                When(hire_date__gte=cutoff(today + timedelta(days=1)), then=Value('probation_ending_soon')),
+                When(hire_date__gte=cutoff(today - timedelta(days=90)), then=Value('probation_completed')),
+                default=Value('probation_overdue'),
+                output_field=CharField()
+            )
+        )
+        category_counts = EmployeeDataExtractor.category_counts(employees, 'probation_category', categories)
+
+        page = paginate_keyset(
+            employees.annotate(
+                category_rank=EmployeeDataExtractor.category_rank_expression('probation_category', categories)
+            ).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'hire_date',
+                'employment_status', 'probation_category', 'category_rank'
+            ),
+            ('category_rank', 'hire_date', 'employee_name', 'id'), page_size, cursor
+        )
+
+        probation_categories = {category: [] for category in categories}
+        for row in page.rows:
+            probation_end_date = DateCalculator.add_months(row['hire_date'], PROBATION_MONTHS)
+            probation_categories[row['probation_category']].append({
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+                'position': row['position_name'],
                 'hire_date': DateFormatter.format_for_display(
-                    employee.hire_date, "french", locale
+                    row['hire_date'], "french", locale
                 ),
                 'probation_end_date': DateFormatter.format_for_display(
                     probation_end_date, "french", locale
                 ),
-                'days_in_probation': (today - employee.hire_date).days,
-                'days_to_probation_end': days_to_probation_end,
-                'employment_status': self._localize_status(summary_data.employment_status, locale)
-            }
-            
-            # Categorize based on probation status
-            if days_to_probation_end > 0:
-                if days_to_probation_end <= 30:
-                    probation_categories['probation_ending_soon'].append(employee_data)
-                else:
-                    probation_categories['current_probation'].append(employee_data)
-            elif days_to_probation_end >= -90:  # Completed within last 90 days
-                probation_categories['probation_completed'].append(employee_data)
-            else:  # Overdue review
-                probation_categories['probation_overdue'].append(employee_data)
-        
-        # Sort categories
-        for category in probation_categories.values():
-            category.sort(key=lambda x: x['days_to_probation_end'])
-        
-        # Generate statistics
-        total_tracked = sum(len(group) for group in probation_categories.values())
-        
+                'days_in_probation': (today - row['hire_date']).days,
+                'days_to_probation_end': (probation_end_date - today).days,
+                'employment_status': self._localize_status(row['employment_status'], locale)
+            })
+
         return {
             'report_type': 'probation_tracking',
             'generation_date': datetime.now(),
@@ -955,23 +1055,26 @@ class EmployeeStatusReports:
                 for category, employees_list in probation_categories.items()
             },
             'summary_statistics': {
-                'total_tracked_employees': total_tracked,
-                'current_probation_count': len(probation_categories['current_probation']),
-                'ending_soon_count': len(probation_categories['probation_ending_soon']),
-                'overdue_reviews_count': len(probation_categories['probation_overdue']),
-                'reviews_needed_urgently': len(probation_categories['probation_ending_soon']) + len(probation_categories['probation_overdue'])
-            }
+                'total_tracked_employees': sum(category_counts.values()),
+                'current_probation_count': category_counts['current_probation'],
+                'ending_soon_count': category_counts['probation_ending_soon'],
+                'overdue_reviews_count': category_counts['probation_overdue'],
+                'reviews_needed_urgently': category_counts['probation_ending_soon'] + category_counts['probation_overdue']
+            },
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
+
     def _get_contract_types_distribution(self, employees) -> Dict[str, int]:
-        """Get distribution of contract types"""
-        contract_counts = defaultdict(int)
-        
-        for employee in employees:
-            contract_type = employee.contract_type or 'Non spécifié'
-            contract_counts[contract_type] += 1
-        
-        return dict(contract_counts)
+        """Get distribution of contract types with one GROUP BY query"""
+        contract_types = employees.annotate(
+            contract_type_label=Case(
+                When(Q(contract_type__isnull=True) | Q(contract_type=''), then=Value('Non spécifié')),
+                default=F('contract_type'),
+                output_field=CharField()
+            )
+        ).order_by().values('contract_type_label').annotate(count=Count('id'))
+
+        return {row['contract_type_label']: row['count'] for row in contract_types}
     
     def _localize_status(self, status: str, locale: str = "fr") -> str:
         """Localize employment status"""
@@ -1229,21 +1332,53 @@ class EmployeeLifecycleReports:
     
     def generate_anniversary_report(self, anniversary_year: int = None,
                                   filters: EmployeeReportFilter = None,
-                                  locale: str = "fr") -> Dict[str, Any]:
+                                  locale: str = "fr", page_size: int = None,
+                                  cursor: str = None) -> Dict[str, Any]:
         """
         Generate employee anniversary and milestone tracking report
-        
+
+        Years of service and the summary statistics are computed by the
+        database; only the rows of the requested page are loaded, in
+        anniversary date order.
+
         Args:
             anniversary_year: Specific anniversary year to track (optional)
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Anniversary report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
         current_year = anniversary_year or date.today().year
-        
+        milestone_years = [1, 5, 10, 15, 20, 25, 30]
+
+        employees = EmployeeDataExtractor.get_report_queryset(filters).filter(
+            hire_date__isnull=False, hire_date__year__lt=current_year
+        ).annotate(
+            years_of_service=ExpressionWrapper(
+                Value(current_year) - ExtractYear('hire_date'), output_field=IntegerField()
+            )
+        )
+        statistics = employees.aggregate(
+            total_anniversaries=Count('id'),
+            milestone_anniversaries=Count('id', filter=Q(years_of_service__in=milestone_years)),
+            longest_tenure=Max('years_of_service'),
+            average_tenure=Avg('years_of_service')
+        )
+
+        page = paginate_keyset(
+            employees.annotate(
+                anniversary_month=ExtractMonth('hire_date'),
+                anniversary_day=ExtractDay('hire_date')
+            ).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'hire_date', 'employment_status',
+                'years_of_service', 'anniversary_month', 'anniversary_day'
+            ),
+            ('anniversary_month', 'anniversary_day', 'employee_name', 'id'), page_size, cursor
+        )
+
         anniversaries = []
         milestone_categories = {
             'service_awards_1_year': [],
@@ -1254,39 +1389,29 @@ class EmployeeLifecycleReports:
             'service_awards_25_years': [],
             'upcoming_milestones': []
         }
-        
-        for employee in employees:
-            if not employee.hire_date:
-                continue
-                
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            
-            # Calculate anniversary date for current year
-            anniversary_date = employee.hire_date.replace(year=current_year)
-            years_of_service = current_year - employee.hire_date.year
-            
-            if years_of_service <= 0:
-                continue
-            
+
+        for row in page.rows:
+            years_of_service = row['years_of_service']
+
             anniversary_data = {
-                'employee_number': summary_data.employee_number,
-                'full_name': summary_data.full_name,
-                'department': summary_data.department_name or '',
-                'position': summary_data.position_name or '',
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+                'position': row['position_name'],
                 'hire_date': DateFormatter.format_for_display(
-                    employee.hire_date, "french", locale
+                    row['hire_date'], "french", locale
                 ),
                 'anniversary_date': DateFormatter.format_for_display(
-                    anniversary_date, "french", locale
+                    DateCalculator.add_years(row['hire_date'], years_of_service), "french", locale
                 ),
                 'years_of_service': years_of_service,
-                'is_milestone_year': years_of_service in [1, 5, 10, 15, 20, 25, 30],
+                'is_milestone_year': years_of_service in milestone_years,
                 'milestone_type': self._get_milestone_type(years_of_service, locale),
-                'employment_status': self._localize_status(summary_data.employment_status, locale)
+                'employment_status': self._localize_status(row['employment_status'], locale)
             }
-            
+
             anniversaries.append(anniversary_data)
-            
+
             # Categorize by milestone
             if years_of_service == 1:
                 milestone_categories['service_awards_1_year'].append(anniversary_data)
@@ -1300,7 +1425,7 @@ class EmployeeLifecycleReports:
                 milestone_categories['service_awards_20_years'].append(anniversary_data)
             elif years_of_service >= 25:
                 milestone_categories['service_awards_25_years'].append(anniversary_data)
-            
+
             # Check for upcoming milestones (next milestone year)
             next_milestone = self._get_next_milestone_year(years_of_service)
             if next_milestone and next_milestone - years_of_service <= 2:
@@ -1309,14 +1434,7 @@ class EmployeeLifecycleReports:
                     'years_to_milestone': next_milestone - years_of_service,
                     'next_milestone_year': next_milestone
                 })
-        
-        # Sort anniversaries by date
-        anniversaries.sort(key=lambda x: x['anniversary_date'])
-        
-        # Sort milestone categories
-        for category in milestone_categories.values():
-            category.sort(key=lambda x: x['anniversary_date'])
-        
+
         return {
             'report_type': 'anniversary_report',
             'generation_date': datetime.now(),
@@ -1328,11 +1446,12 @@ class EmployeeLifecycleReports:
                 for cat, employees_list in milestone_categories.items()
             },
             'summary_statistics': {
-                'total_anniversaries': len(anniversaries),
-                'milestone_anniversaries': sum(1 for a in anniversaries if a['is_milestone_year']),
-                'longest_tenure': max((a['years_of_service'] for a in anniversaries), default=0),
-                'average_tenure': sum(a['years_of_service'] for a in anniversaries) / len(anniversaries) if anniversaries else 0
-            }
+                'total_anniversaries': statistics['total_anniversaries'],
+                'milestone_anniversaries': statistics['milestone_anniversaries'],
+                'longest_tenure': statistics['longest_tenure'] or 0,
+                'average_tenure': float(statistics['average_tenure'] or 0)
+            },
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
     
     def _get_missing_documents(self, employee: Employee, required_docs: List[str]) -> List[str]:
@@ -1508,102 +1627,150 @@ class DocumentComplianceReports:
     def __init__(self, system_params=None):
         self.system_params = system_params
     
+    # Required document types, and the ones also required from expatriates
+    REQUIRED_DOCUMENT_TYPES = ['CONTRACT', 'ID_CARD', 'PASSPORT', 'MEDICAL']
+    EXPATRIATE_DOCUMENT_TYPES = ['PASSPORT', 'VISA', 'WORK_PERMIT', 'RESIDENCE_CARD']
+
     def generate_document_status_report(self, expiry_within_days: int = 90,
                                       filters: EmployeeReportFilter = None,
-                                      locale: str = "fr") -> Dict[str, Any]:
+                                      locale: str = "fr", page_size: int = None,
+                                      cursor: str = None) -> Dict[str, Any]:
         """
         Generate comprehensive document status and expiration tracking report
-        
+
+        Document statuses and missing documents are counted by the database
+        (conditional counts and Exists subqueries); only the documents of the
+        requested page of employees are loaded, employees ordered by name.
+
         Args:
             expiry_within_days: Alert threshold for document expiry
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Document status report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
         today = date.today()
         expiry_threshold = today + timedelta(days=expiry_within_days)
-        
+        required_doc_types = self.REQUIRED_DOCUMENT_TYPES
+        expat_doc_types = self.EXPATRIATE_DOCUMENT_TYPES
+
+        employees = EmployeeDataExtractor.get_report_queryset(filters, today).annotate(
+            is_foreign=Case(
+                When(self._foreign_employee_condition(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField()
+            ),
+            **{
+                self._has_document_alias(doc_type): Exists(
+                    Document.objects.filter(employee=OuterRef('pk'), document_type=doc_type)
+                )
+                for doc_type in dict.fromkeys(required_doc_types + expat_doc_types)
+            }
+        )
+
+        # Existing required documents by status
+        status_counts = Document.objects.filter(
+            employee__in=employees.order_by().values('id'), document_type__in=required_doc_types
+        ).aggregate(
+            valid=Count('id', filter=Q(expiry_date__isnull=True) | Q(expiry_date__gt=expiry_threshold)),
+            expiring_soon=Count('id', filter=Q(expiry_date__gte=today, expiry_date__lte=expiry_threshold)),
+            expired=Count('id', filter=Q(expiry_date__lt=today)),
+        )
+
+        # Missing required documents (expatriates also need their own documents)
+        missing_counts = employees.aggregate(
+            total_employees=Count('id'),
+            **{
+                f'missing_{doc_type}': Count('id', filter=Q(**{self._has_document_alias(doc_type): False}))
+                for doc_type in required_doc_types
+            },
+            **{
+                f'missing_expatriate_{doc_type}': Count(
+                    'id', filter=Q(is_foreign=True, **{self._has_document_alias(doc_type): False})
+                )
+                for doc_type in expat_doc_types
+            }
+        )
+        total_employees = missing_counts.pop('total_employees')
+        status_counts['missing'] = sum(missing_counts.values())
+
+        page = paginate_keyset(
+            employees.values(
+                'id', 'employee_name', 'department_name', 'is_foreign',
+                *[self._has_document_alias(doc_type) for doc_type in dict.fromkeys(required_doc_types + expat_doc_types)]
+            ),
+            ('employee_name', 'id'), page_size, cursor
+        )
+
+        documents = defaultdict(list)
+        for document in Document.objects.filter(
+            employee_id__in=[row['id'] for row in page.rows], document_type__in=required_doc_types
+        ).order_by('id').values('employee_id', 'document_type', 'document_name', 'issue_date', 'expiry_date'):
+            documents[(document['employee_id'], document['document_type'])].append(document)
+
         document_status = {
             'valid': [],           # Documents that are valid and not expiring soon
             'expiring_soon': [],   # Documents expiring within threshold
             'expired': [],         # Expired documents
             'missing': []          # Employees missing required documents
         }
-        
-        # Required document types
-        required_doc_types = ['CONTRACT', 'ID_CARD', 'PASSPORT', 'MEDICAL']
-        
-        for employee in employees:
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            employee_docs = employee.documents.all()
-            
+
+        for row in page.rows:
+            employee_data = {
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+            }
+
             # Check each required document type
             for doc_type in required_doc_types:
-                docs_of_type = employee_docs.filter(document_type=doc_type)
-                
-                if not docs_of_type.exists():
+                if not row[self._has_document_alias(doc_type)]:
                     # Missing document
                     document_status['missing'].append({
-                        'employee_number': summary_data.employee_number,
-                        'full_name': summary_data.full_name,
-                        'department': summary_data.department_name or '',
+                        **employee_data,
                         'document_type': doc_type,
                         'status': 'missing',
                         'priority': 'high' if doc_type in ['CONTRACT', 'ID_CARD'] else 'medium'
                     })
-                else:
-                    # Check expiry status for existing documents
-                    for doc in docs_of_type:
-                        status = self._get_document_status(doc, today, expiry_threshold)
-                        
-                        doc_data = {
-                            'employee_number': summary_data.employee_number,
-                            'full_name': summary_data.full_name,
-                            'department': summary_data.department_name or '',
-                            'document_type': doc.document_type,
-                            'document_name': doc.document_name,
-                            'issue_date': DateFormatter.format_for_display(
-                                doc.issue_date, "french", locale
-                            ) if doc.issue_date else '',
-                            'expiry_date': DateFormatter.format_for_display(
-                                doc.expiry_date, "french", locale
-                            ) if doc.expiry_date else '',
-                            'days_to_expiry': (doc.expiry_date - today).days if doc.expiry_date else None,
-                            'status': status
-                        }
-                        
-                        document_status[status].append(doc_data)
-            
+                    continue
+
+                # Check expiry status for existing documents
+                for doc in documents[(row['id'], doc_type)]:
+                    status = self._get_document_status(doc['expiry_date'], today, expiry_threshold)
+                    document_status[status].append({
+                        **employee_data,
+                        'document_type': doc['document_type'],
+                        'document_name': doc['document_name'],
+                        'issue_date': DateFormatter.format_for_display(
+                            doc['issue_date'], "french", locale
+                        ) if doc['issue_date'] else '',
+                        'expiry_date': DateFormatter.format_for_display(
+                            doc['expiry_date'], "french", locale
+                        ) if doc['expiry_date'] else '',
+                        'days_to_expiry': (doc['expiry_date'] - today).days if doc['expiry_date'] else None,
+                        'status': status
+                    })
+
             # Check for expatriate-specific documents
-            if employee.is_expatriate or employee.is_foreign_employee:
-                expat_docs = ['PASSPORT', 'VISA', 'WORK_PERMIT', 'RESIDENCE_CARD']
-                for doc_type in expat_docs:
-                    if not employee_docs.filter(document_type=doc_type).exists():
+            if row['is_foreign']:
+                for doc_type in expat_doc_types:
+                    if not row[self._has_document_alias(doc_type)]:
                         document_status['missing'].append({
-                            'employee_number': summary_data.employee_number,
-                            'full_name': summary_data.full_name,
-                            'department': summary_data.department_name or '',
+                            **employee_data,
                             'document_type': doc_type,
                             'status': 'missing',
                             'priority': 'high',
                             'is_expatriate_doc': True
                         })
-        
-        # Sort each category
-        for category in document_status.values():
-            category.sort(key=lambda x: x['full_name'])
-        
-        # Sort expiring soon by days to expiry
+
+        # Sort expiring soon by days to expiry (rows are already ordered by name)
         document_status['expiring_soon'].sort(
             key=lambda x: x['days_to_expiry'] if x['days_to_expiry'] is not None else float('inf')
         )
-        
-        # Generate statistics
-        stats = self._generate_document_statistics(document_status, employees.count())
-        
+
         return {
             'report_type': 'document_status',
             'generation_date': datetime.now(),
@@ -1613,57 +1780,117 @@ class DocumentComplianceReports:
                 self._localize_document_category(category, locale): docs_list
                 for category, docs_list in document_status.items()
             },
-            'statistics': stats,
-            'compliance_score': self._calculate_compliance_score(document_status, employees.count())
+            'statistics': self._generate_document_statistics(status_counts, total_employees),
+            'compliance_score': self._calculate_compliance_score(status_counts, total_employees),
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
+
     def generate_compliance_alerts_report(self, filters: EmployeeReportFilter = None,
-                                        locale: str = "fr") -> Dict[str, Any]:
+                                        locale: str = "fr", page_size: int = None,
+                                        cursor: str = None) -> Dict[str, Any]:
         """
         Generate compliance alerts and notifications report
-        
+
+        Alert counts are computed by the database (conditional counts, Exists
+        subqueries for expired and expiring documents); only the employees of
+        the requested page having an alert are loaded, ordered by name.
+
         Args:
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Compliance alerts report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
-        
+        today = date.today()
+        expiring_threshold = today + timedelta(days=30)
+
+        employees = EmployeeDataExtractor.get_report_queryset(filters, today).annotate(
+            has_expired_documents=Exists(
+                Document.objects.filter(employee=OuterRef('pk'), expiry_date__lt=today)
+            ),
+            has_expiring_documents=Exists(
+                Document.objects.filter(
+                    employee=OuterRef('pk'), expiry_date__gte=today, expiry_date__lte=expiring_threshold
+                )
+            )
+        )
+
+        conditions = {
+            'missing_nni': self._blank('national_id'),
+            'missing_cnss': self._blank('cnss_number'),
+            'missing_cnam': self._blank('cnam_number'),
+            'expired_documents': Q(has_expired_documents=True),
+            'expiring_documents': Q(has_expiring_documents=True),
+            'missing_contact': self._blank('phone') & self._blank('email'),
+            'missing_passport': Q(is_expatriate=True) & self._blank('passport_number'),
+        }
+        any_alert = Q()
+        for condition in conditions.values():
+            any_alert |= condition
+
+        counts = employees.aggregate(
+            employees_affected=Count('id', filter=any_alert),
+            **{alert_type: Count('id', filter=condition) for alert_type, condition in conditions.items()}
+        )
+
+        page = paginate_keyset(
+            employees.filter(any_alert).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'national_id', 'cnss_number',
+                'cnam_number', 'phone', 'email', 'is_expatriate', 'passport_number',
+                'has_expired_documents', 'has_expiring_documents'
+            ),
+            ('employee_name', 'id'), page_size, cursor
+        )
+
+        # Document counts of the page employees with alerts on their documents
+        document_counts = {
+            row['employee_id']: row
+            for row in Document.objects.filter(
+                employee_id__in=[
+                    row['id'] for row in page.rows
+                    if row['has_expired_documents'] or row['has_expiring_documents']
+                ]
+            ).values('employee_id').annotate(
+                expired=Count('id', filter=Q(expiry_date__lt=today)),
+                expiring=Count('id', filter=Q(expiry_date__gte=today, expiry_date__lte=expiring_threshold))
+            ).order_by()
+        }
+
         alerts = {
             'critical': [],    # Critical compliance issues
             'warning': [],     # Warning level issues
             'info': []         # Informational alerts
         }
-        
-        for employee in employees:
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            employee_alerts = self._check_employee_compliance(employee, summary_data)
-            
-            for alert in employee_alerts:
+
+        for row in page.rows:
+            for alert in self._check_employee_compliance(row, document_counts.get(row['id'], {})):
                 alert.update({
-                    'employee_number': summary_data.employee_number,
-                    'full_name': summary_data.full_name,
-                    'department': summary_data.department_name or '',
-                    'position': summary_data.position_name or ''
+                    'employee_number': str(row['id']),
+                    'full_name': row['employee_name'],
+                    'department': row['department_name'],
+                    'position': row['position_name']
                 })
-                
+
                 alerts[alert['severity']].append(alert)
-        
+
         # Sort by priority and employee name
         for category in alerts.values():
             category.sort(key=lambda x: (x.get('priority', 0), x['full_name']))
-        
+
         # Generate alert summary
+        critical_count = counts['missing_nni'] + counts['missing_cnss'] + counts['missing_cnam']
+        warning_count = counts['expired_documents'] + counts['expiring_documents'] + counts['missing_passport']
         alert_summary = {
-            'total_alerts': sum(len(category) for category in alerts.values()),
-            'critical_count': len(alerts['critical']),
-            'warning_count': len(alerts['warning']),
-            'info_count': len(alerts['info']),
-            'employees_affected': len(set(alert['employee_number'] for category in alerts.values() for alert in category))
+            'total_alerts': critical_count + warning_count + counts['missing_contact'],
+            'critical_count': critical_count,
+            'warning_count': warning_count,
+            'info_count': counts['missing_contact'],
+            'employees_affected': counts['employees_affected']
         }
-        
+
         return {
             'report_type': 'compliance_alerts',
             'generation_date': datetime.now(),
@@ -1673,86 +1900,99 @@ class DocumentComplianceReports:
                 for category, alerts_list in alerts.items()
             },
             'alert_summary': alert_summary,
-            'action_required': alert_summary['critical_count'] > 0
+            'action_required': alert_summary['critical_count'] > 0,
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
+
     def generate_nni_cnss_cnam_report(self, filters: EmployeeReportFilter = None,
-                                     locale: str = "fr") -> Dict[str, Any]:
+                                     locale: str = "fr", page_size: int = None,
+                                     cursor: str = None) -> Dict[str, Any]:
         """
         Generate NNI, CNSS, and CNAM registration compliance report
-        
+
+        Compliance categories are computed by the database; only the rows of
+        the requested page are loaded, ordered by category then name.
+
         Args:
             filters: Optional filtering criteria
             locale: Localization ("fr" or "ar")
-            
+            page_size: Employees per page (None for every employee)
+            cursor: Pagination cursor of the previous page
+
         Returns:
             Registration compliance report data
         """
-        employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
-        
-        compliance_data = {
-            'compliant': [],           # All registrations complete
-            'missing_nni': [],         # Missing NNI
-            'missing_cnss': [],        # Missing CNSS
-            'missing_cnam': [],        # Missing CNAM
-            'multiple_missing': []     # Missing multiple registrations
-        }
-        
-        for employee in employees:
-            summary_data = EmployeeDataExtractor.extract_employee_summary_data(employee)
-            
-            missing_registrations = []
-            if not employee.national_id:
-                missing_registrations.append('NNI')
-            if not employee.cnss_number:
-                missing_registrations.append('CNSS')
-            if not employee.cnam_number:
-                missing_registrations.append('CNAM')
-            
-            employee_data = {
-                'employee_number': summary_data.employee_number,
-                'full_name': summary_data.full_name,
-                'department': summary_data.department_name or '',
-                'position': summary_data.position_name or '',
+        categories = [
+            'compliant',           # All registrations complete
+            'missing_nni',         # Missing NNI
+            'missing_cnss',        # Missing CNSS
+            'missing_cnam',        # Missing CNAM
+            'multiple_missing'     # Missing multiple registrations
+        ]
+        registrations = (('NNI', 'national_id'), ('CNSS', 'cnss_number'), ('CNAM', 'cnam_number'))
+
+        missing_count = Value(0)
+        for _, field_name in registrations:
+            missing_count = missing_count + Case(When(self._blank(field_name), then=Value(1)), default=Value(0))
+
+        employees = EmployeeDataExtractor.get_report_queryset(filters).annotate(
+            missing_count=ExpressionWrapper(missing_count, output_field=IntegerField())
+        ).annotate(
+            compliance_category=Case(
+                When(missing_count=0, then=Value('compliant')),
+                When(missing_count__gt=1, then=Value('multiple_missing')),
+                When(self._blank('national_id'), then=Value('missing_nni')),
+                When(self._blank('cnss_number'), then=Value('missing_cnss')),
+                default=Value('missing_cnam'),
+                output_field=CharField()
+            )
+        )
+        category_counts = EmployeeDataExtractor.category_counts(employees, 'compliance_category', categories)
+
+        page = paginate_keyset(
+            employees.annotate(
+                category_rank=EmployeeDataExtractor.category_rank_expression('compliance_category', categories)
+            ).values(
+                'id', 'employee_name', 'department_name', 'position_name', 'hire_date', 'national_id',
+                'cnss_number', 'cnam_number', 'cnss_date', 'compliance_category', 'category_rank'
+            ),
+            ('category_rank', 'employee_name', 'id'), page_size, cursor
+        )
+
+        compliance_data = {category: [] for category in categories}
+        for row in page.rows:
+            missing_registrations = [label for label, field_name in registrations if not row[field_name]]
+
+            compliance_data[row['compliance_category']].append({
+                'employee_number': str(row['id']),
+                'full_name': row['employee_name'],
+                'department': row['department_name'],
+                'position': row['position_name'],
                 'hire_date': DateFormatter.format_for_display(
-                    summary_data.hire_date, "french", locale
-                ) if summary_data.hire_date else '',
-                'nni': ReportFormatter.format_nni(employee.national_id or ''),
-                'cnss_number': ReportFormatter.format_cnss_number(employee.cnss_number or ''),
-                'cnam_number': ReportFormatter.format_cnam_number(employee.cnam_number or ''),
+                    row['hire_date'], "french", locale
+                ) if row['hire_date'] else '',
+                'nni': ReportFormatter.format_nni(row['national_id'] or ''),
+                'cnss_number': ReportFormatter.format_cnss_number(row['cnss_number'] or ''),
+                'cnam_number': ReportFormatter.format_cnam_number(row['cnam_number'] or ''),
                 'cnss_date': DateFormatter.format_for_display(
-                    employee.cnss_date, "french", locale
-                ) if employee.cnss_date else '',
+                    row['cnss_date'], "french", locale
+                ) if row['cnss_date'] else '',
                 'missing_registrations': missing_registrations,
                 'compliance_status': 'compliant' if not missing_registrations else 'non_compliant'
-            }
-            
-            # Categorize employee
-            if not missing_registrations:
-                compliance_data['compliant'].append(employee_data)
-            elif len(missing_registrations) > 1:
-                compliance_data['multiple_missing'].append(employee_data)
-            else:
-                category_key = f"missing_{missing_registrations[0].lower()}"
-                if category_key in compliance_data:
-                    compliance_data[category_key].append(employee_data)
-        
-        # Sort each category
-        for category in compliance_data.values():
-            category.sort(key=lambda x: x['full_name'])
-        
+            })
+
         # Calculate compliance statistics
-        total_employees = sum(len(category) for category in compliance_data.values())
+        total_employees = sum(category_counts.values())
         compliance_stats = {
             'total_employees': total_employees,
-            'compliant_count': len(compliance_data['compliant']),
-            'non_compliant_count': total_employees - len(compliance_data['compliant']),
-            'compliance_percentage': (len(compliance_data['compliant']) / total_employees * 100) if total_employees > 0 else 0,
-            'missing_nni_count': len(compliance_data['missing_nni']) + len(compliance_data['multiple_missing']),
-            'missing_cnss_count': len(compliance_data['missing_cnss']) + len(compliance_data['multiple_missing']),
-            'missing_cnam_count': len(compliance_data['missing_cnam']) + len(compliance_data['multiple_missing'])
+            'compliant_count': category_counts['compliant'],
+            'non_compliant_count': total_employees - category_counts['compliant'],
+            'compliance_percentage': (category_counts['compliant'] / total_employees * 100) if total_employees > 0 else 0,
+            'missing_nni_count': category_counts['missing_nni'] + category_counts['multiple_missing'],
+            'missing_cnss_count': category_counts['missing_cnss'] + category_counts['multiple_missing'],
+            'missing_cnam_count': category_counts['missing_cnam'] + category_counts['multiple_missing']
         }
-        
+
         return {
             'report_type': 'registration_compliance',
             'generation_date': datetime.now(),
@@ -1762,89 +2002,112 @@ class DocumentComplianceReports:
                 for category, employees_list in compliance_data.items()
             },
             'compliance_statistics': compliance_stats,
-            'action_items': self._generate_compliance_action_items(compliance_data, locale)
+            'action_items': self._generate_compliance_action_items(category_counts, locale),
+            'pagination': EmployeeDataExtractor.pagination_info(page, page_size)
         }
-    
-    def _get_document_status(self, document: Document, today: date, 
+
+    @staticmethod
+    def _blank(field_name: str) -> Q:
+        """Condition of an empty (NULL or '') text field"""
+        return Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+
+    def _foreign_employee_condition(self) -> Q:
+        """SQL condition of Employee.is_foreign_employee"""
+        return (
+            Q(is_expatriate=True) | ~self._blank('passport_number') | Q(visa_start_date__isnull=False)
+            | ~self._blank('work_permit_number') | ~self._blank('residence_card_number')
+        )
+
+    @staticmethod
+    def _has_document_alias(doc_type: str) -> str:
+        """Annotation name of the Exists subquery for a document type"""
+        return f'has_{doc_type.lower()}'
+
+    def _get_document_status(self, expiry_date: Optional[date], today: date,
                            expiry_threshold: date) -> str:
         """Determine document status based on expiry date"""
-        if not document.expiry_date:
+        if not expiry_date:
             return 'valid'  # No expiry date means indefinite validity
-        
-        if document.expiry_date < today:
+
+        if expiry_date < today:
             return 'expired'
-        elif document.expiry_date <= expiry_threshold:
+        elif expiry_date <= expiry_threshold:
             return 'expiring_soon'
         else:
             return 'valid'
-    
-    def _generate_document_statistics(self, document_status: Dict, total_employees: int) -> Dict[str, Any]:
-        """Generate document compliance statistics"""
-        total_docs = sum(len(category) for category in document_status.values())
-        
+
+    def _generate_document_statistics(self, status_counts: Dict[str, int], total_employees: int) -> Dict[str, Any]:
+        """Generate document compliance statistics from the counts per status"""
+        total_docs = sum(status_counts.values())
+
         return {
             'total_employees': total_employees,
             'total_documents_tracked': total_docs,
-            'valid_documents': len(document_status['valid']),
-            'expiring_soon': len(document_status['expiring_soon']),
-            'expired_documents': len(document_status['expired']),
-            'missing_documents': len(document_status['missing']),
-            'compliance_percentage': (len(document_status['valid']) / total_docs * 100) if total_docs > 0 else 0,
-            'urgent_action_needed': len(document_status['expired']) + len(document_status['expiring_soon'])
+            'valid_documents': status_counts['valid'],
+            'expiring_soon': status_counts['expiring_soon'],
+            'expired_documents': status_counts['expired'],
+            'missing_documents': status_counts['missing'],
+            'compliance_percentage': (status_counts['valid'] / total_docs * 100) if total_docs > 0 else 0,
+            'urgent_action_needed': status_counts['expired'] + status_counts['expiring_soon']
         }
-    
-    def _calculate_compliance_score(self, document_status: Dict, total_employees: int) -> int:
+
+    def _calculate_compliance_score(self, status_counts: Dict[str, int], total_employees: int) -> int:
         """Calculate overall compliance score (0-100)"""
         if total_employees == 0:
             return 100
-        
-        total_docs = sum(len(category) for category in document_status.values())
+
+        total_docs = sum(status_counts.values())
         if total_docs == 0:
             return 0
-        
+
         # Weight different statuses
         score = (
-            len(document_status['valid']) * 100 +
-            len(document_status['expiring_soon']) * 75 +
-            len(document_status['expired']) * 25 +
-            len(document_status['missing']) * 0
+            status_counts['valid'] * 100 +
+            status_counts['expiring_soon'] * 75 +
+            status_counts['expired'] * 25 +
+            status_counts['missing'] * 0
         ) / total_docs
-        
+
         return int(score)
-    
-    def _check_employee_compliance(self, employee: Employee, 
-                                 summary_data: EmployeeSummaryData) -> List[Dict[str, Any]]:
-        """Check individual employee compliance issues"""
+
+    def _check_employee_compliance(self, employee: Dict[str, Any],
+                                 document_counts: Dict[str, int]) -> List[Dict[str, Any]]:
+        """
+        Check individual employee compliance issues
+
+        Args:
+            employee: Employee row of generate_compliance_alerts_report
+            document_counts: Expired and expiring (30 days) document counts
+        """
         alerts = []
-        today = date.today()
-        
+
         # Critical alerts
-        if not employee.national_id:
+        if not employee['national_id']:
             alerts.append({
                 'type': 'missing_nni',
                 'message': 'NNI manquant',
                 'severity': 'critical',
                 'priority': 10
             })
-        
-        if not employee.cnss_number:
+
+        if not employee['cnss_number']:
             alerts.append({
                 'type': 'missing_cnss',
                 'message': 'Numéro CNSS manquant',
                 'severity': 'critical',
                 'priority': 9
             })
-        
-        if not employee.cnam_number:
+
+        if not employee['cnam_number']:
             alerts.append({
                 'type': 'missing_cnam',
                 'message': 'Numéro CNAM manquant',
                 'severity': 'critical',
                 'priority': 8
             })
-        
+
         # Warning alerts
-        expired_docs = employee.documents.filter(expiry_date__lt=today).count()
+        expired_docs = document_counts.get('expired', 0)
         if expired_docs > 0:
             alerts.append({
                 'type': 'expired_documents',
@@ -1852,11 +2115,8 @@ class DocumentComplianceReports:
                 'severity': 'warning',
                 'priority': 7
             })
-        
-        expiring_docs = employee.documents.filter(
-            expiry_date__gte=today,
-            expiry_date__lte=today + timedelta(days=30)
-        ).count()
+
+        expiring_docs = document_counts.get('expiring', 0)
         if expiring_docs > 0:
             alerts.append({
                 'type': 'expiring_documents',
@@ -1864,54 +2124,54 @@ class DocumentComplianceReports:
                 'severity': 'warning',
                 'priority': 6
             })
-        
+
         # Info alerts
-        if not employee.phone and not employee.email:
+        if not employee['phone'] and not employee['email']:
             alerts.append({
                 'type': 'missing_contact',
                 'message': 'Informations de contact manquantes',
                 'severity': 'info',
                 'priority': 3
             })
-        
-        if employee.is_expatriate and not employee.passport_number:
+
+        if employee['is_expatriate'] and not employee['passport_number']:
             alerts.append({
                 'type': 'missing_passport',
                 'message': 'Numéro de passeport manquant pour expatrié',
                 'severity': 'warning',
                 'priority': 5
             })
-        
+
         return alerts
-    
-    def _generate_compliance_action_items(self, compliance_data: Dict, locale: str) -> List[Dict[str, Any]]:
+
+    def _generate_compliance_action_items(self, category_counts: Dict[str, int], locale: str) -> List[Dict[str, Any]]:
         """Generate action items for compliance issues"""
         action_items = []
-        
-        if compliance_data['missing_nni']:
+
+        if category_counts['missing_nni']:
             action_items.append({
                 'priority': 'high',
                 'action': 'Obtenir les NNI manquants' if locale == 'fr' else 'Get missing NNIs',
-                'affected_employees': len(compliance_data['missing_nni']),
+                'affected_employees': category_counts['missing_nni'],
                 'deadline': '15 jours'
             })
-        
-        if compliance_data['missing_cnss']:
+
+        if category_counts['missing_cnss']:
             action_items.append({
                 'priority': 'high',
                 'action': 'Enregistrement CNSS' if locale == 'fr' else 'CNSS registration',
-                'affected_employees': len(compliance_data['missing_cnss']),
+                'affected_employees': category_counts['missing_cnss'],
                 'deadline': '30 jours'
             })
-        
-        if compliance_data['missing_cnam']:
+
+        if category_counts['missing_cnam']:
             action_items.append({
                 'priority': 'high',
                 'action': 'Enregistrement CNAM' if locale == 'fr' else 'CNAM registration',
-                'affected_employees': len(compliance_data['missing_cnam']),
+                'affected_employees': category_counts['missing_cnam'],
                 'deadline': '30 jours'
             })
-        
+
         return action_items
     
     def _localize_document_category(self, category: str, locale: str = "fr") -> str:
@@ -1997,6 +2257,8 @@ class EmployeeReportManager:
             Generated report data
         """
         locale = kwargs.get('locale', 'fr')
+        # Keyset pagination of the status, anniversary and compliance reports
+        page = {'page_size': kwargs.get('page_size'), 'cursor': kwargs.get('cursor')}
         
         if report_type == ReportType.DIRECTORY:
             if kwargs.get('report_subtype') == 'hierarchy':
@@ -2013,12 +2275,12 @@ class EmployeeReportManager:
         elif report_type == ReportType.STATUS:
             if kwargs.get('report_subtype') == 'contracts':
                 return self.status_reports.generate_contract_status_report(
-                    kwargs.get('expiry_within_days', 90), filters, locale
+                    kwargs.get('expiry_within_days', 90), filters, locale, **page
                 )
             elif kwargs.get('report_subtype') == 'probation':
-                return self.status_reports.generate_probation_tracking_report(filters, locale)
+                return self.status_reports.generate_probation_tracking_report(filters, locale, **page)
             else:
-                return self.status_reports.generate_employment_status_report(filters, locale)
+                return self.status_reports.generate_employment_status_report(filters, locale, **page)
         
         elif report_type == ReportType.LIFECYCLE:
             if kwargs.get('report_subtype') == 'new_hires':
@@ -2031,7 +2293,7 @@ class EmployeeReportManager:
                 )
             elif kwargs.get('report_subtype') == 'anniversaries':
                 return self.lifecycle_reports.generate_anniversary_report(
-                    kwargs.get('anniversary_year'), filters, locale
+                    kwargs.get('anniversary_year'), filters, locale, **page
                 )
             elif kwargs.get('report_subtype') == 'career_progression':
                 return self.lifecycle_reports.generate_career_progression_report(filters, locale)
@@ -2039,12 +2301,12 @@ class EmployeeReportManager:
         elif report_type == ReportType.COMPLIANCE:
             if kwargs.get('report_subtype') == 'documents':
                 return self.compliance_reports.generate_document_status_report(
-                    kwargs.get('expiry_within_days', 90), filters, locale
+                    kwargs.get('expiry_within_days', 90), filters, locale, **page
                 )
             elif kwargs.get('report_subtype') == 'alerts':
-                return self.compliance_reports.generate_compliance_alerts_report(filters, locale)
+                return self.compliance_reports.generate_compliance_alerts_report(filters, locale, **page)
             elif kwargs.get('report_subtype') == 'registrations':
-                return self.compliance_reports.generate_nni_cnss_cnam_report(filters, locale)
+                return self.compliance_reports.generate_nni_cnss_cnam_report(filters, locale, **page)
         
         else:
             raise ValueError(f"Unsupported report type: {report_type}")
@@ -2076,6 +2338,50 @@ class EmployeeReportManager:
         else:
             raise ValueError(f"Unsupported export format: {export_format}")
     
+    DIRECTORY_EXPORT_FIELDS = {
+        'id': "Matricule",
+        'last_name': "Nom",
+        'first_name': "Prénom",
+        'national_id': "NNI",
+        'cnss_number': "N° CNSS",
+        'cnam_number': "N° CNAM",
+        'department__name': "Département",
+        'direction__name': "Direction",
+        'position__name': "Poste",
+        'hire_date': "Date d'embauche",
+        'is_active': "Actif",
+        'phone': "Téléphone",
+        'email': "Email",
+    }
+    
+    def export_employee_directory(self, export_format: str,
+                                  filters: EmployeeReportFilter = None,
+                                  destination: Any = None,
+                                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                  columns: List[str] = None):
+        """
+        Stream the employee directory from a server-side cursor
+        
+        Args:
+            export_format: 'csv', 'jsonl', 'xml' or 'xlsx'
+            filters: Optional filtering criteria
+            destination: File path or file object (default: HTTP response)
+            chunk_size: Rows fetched per database round trip
+            columns: DIRECTORY_EXPORT_FIELDS columns to export (default: all)
+            
+        Returns:
+            Number of rows written, or the HTTP response
+        """
+        fields = [field for field in self.DIRECTORY_EXPORT_FIELDS if columns is None or field in columns]
+        employees = EmployeeDataExtractor.get_base_employee_queryset(filters).prefetch_related(None)
+        rows = employees.order_by('id').values(*fields).iterator(chunk_size=chunk_size)
+        return export_rows(
+            rows, export_format, destination, filename="annuaire_employes",
+            fields=fields, field_mapping=self.DIRECTORY_EXPORT_FIELDS,
+            root_element="employee_report", row_element="employee",
+            totals=False, sheet_name="Annuaire",
+        )
+    
     def get_dashboard_summary(self, filters: EmployeeReportFilter = None) -> Dict[str, Any]:
         """
         Get summary statistics for HR dashboard
@@ -2089,6 +2395,48 @@ class EmployeeReportManager:
         employees = EmployeeDataExtractor.get_base_employee_queryset(filters)
         today = date.today()
         
+        if NUMPY_AVAILABLE:
+            # Vectorized counts over the in-memory employee snapshot
+            snapshot = get_employee_snapshot()
+            counts = snapshot.dashboard_counts(snapshot.select(filters), today)
+        else:
+            counts = self._get_dashboard_counts(employees, today)
+        total_employees = counts['employee_counts']['total']
+        missing_nni = counts['missing_nni']
+        missing_cnss = counts['missing_cnss']
+        missing_cnam = counts['missing_cnam']
+        
+        # Document compliance
+        documents = Document.objects.all() if not filters else Document.objects.filter(
+            employee__in=employees.order_by().values('id')
+        )
+        document_counts = documents.aggregate(
+            total=Count('id'), expired=Count('id', filter=Q(expiry_date__lt=today))
+        )
+        total_docs = document_counts['total']
+        expired_docs = document_counts['expired']
+        
+        return {
+            'summary_date': today,
+            'employee_counts': counts['employee_counts'],
+            'status_distribution': counts['status_distribution'],
+            'age_distribution': counts['age_distribution'],
+            'seniority_distribution': counts['seniority_distribution'],
+            'alerts': {
+                'contracts_expiring_soon': counts['contracts_expiring_soon'],
+                'expired_documents': expired_docs,
+                'missing_nni': missing_nni,
+                'missing_cnss': missing_cnss,
+                'missing_cnam': missing_cnam
+            },
+            'compliance_metrics': {
+                'document_compliance_rate': ((total_docs - expired_docs) / total_docs * 100) if total_docs > 0 else 100,
+                'registration_compliance_rate': ((total_employees - missing_nni - missing_cnss - missing_cnam) / (total_employees * 3) * 100) if total_employees > 0 else 100
+            }
+        }
+    
+    def _get_dashboard_counts(self, employees, today: date) -> Dict[str, Any]:
+        """Dashboard counts computed from the queryset (without NumPy)"""
         # Basic counts
         total_employees = employees.count()
         active_employees = employees.filter(is_active=True).count()
@@ -2108,13 +2456,6 @@ class EmployeeReportManager:
             is_active=True
         ).count()
         
-        # Document compliance
-        total_docs = Document.objects.filter(employee__in=employees).count()
-        expired_docs = Document.objects.filter(
-            employee__in=employees,
-            expiry_date__lt=today
-        ).count()
-        
         # Missing registrations
         missing_nni = employees.filter(
             Q(national_id__isnull=True) | Q(national_id__exact='')
@@ -2173,7 +2514,6 @@ class EmployeeReportManager:
                     seniority_distribution['15+ ans'] += 1
         
         return {
-            'summary_date': today,
             'employee_counts': {
                 'total': total_employees,
                 'active': active_employees,
@@ -2182,17 +2522,10 @@ class EmployeeReportManager:
             'status_distribution': dict(status_counts),
             'age_distribution': age_distribution,
             'seniority_distribution': seniority_distribution,
-            'alerts': {
-                'contracts_expiring_soon': contracts_expiring,
-                'expired_documents': expired_docs,
-                'missing_nni': missing_nni,
-                'missing_cnss': missing_cnss,
-                'missing_cnam': missing_cnam
-            },
-            'compliance_metrics': {
-                'document_compliance_rate': ((total_docs - expired_docs) / total_docs * 100) if total_docs > 0 else 100,
-                'registration_compliance_rate': ((total_employees - missing_nni - missing_cnss - missing_cnam) / (total_employees * 3) * 100) if total_employees > 0 else 100
-            }
+            'contracts_expiring_soon': contracts_expiring,
+            'missing_nni': missing_nni,
+            'missing_cnss': missing_cnss,
+            'missing_cnam': missing_cnam
         }
     
     def _export_to_csv(self, report_data: Dict[str, Any], **kwargs) -> str:
@@ -45,7 +45,11 @@ from ..utils.report_utils import (
 )
 from ..utils.business_rules import PayrollBusinessRules, BusinessRulesEngine
 from ..utils.date_utils import DateCalculator, SeniorityCalculator, WorkingDayCalculator
-from ..utils.payroll_calculations import PayrollCalculator, TaxUtilities
+from ..utils.payroll_calculations import PayrollCalculator
+from ..utils.tax_calculations import TaxUtilities
+from ..utils.period_aggregates import aggregate_totals
+from ..utils.report_cache import report_cache
+from .streaming_exports import DEFAULT_CHUNK_SIZE, PayrollStateExport, export_rows
 
 
 class ReportPeriodType(Enum):
@@ -101,7 +105,7 @@ class PayrollSummaryAnalytics:
         self.logger = logging.getLogger(__name__)
         
         # Cache settings
-        self.cache_timeout = 3600  # 1 hour
+        self.cache_timeout = None  # Until the payroll data of the period changes
         self.enable_cache = True
     
     def generate_monthly_payroll_summary(self, 
@@ -119,13 +123,18 @@ class PayrollSummaryAnalytics:
         Returns:
             Monthly payroll summary data
         """
-        cache_key = f"monthly_summary_{period.strftime('%Y%m')}_{hash(str(filters))}"
-        
-        if self.enable_cache:
-            cached_result = cache.get(cache_key)
-            if cached_result:
-                return cached_result
+        if not self.enable_cache:
+            return self._build_monthly_payroll_summary(period, filters, include_details)
         
+        return report_cache.get_or_compute(
+            'monthly_summary', period, period, {'filters': filters, 'include_details': include_details},
+            lambda: self._build_monthly_payroll_summary(period, filters, include_details),
+            timeout=self.cache_timeout,
+        )
+    
+    def _build_monthly_payroll_summary(self, period: date, filters: FilterCriteria,
+                                       include_details: bool) -> Dict[str, Any]:
+        """Build the monthly payroll summary from the payroll records of the period"""
         try:
             # Import models dynamically to avoid circular imports
             from ..models import Employee, Payroll, Department, Direction
@@ -198,10 +207,6 @@ class PayrollSummaryAnalytics:
             if include_details:
                 result['detailed_records'] = self._prepare_detailed_records(payroll_records)
             
-            # Cache result
-            if self.enable_cache:
-                cache.set(cache_key, result, self.cache_timeout)
-            
             return result
             
         except Exception as e:
@@ -459,6 +464,10 @@ class PayrollSummaryAnalytics:
                     'end_date': end_date
                 },
                 'kpis': kpis,
+                'period_totals': {
+                    'current': self._get_period_totals(start_date, end_date),
+                    'comparison': self._get_period_totals(comp_start, comp_end),
+                },
                 'cost_control': cost_control,
                 'compliance_status': compliance_status,
                 'trend_indicators': trend_indicators,
@@ -506,6 +515,46 @@ class PayrollSummaryAnalytics:
             self.logger.error(f"Error exporting report: {str(e)}")
             raise
     
+    def export_payroll_state(self,
+                             period: date,
+                             export_format: str,
+                             destination: Any = None,
+                             filters: FilterCriteria = None,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             columns: List[str] = None,
+                             element_ids: List[int] = None):
+        """
+        Stream the "Etat de paie" of a month: one row per payroll, one column per rubrique
+        
+        Rows are read with server-side cursors and written as they are
+        serialized, so memory does not grow with the number of employees.
+        
+        Args:
+            period: Report period (month/year)
+            export_format: 'csv', 'jsonl', 'xml' or 'xlsx'
+            destination: File path or file object (default: HTTP response)
+            filters: Filtering criteria
+            chunk_size: Rows fetched per database round trip
+            columns: Base and total columns to export (default: all)
+            element_ids: Rubriques to export (default: all)
+            
+        Returns:
+            Number of rows written, or the HTTP response
+        """
+        from ..models import Payroll
+        
+        payrolls = Payroll.objects.filter(period__year=period.year, period__month=period.month)
+        if filters:
+            payrolls = self._apply_filters_to_query(payrolls, filters)
+        
+        export = PayrollStateExport(payrolls, chunk_size, columns=columns, element_ids=element_ids)
+        return export_rows(
+            export.rows(), export_format, destination, filename=f"etat_de_paie_{period.strftime('%Y%m')}",
+            fields=export.fields, field_mapping=export.field_mapping,
+            root_element="etat_de_paie", row_element="bulletin",
+            total_fields=export.total_fields, sheet_name="Etat de paie",
+        )
+    
     # ========== PRIVATE HELPER METHODS ==========
     
     def _apply_filters_to_query(self, query, filters: FilterCriteria):
@@ -536,6 +585,23 @@ class PayrollSummaryAnalytics:
         
         return query
     
+    def _get_period_totals(self, start_date: date, end_date: date) -> Dict[str, Any]:
+        """Get payroll totals of a date range from the monthly rollup (PayrollPeriodAggregate)"""
+        totals = aggregate_totals(start_date, end_date)[0]
+        return {
+            'payroll_count': totals['payroll_count'],
+            'total_gross_taxable': totals['total_gross_taxable'],
+            'total_gross_non_taxable': totals['total_gross_non_taxable'],
+            'total_net_salary': totals['total_net_salary'],
+            'total_cnss_employee': totals['total_cnss_employee'],
+            'total_cnam_employee': totals['total_cnam_employee'],
+            'total_its': totals['total_its_total'],
+            'total_cnss_employer': totals['total_rcnss'],
+            'total_cnam_employer': totals['total_rcnam'],
+            'max_net_salary': totals['max_net_salary'],
+            'min_net_salary': totals['min_net_salary'],
+        }
+    
     def _calculate_summary_statistics(self, payroll_records: List, period: date) -> Dict[str, Any]:
         """Calculate summary statistics for payroll records"""
         if not payroll_records:
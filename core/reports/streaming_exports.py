@@ -0,0 +1,489 @@
+# streaming_exports.py
+"""
+Streaming report exports for large payroll datasets
+
+The dict-based exporters (export_report_data, export_report) build the whole
+report and serialize it to one string, which does not scale to an "Etat de
+paie" of thousands of employees by dozens of rubriques. The exporters here
+consume a generator of rows read from server-side cursors
+(QuerySet.iterator(chunk_size=...)) and write CSV, JSON Lines or XML chunk by
+chunk to a file or a Django StreamingHttpResponse, so memory stays constant
+whatever the number of rows. XLSX files are written with an openpyxl
+write-only workbook, which spools rows to disk instead of keeping cell
+objects.
+
+Usage:
+    export = PayrollStateExport(Payroll.objects.filter(period=date(2024, 1, 31)))
+    write_export(export.rows(), "etat_de_paie.csv", "csv", fields=export.fields,
+                 field_mapping=export.field_mapping)
+    return streaming_response(export.rows(), "csv", "etat_de_paie.csv", fields=export.fields)
+    write_export(export.rows(), "etat_de_paie.xlsx", "xlsx", fields=export.fields,
+                 field_mapping=export.field_mapping, total_fields=export.total_fields)
+"""
+
+import csv
+import io
+import json
+import logging
+import re
+import tempfile
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from django.db.models import Exists, OuterRef
+
+try:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+    from openpyxl.utils import get_column_letter
+    EXCEL_AVAILABLE = True
+except ImportError:
+    EXCEL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Formats the exporters can stream
+STREAMING_FORMATS = ('csv', 'jsonl', 'xml')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'xml': 'application/xml; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Options only write_xlsx takes, and those it shares with iter_export
+XLSX_ONLY_OPTIONS = ('number_formats', 'totals', 'total_fields', 'sheet_name')
+XLSX_OPTIONS = ('fields', 'field_mapping') + XLSX_ONLY_OPTIONS
+
+# Excel number formats of amounts and dates
+AMOUNT_FORMAT = '#,##0.00'
+DATE_FORMAT = 'DD/MM/YYYY'
+
+# Rows serialized per yielded chunk
+DEFAULT_BATCH_SIZE = 500
+
+# Rows fetched per server-side cursor round trip
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _csv_value(value: Any) -> str:
+    """French CSV formatting of ExportUtilities.to_csv_format_enhanced"""
+    if isinstance(value, Decimal):
+        return str(value).replace('.', ',')
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, bool):
+        return "Oui" if value else "Non"
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _json_value(value: Any) -> Any:
+    """JSON serialization keeping amounts exact"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value)} is not JSON serializable")
+
+
+def _xml_tag(name: Any) -> str:
+    """Clean a field name for XML, as AdvancedExportUtilities.to_xml_format"""
+    return re.sub(r'[^a-zA-Z0-9_]', '_', str(name))
+
+
+def _xml_value(value: Any) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _batched(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_export(rows: Iterable[Dict[str, Any]],
+                export_format: str,
+                fields: Optional[List[str]] = None,
+                field_mapping: Optional[Dict[str, str]] = None,
+                delimiter: str = ";",
+                root_element: str = "data",
+                row_element: str = "record",
+                batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Serialize rows incrementally
+
+    Args:
+        rows: Row dicts, typically a generator over a server-side cursor
+        export_format: 'csv', 'jsonl' or 'xml'
+        fields: Field order (defaults to the keys of the first row)
+        field_mapping: CSV header labels of the fields
+        delimiter: CSV delimiter (default semicolon for French locale)
+        root_element: XML root element
+        row_element: XML element of each row
+        batch_size: Rows serialized per yielded chunk
+
+    Yields:
+        Text chunks of at most batch_size rows
+    """
+    if export_format not in STREAMING_FORMATS:
+        raise ValueError(f"Unsupported streaming export format: {export_format}")
+
+    rows = iter(rows)
+    if fields is None:
+        first_row = next(rows, None)
+        fields = list(first_row) if first_row is not None else []
+        if first_row is not None:
+            rows = chain([first_row], rows)
+
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+        writer.writerow([(field_mapping or {}).get(field, field) for field in fields])
+        for batch in _batched(rows, batch_size):
+            writer.writerows([_csv_value(row.get(field)) for field in fields] for row in batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    elif export_format == 'jsonl':
+        for batch in _batched(rows, batch_size):
+            yield ''.join(
+                json.dumps({field: row.get(field) for field in fields}, default=_json_value, ensure_ascii=False) + "\n"
+                for row in batch
+            )
+
+    else:
+        tags = [_xml_tag(field) for field in fields]
+        yield f'<?xml version="1.0" encoding="utf-8"?>\n<{root_element}>\n'
+        for batch in _batched(rows, batch_size):
+            chunk = []
+            for row in batch:
+                record = ET.Element(row_element)
+                for field, tag in zip(fields, tags):
+                    ET.SubElement(record, tag).text = _xml_value(row.get(field))
+                chunk.append("  " + ET.tostring(record, encoding="unicode") + "\n")
+            yield ''.join(chunk)
+        yield f"</{root_element}>\n"
+
+
+def _format_options(export_format: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the options the writer of a format takes"""
+    if export_format == 'xlsx':
+        return {key: value for key, value in options.items() if key in XLSX_OPTIONS}
+    return {key: value for key, value in options.items() if key not in XLSX_ONLY_OPTIONS}
+
+
+def write_export(rows: Iterable[Dict[str, Any]], destination: Any, export_format: str, **options) -> int:
+    """
+    Write rows incrementally to a file
+
+    Args:
+        rows: Row dicts
+        destination: File path, or a file object open for writing (binary for xlsx)
+        export_format: 'csv', 'jsonl', 'xml' or 'xlsx'
+        **options: iter_export or write_xlsx options (the other writer's are ignored)
+
+    Returns:
+        Number of rows written
+    """
+    options = _format_options(export_format, options)
+    if export_format == 'xlsx':
+        return write_xlsx(rows, destination, **options)
+
+    counter = _RowCounter(rows)
+    if hasattr(destination, 'write'):
+        for chunk in iter_export(counter, export_format, **options):
+            destination.write(chunk)
+    else:
+        # UTF-8 with BOM so spreadsheet software detects the encoding of CSV files
+        encoding = "utf-8-sig" if export_format == 'csv' else "utf-8"
+        with open(destination, "w", encoding=encoding, newline="") as output:
+            for chunk in iter_export(counter, export_format, **options):
+                output.write(chunk)
+    return counter.count
+
+
+def write_xlsx(rows: Iterable[Dict[str, Any]],
+               destination: Any,
+               fields: Optional[List[str]] = None,
+               field_mapping: Optional[Dict[str, str]] = None,
+               number_formats: Optional[Dict[str, str]] = None,
+               totals: bool = True,
+               total_fields: Optional[List[str]] = None,
+               sheet_name: str = "Export") -> int:
+    """
+    Write rows to an XLSX file with a write-only workbook
+
+    Rows are spooled to disk as they are appended, so memory does not grow
+    with the row count. Decimal amounts get AMOUNT_FORMAT and dates
+    DATE_FORMAT unless number_formats says otherwise.
+
+    Args:
+        rows: Row dicts
+        destination: File path or binary file object
+        fields: Column order (defaults to the keys of the first row)
+        field_mapping: Header labels of the columns
+        number_formats: Excel number format per column
+        totals: Append a totals row
+        total_fields: Columns summed in the totals row (default: the Decimal columns)
+        sheet_name: Worksheet title
+
+    Returns:
+        Number of rows written
+    """
+    if not EXCEL_AVAILABLE:
+        raise ImportError("openpyxl is required for Excel export")
+
+    rows = iter(rows)
+    if fields is None:
+        first_row = next(rows, None)
+        fields = list(first_row) if first_row is not None else []
+        if first_row is not None:
+            rows = chain([first_row], rows)
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(sheet_name)
+    worksheet.freeze_panes = 'A2'
+    for column, field in enumerate(fields, 1):
+        worksheet.column_dimensions[get_column_letter(column)].width = 15
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="366092")
+    header = []
+    for field in fields:
+        cell = WriteOnlyCell(worksheet, value=(field_mapping or {}).get(field, field))
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal="center")
+        header.append(cell)
+    worksheet.append(header)
+
+    number_formats = number_formats or {}
+    sums = {field: Decimal('0') for field in total_fields} if total_fields is not None else {}
+    count = 0
+    for row in rows:
+        values = []
+        for field in fields:
+            value = row.get(field)
+            if isinstance(value, (Decimal, date)):
+                if isinstance(value, Decimal) and total_fields is None:
+                    sums.setdefault(field, Decimal('0'))
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.number_format = number_formats.get(
+                    field, AMOUNT_FORMAT if isinstance(value, Decimal) else DATE_FORMAT
+                )
+                value = cell
+            elif field in number_formats and value is not None:
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.number_format = number_formats[field]
+                value = cell
+            values.append(value)
+            if field in sums and row.get(field) is not None:
+                sums[field] += row[field]
+        worksheet.append(values)
+        count += 1
+
+    if totals and fields:
+        total_font = Font(bold=True)
+        totals_row = []
+        for position, field in enumerate(fields):
+            if field in sums:
+                cell = WriteOnlyCell(worksheet, value=sums[field])
+                cell.number_format = number_formats.get(field, AMOUNT_FORMAT)
+            else:
+                cell = WriteOnlyCell(worksheet, value="Total" if position == 0 else None)
+            cell.font = total_font
+            totals_row.append(cell)
+        worksheet.append(totals_row)
+
+    workbook.save(destination)
+    return count
+
+
+def streaming_response(rows: Iterable[Dict[str, Any]], export_format: str, filename: str, **options):
+    """
+    Stream rows as a file download
+
+    Returns:
+        StreamingHttpResponse sending the export as it is serialized, or a
+        FileResponse of a temporary file for xlsx (zip files are only
+        complete once written)
+    """
+    from django.http import FileResponse, StreamingHttpResponse
+
+    options = _format_options(export_format, options)
+    if export_format == 'xlsx':
+        output = tempfile.TemporaryFile()
+        write_export(rows, output, export_format, **options)
+        output.seek(0)
+        return FileResponse(output, as_attachment=True, filename=filename, content_type=CONTENT_TYPES['xlsx'])
+
+    chunks = (chunk.encode("utf-8") for chunk in iter_export(rows, export_format, **options))
+    if export_format == 'csv':
+        chunks = chain([b"\xef\xbb\xbf"], chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_rows(rows: Iterable[Dict[str, Any]], export_format: str, destination: Any = None,
+                filename: str = "export", **options) -> Union[int, Any]:
+    """Write rows to destination, or stream them as a response when destination is None"""
+    if destination is None:
+        return streaming_response(rows, export_format, f"{filename}.{export_format}", **options)
+    return write_export(rows, destination, export_format, **options)
+
+
+class _RowCounter:
+    """Iterable that counts the rows passing through it"""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+class PayrollStateExport:
+    """
+    "Etat de paie" rows: one per payroll, one column per rubrique
+
+    Payrolls and their line items are read with two server-side cursors in
+    the same (employee, motif, period) order and merged as they stream, so
+    only the line items of the current payroll are held in memory.
+    """
+
+    BASE_FIELDS = [
+        ('employee_id', "Matricule"),
+        ('last_name', "Nom"),
+        ('first_name', "Prénom"),
+        ('period', "Période"),
+        ('department_name', "Département"),
+        ('direction_name', "Direction"),
+        ('position_name', "Poste"),
+        ('worked_days', "Jours travaillés"),
+    ]
+
+    TOTAL_FIELDS = [
+        ('gross_taxable', "Brut imposable"),
+        ('gross_non_taxable', "Brut non imposable"),
+        ('cnss_employee', "CNSS"),
+        ('cnam_employee', "CNAM"),
+        ('its_total', "ITS"),
+        ('gross_deductions', "Retenues brut"),
+        ('net_deductions', "Retenues net"),
+        ('net_salary', "Net à payer"),
+    ]
+
+    ORDERING = ('employee_id', 'motif_id', 'period')
+
+    def __init__(self, payrolls, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 columns: Optional[List[str]] = None, element_ids: Optional[List[int]] = None):
+        """
+        Args:
+            payrolls: Payroll queryset of the export (already filtered)
+            chunk_size: Rows fetched per cursor round trip
+            columns: Base and total columns to export (default: all, see column_choices)
+            element_ids: Rubriques to export (default: all those present)
+        """
+        self.payrolls = payrolls.order_by()
+        self.chunk_size = chunk_size
+        self.columns = set(columns) if columns is not None else None
+        self.element_ids = list(element_ids) if element_ids is not None else None
+        self._elements = None
+
+    @classmethod
+    def column_choices(cls) -> Dict[str, str]:
+        """Base and total columns of the column chooser, with their labels"""
+        return dict(cls.BASE_FIELDS + cls.TOTAL_FIELDS)
+
+    def _chosen(self, fields: List[Tuple[str, str]]) -> List[str]:
+        return [name for name, _ in fields if self.columns is None or name in self.columns]
+
+    def _line_items(self):
+        from ..models import PayrollLineItem
+
+        line_items = PayrollLineItem.objects.filter(Exists(self.payrolls.filter(
+            employee_id=OuterRef('employee_id'), motif_id=OuterRef('motif_id'), period=OuterRef('period')
+        )))
+        if self.element_ids is not None:
+            line_items = line_items.filter(payroll_element_id__in=self.element_ids)
+        return line_items
+
+    @property
+    def elements(self) -> List[Tuple[int, str]]:
+        """(id, label) of the rubriques present in the export, gains first"""
+        if self._elements is None:
+            from ..models import PayrollElement
+
+            self._elements = list(PayrollElement.objects.filter(
+                id__in=self._line_items().values('payroll_element_id')
+            ).order_by('-type', 'id').values_list('id', 'label'))
+        return self._elements
+
+    @property
+    def fields(self) -> List[str]:
+        return (self._chosen(self.BASE_FIELDS)
+                + [f"element_{element_id}" for element_id, _ in self.elements]
+                + self._chosen(self.TOTAL_FIELDS))
+
+    @property
+    def total_fields(self) -> List[str]:
+        """Columns summed in the totals row: the rubriques and the payroll totals"""
+        return [f"element_{element_id}" for element_id, _ in self.elements] + self._chosen(self.TOTAL_FIELDS)
+
+    @property
+    def field_mapping(self) -> Dict[str, str]:
+        mapping = dict(self.BASE_FIELDS + self.TOTAL_FIELDS)
+        mapping.update({f"element_{element_id}": label for element_id, label in self.elements})
+        return mapping
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Yield the rows in employee order"""
+        element_fields = {element_id: f"element_{element_id}" for element_id, _ in self.elements}
+        amount_fields = [name for name, _ in self.BASE_FIELDS[4:] + self.TOTAL_FIELDS]
+        payrolls = self.payrolls.order_by(*self.ORDERING).values_list(
+            *self.ORDERING, 'employee__last_name', 'employee__first_name', *amount_fields
+        ).iterator(chunk_size=self.chunk_size)
+        line_items = self._line_items().order_by(*self.ORDERING).values_list(
+            *self.ORDERING, 'payroll_element_id', 'calculated_amount'
+        ).iterator(chunk_size=self.chunk_size)
+
+        pending = next(line_items, None)
+        for payroll in payrolls:
+            key = payroll[:3]
+            row = {'employee_id': payroll[0], 'last_name': payroll[3], 'first_name': payroll[4], 'period': payroll[2]}
+            row.update(dict.fromkeys(element_fields.values()))
+            row.update(zip(amount_fields, payroll[5:]))
+
+            # Skip line items without a payroll in the export, then take this payroll's
+            while pending is not None and pending[:3] < key:
+                pending = next(line_items, None)
+            while pending is not None and pending[:3] == key:
+                field = element_fields[pending[3]]
+                row[field] = (row[field] or Decimal('0')) + pending[4]
+                pending = next(line_items, None)
+            yield row
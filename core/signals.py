@@ -0,0 +1,277 @@
+# signals.py
+"""
+Model signal handlers for the core app
+Keeps in-memory payroll caches consistent with database changes, records
+the payroll changes consumed by incremental recalculation, refreshes the
+monthly payroll rollup, invalidates the cached reports of changed months
+and the HR dashboard employee snapshot, and keeps the employee search index
+in sync
+"""
+
+import logging
+
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import (
+    Employee, InstallmentTranche, Payroll, PayrollChange, PayrollElementFormula,
+    PayrollLineItem, WorkedDays
+)
+from .utils.formula_engine import find_formula_cycle
+from .utils.incremental_recalculation import (
+    TRACKED_EMPLOYEE_FIELDS, TRACKED_LINE_ITEM_FIELDS, TRACKED_WORKED_DAYS_FIELDS,
+    is_change_tracking_suspended, record_payroll_change
+)
+from .utils.period_aggregates import (
+    AGGREGATE_EMPLOYEE_FIELDS, AGGREGATE_PAYROLL_FIELDS, aggregate_contribution, deferred_aggregate_refresh,
+    payroll_aggregate_values, schedule_aggregate_delta, schedule_aggregate_refresh
+)
+from .utils.employee_snapshot import invalidate_employee_snapshot
+from .utils.employee_search import update_employee_search_entry
+from .utils.report_cache import invalidate_report_period
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=PayrollElementFormula)
+def payroll_element_formula_saved(sender, instance, raw=False, **kwargs):
+    """Report rubrique reference cycles when the formula is saved, not at run time"""
+    if raw or instance.component_type != 'R':
+        return
+    cycle = find_formula_cycle(instance.payroll_element_id)
+    if cycle:
+        logger.warning(
+            "Circular rubrique reference: " + ' -> '.join(f"R{element_id}" for element_id in cycle)
+        )
+
+
+def _is_direct_delete(sender, instance, origin) -> bool:
+    """Ignore deletions cascading from a parent (employee, motif, element)"""
+    if origin is None or origin is instance:
+        return True
+    return isinstance(origin, QuerySet) and origin.model is sender
+
+
+@receiver(pre_save, sender=Employee)
+def employee_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Remember which payroll-relevant and rollup dimension fields are about to change"""
+    instance._payroll_changed_fields = []
+    instance._aggregate_dimensions_changed = False
+    if raw or instance.pk is None:
+        return
+
+    tracked = [] if is_change_tracking_suspended() else TRACKED_EMPLOYEE_FIELDS
+    fields = sorted(set(tracked) | set(AGGREGATE_EMPLOYEE_FIELDS))
+    if update_fields is not None:
+        attnames = {sender._meta.get_field(name).attname for name in update_fields}
+        fields = [field for field in fields if field in attnames]
+        if not fields:
+            return
+
+    previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if previous is not None:
+        changed = [field for field in fields if previous[field] != getattr(instance, field)]
+        instance._payroll_changed_fields = [field for field in changed if field in tracked]
+        instance._aggregate_dimensions_changed = any(field in AGGREGATE_EMPLOYEE_FIELDS for field in changed)
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created=False, raw=False, **kwargs):
+    """Record payroll-relevant employee field changes and move the employee's rollup rows"""
+    if raw or created:
+        return
+    changed_fields = getattr(instance, '_payroll_changed_fields', None)
+    if changed_fields:
+        record_payroll_change(instance.pk, PayrollChange.SOURCE_EMPLOYEE, changed_fields=changed_fields)
+        instance._payroll_changed_fields = []
+    if getattr(instance, '_aggregate_dimensions_changed', False):
+        periods = set()
+        with deferred_aggregate_refresh():
+            for period, motif_id in Payroll.objects.filter(employee=instance).values_list('period', 'motif_id'):
+                schedule_aggregate_refresh(period, motif_id)
+                periods.add(period.replace(day=1))
+        for period in sorted(periods):
+            invalidate_report_period(period)
+        instance._aggregate_dimensions_changed = False
+
+
+@receiver([post_save, post_delete], sender=Employee)
+def employee_changed(sender, instance, **kwargs):
+    """Rebuild the HR dashboard employee snapshot on next use"""
+    invalidate_employee_snapshot()
+
+
+@receiver(post_save, sender=Employee)
+def employee_search_entry_saved(sender, instance, **kwargs):
+    """Refresh the employee's search index row (deleted with the employee)"""
+    update_employee_search_entry(instance)
+
+
+@receiver(post_init, sender=Payroll)
+def payroll_loaded(sender, instance, **kwargs):
+    """Remember the rollup fields of a loaded payroll (None when some are deferred)"""
+    values = instance.__dict__
+    if all(field in values for field in AGGREGATE_PAYROLL_FIELDS):
+        instance._stored_aggregate_values = {field: values[field] for field in AGGREGATE_PAYROLL_FIELDS}
+    else:
+        instance._stored_aggregate_values = None
+
+
+def _payroll_contribution(instance, values):
+    """Rollup contribution of a payroll's stored values, with its employee's dimensions"""
+    if values is None:
+        return None
+    if Payroll.employee.is_cached(instance) and instance.employee.pk == values['employee_id']:
+        dimensions = [getattr(instance.employee, field) for field in AGGREGATE_EMPLOYEE_FIELDS]
+    else:
+        dimensions = Employee.objects.filter(pk=values['employee_id']).values_list(*AGGREGATE_EMPLOYEE_FIELDS).first()
+    return aggregate_contribution(values, dimensions or (None, None, False))
+
+
+@receiver(pre_save, sender=Payroll)
+def payroll_pre_save(sender, instance, raw=False, **kwargs):
+    """Remember the rollup fields a payroll is saved over"""
+    instance._previous_aggregate_values = None
+    if raw or instance.pk is None:
+        return
+    previous = None if instance._state.adding else getattr(instance, '_stored_aggregate_values', None)
+    if previous is None:
+        # Not loaded from the database, or rollup fields deferred
+        previous = sender.objects.filter(pk=instance.pk).values(*AGGREGATE_PAYROLL_FIELDS).first()
+    instance._previous_aggregate_values = previous
+
+
+@receiver(post_save, sender=Payroll)
+def payroll_saved(sender, instance, raw=False, **kwargs):
+    """Move a saved payroll's amounts in the rollup and invalidate its cached reports"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_aggregate_values', None)
+    current = payroll_aggregate_values(instance)
+    instance._previous_aggregate_values = None
+    instance._stored_aggregate_values = current
+    invalidate_report_period(instance.period)
+    if previous == current:
+        return
+    schedule_aggregate_delta(_payroll_contribution(instance, previous), _payroll_contribution(instance, current))
+    if previous is not None and previous['period'] != current['period']:
+        invalidate_report_period(previous['period'])
+
+
+@receiver(post_delete, sender=Payroll)
+def payroll_deleted(sender, instance, origin=None, **kwargs):
+    """Take a deleted payroll out of the rollup, refreshing once per slice for bulk and cascading deletes"""
+    if origin is None or origin is instance:
+        stored = getattr(instance, '_stored_aggregate_values', None) or payroll_aggregate_values(instance)
+        schedule_aggregate_delta(_payroll_contribution(instance, stored), None)
+        invalidate_report_period(instance.period)
+        return
+    refreshed = origin.__dict__.setdefault('_refreshed_aggregate_slices', set())
+    slice_key = (instance.period.year, instance.period.month, instance.motif_id)
+    if slice_key not in refreshed:
+        refreshed.add(slice_key)
+        schedule_aggregate_refresh(instance.period, instance.motif_id)
+        invalidate_report_period(instance.period)
+
+
+def _remember_changed_fields(sender, instance, tracked_fields, update_fields=None, raw=False):
+    """Set instance._payroll_changed_fields to the tracked fields this save changes"""
+    instance._payroll_changed_fields = []
+    if raw or is_change_tracking_suspended():
+        return
+    if instance.pk is None:
+        instance._payroll_changed_fields = tracked_fields
+        return
+
+    fields = tracked_fields
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+        if not fields:
+            return
+
+    previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if previous is None:
+        instance._payroll_changed_fields = tracked_fields
+    else:
+        instance._payroll_changed_fields = [
+            field for field in fields if previous[field] != getattr(instance, field)
+        ]
+
+
+@receiver(pre_save, sender=PayrollLineItem)
+def payroll_line_item_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Remember which amount fields of a payroll line item are about to change"""
+    _remember_changed_fields(sender, instance, TRACKED_LINE_ITEM_FIELDS, update_fields, raw)
+
+
+@receiver(post_save, sender=PayrollLineItem)
+def payroll_line_item_saved(sender, instance, raw=False, **kwargs):
+    """Record a changed payroll line item and invalidate the cached reports of its month"""
+    if raw:
+        return
+    invalidate_report_period(instance.period)
+    changed_fields = getattr(instance, '_payroll_changed_fields', None)
+    if changed_fields:
+        record_payroll_change(
+            instance.employee_id, PayrollChange.SOURCE_LINE_ITEM, instance.motif_id, instance.period,
+            payroll_element_id=instance.payroll_element_id, changed_fields=changed_fields
+        )
+        instance._payroll_changed_fields = []
+
+
+@receiver(post_delete, sender=PayrollLineItem)
+def payroll_line_item_deleted(sender, instance, origin=None, **kwargs):
+    """Record a deleted payroll line item and invalidate the cached reports of its month"""
+    invalidated = origin.__dict__.setdefault('_invalidated_report_months', set()) if origin is not None else set()
+    month = (instance.period.year, instance.period.month)
+    if month not in invalidated:
+        invalidated.add(month)
+        invalidate_report_period(instance.period)
+    if _is_direct_delete(sender, instance, origin):
+        record_payroll_change(
+            instance.employee_id, PayrollChange.SOURCE_LINE_ITEM, instance.motif_id, instance.period,
+            payroll_element_id=instance.payroll_element_id
+        )
+
+
+@receiver(pre_save, sender=WorkedDays)
+def worked_days_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Remember whether the worked days are about to change"""
+    _remember_changed_fields(sender, instance, TRACKED_WORKED_DAYS_FIELDS, update_fields, raw)
+
+
+@receiver(post_save, sender=WorkedDays)
+def worked_days_saved(sender, instance, raw=False, **kwargs):
+    """Record changed worked days (F01)"""
+    if raw or is_change_tracking_suspended():
+        return
+    changed_fields = getattr(instance, '_payroll_changed_fields', None)
+    if changed_fields:
+        record_payroll_change(
+            instance.employee_id, PayrollChange.SOURCE_WORKED_DAYS, instance.motif_id, instance.period,
+            changed_fields=changed_fields
+        )
+        instance._payroll_changed_fields = []
+
+
+@receiver(post_delete, sender=WorkedDays)
+def worked_days_deleted(sender, instance, origin=None, **kwargs):
+    """Record deleted worked days (F01)"""
+    if _is_direct_delete(sender, instance, origin):
+        record_payroll_change(
+            instance.employee_id, PayrollChange.SOURCE_WORKED_DAYS, instance.motif_id, instance.period
+        )
+
+
+@receiver([post_save, post_delete], sender=InstallmentTranche)
+def installment_tranche_changed(sender, instance, raw=False, origin=None, **kwargs):
+    """Record a changed installment tranche of an employee deduction"""
+    if raw or is_change_tracking_suspended():
+        return
+    if kwargs.get('signal') is post_delete and not _is_direct_delete(sender, instance, origin):
+        return
+    record_payroll_change(
+        instance.installment_deduction.employee_id, PayrollChange.SOURCE_INSTALLMENT,
+        instance.motif_id, instance.period
+    )
@@ -0,0 +1,478 @@
+"""
+Tests for core.reports.bulletin_management module.
+
+Renders payslips of real payroll rows to a temporary media root, serially
+and with the process pool of bulk generation, and delivers queued
+distributions with stand-in channel handlers.
+"""
+
+import hashlib
+import json
+import os
+import pytest
+from decimal import Decimal
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+
+from core.reports.bulletin_management import (
+    DISTRIBUTION_PRIORITIES,
+    PAYSLIP_RENDER_CHUNK_SIZE,
+    REPORTLAB_AVAILABLE,
+    DistributionChannel,
+    DistributionMetrics,
+    DistributionScheduler,
+    DistributionStatus,
+    PayslipDistributionRecord,
+    PayslipFormat,
+    PayslipGenerationOptions,
+    PayslipGenerator,
+    PayslipTemplate,
+    PayslipTemplateType,
+    distribution_retry_delay,
+)
+
+HTML_OPTIONS = PayslipGenerationOptions(format=PayslipFormat.HTML)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def _payslip_fixture(count):
+    from core.models import Employee, Payroll, PayrollMotif, SystemParameters
+
+    PayslipTemplate.objects.create(
+        name="Standard", template_type=PayslipTemplateType.STANDARD.value,
+        html_template="<h1>{{ employee_info.full_name }}</h1><p>{{ payroll_info.net_salary }}</p>",
+    )
+    motif = PayrollMotif.objects.create(name="Salaire Normal")
+    parameters = SystemParameters.objects.create(
+        company_name="Test", current_period=date(2024, 3, 31), next_period=date(2024, 4, 30),
+        closure_period=date(2024, 3, 31), default_working_days=30,
+        non_taxable_allowance_ceiling=10000, net_account=411000
+    )
+    for index in range(count):
+        Payroll.objects.create(
+            employee=Employee.objects.create(first_name=f"Employe{index}", last_name="Test"),
+            motif=motif, parameters=parameters, period=date(2024, 3, 31),
+            gross_taxable=Decimal('60000.00'), net_salary=Decimal('50000.00') + index,
+        )
+    # Read back, as payslips are generated for stored payrolls
+    return list(Payroll.objects.order_by('id'))
+
+
+@pytest.fixture
+def render_pids(monkeypatch):
+    """Process ids that rendered the payslips of a bulk generation, in recording order"""
+    pids = []
+    render_payslip = PayslipGenerator._render_payslip
+    record_bulk_generation = PayslipGenerator._record_bulk_generation
+
+    def _render_payslip(self, payslip_data, template, options):
+        result = render_payslip(self, payslip_data, template, options)
+        result['pid'] = os.getpid()
+        return result
+
+    def _record_bulk_generation(self, result, payroll, generation_result):
+        pids.append(generation_result.get('pid'))
+        record_bulk_generation(self, result, payroll, generation_result)
+
+    monkeypatch.setattr(PayslipGenerator, '_render_payslip', _render_payslip)
+    monkeypatch.setattr(PayslipGenerator, '_record_bulk_generation', _record_bulk_generation)
+    return pids
+
+
+class TestBulkPayslipGeneration:
+    """Test bulk generation, serial and with worker processes"""
+
+    @pytest.mark.django_db(transaction=True)
+    def test_process_pool_renders_every_payslip(self, media_root, render_pids):
+        """Test workers render the chunks of every batch to the same files as a serial run"""
+        payrolls = _payslip_fixture(PAYSLIP_RENDER_CHUNK_SIZE * 2 + 5)
+        progress = []
+
+        result = PayslipGenerator(workers=2).generate_bulk_payslips(
+            payrolls, HTML_OPTIONS, progress_callback=lambda done, total: progress.append(done), workers=2
+        )
+
+        assert result['success'], result['errors']
+        assert result['generated_count'] == len(payrolls)
+        assert result['failed_count'] == 0
+        assert progress == list(range(1, len(payrolls) + 1))
+        assert len(render_pids) == len(payrolls)
+        assert os.getpid() not in render_pids
+        files = {record['payroll_id']: record for record in result['generated_files']}
+        assert set(files) == {payroll.id for payroll in payrolls}
+        with default_storage.open(files[payrolls[7].id]['file_path']) as stored:
+            assert stored.read().decode() == "<h1>Employe7 Test</h1><p>50007.00</p>"
+        # The parent reconnects after the pool
+        assert PayslipTemplate.objects.count() == 1
+
+        serial = PayslipGenerator(workers=1).generate_bulk_payslips(
+            payrolls, PayslipGenerationOptions(format=PayslipFormat.HTML, reuse_existing=False)
+        )
+        serial_files = {record['payroll_id']: record for record in serial['generated_files']}
+        assert {payroll_id: record['file_hash'] for payroll_id, record in serial_files.items()} == \
+            {payroll_id: record['file_hash'] for payroll_id, record in files.items()}
+
+    @pytest.mark.django_db
+    def test_process_pool_not_started_in_transaction(self, media_root, render_pids):
+        """Test a generation inside a transaction stays serial, workers could not see its rows"""
+        payrolls = _payslip_fixture(PAYSLIP_RENDER_CHUNK_SIZE + 1)
+
+        result = PayslipGenerator().generate_bulk_payslips(payrolls, HTML_OPTIONS, workers=2)
+
+        assert result['generated_count'] == len(payrolls)
+        assert set(render_pids) == {os.getpid()}
+
+
+@pytest.mark.django_db
+class TestPayslipReuse:
+    """Test unchanged payslips keep their stored file"""
+
+    @pytest.fixture
+    def rendered(self, monkeypatch):
+        """Payroll ids rendered to new files"""
+        rendered = []
+        generate_html_payslip = PayslipGenerator._generate_html_payslip
+
+        def _generate_html_payslip(self, data, template, options):
+            rendered.append(data['payroll'].id)
+            return generate_html_payslip(self, data, template, options)
+
+        monkeypatch.setattr(PayslipGenerator, '_generate_html_payslip', _generate_html_payslip)
+        return rendered
+
+    def test_unchanged_payslips_are_not_rendered_again(self, media_root, rendered):
+        """Test a second generation reuses every file, from a new generator too"""
+        payrolls = _payslip_fixture(3)
+        first = PayslipGenerator().generate_bulk_payslips(payrolls, HTML_OPTIONS, workers=1)
+        assert first['reused_count'] == 0
+        assert rendered == [payroll.id for payroll in payrolls]
+
+        rendered.clear()
+        again = PayslipGenerator().generate_bulk_payslips(payrolls, HTML_OPTIONS, workers=1)
+
+        assert rendered == []
+        assert again['generated_count'] == again['reused_count'] == 3
+        assert [(record['file_path'], record['file_hash']) for record in again['generated_files']] == \
+            [(record['file_path'], record['file_hash']) for record in first['generated_files']]
+
+        # Reuse can be turned off
+        PayslipGenerator().generate_bulk_payslips(
+            payrolls, PayslipGenerationOptions(format=PayslipFormat.HTML, reuse_existing=False), workers=1
+        )
+        assert rendered == [payroll.id for payroll in payrolls]
+
+    def test_changed_payslip_is_rendered_to_a_new_file(self, media_root, rendered):
+        """Test only the corrected payroll is rendered again, under a new fingerprint"""
+        from core.models import Payroll
+
+        payrolls = _payslip_fixture(3)
+        generator = PayslipGenerator()
+        first = {record['payroll_id']: record
+                 for record in generator.generate_bulk_payslips(payrolls, HTML_OPTIONS)['generated_files']}
+
+        corrected = payrolls[1]
+        corrected.net_salary = Decimal('51234.00')
+        corrected.save()
+        rendered.clear()
+        payrolls = list(Payroll.objects.order_by('id'))
+        result = generator.generate_bulk_payslips(payrolls, HTML_OPTIONS)
+        files = {record['payroll_id']: record for record in result['generated_files']}
+
+        assert rendered == [corrected.id]
+        assert result['reused_count'] == 2
+        assert files[corrected.id]['file_path'] != first[corrected.id]['file_path']
+        assert files[corrected.id]['file_hash'] != first[corrected.id]['file_hash']
+        with default_storage.open(files[corrected.id]['file_path']) as stored:
+            assert b"51234.00" in stored.read()
+        for payroll_id in (payrolls[0].id, payrolls[2].id):
+            assert files[payroll_id]['file_path'] == first[payroll_id]['file_path']
+
+    def test_single_payslip_reuses_bulk_file(self, media_root, rendered):
+        """Test generate_payslip finds the file stored by a bulk generation"""
+        payrolls = _payslip_fixture(2)
+        bulk = PayslipGenerator().generate_bulk_payslips(payrolls, HTML_OPTIONS)
+        rendered.clear()
+
+        result = PayslipGenerator().generate_payslip(payrolls[0], HTML_OPTIONS)
+
+        assert rendered == []
+        assert result['reused']
+        assert result['file_path'] == bulk['generated_files'][0]['file_path']
+
+    def test_superseded_file_is_deleted_once_unused(self, media_root, rendered):
+        """Test a distribution moved to a corrected payslip deletes the old file unless another record uses it"""
+        from core.models import Payroll
+        from core.reports.bulletin_management import DistributionManager
+
+        payrolls = _payslip_fixture(2)
+        first = PayslipGenerator().generate_bulk_payslips(payrolls, HTML_OPTIONS)['generated_files']
+        records = _distribution_queue(payrolls, file_path=first[0]['file_path'])
+        records[1].file_path = first[1]['file_path']
+        records[1].save()
+        _distribution_queue(payrolls[1:], file_path=first[1]['file_path'])
+
+        Payroll.objects.update(net_salary=F('net_salary') + 1)
+        manager = DistributionManager()
+        for record, payroll in zip(records, Payroll.objects.order_by('id')):
+            manager._point_at_payslip_file(record, PayslipGenerator().generate_payslip(payroll, HTML_OPTIONS))
+            assert record.file_path != first[payrolls.index(payroll)]['file_path']
+            assert default_storage.exists(record.file_path)
+
+        assert not default_storage.exists(first[0]['file_path'])
+        assert default_storage.exists(first[1]['file_path'])
+
+
+@pytest.mark.django_db
+class TestPayslipProtection:
+    """Test password protected payslips are encrypted PDFs"""
+
+    def test_protection_needs_pdf(self):
+        """Test other formats cannot be password protected"""
+        options = PayslipGenerationOptions(format=PayslipFormat.HTML, password_protect=True, password="secret123")
+
+        assert not options.validate().is_valid
+        assert PayslipGenerationOptions(password_protect=True, password="secret123").validate().is_valid
+
+    @pytest.mark.skipif(not REPORTLAB_AVAILABLE, reason="PDF payslips are drawn with ReportLab")
+    def test_protected_payslip_is_encrypted(self, media_root):
+        """Test the stored file, and the hash recorded for it, are those of the encrypted PDF"""
+        payroll = _payslip_fixture(1)[0]
+
+        protected = PayslipGenerator().generate_payslip(
+            payroll, PayslipGenerationOptions(password_protect=True, password="secret123")
+        )
+        plain = PayslipGenerator().generate_payslip(payroll, PayslipGenerationOptions())
+
+        assert protected['success'], protected['errors']
+        with default_storage.open(protected['file_path'], 'rb') as stored:
+            content = stored.read()
+        assert b"/Encrypt" in content
+        assert protected['file_hash'] == hashlib.sha256(content).hexdigest()
+        with default_storage.open(plain['file_path'], 'rb') as stored:
+            assert b"/Encrypt" not in stored.read()
+
+        merged = PayslipGenerator().generate_merged_payslips(
+            [payroll], PayslipGenerationOptions(password_protect=True, password="secret123"), file_name="mars"
+        )
+        with default_storage.open(merged['files'][0]['file_path'], 'rb') as stored:
+            assert b"/Encrypt" in stored.read()
+
+
+@pytest.mark.django_db
+class TestMergedPayslips:
+    """Test merged PDF documents with an outline entry per employee and a page index"""
+
+    def test_merged_payslips_need_pdf(self, media_root):
+        """Test other formats are refused"""
+        result = PayslipGenerator().generate_merged_payslips(_payslip_fixture(1), HTML_OPTIONS)
+
+        assert not result['success']
+        assert result['files'] == []
+
+    @pytest.mark.skipif(not REPORTLAB_AVAILABLE, reason="merged payslips are drawn with ReportLab")
+    def test_outline_and_page_index(self, media_root):
+        """Test each document indexes its payslips, one outline entry per employee"""
+        payrolls = _payslip_fixture(5)
+
+        result = PayslipGenerator().generate_merged_payslips(payrolls, payslips_per_file=3, file_name="mars")
+
+        assert result['success'], result['errors']
+        assert result['generated_count'] == 5
+        assert [merged['file_path'] for merged in result['files']] == [
+            "payroll/bulletins/2024/03/mars_001.pdf", "payroll/bulletins/2024/03/mars_002.pdf"
+        ]
+        assert [merged['payslip_count'] for merged in result['files']] == [3, 2]
+
+        first = result['files'][0]
+        assert [row['payroll_id'] for row in first['index']] == [payroll.id for payroll in payrolls[:3]]
+        assert [row['employee_name'] for row in first['index']] == ["Employe0 Test", "Employe1 Test",
+                                                                    "Employe2 Test"]
+        # Payslips follow each other from the first page, the index comes last
+        page = 1
+        for row in first['index']:
+            assert row['page'] == page and row['page_count'] >= 1
+            page += row['page_count']
+        assert first['page_count'] > page - 1
+
+        with default_storage.open(first['file_path'], 'rb') as stored:
+            content = stored.read()
+        assert content.startswith(b"%PDF")
+        assert first['file_size'] == len(content)
+        assert b"/Outlines" in content
+        for title in (b"Employe0 Test", b"Employe1 Test", b"Employe2 Test", b"Index"):
+            assert b"/Title (" + title + b")" in content
+        assert b"Employe3 Test" not in content
+
+    @pytest.mark.skipif(not REPORTLAB_AVAILABLE, reason="merged payslips are drawn with ReportLab")
+    def test_documents_are_bounded_by_default(self, media_root):
+        """Test periods within the default document size give one unnumbered document, empty sizes are refused"""
+        payrolls = _payslip_fixture(2)
+
+        result = PayslipGenerator().generate_merged_payslips(payrolls, file_name="mars")
+
+        assert result['success'], result['errors']
+        assert [merged['file_path'] for merged in result['files']] == ["payroll/bulletins/2024/03/mars.pdf"]
+        with default_storage.open(result['files'][0]['file_path'], 'rb') as stored:
+            content = stored.read()
+        assert result['files'][0]['file_size'] == len(content)
+        assert result['files'][0]['file_hash'] == hashlib.sha256(content).hexdigest()
+
+        refused = PayslipGenerator().generate_merged_payslips(payrolls, payslips_per_file=0)
+        assert not refused['success']
+        assert refused['files'] == []
+
+
+def _distribution_queue(payrolls, **fields):
+    from django.utils import timezone
+
+    due_time = timezone.now() - timedelta(minutes=1)
+    return [
+        PayslipDistributionRecord.objects.create(
+            employee=payroll.employee, payroll=payroll, channel=DistributionChannel.EMAIL.value,
+            due_time=due_time, **fields
+        )
+        for payroll in payrolls
+    ]
+
+
+def _scheduler(deliver_email, **kwargs):
+    """Scheduler delivering email distributions with deliver_email(distribution)"""
+    def process(distributions, result):
+        for distribution in distributions:
+            deliver_email(distribution)
+            result['processed_count'] += 1
+
+    manager = SimpleNamespace(_process_email_distributions=process, _process_print_distributions=process,
+                              _process_sms_distributions=process)
+    return DistributionScheduler(manager=manager, **kwargs)
+
+
+def _send(distribution):
+    from django.utils import timezone
+
+    distribution.status = DistributionStatus.SENT.value
+    distribution.sent_time = timezone.now()
+
+
+def _fail(distribution):
+    distribution.status = DistributionStatus.FAILED.value
+
+
+@pytest.mark.django_db
+class TestDistributionScheduler:
+    """Test leasing, retries and metrics of the distribution queue"""
+
+    def test_schedulers_never_claim_the_same_record(self):
+        """Test a record leased by one scheduler is skipped by the others until the lease expires"""
+        records = _distribution_queue(_payslip_fixture(5))
+        first = _scheduler(_send, worker_id="first", batch_size=3)
+        second = _scheduler(_send, worker_id="second", batch_size=3)
+        first.refresh()
+        second.refresh()
+
+        claimed_first = first.claim_batch()
+        # The heap of the second scheduler still lists the first batch
+        claimed_second = second.claim_batch()
+
+        assert len(claimed_first) == 3
+        assert len(claimed_second) == 2
+        assert {record.id for record in claimed_first}.isdisjoint(record.id for record in claimed_second)
+        assert {record.id for record in claimed_first + claimed_second} == {record.id for record in records}
+        assert second.claim_batch([record.id for record in claimed_first]) == []
+
+        # An expired lease is claimable again
+        PayslipDistributionRecord.objects.filter(lease_owner="first").update(
+            lease_expires_at=F('due_time')
+        )
+        reclaimed = second.claim_batch([record.id for record in claimed_first])
+        assert {record.id for record in reclaimed} == {record.id for record in claimed_first}
+        assert set(PayslipDistributionRecord.objects.values_list('lease_owner', flat=True)) == {"second"}
+
+    def test_urgent_records_are_claimed_first(self):
+        """Test a batch takes the most urgent due records"""
+        payrolls = _payslip_fixture(4)
+        _distribution_queue(payrolls[:3], priority=DISTRIBUTION_PRIORITIES['low'])
+        urgent = _distribution_queue(payrolls[3:], priority=DISTRIBUTION_PRIORITIES['urgent'])
+        scheduler = _scheduler(_send, batch_size=2)
+        scheduler.refresh()
+
+        claimed = scheduler.claim_batch()
+
+        assert claimed[0].id == urgent[0].id
+        assert len(claimed) == 2
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        """Test failures are queued again after a jittered delay, then left failed"""
+        from django.utils import timezone
+
+        record = _distribution_queue(_payslip_fixture(1),
+                                     distribution_options=json.dumps({'retry_attempts': 2, 'retry_delay': 60}))[0]
+        scheduler = _scheduler(_fail)
+
+        for retry_count, delay in ((1, 60), (2, 120)):
+            before = timezone.now()
+            claimed = scheduler.claim_batch([record.id])
+            assert [distribution.id for distribution in claimed] == [record.id]
+            scheduler.deliver(claimed)
+            record.refresh_from_db()
+            assert record.status == DistributionStatus.RETRY.value
+            assert record.retry_count == retry_count
+            assert before + timedelta(seconds=delay / 2) <= record.due_time
+            assert record.due_time <= timezone.now() + timedelta(seconds=delay)
+            assert record.lease_owner == "" and record.lease_expires_at is None
+            PayslipDistributionRecord.objects.filter(id=record.id).update(due_time=before)
+
+        scheduler.deliver(scheduler.claim_batch([record.id]))
+        record.refresh_from_db()
+        assert record.status == DistributionStatus.FAILED.value
+        assert record.due_time is None
+        assert scheduler.claim_batch([record.id]) == []
+
+    def test_metrics_per_channel(self):
+        """Test delivered batches are counted per channel with their latencies"""
+        _distribution_queue(_payslip_fixture(3))
+        scheduler = _scheduler(_send)
+
+        result = scheduler.process_due()
+
+        assert result['processed_count'] == 3
+        email = result['metrics'][DistributionChannel.EMAIL.value]
+        assert (email['processed'], email['sent'], email['failed'], email['retried']) == (3, 3, 0, 0)
+        assert 60 <= email['latency_p50'] <= email['latency_max'] < 120
+
+
+def test_retry_delay_backoff_and_jitter():
+    """Test delays double per retry up to the cap, drawn in their upper half"""
+    for retry_count in range(4):
+        delays = {distribution_retry_delay(retry_count, 300) for _ in range(50)}
+        assert all(300 * 2 ** retry_count / 2 <= delay <= 300 * 2 ** retry_count for delay in delays)
+        assert len(delays) > 1
+    assert 1800 <= distribution_retry_delay(10, 300, max_delay=3600) <= 3600
+
+
+def test_metrics_snapshot():
+    """Test counts, rates and latency percentiles of recorded batches"""
+    metrics = DistributionMetrics()
+    metrics.record('email', [('sent', float(latency)) for latency in range(1, 101)], busy_time=10.0)
+    metrics.record('email', [('retry', None), ('failed', None)], busy_time=2.0)
+    metrics.record('sms', [('failed', None)], busy_time=0.0)
+
+    snapshot = metrics.snapshot()
+
+    email = snapshot['email']
+    assert (email['processed'], email['sent'], email['failed'], email['retried']) == (102, 100, 1, 1)
+    assert email['delivery_rate_per_minute'] == 510.0
+    assert email['latency_avg'] == 50.5
+    assert (email['latency_p50'], email['latency_p95'], email['latency_max']) == (51.0, 96.0, 100.0)
+    assert email['throughput_per_minute'] > 0
+    assert snapshot['sms']['sent'] == 0
+    assert snapshot['sms']['delivery_rate_per_minute'] is None
+    assert snapshot['sms']['latency_p50'] is None
@@ -0,0 +1,209 @@
+"""
+Tests for core.reports.employee_reports status, anniversary and compliance reports.
+
+Checks that the statuses, categories and counts computed by the database
+match the per-employee rules, and that keyset pages cover every row once
+with a bounded number of queries.
+"""
+
+import pytest
+from datetime import date, timedelta
+
+from core.utils.date_utils import DateCalculator, SeniorityCalculator
+
+
+@pytest.fixture
+def employees():
+    from core.models import Department, Document, Employee
+
+    today = date.today()
+    finance = Department.objects.create(name="Finance")
+    rows = [
+        # Probation ending within 30 days, contract expiring soon
+        dict(first_name="Aicha", last_name="Sidi", department=finance, national_id="1234567890", cnss_number="C1",
+             cnam_number="M1", phone="22220000", hire_date=DateCalculator.add_months(today, -6) + timedelta(days=10),
+             contract_end_date=today + timedelta(days=20)),
+        # Active, hired on today's date years ago, expired contract
+        dict(first_name="Moussa", last_name="Ba", department=finance, national_id="2234567890", cnss_number="C2",
+             hire_date=DateCalculator.add_years(today, -5), contract_end_date=today - timedelta(days=3)),
+        # On leave, hired the day after today's date 10 years ago, no registration numbers
+        dict(first_name="Fatma", last_name="Ely", on_leave=True, email="fatma@example.mr",
+             hire_date=DateCalculator.add_years(today, -10) + timedelta(days=1)),
+        # Terminated expatriate without passport
+        dict(first_name="Sidi", last_name="Mohamed", is_active=False, is_expatriate=True, national_id="3234567890",
+             hire_date=date(2012, 2, 29), termination_date=today - timedelta(days=10),
+             contract_end_date=today + timedelta(days=5)),
+        # Inactive without dates, foreign documentation
+        dict(first_name="Mariem", last_name="Vall", is_active=False, work_permit_number="WP-1"),
+    ]
+    created = [Employee.objects.create(**row) for row in rows]
+
+    Document.objects.create(employee=created[0], document_type='CONTRACT', document_name="Contrat",
+                            expiry_date=today + timedelta(days=20))
+    Document.objects.create(employee=created[0], document_type='ID_CARD', document_name="CNI",
+                            expiry_date=today - timedelta(days=1))
+    Document.objects.create(employee=created[1], document_type='PASSPORT', document_name="Passeport")
+    Document.objects.create(employee=created[3], document_type='VISA', document_name="Visa",
+                            expiry_date=today + timedelta(days=200))
+    return created
+
+
+def _numbers(categories):
+    """Employee numbers of each category of a report"""
+    return {category: [row['employee_number'] for row in rows] for category, rows in categories.items()}
+
+
+@pytest.mark.django_db
+class TestEmployeeStatusReports:
+    """Test the database-side status computations"""
+
+    def test_statuses_match_per_employee_rules(self, employees):
+        """Test statuses, seniority and probation categories against the Python rules"""
+        from core.reports.employee_reports import EmployeeDataExtractor, EmployeeReportManager, ReportType
+
+        manager = EmployeeReportManager()
+        today = date.today()
+
+        report = manager.generate_report(ReportType.STATUS)
+        for status_rows in report['status_groups'].values():
+            for row in status_rows:
+                employee = next(e for e in employees if str(e.id) == row['employee_number'])
+                localized = manager.status_reports._localize_status(
+                    EmployeeDataExtractor._get_employment_status(employee)
+                )
+                assert row in report['status_groups'][localized]
+                expected = SeniorityCalculator.calculate_seniority_years(employee.hire_date) if employee.hire_date else 0
+                assert row['seniority_years'] == expected
+        assert report['summary_statistics']['status_counts'] == {
+            'Actif': 1, 'Inactif': 1, 'En congé': 1, 'Licencié': 1, 'En probation': 1
+        }
+
+        contracts = manager.generate_report(ReportType.STATUS, report_subtype='contracts')
+        assert _numbers(contracts['contract_categories']) == {
+            'Contrats actifs': [],
+            'Contrats expirant bientôt': [str(employees[0].id)],
+            'Contrats expirés': [str(employees[1].id)],
+            'Contrats CDI': [str(employees[2].id), str(employees[4].id)],
+            'Contrats résiliés': [str(employees[3].id)],
+        }
+        assert contracts['summary_statistics']['contract_types_distribution'] == {'Non spécifié': 5}
+
+        probation = manager.generate_report(ReportType.STATUS, report_subtype='probation')
+        for category, rows in probation['probation_categories'].items():
+            for row in rows:
+                days = row['days_to_probation_end']
+                expected = (
+                    "En période d'essai" if days > 30 else
+                    "Fin de période d'essai prochaine" if days > 0 else
+                    "Période d'essai terminée" if days >= -90 else
+                    "Évaluation d'essai en retard"
+                )
+                assert category == expected
+        assert probation['summary_statistics']['total_tracked_employees'] == 4
+        assert probation['summary_statistics']['ending_soon_count'] == 1
+
+        anniversaries = manager.generate_report(ReportType.LIFECYCLE, report_subtype='anniversaries')
+        hired = sorted(
+            (e for e in employees if e.hire_date and e.hire_date.year < today.year),
+            key=lambda e: (e.hire_date.month, e.hire_date.day)
+        )
+        assert [row['employee_number'] for row in anniversaries['anniversaries']] == [str(e.id) for e in hired]
+        assert [row['years_of_service'] for row in anniversaries['anniversaries']] == [
+            today.year - e.hire_date.year for e in hired
+        ]
+        assert anniversaries['summary_statistics']['longest_tenure'] == today.year - 2012
+
+        # Same result from the per-day thresholds whatever the date
+        for day in (date(2024, 8, 31), date(2023, 3, 31), date(2023, 2, 28)):
+            cutoff = EmployeeDataExtractor.probation_hire_cutoff(day)
+            assert DateCalculator.add_months(cutoff, 6) >= day
+            assert DateCalculator.add_months(cutoff - timedelta(days=1), 6) < day
+
+    def test_keyset_pages_cover_the_report(self, employees, django_assert_max_num_queries):
+        """Test pages are disjoint, complete, ordered, and read with a fixed number of queries"""
+        from core.models import Employee
+        from core.reports.employee_reports import EmployeeReportManager, ReportType
+
+        for index in range(12):
+            Employee.objects.create(first_name=f"Employe{index:02d}", last_name="Test",
+                                    hire_date=date(2015, 1, 1) + timedelta(days=90 * index),
+                                    contract_end_date=date.today() + timedelta(days=10 * index))
+
+        manager = EmployeeReportManager()
+        full = _numbers(manager.generate_report(ReportType.STATUS, report_subtype='contracts')['contract_categories'])
+
+        paged = {category: [] for category in full}
+        cursor, pages = None, 0
+        while True:
+            # Aggregates, contract types and the page itself
+            with django_assert_max_num_queries(3):
+                report = manager.generate_report(ReportType.STATUS, report_subtype='contracts',
+                                                 page_size=4, cursor=cursor)
+            assert sum(len(rows) for rows in report['contract_categories'].values()) <= 4
+            assert report['summary_statistics']['total_employees'] == 17
+            for category, numbers in _numbers(report['contract_categories']).items():
+                paged[category].extend(numbers)
+            pages += 1
+            cursor = report['pagination']['next_cursor']
+            if not cursor:
+                break
+
+        assert pages == 5
+        assert paged == full
+
+        with pytest.raises(ValueError):
+            manager.generate_report(ReportType.STATUS, page_size=4, cursor="pas-un-curseur")
+
+
+@pytest.mark.django_db
+class TestDocumentComplianceReports:
+    """Test the document and alert counts"""
+
+    def test_document_status_counts_and_pages(self, employees):
+        """Test document statistics come from the whole selection and rows from the page"""
+        from core.reports.employee_reports import EmployeeReportManager, ReportType
+
+        manager = EmployeeReportManager()
+        report = manager.generate_report(ReportType.COMPLIANCE, report_subtype='documents')
+        statistics = report['statistics']
+        # 5 x 4 required types, minus the 3 held, plus 4 expatriate types for 2 foreign employees minus the visa
+        assert (statistics['valid_documents'], statistics['expiring_soon'], statistics['expired_documents'],
+                statistics['missing_documents']) == (1, 1, 1, 24)
+        assert report['document_categories']['Documents expirés'][0]['employee_number'] == str(employees[0].id)
+
+        first = manager.generate_report(ReportType.COMPLIANCE, report_subtype='documents', page_size=2)
+        assert first['statistics'] == statistics
+        names = {row['full_name'] for rows in first['document_categories'].values() for row in rows}
+        assert names == {'Aicha Sidi', 'Fatma Ely'}
+        assert first['pagination']['has_more']
+
+    def test_compliance_alerts(self, employees):
+        """Test alert counts and messages against the per-employee checks"""
+        from core.reports.employee_reports import EmployeeReportManager, ReportType
+
+        manager = EmployeeReportManager()
+        report = manager.generate_report(ReportType.COMPLIANCE, report_subtype='alerts')
+        assert report['alert_summary'] == {
+            'total_alerts': 15, 'critical_count': 9, 'warning_count': 3, 'info_count': 3, 'employees_affected': 5
+        }
+        warnings = {(row['full_name'], row['message']) for row in report['alert_categories']['Avertissements']}
+        assert warnings == {
+            ('Aicha Sidi', '1 document(s) expiré(s)'),
+            ('Aicha Sidi', '1 document(s) expirant dans 30 jours'),
+            ('Sidi Mohamed', 'Numéro de passeport manquant pour expatrié'),
+        }
+
+        paged = []
+        cursor = None
+        while True:
+            page = manager.generate_report(ReportType.COMPLIANCE, report_subtype='alerts', page_size=2, cursor=cursor)
+            assert page['alert_summary'] == report['alert_summary']
+            paged.extend(alert for alerts in page['alert_categories'].values() for alert in alerts)
+            cursor = page['pagination']['next_cursor']
+            if not cursor:
+                break
+        assert len(paged) == 15
+
+        registrations = manager.generate_report(ReportType.COMPLIANCE, report_subtype='registrations')
+        assert registrations['compliance_statistics']['compliant_count'] == 1
+        assert _numbers(registrations['compliance_categories'])['CNAM manquant'] == [str(employees[1].id)]
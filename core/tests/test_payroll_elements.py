@@ -3,6 +3,7 @@ from decimal import Decimal
 from django.test import TestCase
 from django.core.exceptions import ValidationError
 from core.models import PayrollElement, PayrollElementFormula
+from core.utils.formula_engine import FormulaCompiler
 
 
 class PayrollElementModelTest(TestCase):
@@ -304,6 +305,26 @@ class PayrollElementFormulaModelTest(TestCase):
         # Verify formula is also deleted
         self.assertFalse(PayrollElementFormula.objects.filter(id=formula_id).exists())
 
+    def test_formula_change_invalidates_compiled_formula(self):
+        """Test saving or deleting formula rows recompiles the element formula"""
+        compiler = FormulaCompiler()
+        compiled = compiler.get_compiled_formula(self.payroll_element, 'B')
+        self.assertIs(compiler.get_compiled_formula(self.payroll_element, 'B'), compiled)
+
+        PayrollElementFormula.objects.create(
+            payroll_element=self.payroll_element,
+            section="B",
+            component_type="O",
+            text_value="*2"
+        )
+        recompiled = compiler.get_compiled_formula(self.payroll_element, 'B')
+        self.assertIsNot(recompiled, compiled)
+        stored_value = PayrollElementFormula.objects.get(id=self.formula.id).numeric_value
+        self.assertEqual(recompiled.evaluate(), stored_value * 2)
+
+        self.formula.delete()
+        self.assertIsNot(compiler.get_compiled_formula(self.payroll_element, 'B'), recompiled)
+
 
 class PayrollElementsIntegrationTest(TestCase):
     def test_complex_payroll_element_with_multiple_formulas(self):
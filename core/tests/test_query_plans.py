@@ -0,0 +1,112 @@
+"""
+Query plan regression tests for hot lookups.
+
+Captures the SQLite EXPLAIN QUERY PLAN of the queries run for every employee
+or period (line items of a payroll, payrolls of a month, clock punches,
+expiring documents, employees by NNI) and fails when one of them falls back
+to a full table scan or stops using the index it was given.
+"""
+
+import pytest
+from datetime import date, datetime, timezone
+
+from django.db import connection
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != 'sqlite', reason="Plans are checked on SQLite"),
+]
+
+PERIOD = date(2024, 1, 31)
+TODAY = date(2024, 3, 1)
+
+
+def query_plan(queryset):
+    """Return the detail column of each EXPLAIN QUERY PLAN row"""
+    # Rows read "<id> <parent> <notused> <detail>"
+    return [line.split(' ', 3)[-1] for line in queryset.order_by().explain().splitlines()]
+
+
+def line_items_of_payroll():
+    from core.models import PayrollLineItem
+    # Payroll.line_items
+    return PayrollLineItem.objects.filter(employee_id=1, period=PERIOD, motif_id=1)
+
+
+def line_items_of_batch():
+    from core.models import PayrollLineItem
+    # Batch payroll calculation and incremental recalculation
+    return PayrollLineItem.objects.filter(employee_id__in=[1, 2, 3], motif_id=1, period=PERIOD)
+
+
+def payrolls_of_range():
+    from core.models import Payroll
+    # Cumulative reports and period aggregates
+    return Payroll.objects.filter(period__gte=date(2024, 1, 1), period__lte=date(2024, 12, 31))
+
+
+def payrolls_of_month():
+    from core.models import Payroll
+    # Payroll summary and accounting exports
+    return Payroll.objects.filter(period__year=2024, period__month=1)
+
+
+def payrolls_of_month_and_motif():
+    from core.models import Payroll
+    return Payroll.objects.filter(period__year=2024, period__month=1, motif_id=1)
+
+
+def clock_punches_to_import():
+    from core.models import TimeClockData
+    # Clock imports
+    month_start, month_end = datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 2, 1, tzinfo=timezone.utc)
+    return TimeClockData.objects.filter(
+        employee_id=1, timestamp__gte=month_start, timestamp__lt=month_end, is_imported=False
+    )
+
+
+def expired_documents():
+    from core.models import Document
+    # Document compliance reports
+    return Document.objects.filter(expiry_date__lt=TODAY)
+
+
+def employees_with_expiring_documents():
+    from core.models import Document
+    return Document.objects.filter(expiry_date__gte=TODAY, expiry_date__lte=date(2024, 3, 31)).values('employee_id')
+
+
+def employee_by_national_id():
+    from core.models import Employee
+    # Employee import matching
+    return Employee.objects.filter(national_id='1234567890')
+
+
+@pytest.mark.parametrize('build_queryset, table, index', [
+    (line_items_of_payroll, 'rubriquepaie', 'rubriquepaie_emp_per_mot_idx'),
+    (line_items_of_batch, 'rubriquepaie', 'rubriquepaie_emp_per_mot_idx'),
+    (payrolls_of_range, 'paie', 'paie_period_motif_idx'),
+    (payrolls_of_month, 'paie', 'paie_period_motif_idx'),
+    (payrolls_of_month_and_motif, 'paie', None),
+    (clock_punches_to_import, 'donneespointeuse', 'donneespointeuse_emp_ts_idx'),
+    (expired_documents, 'Document', 'document_expiry_emp_idx'),
+    (employees_with_expiring_documents, 'Document', 'document_expiry_emp_idx'),
+    (employee_by_national_id, 'employe', 'employe_nni_idx'),
+])
+def test_hot_lookup_uses_index(build_queryset, table, index):
+    """Test the table is searched through an index, never scanned"""
+    plan = query_plan(build_queryset())
+    steps = [step for step in plan if step.split(' ')[1:2] == [table]]
+
+    assert steps, plan
+    for step in steps:
+        assert step.startswith('SEARCH '), plan
+        if index:
+            assert f" INDEX {index} " in step, plan
+
+
+def test_query_plan_reports_full_scans():
+    """Test an unindexed filter is caught as a scan"""
+    from core.models import Document
+
+    assert query_plan(Document.objects.filter(document_name="Contrat")) == ['SCAN Document']
@@ -0,0 +1,175 @@
+"""
+Tests for core.reports.streaming_exports module.
+
+Checks the chunked CSV, JSON Lines and XML serializers, the write-only XLSX
+writer and the "Etat de paie" rows merged from the payroll and line item
+cursors.
+"""
+
+import json
+import pytest
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+from datetime import date
+
+from core.reports.streaming_exports import AMOUNT_FORMAT, DATE_FORMAT, iter_export, write_export
+
+
+ROWS = [
+    {'employee_id': 1, 'name': 'Sidi; Aicha', 'net_salary': Decimal('50000.50'), 'period': date(2024, 1, 31), 'is_active': True},
+    {'employee_id': 2, 'name': 'Ba "Moussa"', 'net_salary': Decimal('42000.00'), 'period': date(2024, 1, 31), 'is_active': False},
+    {'employee_id': 3, 'name': 'Ely', 'net_salary': None, 'period': date(2024, 1, 31), 'is_active': True},
+]
+
+
+def test_csv_is_written_in_batches():
+    """Test CSV rows keep the French formatting and stream in batches"""
+    chunks = list(iter_export(iter(ROWS), 'csv', field_mapping={'net_salary': 'Net'}, batch_size=2))
+
+    assert len(chunks) == 2
+    lines = ''.join(chunks).splitlines()
+    assert lines[0] == 'employee_id;name;Net;period;is_active'
+    assert lines[1] == '1;"Sidi; Aicha";50000,50;31/01/2024;Oui'
+    assert lines[2] == '2;"Ba ""Moussa""";42000,00;31/01/2024;Non'
+    assert lines[3] == '3;Ely;;31/01/2024;Oui'
+
+
+def test_jsonl_and_xml_exports():
+    """Test JSON Lines keep exact amounts and XML is well formed"""
+    records = [json.loads(line) for line in ''.join(iter_export(ROWS, 'jsonl')).splitlines()]
+    assert records[0]['net_salary'] == '50000.50'
+    assert records[2]['net_salary'] is None
+
+    root = ET.fromstring(''.join(iter_export(ROWS, 'xml', root_element='etat', row_element='bulletin', batch_size=1)))
+    assert root.tag == 'etat'
+    assert [record.find('net_salary').text for record in root] == ['50000.50', '42000.00', None]
+
+    with pytest.raises(ValueError):
+        list(iter_export(ROWS, 'pdf'))
+
+
+def test_write_export_counts_rows(tmp_path):
+    """Test writing to a path returns the number of rows"""
+    path = tmp_path / "export.csv"
+
+    assert write_export((row for row in ROWS), path, 'csv') == 3
+    assert path.read_text(encoding='utf-8-sig').count('\n') == 4
+
+
+def test_xlsx_has_number_formats_and_totals(tmp_path):
+    """Test the write-only XLSX keeps typed cells and appends a totals row"""
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "export.xlsx"
+
+    assert write_export(iter(ROWS), path, 'xlsx', fields=['employee_id', 'net_salary', 'period'],
+                        field_mapping={'net_salary': 'Net'}, delimiter=';') == 3
+
+    worksheet = openpyxl.load_workbook(path).active
+    rows = list(worksheet.iter_rows(values_only=True))
+    assert rows[0] == ('employee_id', 'Net', 'period')
+    assert rows[1][1] == 50000.5
+    assert rows[3][1] is None
+    assert rows[4] == ('Total', 92000.5, None)
+    assert worksheet['B2'].number_format == AMOUNT_FORMAT
+    assert worksheet['C2'].number_format == DATE_FORMAT
+    assert worksheet['A1'].font.bold
+    assert worksheet.freeze_panes == 'A2'
+
+
+@pytest.mark.django_db
+class TestPayrollStateExport:
+    """Test the "Etat de paie" rows"""
+
+    @pytest.fixture
+    def payroll_data(self):
+        from core.models import (
+            Department, Employee, Payroll, PayrollElement, PayrollLineItem, PayrollMotif, SystemParameters
+        )
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=date(2024, 1, 31), next_period=date(2024, 2, 29),
+            closure_period=date(2024, 1, 31), default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        finance = Department.objects.create(name="Finance")
+        employees = [
+            Employee.objects.create(first_name="Aicha", last_name="Sidi", department=finance),
+            Employee.objects.create(first_name="Moussa", last_name="Ba"),
+            Employee.objects.create(first_name="Fatma", last_name="Ely", department=finance),
+        ]
+        base = PayrollElement.objects.create(label="Salaire de Base", type='G')
+        advance = PayrollElement.objects.create(label="Avance", type='D')
+        unused = PayrollElement.objects.create(label="Prime", type='G')
+
+        for index, employee in enumerate(employees):
+            Payroll.objects.create(employee=employee, motif=motif, parameters=parameters, period=date(2024, 1, 31),
+                                   net_salary=Decimal('40000.00') + index, department_name=employee.department.name
+                                   if employee.department else "")
+            PayrollLineItem.objects.create(employee=employee, payroll_element=base, motif=motif, period=date(2024, 1, 31),
+                                           calculated_amount=Decimal('45000.00') + index)
+        PayrollLineItem.objects.create(employee=employees[2], payroll_element=advance, motif=motif,
+                                       period=date(2024, 1, 31), calculated_amount=Decimal('5000.00'))
+        # Line item without a payroll is not exported
+        PayrollLineItem.objects.create(employee=employees[0], payroll_element=unused, motif=motif,
+                                       period=date(2024, 2, 29), calculated_amount=Decimal('1000.00'))
+
+        return {'employees': employees, 'base': base, 'advance': advance, 'finance': finance}
+
+    def test_rows_merge_line_items_per_payroll(self, payroll_data, django_assert_num_queries):
+        """Test each payroll row carries its own rubriques from one query per cursor"""
+        from core.models import Payroll
+        from core.reports.streaming_exports import PayrollStateExport
+
+        export = PayrollStateExport(Payroll.objects.filter(period=date(2024, 1, 31)), chunk_size=2)
+        with django_assert_num_queries(3):
+            fields = export.fields
+            rows = list(export.rows())
+
+        base, advance = f"element_{payroll_data['base'].id}", f"element_{payroll_data['advance'].id}"
+        assert fields[8:10] == [base, advance]
+        assert export.field_mapping[advance] == "Avance"
+        assert [row['employee_id'] for row in rows] == [employee.id for employee in payroll_data['employees']]
+        assert [row[base] for row in rows] == [Decimal('45000.00'), Decimal('45001.00'), Decimal('45002.00')]
+        assert [row[advance] for row in rows] == [None, None, Decimal('5000.00')]
+        assert rows[0]['department_name'] == "Finance"
+
+    def test_summary_export_filters_payrolls(self, payroll_data, tmp_path):
+        """Test the monthly "Etat de paie" export applies the report filters"""
+        from django.http import StreamingHttpResponse
+        from core.models import SystemParameters
+        from core.reports.payroll_summary import FilterCriteria, PayrollSummaryAnalytics
+
+        analytics = PayrollSummaryAnalytics(SystemParameters.objects.get())
+        filters = FilterCriteria(departments=[payroll_data['finance'].id], include_terminated=True)
+        path = tmp_path / "etat_de_paie.jsonl"
+
+        assert analytics.export_payroll_state(date(2024, 1, 15), 'jsonl', destination=path, filters=filters) == 2
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert [record['last_name'] for record in records] == ["Sidi", "Ely"]
+
+        response = analytics.export_payroll_state(date(2024, 1, 15), 'csv')
+        assert isinstance(response, StreamingHttpResponse)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        assert content.splitlines()[0].startswith("Matricule;Nom;Prénom")
+        assert len(content.splitlines()) == 4
+
+    def test_xlsx_column_chooser(self, payroll_data, tmp_path):
+        """Test chosen columns and rubriques are exported with their totals"""
+        openpyxl = pytest.importorskip("openpyxl")
+        from core.models import SystemParameters
+        from core.reports.payroll_summary import PayrollSummaryAnalytics
+
+        analytics = PayrollSummaryAnalytics(SystemParameters.objects.get())
+        path = tmp_path / "etat_de_paie.xlsx"
+
+        assert analytics.export_payroll_state(
+            date(2024, 1, 15), 'xlsx', destination=path,
+            columns=['employee_id', 'last_name', 'net_salary'], element_ids=[payroll_data['advance'].id]
+        ) == 3
+
+        worksheet = openpyxl.load_workbook(path)["Etat de paie"]
+        rows = list(worksheet.iter_rows(values_only=True))
+        assert rows[0] == ("Matricule", "Nom", "Avance", "Net à payer")
+        assert [row[2] for row in rows[1:4]] == [None, None, 5000]
+        assert rows[4] == ("Total", None, 5000, 120003)
@@ -0,0 +1,246 @@
+"""
+Tests for core.utils.batch_calculations module.
+
+Checks that the vectorized payroll engine reproduces the scalar
+PayrollCalculator.calculate_payroll results to the cent.
+"""
+
+import random
+import pytest
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from core.utils.payroll_calculations import PayrollCalculator
+from core.utils.batch_calculations import (
+    NUMPY_AVAILABLE,
+    PayrollLineItemColumns,
+    VectorizedPayrollEngine,
+    rate_to_fraction,
+    to_cents,
+)
+
+pytestmark = pytest.mark.skipif(not NUMPY_AVAILABLE, reason="NumPy not installed")
+
+
+class BatchSystemParameters:
+    """System parameters exposing the PayrollCalculator interface"""
+
+    def __init__(self, deduct_cnss_from_its=True, deduct_cnam_from_its=True):
+        self.deduct_cnss_from_its = deduct_cnss_from_its
+        self.deduct_cnam_from_its = deduct_cnam_from_its
+        self.tax_abatement = Decimal('6000')
+
+    def get_cnss_ceiling(self):
+        return Decimal('70000')
+
+    def get_cnss_rate_employee(self):
+        return Decimal('0.01')
+
+    def get_cnss_rate_employer(self):
+        return Decimal('0.15')
+
+    def get_cnam_rate_employee(self):
+        return Decimal('0.04')
+
+    def get_cnam_rate_employer(self):
+        return Decimal('0.05')
+
+    def get_its_brackets(self):
+        return [
+            {'min': 0, 'max': 9000, 'rate': 0.15},
+            {'min': 9000, 'max': 21000, 'rate': 0.25},
+            {'min': 21000, 'max': float('inf'), 'rate': 0.40},
+        ]
+
+
+class BatchEmployee:
+    """Employee exposing the attributes used by calculate_payroll"""
+
+    def __init__(self, employee_id, is_expatriate=False, cnss_rate=None, cnam_rate=None,
+                 subject_cnss=True, subject_cnam=True, subject_its=True):
+        self.id = employee_id
+        self.is_expatriate = is_expatriate
+        self.cnss_reimbursement_rate = cnss_rate
+        self.cnam_reimbursement_rate = cnam_rate
+        self._subject = (subject_cnss, subject_cnam, subject_its)
+
+    def is_subject_to_cnss(self):
+        return self._subject[0]
+
+    def is_subject_to_cnam(self):
+        return self._subject[1]
+
+    def is_subject_to_its(self):
+        return self._subject[2]
+
+
+def _line_item(amount, element_type='G', deduction_from='', cnss=False, cnam=False,
+               its=False, benefit=False):
+    element = SimpleNamespace(
+        type=element_type, deduction_from=deduction_from, affects_cnss=cnss,
+        affects_cnam=cnam, affects_its=its, is_benefit_in_kind=benefit
+    )
+    return SimpleNamespace(amount=Decimal(amount), payroll_element=element)
+
+
+def _motif(cnss=True, cnam=True, its=True):
+    motif = Mock()
+    motif.employee_subject_to_cnss = cnss
+    motif.employee_subject_to_cnam = cnam
+    motif.employee_subject_to_its = its
+    return motif
+
+
+def _random_population(size, seed=42):
+    rng = random.Random(seed)
+    employees = []
+    line_items = {}
+    for employee_id in range(1, size + 1):
+        employees.append(BatchEmployee(
+            employee_id,
+            is_expatriate=rng.random() < 0.2,
+            cnss_rate=rng.choice([None, Decimal('0.10'), Decimal('0.125')]),
+            cnam_rate=rng.choice([None, Decimal('0.05')]),
+            subject_cnss=rng.random() < 0.9,
+            subject_its=rng.random() < 0.95,
+        ))
+        items = [_line_item(f"{rng.randint(5000, 250000)}.{rng.randint(0, 99):02d}",
+                            cnss=True, cnam=True, its=True)]
+        for _ in range(rng.randint(0, 6)):
+            items.append(_line_item(
+                f"{rng.randint(0, 40000)}.{rng.randint(0, 99):02d}",
+                element_type=rng.choice(['G', 'G', 'R']),
+                deduction_from=rng.choice(['Brut', 'Net', '']),
+                cnss=rng.random() < 0.5, cnam=rng.random() < 0.5,
+                its=rng.random() < 0.7, benefit=rng.random() < 0.1,
+            ))
+        line_items[employee_id] = items
+    return employees, line_items
+
+
+class TestConversions:
+    """Test exact money and rate conversions"""
+
+    def test_to_cents(self):
+        assert to_cents(Decimal('1234.56')) == 123456
+        assert to_cents(None) == 0
+        assert to_cents(25000) == 2500000
+
+    def test_to_cents_rejects_sub_cent_amounts(self):
+        with pytest.raises(ValueError):
+            to_cents(Decimal('0.001'))
+
+    def test_rate_to_fraction(self):
+        assert rate_to_fraction(Decimal('0.01')) == (1, 100)
+        assert rate_to_fraction(0.15) == (15, 100)
+        assert rate_to_fraction(Decimal('0.0825')) == (825, 10000)
+
+
+class TestVectorizedPayrollEngine:
+    """Test vectorized engine against the scalar calculator"""
+
+    def _assert_same_results(self, employees, line_items, motif, system_parameters):
+        scalar = PayrollCalculator(system_parameters)
+        vectorized = PayrollCalculator(system_parameters, calculation_mode=PayrollCalculator.MODE_VECTORIZED)
+        period_start, period_end = date(2024, 1, 1), date(2024, 1, 31)
+
+        expected = scalar.calculate_payroll_batch(employees, motif, period_start, period_end, line_items)
+        actual = vectorized.calculate_payroll_batch(employees, motif, period_start, period_end, line_items)
+
+        assert actual.keys() == expected.keys()
+        for employee_id, expected_result in expected.items():
+            for key, value in expected_result.items():
+                expected_value = Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                assert actual[employee_id][key] == expected_value, (employee_id, key)
+
+    def test_matches_scalar_path_random_population(self):
+        """Test identical results for a random population"""
+        employees, line_items = _random_population(300)
+        self._assert_same_results(employees, line_items, _motif(), BatchSystemParameters())
+
+    def test_matches_scalar_without_its_deductions(self):
+        """Test identical results when CNSS/CNAM are not deducted from ITS"""
+        employees, line_items = _random_population(100, seed=7)
+        parameters = BatchSystemParameters(deduct_cnss_from_its=False, deduct_cnam_from_its=False)
+        self._assert_same_results(employees, line_items, _motif(), parameters)
+
+    def test_matches_scalar_with_motif_exemptions(self):
+        """Test motif flags disable contributions for everyone"""
+        employees, line_items = _random_population(50, seed=3)
+        self._assert_same_results(employees, line_items, _motif(cnss=False, its=False), BatchSystemParameters())
+
+    def test_half_cent_rounds_up(self):
+        """Test contributions ending in half a cent round half up"""
+        employee = BatchEmployee(1)
+        line_items = {1: [_line_item('12.50', cnss=True, cnam=True)]}
+        engine = VectorizedPayrollEngine(BatchSystemParameters())
+        columns = PayrollLineItemColumns.from_line_items([1], line_items)
+
+        result = engine.calculate([employee], _motif(), columns)[1]
+
+        # 12.50 * 1% = 0.125 -> 0.13
+        assert result['cnss_employee'] == Decimal('0.13')
+        assert result['cnam_employee'] == Decimal('0.50')
+
+    def test_employee_without_line_items(self):
+        """Test employees with no line items get zero results"""
+        employees = [BatchEmployee(1), BatchEmployee(2)]
+        line_items = {1: [_line_item('50000.00', cnss=True, cnam=True, its=True)]}
+        self._assert_same_results(employees, line_items, _motif(), BatchSystemParameters())
+
+        engine = VectorizedPayrollEngine(BatchSystemParameters())
+        columns = PayrollLineItemColumns.from_line_items([1, 2], line_items)
+        result = engine.calculate(employees, _motif(), columns)[2]
+        assert all(value == Decimal('0') for value in result.values())
+
+    def test_very_large_amounts_stay_exact(self):
+        """Test amounts beyond int64 products fall back to exact integers"""
+        employees = [BatchEmployee(1, cnss_rate=Decimal('0.123456789'))]
+        line_items = {1: [_line_item('98765432109876.55', cnss=True, cnam=True, its=True)]}
+        self._assert_same_results(employees, line_items, _motif(), BatchSystemParameters())
+
+    @pytest.mark.django_db
+    def test_modes_match_on_stored_line_items(self):
+        """Test both modes load the stored line items when none are passed"""
+        from core.models import Employee, PayrollElement, PayrollLineItem, PayrollMotif
+
+        motif = PayrollMotif.objects.create(name="Salaire")
+        period = date(2024, 1, 1)
+        salary = PayrollElement.objects.create(label="Salaire de Base", type='G', affects_cnss=True,
+                                               affects_cnam=True, affects_its=True)
+        housing = PayrollElement.objects.create(label="Logement", type='G', affects_its=True,
+                                                is_benefit_in_kind=True)
+        advance = PayrollElement.objects.create(label="Avance", type='R', deduction_from='Net')
+        employees = [Employee.objects.create(first_name=f"Employe{index}", last_name="Test")
+                     for index in range(3)]
+        for index, employee in enumerate(employees):
+            PayrollLineItem.objects.create(employee=employee, payroll_element=salary, motif=motif,
+                                           period=period, calculated_amount=Decimal('85000.50') * (index + 1))
+            PayrollLineItem.objects.create(employee=employee, payroll_element=advance, motif=motif,
+                                           period=period, calculated_amount=Decimal('5000'))
+        PayrollLineItem.objects.create(employee=employees[0], payroll_element=housing, motif=motif,
+                                       period=period, calculated_amount=Decimal('12000'))
+        # Other periods and motifs are not loaded
+        PayrollLineItem.objects.create(employee=employees[0], payroll_element=salary, motif=motif,
+                                       period=date(2023, 12, 1), calculated_amount=Decimal('99999'))
+
+        scalar = PayrollCalculator(BatchSystemParameters())
+        vectorized = PayrollCalculator(BatchSystemParameters(), calculation_mode=PayrollCalculator.MODE_VECTORIZED)
+        expected = scalar.calculate_payroll_batch(employees, motif, period, date(2024, 1, 31))
+        actual = vectorized.calculate_payroll_batch(employees, motif, period, date(2024, 1, 31))
+
+        assert expected[employees[0].id]['benefits_in_kind'] == Decimal('12000')
+        assert expected[employees[2].id]['gross_taxable'] == Decimal('255001.50')
+        assert expected[employees[1].id]['net_salary'] > 0
+        for employee in employees:
+            for key, value in expected[employee.id].items():
+                assert actual[employee.id][key] == Decimal(value).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        single = scalar.calculate_payroll(employees[1], motif, period, date(2024, 1, 31))
+        assert single == expected[employees[1].id]
+
+    def test_invalid_calculation_mode(self):
+        """Test unknown calculation modes are rejected"""
+        with pytest.raises(ValueError):
+            PayrollCalculator(BatchSystemParameters(), calculation_mode='gpu')
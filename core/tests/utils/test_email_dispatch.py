@@ -0,0 +1,153 @@
+"""
+Tests for core.utils.email_dispatch module.
+
+Sends through a local SMTP stand-in that counts its sessions and messages,
+and checks that a large mailing reuses a few connections, that dropped
+connections are reopened, refused recipients are reported, and that the
+rate limiter spaces messages per domain.
+"""
+
+import socketserver
+import threading
+
+import pytest
+from django.core.mail import EmailMessage
+
+from core.utils.email_dispatch import DomainRateLimiter, EmailDispatcher
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server: accepts every message, refuses recipients at refused.example"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, messages_per_session=None):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages_per_session = messages_per_session
+        self.sessions = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.sessions += 1
+        received = 0
+        self.reply("220 localhost")
+        for raw in self.rfile:
+            command = raw.decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply("250 localhost")
+            elif command.startswith('RCPT') and 'REFUSED.EXAMPLE' in command:
+                self.reply("550 No such user")
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                    lines.append(data.decode())
+                with server.lock:
+                    server.messages.append(''.join(lines))
+                self.reply("250 OK")
+                received += 1
+                if server.messages_per_session and received >= server.messages_per_session:
+                    # Drop the session without a reply to the next command
+                    return
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+@pytest.fixture
+def smtp_server(request):
+    server = SMTPStandIn(getattr(request, 'param', None))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def dispatcher_for(server, **kwargs):
+    return EmailDispatcher(backend=SMTP_BACKEND, host='127.0.0.1', port=server.server_address[1],
+                           use_tls=False, use_ssl=False, timeout=10, **kwargs)
+
+
+def payslip_messages(count, domain='example.mr'):
+    for index in range(count):
+        yield index, EmailMessage("Bulletin de paie", f"Bulletin {index}", 'paie@example.mr',
+                                  [f"employe{index}@{domain}"])
+
+
+def test_large_mailing_reuses_pooled_connections(smtp_server):
+    """Test every message is sent over at most one connection per worker"""
+    dispatcher = dispatcher_for(smtp_server, max_workers=4)
+
+    deliveries = list(dispatcher.dispatch(payslip_messages(300)))
+
+    assert sorted(delivery.key for delivery in deliveries) == list(range(300))
+    assert all(delivery.sent and delivery.sent_time for delivery in deliveries)
+    assert len(smtp_server.messages) == 300
+    assert smtp_server.sessions == dispatcher.connections_opened <= 4
+    # Message-IDs are returned as sent
+    message_ids = {delivery.message_id for delivery in deliveries}
+    assert len(message_ids) == 300
+    assert {line.split(':', 1)[1].strip() for message in smtp_server.messages
+            for line in message.splitlines() if line.startswith('Message-ID:')} == message_ids
+
+
+@pytest.mark.parametrize('smtp_server', [5], indirect=True)
+def test_dropped_connections_are_reopened(smtp_server):
+    """Test a session closed by the server is replaced and the message sent again"""
+    dispatcher = dispatcher_for(smtp_server, max_workers=2)
+
+    deliveries = list(dispatcher.dispatch(payslip_messages(20)))
+
+    assert all(delivery.sent for delivery in deliveries), [d.error for d in deliveries if not d.sent]
+    assert len(smtp_server.messages) == 20
+    assert smtp_server.sessions > 2
+
+
+def test_refused_recipients_are_reported(smtp_server):
+    """Test a refused message fails alone, the others are sent"""
+    dispatcher = dispatcher_for(smtp_server, max_workers=2)
+    messages = list(payslip_messages(3)) + list(payslip_messages(1, domain='refused.example'))
+    messages[-1] = ('refused', messages[-1][1])
+
+    deliveries = {delivery.key: delivery for delivery in dispatcher.dispatch(messages)}
+
+    assert not deliveries['refused'].sent
+    assert deliveries['refused'].error
+    assert all(deliveries[index].sent for index in range(3))
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.sessions <= 2
+
+
+def test_rate_limiter_spaces_messages_per_domain():
+    """Test each domain gets its own slots at its own rate"""
+    now = [0.0]
+    waits = []
+    limiter = DomainRateLimiter({'default': 60, 'gmail.com': 20}, clock=lambda: now[0], sleep=waits.append)
+
+    assert [limiter.acquire("a@example.mr") for _ in range(3)] == [0.0, 1.0, 2.0]
+    assert [limiter.acquire("b@Gmail.com") for _ in range(3)] == [0.0, 3.0, 6.0]
+    assert waits == [1.0, 2.0, 3.0, 6.0]
+
+    # Slots already passed are not waited for
+    now[0] = 10.0
+    assert limiter.acquire("c@example.mr") == 0.0
+
+    assert DomainRateLimiter({'gmail.com': 20}).acquire("a@example.mr") == 0.0
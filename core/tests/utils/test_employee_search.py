@@ -0,0 +1,101 @@
+"""
+Tests for core.utils.employee_search module.
+
+Checks the normalization of Latin and Arabic names and identifiers, and that
+prefix, typo-tolerant and identifier searches find the same employees with
+the SQLite FTS5 index and with token matching, as employees are saved.
+"""
+
+import pytest
+
+from core.utils.employee_search import (
+    install_search_backend, normalize_search_text, rebuild_employee_search_index,
+    search_condition, search_document, search_employees, uninstall_search_backend
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(params=['fts', 'tokens'])
+def backend(request):
+    """Run the test with the FTS5 table and with token matching"""
+    if request.param == 'fts' and not install_search_backend():
+        pytest.skip("SQLite built without FTS5")
+    yield request.param
+    uninstall_search_backend()
+
+
+@pytest.fixture
+def employees():
+    from core.models import Employee
+
+    return {
+        'mohamed': Employee.objects.create(first_name="Mohamed", last_name="Ould Ahmed", phone="22 45 10 10",
+                                           email="m.ahmed@example.mr", cnss_number="CN-4521"),
+        'arabic': Employee.objects.create(first_name="مُحَمَّد", last_name="أحمد", national_id="1234567890"),
+        'fatimetou': Employee.objects.create(first_name="Fatimétou", last_name="Mint Sidi"),
+    }
+
+
+def test_normalization():
+    """Test accents, Arabic diacritics and letter variants fold, identifiers are also indexed compact"""
+    assert normalize_search_text("Fatimétou ÉLY") == "fatimetou ely"
+    assert normalize_search_text("مُحَمَّد أحمد إبراهيم فاطمة") == "محمد احمد ابراهىم فاطمه"
+    assert search_document({'first_name': "Sidi", 'phone': "22 45 10 10", 'email': "Sidi@Example.mr"}) == \
+        " sidi 22 45 10 22451010 example mr "
+    assert search_document({}) == ''
+
+
+@pytest.mark.django_db
+class TestEmployeeSearch:
+    """Test searches on both backends"""
+
+    def test_prefix_arabic_typo_and_identifier_matches(self, backend, employees):
+        """Test every term must match a word prefix or a close word"""
+        ids = {name: employee.id for name, employee in employees.items()}
+
+        assert set(search_employees("moham")) == {ids['mohamed']}
+        assert search_employees("ould ahm") == [ids['mohamed']]
+        assert search_employees("ould sidi") == []
+        # Arabic with or without diacritics and hamza
+        assert search_employees("احمد") == [ids['arabic']]
+        assert search_employees("محمد") == [ids['arabic']]
+        # Typos and transliteration variants
+        assert search_employees("mohamd") == [ids['mohamed']]
+        assert search_employees("fatimatou") == [ids['fatimetou']]
+        assert search_employees("fatimatou", fuzzy=False) == []
+        # Identifiers, compact or as typed, and email
+        assert search_employees("22451010") == [ids['mohamed']]
+        assert search_employees("CN-4521") == [ids['mohamed']]
+        assert search_employees("1234567890") == [ids['arabic']]
+        assert search_employees("m.ahmed@example.mr") == [ids['mohamed']]
+
+    def test_index_follows_employee_changes(self, backend, employees):
+        """Test saved and deleted employees are searchable at once, report filters use the index"""
+        from core.models import Employee
+        from core.reports.employee_reports import EmployeeDataExtractor, EmployeeReportFilter
+
+        employee = employees['fatimetou']
+        employee.last_name = "Mint Brahim"
+        employee.save()
+        assert search_employees("brahim") == [employee.id]
+        assert search_employees("mint sidi") == []
+
+        filters = EmployeeReportFilter(search_text="Fatimetou brah")
+        assert list(EmployeeDataExtractor.get_base_employee_queryset(filters)) == [employee]
+
+        employees['mohamed'].delete()
+        assert search_employees("ould") == []
+
+        # Bulk imports send no signal: the rebuild indexes them
+        Employee.objects.bulk_create([Employee(first_name="Khadijetou", last_name="Salem")])
+        assert not Employee.objects.filter(search_condition("khadijetou")).exists()
+        assert rebuild_employee_search_index() == 3
+        assert Employee.objects.filter(search_condition("khadijetou")).count() == 1
@@ -0,0 +1,98 @@
+"""
+Tests for core.utils.employee_snapshot module.
+
+Checks that the vectorized HR dashboard counts match the per-employee
+computation and that employee changes rebuild the snapshot.
+"""
+
+import pytest
+from datetime import date, timedelta
+
+from core.utils.date_utils import DateCalculator
+from core.utils.employee_snapshot import EmployeeSnapshot, get_employee_snapshot
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def employees():
+    from core.models import Department, Employee
+
+    today = date.today()
+    finance = Department.objects.create(name="Finance")
+    hr = Department.objects.create(name="Ressources Humaines")
+    rows = [
+        # Probation, expiring contract, missing CNAM
+        dict(first_name="Aicha", last_name="Sidi", department=finance, national_id="1234567890",
+             cnss_number="C1", birth_date=today - timedelta(days=365 * 24), hire_date=today - timedelta(days=30),
+             contract_end_date=today + timedelta(days=60)),
+        # Active, hired on today's date years ago
+        dict(first_name="Moussa", last_name="Ba", department=finance, national_id="2234567890", cnss_number="C2",
+             cnam_number="M2", birth_date=date(today.year - 40, 1, 1), hire_date=DateCalculator.add_years(today, -5)),
+        # On leave, no registration numbers
+        dict(first_name="Fatma", last_name="Ely", department=hr, on_leave=True, birth_date=date(1965, 6, 15),
+             hire_date=date(2000, 2, 29), contract_end_date=today + timedelta(days=120)),
+        # Terminated
+        dict(first_name="Sidi", last_name="Mohamed", department=hr, is_active=False, national_id="3234567890",
+             termination_date=today - timedelta(days=10), contract_end_date=today + timedelta(days=5)),
+        # Inactive without dates
+        dict(first_name="Mariem", last_name="Vall", is_active=False, is_expatriate=True),
+    ]
+    return {'finance': finance, 'hr': hr, 'employees': [Employee.objects.create(**row) for row in rows]}
+
+
+@pytest.mark.django_db
+class TestEmployeeSnapshot:
+    """Test the HR dashboard counts"""
+
+    def test_counts_match_queryset_computation(self, employees):
+        """Test each metric matches the per-employee computation, with and without filters"""
+        from core.reports.employee_reports import (
+            EmployeeDataExtractor, EmployeeReportFilter, EmployeeReportManager
+        )
+
+        manager = EmployeeReportManager()
+        snapshot = EmployeeSnapshot.build()
+        today = date.today()
+        for filters in (None, EmployeeReportFilter(departments=[employees['finance'].id]),
+                        EmployeeReportFilter(is_active=False), EmployeeReportFilter(age_from=30, missing_cnam=True),
+                        EmployeeReportFilter(search_text="Sidi")):
+            expected = manager._get_dashboard_counts(EmployeeDataExtractor.get_base_employee_queryset(filters), today)
+            assert snapshot.dashboard_counts(snapshot.select(filters), today) == expected
+
+        counts = snapshot.dashboard_counts(snapshot.select(), today)
+        assert counts['status_distribution'] == {
+            'probation': 1, 'active': 1, 'on_leave': 1, 'terminated': 1, 'inactive': 1
+        }
+        assert counts['seniority_distribution']['5-10 ans'] == 1
+        assert counts['contracts_expiring_soon'] == 1
+
+    def test_employee_save_rebuilds_snapshot(self, employees, django_assert_num_queries):
+        """Test the dashboard reads the snapshot once and sees saved employees"""
+        from core.models import Employee
+        from core.reports.employee_reports import EmployeeReportManager
+
+        manager = EmployeeReportManager()
+        assert manager.get_dashboard_summary()['employee_counts']['total'] == 5
+
+        # Snapshot reused: only the document counts query
+        with django_assert_num_queries(1):
+            summary = manager.get_dashboard_summary()
+        assert summary['alerts']['missing_cnss'] == 3
+
+        employee = employees['employees'][2]
+        employee.cnss_number = "C3"
+        employee.save()
+        Employee.objects.create(first_name="Khadijetou", last_name="Salem")
+
+        assert get_employee_snapshot() is get_employee_snapshot()
+        summary = manager.get_dashboard_summary()
+        assert summary['employee_counts']['total'] == 6
+        assert summary['alerts']['missing_cnss'] == 3
@@ -6,13 +6,24 @@ PayrollFormulaEvaluator classes and utility functions for mathematical
 expression parsing and evaluation.
 """
 
+import multiprocessing
+import os
 import pytest
 from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import patch
 
+from core.utils.payroll_calculations import PayrollFunctions
 from core.utils.formula_engine import (
     FormulaEngine,
     FormulaCalculationError,
     PayrollFormulaEvaluator,
+    PayrollFormulaBuilder,
+    PayrollIntegrationLayer,
+    FormulaCompiler,
+    find_formula_cycle,
+    get_dependency_plan,
+    invalidate_compiled_formulas,
     safe_divide,
     percentage,
     round_currency
@@ -372,6 +383,549 @@ class TestPayrollFormulaEvaluator:
         assert self.evaluator._check_balanced_parentheses(")a + b(") is False
 
 
+def _component(component_type, text_value=None, numeric_value=None, section='B'):
+    """Build a PayrollElementFormula-like component"""
+    return SimpleNamespace(component_type=component_type, text_value=text_value,
+                           numeric_value=numeric_value, section=section)
+
+
+class _StubFormulaManager:
+    """Minimal stand-in for the PayrollElement.formulas related manager"""
+
+    def __init__(self, components):
+        self.components = components
+        self.query_count = 0
+
+    def filter(self, section):
+        self.query_count += 1
+        self._section = section
+        return self
+
+    def order_by(self, field):
+        return [c for c in self.components if c.section == self._section]
+
+
+class _StubPayrollFunctions:
+    """Payroll functions returning fixed values per function code"""
+
+    def __init__(self, values):
+        self.values = values
+        self.calls = []
+
+    def calculate_function(self, function_code, employee, motif, period):
+        self.calls.append((function_code, employee.id))
+        return self.values.get(function_code, Decimal('0'))
+
+
+class TestFormulaCompiler:
+    """Test FormulaCompiler and CompiledFormula"""
+
+    def setup_method(self):
+        self.compiler = FormulaCompiler()
+
+    def test_static_formula_is_folded(self):
+        """Test formula without slots compiles to a constant"""
+        compiled = self.compiler.compile_components([
+            _component('N', numeric_value=Decimal('10')),
+            _component('O', '+'),
+            _component('N', numeric_value=Decimal('5')),
+            _component('O', '*'),
+            _component('N', numeric_value=Decimal('2')),
+        ])
+
+        assert compiled.is_static
+        assert compiled.evaluate() == Decimal('20')
+
+    def test_slots_bound_at_evaluation(self):
+        """Test F and R slots are resolved for each evaluation"""
+        compiled = self.compiler.compile_components([
+            _component('O', '('),
+            _component('F', 'F02'),
+            _component('O', '*'),
+            _component('F', 'F01'),
+            _component('O', ')+'),
+            _component('R', '7'),
+        ])
+
+        assert compiled.function_slots == ['F02', 'F01']
+        assert compiled.reference_slots == [7]
+
+        functions = {'F01': Decimal('26'), 'F02': Decimal('1500.50')}
+        result = compiled.evaluate(functions.get, lambda rubrique_id: Decimal('100'))
+        assert result == Decimal('39113.00')
+
+        functions = {'F01': Decimal('10'), 'F02': Decimal('200')}
+        result = compiled.evaluate(functions.get, lambda rubrique_id: Decimal('0'))
+        assert result == Decimal('2000')
+
+    def test_matches_formula_engine(self):
+        """Test compiled result equals parsing the built formula string"""
+        components = [
+            _component('F', 'F02'),
+            _component('O', '*'),
+            _component('N', numeric_value=Decimal('30')),
+            _component('O', '/'),
+            _component('O', '('),
+            _component('R', '1'),
+            _component('O', '-'),
+            _component('N', numeric_value=Decimal('4')),
+            _component('O', ')'),
+        ]
+        compiled = self.compiler.compile_components(components)
+
+        expected = FormulaEngine().calculate("1250.75*30/(20-4)")
+        result = compiled.evaluate(lambda code: Decimal('1250.75'), lambda rubrique_id: Decimal('20'))
+        assert result == expected
+
+    def test_zero_number_component_skipped(self):
+        """Test number components <= 0 are skipped like the string builder"""
+        compiled = self.compiler.compile_components([
+            _component('N', numeric_value=Decimal('1')),
+            _component('N', numeric_value=Decimal('0')),
+            _component('N', numeric_value=Decimal('5')),
+        ])
+        assert compiled.evaluate() == Decimal('15')
+
+    def test_division_by_zero_raised_at_evaluation(self):
+        """Test division by zero is reported when evaluated"""
+        compiled = self.compiler.compile_components([
+            _component('N', numeric_value=Decimal('10')),
+            _component('O', '/'),
+            _component('R', '3'),
+        ])
+
+        with pytest.raises(FormulaCalculationError, match="Division par 0"):
+            compiled.evaluate(resolve_reference=lambda rubrique_id: Decimal('0'))
+
+    def test_invalid_formula_raised_at_evaluation(self):
+        """Test invalid expressions compile but fail when evaluated"""
+        compiled = self.compiler.compile_components([
+            _component('O', '('),
+            _component('F', 'F01'),
+        ])
+
+        with pytest.raises(FormulaCalculationError):
+            compiled.evaluate(lambda code: Decimal('1'))
+
+    def test_empty_formula_is_zero(self):
+        """Test element without components evaluates to zero"""
+        assert self.compiler.compile_components([]).evaluate() == Decimal('0')
+
+    def test_compiled_formula_cached_until_invalidated(self):
+        """Test compiled formula is reused until the formula version changes"""
+        manager = _StubFormulaManager([_component('N', numeric_value=Decimal('3'))])
+        element = SimpleNamespace(id=9001, formulas=manager)
+
+        first = self.compiler.get_compiled_formula(element, 'B')
+        second = self.compiler.get_compiled_formula(element, 'B')
+        assert first is second
+        assert manager.query_count == 1
+
+        manager.components = [_component('N', numeric_value=Decimal('4'))]
+        invalidate_compiled_formulas(element.id)
+
+        third = self.compiler.get_compiled_formula(element, 'B')
+        assert third is not first
+        assert third.evaluate() == Decimal('4')
+        assert manager.query_count == 2
+
+    def test_builder_evaluates_compiled_formula_per_employee(self):
+        """Test PayrollFormulaBuilder compiles once and binds per employee"""
+        manager = _StubFormulaManager([
+            _component('F', 'F02'),
+            _component('O', '*'),
+            _component('F', 'F01'),
+        ])
+        element = SimpleNamespace(id=9002, formulas=manager)
+        functions = _StubPayrollFunctions({'F01': Decimal('26'), 'F02': Decimal('1000')})
+        builder = PayrollFormulaBuilder(payroll_functions=functions)
+        motif = SimpleNamespace(id=1)
+
+        for employee_id in range(1, 6):
+            employee = SimpleNamespace(id=employee_id)
+            assert builder.calculate_base(element, employee, motif, '2024-01-31') == Decimal('26000')
+
+        assert manager.query_count == 1
+        assert len(functions.calls) == 10
+        assert builder.build_formula_string(element, SimpleNamespace(id=1), motif, 'B', '2024-01-31') == "1000*26"
+
+
+class _EmployeePayrollFunctions:
+    """Payroll functions where F01 is the employee id (picklable for workers)"""
+
+    def calculate_function(self, function_code, employee, motif, period):
+        return Decimal(employee.id) if function_code == 'F01' else Decimal('0')
+
+    def F01_NJT(self, employee, motif, period):
+        return Decimal(employee.id)
+
+    def F02_sbJour(self, employee, motif, period):
+        return Decimal('0')
+
+    def F03_sbHoraire(self, employee, motif, period):
+        return Decimal('0')
+
+    def F04_TauxAnciennete(self, employee, period):
+        return Decimal('0')
+
+
+class _DatabasePayrollFunctions(_EmployeePayrollFunctions):
+    """Payroll functions where F01 is read from the employee row (picklable for workers)"""
+
+    def calculate_function(self, function_code, employee, motif, period):
+        if function_code != 'F01':
+            return Decimal('0')
+        return self.F01_NJT(employee, motif, period)
+
+    def F01_NJT(self, employee, motif, period):
+        from core.models import Employee
+        return Employee.objects.values_list('contract_hours_per_week', flat=True).get(pk=employee.id)
+
+
+class _CountingPayrollFunctions(PayrollFunctions):
+    """Payroll functions counting F01 calls across worker processes"""
+    calls = None
+
+    def F01_NJT(self, employee, motif, period):
+        with self.calls.get_lock():
+            self.calls.value += 1
+        return Decimal(employee.id)
+
+
+def _parallel_run_fixture(employee_count):
+    element = SimpleNamespace(
+        id=9101, auto_base_calculation=True, auto_quantity_calculation=False,
+        formulas=_StubFormulaManager([
+            _component('F', 'F01'),
+            _component('O', '*'),
+            _component('N', numeric_value=Decimal('100')),
+        ])
+    )
+    employees = [SimpleNamespace(id=employee_id) for employee_id in range(employee_count, 0, -1)]
+    return employees, [element], SimpleNamespace(id=1)
+
+
+class TestPayrollIntegrationLayerParallel:
+    """Test sharded payroll runs"""
+
+    def _expected(self, employees):
+        return {employee.id: Decimal(employee.id * 100) for employee in employees}
+
+    def test_process_pool_matches_serial_run(self):
+        """Test process pool results equal the serial run, in employee order"""
+        employees, elements, motif = _parallel_run_fixture(23)
+
+        serial = PayrollIntegrationLayer(_EmployeePayrollFunctions())
+        expected = serial.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        parallel = PayrollIntegrationLayer(_EmployeePayrollFunctions(), workers=2, shard_size=5)
+        results = parallel.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        assert list(results) == [employee.id for employee in employees]
+        assert results == expected
+        assert {k: v[9101]['amount'] for k, v in results.items()} == self._expected(employees)
+
+        report = parallel.last_run_report
+        assert report['workers'] == 2
+        assert [shard['shard'] for shard in report['shards']] == [0, 1, 2, 3, 4]
+        assert all(shard['elapsed'] is not None for shard in report['shards'])
+        assert os.getpid() not in {shard['pid'] for shard in report['shards']}
+        assert report['errors'] == {}
+        assert parallel.get_rubrique_amount(employees[0], 9101, motif, '2024-01-31') == Decimal('2300')
+
+    def test_shard_report_collects_employee_errors(self):
+        """Test employee failures are reported per shard without stopping the run"""
+        employees, elements, motif = _parallel_run_fixture(6)
+        layer = PayrollIntegrationLayer(_EmployeePayrollFunctions(), shard_size=4)
+        original = layer._process_employee_payroll
+
+        def failing(employee, *args):
+            if employee.id == 2:
+                raise RuntimeError("boom")
+            return original(employee, *args)
+
+        with patch.object(layer, '_process_employee_payroll', side_effect=failing):
+            results = layer.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        assert results[2] == {}
+        assert results[3][9101]['amount'] == Decimal('300')
+        shards = layer.last_run_report['shards']
+        assert len(shards) == 2
+        assert shards[0]['errors'] == {}
+        assert shards[1]['errors'] == {2: 'boom'}
+        assert layer.last_run_report['errors'] == {2: 'boom'}
+
+    def test_invalid_knobs_rejected(self):
+        """Test worker count and shard size must be positive"""
+        with pytest.raises(ValueError):
+            PayrollIntegrationLayer(workers=0)
+        with pytest.raises(ValueError):
+            PayrollIntegrationLayer(shard_size=0)
+        with pytest.raises(ValueError):
+            PayrollIntegrationLayer().process_payroll_batch([], [], None, '2024-01-31', workers=0)
+
+
+    @pytest.mark.django_db(transaction=True)
+    def test_process_pool_with_database_rows(self):
+        """Test workers query formulas and employees on their own connections"""
+        from core.models import Employee, PayrollElement, PayrollElementFormula, PayrollMotif
+
+        employees = [
+            Employee.objects.create(first_name=f"Employe{index}", last_name="Test",
+                                    contract_hours_per_week=Decimal(index))
+            for index in range(1, 13)
+        ]
+        element = PayrollElement.objects.create(label="Heures", type='G', auto_base_calculation=True)
+        for component_type, text_value, numeric_value in (('F', 'F01', None), ('O', '*', None),
+                                                          ('N', None, Decimal('10'))):
+            PayrollElementFormula.objects.create(payroll_element=element, section='B',
+                                                 component_type=component_type, text_value=text_value,
+                                                 numeric_value=numeric_value)
+        motif = PayrollMotif.objects.create(name="Salaire")
+
+        serial = PayrollIntegrationLayer(_DatabasePayrollFunctions())
+        expected = serial.process_payroll_batch(employees, [element], motif, '2024-01-31')
+
+        parallel = PayrollIntegrationLayer(_DatabasePayrollFunctions(), workers=2, shard_size=4)
+        results = parallel.process_payroll_batch(employees, [element], motif, '2024-01-31')
+
+        assert results == expected
+        assert results[employees[4].id][element.id]['amount'] == Decimal('50')
+        report = parallel.last_run_report
+        assert report['errors'] == {}
+        assert report['workers'] == 2
+        assert os.getpid() not in {shard['pid'] for shard in report['shards']}
+        # The parent reconnects after the pool
+        assert Employee.objects.count() == 12
+
+    @pytest.mark.django_db
+    def test_process_pool_not_started_in_transaction(self):
+        """Test a run inside a transaction stays serial, workers could not see its rows"""
+        employees, elements, motif = _parallel_run_fixture(6)
+        layer = PayrollIntegrationLayer(_EmployeePayrollFunctions(), workers=2, shard_size=2)
+
+        results = layer.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        assert results[6][9101]['amount'] == Decimal('600')
+        assert layer.last_run_report['workers'] == 1
+        assert {shard['pid'] for shard in layer.last_run_report['shards']} == {os.getpid()}
+
+    @pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                        reason="the call counter is shared with forked workers")
+    def test_process_pool_memoizes_each_shard(self):
+        """Test workers resolve each function once per employee, not once per element"""
+        _CountingPayrollFunctions.calls = multiprocessing.get_context('fork').Value('i', 0)
+        employees, _, motif = _parallel_run_fixture(9)
+        elements = [
+            SimpleNamespace(
+                id=element_id, auto_base_calculation=True, auto_quantity_calculation=False,
+                formulas=_StubFormulaManager([
+                    _component('F', 'F01'),
+                    _component('O', '*'),
+                    _component('N', numeric_value=Decimal('10')),
+                ])
+            )
+            for element_id in (9301, 9302, 9303)
+        ]
+        layer = PayrollIntegrationLayer(_CountingPayrollFunctions(None, None), workers=2, shard_size=3)
+
+        results = layer.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        assert results[4][9303]['amount'] == Decimal('40')
+        assert _CountingPayrollFunctions.calls.value == 9
+        shards = layer.last_run_report['shards']
+        assert os.getpid() not in {shard['pid'] for shard in shards}
+        assert [(shard['function_memo']['misses'], shard['function_memo']['hits']) for shard in shards] \
+            == [(3, 6)] * 3
+
+    def test_run_memoizes_payroll_functions(self):
+        """Test F-function results are memoized for the run and reported in the stats"""
+        from core.utils.payroll_calculations import PayrollFunctions
+
+        class CountingPayrollFunctions(PayrollFunctions):
+            calls = 0
+
+            def F01_NJT(self, employee, motif, period):
+                CountingPayrollFunctions.calls += 1
+                return Decimal(employee.id)
+
+        employees, _, motif = _parallel_run_fixture(3)
+        elements = []
+        for element_id in (9201, 9202):
+            elements.append(SimpleNamespace(
+                id=element_id, auto_base_calculation=True, auto_quantity_calculation=False,
+                formulas=_StubFormulaManager([
+                    _component('F', 'F01'),
+                    _component('O', '*'),
+                    _component('N', numeric_value=Decimal('10')),
+                ])
+            ))
+        functions = CountingPayrollFunctions(None, None)
+        layer = PayrollIntegrationLayer(functions)
+
+        results = layer.process_payroll_batch(employees, elements, motif, '2024-01-31')
+
+        assert results[2][9202]['amount'] == Decimal('20')
+        assert CountingPayrollFunctions.calls == 3
+        assert functions.memo is None
+        stats = layer.formula_evaluator.get_performance_stats()
+        assert stats['function_memo_misses'] == 3
+        assert stats['function_memo_hits'] == 3
+        assert stats['function_memo_size'] == 0
+
+
+@pytest.mark.django_db
+class TestFormulaDependencyPlan:
+    """Test dependency plans cached per formula version"""
+
+    @pytest.fixture
+    def elements(self):
+        from django.core.cache import cache
+        from core.models import PayrollElement, PayrollElementFormula
+        from core.utils.formula_engine import _dependency_plan_cache
+
+        cache.clear()
+        _dependency_plan_cache.clear()
+        base = PayrollElement.objects.create(label="Salaire de Base", type='G')
+        bonus = PayrollElement.objects.create(label="Prime", type='G', auto_base_calculation=True)
+        total = PayrollElement.objects.create(label="Total", type='G', auto_base_calculation=True)
+        for element, reference in ((total, bonus), (bonus, base)):
+            PayrollElementFormula.objects.create(
+                payroll_element=element, section='B', component_type='R', text_value=str(reference.id)
+            )
+        return [total, bonus, base]
+
+    def _counting_builder(self):
+        layer = PayrollIntegrationLayer()
+        calls = []
+
+        def build_graph(payroll_elements):
+            calls.append(len(payroll_elements))
+            return layer._build_dependency_graph(payroll_elements)
+        return build_graph, calls
+
+    def test_plan_reused_until_formula_changes(self, elements):
+        """Test the graph is built once per formula version"""
+        from core.models import PayrollElementFormula
+
+        total, bonus, base = elements
+        build_graph, calls = self._counting_builder()
+
+        plan = get_dependency_plan(elements, build_graph)
+        assert plan.graph == {total.id: {bonus.id}, bonus.id: {base.id}, base.id: set()}
+        assert plan.evaluation_order == [base.id, bonus.id, total.id]
+        assert plan.cycles == []
+        assert get_dependency_plan(elements, build_graph) is plan
+        assert len(calls) == 1
+
+        PayrollElementFormula.objects.filter(payroll_element=bonus).update(text_value='999')
+        changed = get_dependency_plan(elements, build_graph)
+        assert changed.version != plan.version
+        assert changed.graph[bonus.id] == {999}
+        assert len(calls) == 2
+
+    def test_plan_shared_through_django_cache(self, elements):
+        """Test another process (empty local cache) reuses the stored plan"""
+        from core.utils.formula_engine import _dependency_plan_cache
+
+        build_graph, calls = self._counting_builder()
+        plan = get_dependency_plan(elements, build_graph)
+        _dependency_plan_cache.clear()
+
+        assert get_dependency_plan(elements, build_graph) == plan
+        assert len(calls) == 1
+
+    def test_stub_elements_not_cached(self):
+        """Test elements without formula rows in the database are analysed each time"""
+        _, elements, _ = _parallel_run_fixture(1)
+        build_graph, calls = self._counting_builder()
+
+        get_dependency_plan(elements, build_graph)
+        plan = get_dependency_plan(elements, build_graph)
+
+        assert plan.version is None
+        assert plan.evaluation_order == [9101]
+        assert len(calls) == 2
+
+    def test_cycle_rejected_at_formula_save(self, elements, caplog):
+        """Test circular references are reported when the formula is saved"""
+        from django.core.exceptions import ValidationError
+        from core.models import PayrollElementFormula
+
+        total, bonus, base = elements
+        formula = PayrollElementFormula(
+            payroll_element=base, section='N', component_type='R', text_value=str(total.id)
+        )
+        with pytest.raises(ValidationError, match=f"R{base.id} -> R{total.id} -> R{bonus.id} -> R{base.id}"):
+            formula.full_clean()
+
+        assert find_formula_cycle(base.id) == []
+        formula.save()
+        assert find_formula_cycle(bonus.id) == [bonus.id, base.id, total.id, bonus.id]
+        assert "Circular rubrique reference" in caplog.text
+
+
+@pytest.mark.django_db
+class TestCompiledFormulaVersions:
+    """Test compiled formulas of database elements follow their stored rows"""
+
+    @pytest.fixture
+    def element(self):
+        from core.models import PayrollElement, PayrollElementFormula
+
+        element = PayrollElement.objects.create(label="Prime", type='G', auto_base_calculation=True)
+        for component_type, text_value, numeric_value in (('N', None, Decimal('10')), ('O', '*', None),
+                                                          ('N', None, Decimal('3'))):
+            PayrollElementFormula.objects.create(payroll_element=element, section='B',
+                                                 component_type=component_type, text_value=text_value,
+                                                 numeric_value=numeric_value)
+        return element
+
+    def test_bulk_update_recompiles(self, element):
+        """Test rows changed without signals (bulk update, other process) are picked up"""
+        from core.models import PayrollElementFormula
+
+        compiler = FormulaCompiler()
+        compiled = compiler.get_compiled_formula(element, 'B')
+        assert compiled.evaluate() == Decimal('30')
+        assert compiler.get_compiled_formula(element, 'B') is compiled
+
+        PayrollElementFormula.objects.filter(payroll_element=element, numeric_value=3).update(numeric_value=4)
+
+        recompiled = compiler.get_compiled_formula(element, 'B')
+        assert recompiled.evaluate() == Decimal('40')
+        assert compiler.get_stats()['compilations'] == 2
+
+    def test_run_version_skips_database_check(self, element, django_assert_num_queries):
+        """Test a formula checked for a run version is reused without a query"""
+        builder = PayrollFormulaBuilder()
+        version = get_dependency_plan([element], PayrollIntegrationLayer()._build_dependency_graph).version
+
+        with builder.formula_version_scope(version):
+            compiled = builder.get_compiled_formula(element, 'B')
+            with django_assert_num_queries(0):
+                for _ in range(5):
+                    assert builder.get_compiled_formula(element, 'B') is compiled
+
+        # Outside the run the rows are checked again
+        with django_assert_num_queries(1):
+            assert builder.get_compiled_formula(element, 'B') is compiled
+
+    def test_run_uses_updated_formula(self, element):
+        """Test a payroll run after a bulk update evaluates the new formula"""
+        from core.models import PayrollElementFormula
+
+        layer = PayrollIntegrationLayer()
+        employees, _, motif = _parallel_run_fixture(2)
+        assert layer.process_payroll_batch(employees, [element], motif, '2024-01-31')[1][element.id]['amount'] \
+            == Decimal('30')
+
+        PayrollElementFormula.objects.filter(payroll_element=element, numeric_value=10).update(numeric_value=20)
+
+        results = layer.process_payroll_batch(employees, [element], motif, '2024-01-31')
+        assert results[1][element.id]['amount'] == Decimal('60')
+
+
 class TestUtilityFunctions:
     """Test utility functions"""
     
@@ -0,0 +1,275 @@
+"""
+Tests for core.utils.incremental_recalculation module.
+
+Checks that tracked changes recompute only the dependent payroll elements
+and update the affected Payroll rows.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+
+from core.utils.payroll_calculations import PayrollCalculator
+from core.utils.incremental_recalculation import (
+    IncrementalPayrollRecalculator,
+    change_tracking_suspended,
+    expand_functions,
+)
+
+
+class RecalculationSystemParameters:
+    """System parameters exposing the PayrollCalculator interface"""
+
+    current_period = date(2024, 3, 31)
+    deduct_cnss_from_its = True
+    deduct_cnam_from_its = True
+    tax_abatement = Decimal('6000')
+
+    def get_cnss_ceiling(self):
+        return Decimal('70000')
+
+    def get_cnss_rate_employee(self):
+        return Decimal('0.01')
+
+    def get_cnss_rate_employer(self):
+        return Decimal('0.15')
+
+    def get_cnam_rate_employee(self):
+        return Decimal('0.04')
+
+    def get_cnam_rate_employer(self):
+        return Decimal('0.05')
+
+    def get_its_brackets(self):
+        return [
+            {'min': 0, 'max': 9000, 'rate': 0.15},
+            {'min': 9000, 'max': 21000, 'rate': 0.25},
+            {'min': 21000, 'max': float('inf'), 'rate': 0.40},
+        ]
+
+
+def test_expand_functions_adds_derived_functions():
+    """Test derived functions follow their sources"""
+    assert expand_functions({'F02', 'F09'}) == {'F02', 'F03', 'F09', 'F21'}
+    assert expand_functions({'F01'}) == {'F01'}
+
+
+@pytest.mark.django_db
+class TestIncrementalPayrollRecalculator:
+    """Test recalculation driven by recorded payroll changes"""
+
+    PERIOD = date(2024, 3, 31)
+
+    @pytest.fixture
+    def payroll_data(self):
+        from core.models import (
+            Employee, Payroll, PayrollElement, PayrollElementFormula, PayrollLineItem,
+            PayrollMotif, SystemParameters, WorkedDays
+        )
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=self.PERIOD, next_period=date(2024, 4, 30),
+            closure_period=self.PERIOD, default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        gain = {'type': 'G', 'affects_cnss': True, 'affects_cnam': True, 'affects_its': True}
+        base = PayrollElement.objects.create(label="Salaire de Base", **gain)
+        bonus = PayrollElement.objects.create(label="Prime", auto_base_calculation=True, **gain)
+        attendance = PayrollElement.objects.create(label="Prime de presence", auto_base_calculation=True, **gain)
+        transport = PayrollElement.objects.create(label="Transport", auto_base_calculation=True, **gain)
+
+        formulas = {
+            bonus: [('R', str(base.id), None), ('O', '*', None), ('N', None, 2)],
+            attendance: [('F', 'F01', None), ('O', '*', None), ('N', None, 100)],
+            transport: [('N', None, 3000)],
+        }
+        for element, components in formulas.items():
+            for component_type, text_value, numeric_value in components:
+                PayrollElementFormula.objects.create(
+                    payroll_element=element, section='B', component_type=component_type,
+                    text_value=text_value, numeric_value=numeric_value
+                )
+
+        employees = []
+        for index in range(3):
+            employee = Employee.objects.create(first_name=f"E{index}", last_name="Test")
+            employees.append(employee)
+            WorkedDays.objects.create(employee=employee, motif=motif, period=self.PERIOD,
+                                      worked_days=Decimal('26'))
+            amounts = {base: '50000.00', bonus: '100000.00', attendance: '2600.00', transport: '1000.00'}
+            for element, amount in amounts.items():
+                PayrollLineItem.objects.create(
+                    employee=employee, payroll_element=element, motif=motif, period=self.PERIOD,
+                    base_amount=Decimal(amount), quantity=Decimal('1.00'), calculated_amount=Decimal(amount)
+                )
+            Payroll.objects.create(employee=employee, motif=motif, parameters=parameters,
+                                   period=self.PERIOD, worked_days=Decimal('26'))
+
+        from core.models import PayrollChange
+        PayrollChange.objects.all().delete()
+
+        return {'employees': employees, 'motif': motif, 'base': base, 'bonus': bonus,
+                'attendance': attendance, 'transport': transport}
+
+    def _recalculator(self):
+        return IncrementalPayrollRecalculator(PayrollCalculator(RecalculationSystemParameters()))
+
+    def _amount(self, employee, element):
+        from core.models import PayrollLineItem
+        return PayrollLineItem.objects.get(employee=employee, payroll_element=element).calculated_amount
+
+    def test_signals_record_changes(self, payroll_data):
+        """Test line item, worked days and employee edits are recorded"""
+        from core.models import PayrollChange, PayrollLineItem, WorkedDays
+
+        employee = payroll_data['employees'][0]
+        item = PayrollLineItem.objects.get(employee=employee, payroll_element=payroll_data['base'])
+        item.calculated_amount = Decimal('60000.00')
+        item.save()
+        worked_days = WorkedDays.objects.filter(employee=employee).first()
+        worked_days.worked_days = Decimal('24')
+        worked_days.save()
+        employee.children_count = 3
+        employee.save()
+        employee.first_name = "Renamed"
+        employee.save()
+
+        changes = list(PayrollChange.objects.values_list('source', 'payroll_element_id', 'changed_fields'))
+        assert changes == [
+            (PayrollChange.SOURCE_LINE_ITEM, payroll_data['base'].id, 'calculated_amount'),
+            (PayrollChange.SOURCE_WORKED_DAYS, None, 'worked_days'),
+            (PayrollChange.SOURCE_EMPLOYEE, None, 'children_count'),
+        ]
+
+    def test_suspended_tracking_records_nothing(self, payroll_data):
+        """Test writes inside change_tracking_suspended are not recorded"""
+        from core.models import PayrollChange, PayrollLineItem
+
+        with change_tracking_suspended():
+            PayrollLineItem.objects.filter(employee=payroll_data['employees'][0]).first().save()
+
+        assert not PayrollChange.objects.exists()
+
+    def test_unchanged_line_item_save_records_nothing(self, payroll_data):
+        """Test only saves changing an amount are recorded"""
+        from core.models import PayrollChange, PayrollLineItem
+
+        item = PayrollLineItem.objects.get(employee=payroll_data['employees'][0], payroll_element=payroll_data['base'])
+        item.save()
+        item.is_fixed = True
+        item.save(update_fields=['is_fixed'])
+        item.quantity = Decimal('1')
+        item.save()
+        assert not PayrollChange.objects.exists()
+
+        item.quantity = Decimal('2')
+        item.save(update_fields=['quantity', 'is_fixed'])
+        assert list(PayrollChange.objects.values_list('changed_fields', flat=True)) == ['quantity']
+
+    def test_unchanged_worked_days_save_records_nothing(self, payroll_data):
+        """Test re-saving worked days, or saving them while suspended, is not recorded"""
+        from core.models import PayrollChange, WorkedDays
+
+        worked_days = WorkedDays.objects.filter(employee=payroll_data['employees'][0]).first()
+        worked_days.save()
+        with change_tracking_suspended():
+            worked_days.worked_days = Decimal('22')
+            worked_days.save()
+        assert not PayrollChange.objects.exists()
+
+        worked_days.worked_days = Decimal('21')
+        worked_days.save()
+        assert list(PayrollChange.objects.values_list('source', 'changed_fields')) == [
+            (PayrollChange.SOURCE_WORKED_DAYS, 'worked_days')
+        ]
+
+    def test_payroll_run_writes_not_recorded(self, payroll_data):
+        """Test results persisted during a payroll run are not recorded"""
+        from core.models import PayrollChange, PayrollLineItem
+        from core.utils.formula_engine import PayrollIntegrationLayer
+
+        class PersistingLayer(PayrollIntegrationLayer):
+            def _store_element_result(self, employee, element, motif, period, result):
+                super()._store_element_result(employee, element, motif, period, result)
+                PayrollLineItem.objects.update_or_create(
+                    employee=employee, payroll_element=element, motif=motif, period=period,
+                    defaults={'calculated_amount': result['amount']}
+                )
+
+        PersistingLayer().process_payroll_batch(
+            payroll_data['employees'], [payroll_data['transport']], payroll_data['motif'], self.PERIOD
+        )
+
+        assert self._amount(payroll_data['employees'][0], payroll_data['transport']) == Decimal('3000.00')
+        assert not PayrollChange.objects.exists()
+
+    def test_plan_follows_reference_graph(self, payroll_data):
+        """Test a base change only reaches the elements referencing it"""
+        recalculator = self._recalculator()
+
+        assert recalculator.affected_elements([payroll_data['base'].id]) == {payroll_data['bonus'].id}
+        assert recalculator.affected_elements(function_codes={'F01'}) == {payroll_data['attendance'].id}
+        assert recalculator.affected_elements(function_codes={'F15'}) == set()
+
+    def test_line_item_change_recomputes_dependents_only(self, payroll_data):
+        """Test only the referencing element and the edited payroll are updated"""
+        from core.models import Payroll, PayrollChange, PayrollLineItem
+
+        edited, untouched = payroll_data['employees'][0], payroll_data['employees'][1]
+        item = PayrollLineItem.objects.get(employee=edited, payroll_element=payroll_data['base'])
+        item.base_amount = item.calculated_amount = Decimal('60000.00')
+        item.save()
+
+        summary = self._recalculator().recalculate(self.PERIOD)
+
+        assert summary == {'changes': 1, 'payrolls': 1, 'employees': 1, 'line_items': 1}
+        assert self._amount(edited, payroll_data['bonus']) == Decimal('120000.00')
+        assert self._amount(edited, payroll_data['base']) == Decimal('60000.00')
+        # Transport and attendance are auto elements without changed inputs
+        assert self._amount(edited, payroll_data['transport']) == Decimal('1000.00')
+        assert self._amount(edited, payroll_data['attendance']) == Decimal('2600.00')
+        assert self._amount(untouched, payroll_data['bonus']) == Decimal('100000.00')
+
+        payroll = Payroll.objects.get(employee=edited)
+        assert payroll.gross_taxable == Decimal('183600.00')
+        assert payroll.cnss_employee == Decimal('700.00')
+        assert payroll.net_salary > 0
+        assert Payroll.objects.get(employee=untouched).gross_taxable == Decimal('0.00')
+
+        # Recalculation writes are not tracked and the change is consumed
+        assert not PayrollChange.objects.filter(processed_at__isnull=True).exists()
+        assert self._recalculator().recalculate(self.PERIOD)['changes'] == 0
+
+    def test_worked_days_change_recomputes_f01_elements(self, payroll_data):
+        """Test a worked days correction recomputes elements using F01"""
+        from core.models import WorkedDays
+
+        employee = payroll_data['employees'][2]
+        worked_days = WorkedDays.objects.get(employee=employee)
+        worked_days.worked_days = Decimal('20')
+        worked_days.save()
+
+        summary = self._recalculator().recalculate()
+
+        assert summary['payrolls'] == 1
+        assert self._amount(employee, payroll_data['attendance']) == Decimal('2000.00')
+        assert self._amount(employee, payroll_data['bonus']) == Decimal('100000.00')
+
+        from core.models import Payroll
+        assert Payroll.objects.get(employee=employee).worked_days == Decimal('20.00')
+
+    def test_employee_change_applies_to_latest_payroll(self, payroll_data):
+        """Test employee changes without period target the latest payroll"""
+        from core.models import Payroll
+
+        employee = payroll_data['employees'][1]
+        employee.its_exempt = True
+        employee.save()
+
+        summary = self._recalculator().recalculate()
+
+        assert summary == {'changes': 1, 'payrolls': 1, 'employees': 1, 'line_items': 0}
+        payroll = Payroll.objects.get(employee=employee)
+        assert payroll.gross_taxable == Decimal('153600.00')
+        assert payroll.its_total == Decimal('0.00')
@@ -14,7 +14,8 @@ from core.utils.payroll_calculations import (
     PayrollCalculator,
     OvertimeCalculator,
     InstallmentCalculator,
-    PayrollFunctions
+    PayrollFunctions,
+    FunctionMemo
 )
 
 
@@ -107,7 +108,7 @@ class MockEmployee:
         self.psra_rate = Decimal('0.00')
         self.origin = None
         self.notice_months = Decimal('0.00')
-        self.cumul_12_months_initial = Decimal('0.00')
+        self.cumulative_12dm_initial = Decimal('0.00')
         self.cnss_reimbursement_rate = None
         self.cnam_reimbursement_rate = None
     
@@ -631,9 +632,13 @@ class TestPayrollCalculator:
         # Total should equal sum
         assert result['total'] == result['tranche1'] + result['tranche2'] + result['tranche3']
     
+    @pytest.mark.django_db
     def test_get_payroll_line_items_empty(self):
-        """Test getting payroll line items returns empty list by default"""
-        result = self.calculator._get_payroll_line_items(self.employee, self.motif, date(2023, 12, 1))
+        """Test an employee without line items for the period gets an empty list"""
+        from core.models import PayrollMotif
+
+        motif = PayrollMotif.objects.create(name="Salaire")
+        result = self.calculator._get_payroll_line_items(self.employee, motif, date(2023, 12, 1))
         assert result == []
 
 
@@ -1590,4 +1595,248 @@ class TestStaticPayrollFunctions:
         assert hasattr(StaticPF, 'F03_sbHoraire')
         assert callable(getattr(StaticPF, 'F01_NJT'))
         assert callable(getattr(StaticPF, 'F02_sbJour'))
-        assert callable(getattr(StaticPF, 'F03_sbHoraire'))
\ No newline at end of file
+        assert callable(getattr(StaticPF, 'F03_sbHoraire'))
+
+class TestFunctionMemo:
+    """Test run-scoped memoization of F01-F24 results"""
+    
+    def setup_method(self):
+        self.payroll_calculator = MockPayrollCalculator()
+        self.payroll_calculator.get_rubrique_paie_record = Mock(
+            wraps=self.payroll_calculator.get_rubrique_paie_record
+        )
+        self.functions = PayrollFunctions(MockSystemParameters(), self.payroll_calculator)
+        self.employee = MockEmployee()
+        self.motif = Mock(id=1)
+        self.period = date(2023, 12, 31)
+    
+    def test_results_memoized_within_run(self):
+        """Test F03 reuses the memoized F02 and repeated calls hit the memo"""
+        with self.functions.memoized_run() as memo:
+            daily = self.functions.calculate_function('F02', self.employee, self.motif, self.period)
+            hourly = self.functions.calculate_function('F03', self.employee, self.motif, self.period)
+            assert self.functions.calculate_function('F03', self.employee, self.motif, self.period) == hourly
+            
+            stats = memo.get_stats()
+        
+        assert self.payroll_calculator.get_rubrique_paie_record.call_count == 1
+        assert hourly == self.functions.F03_sbHoraire(self.employee, self.motif, self.period)
+        assert daily > 0
+        assert stats['hits'] == 2
+        assert stats['misses'] == 2
+        assert stats['size'] == 2
+    
+    def test_memo_dropped_at_end_of_run(self):
+        """Test the memo only lives for the run and counters are kept"""
+        with self.functions.memoized_run():
+            self.functions.calculate_function('F10', self.employee, self.motif, self.period)
+            self.functions.calculate_function('F10', MockEmployee(), self.motif, self.period)
+        
+        assert self.functions.memo is None
+        assert self.functions.get_memo_stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 0}
+        
+        self.functions.calculate_function('F02', self.employee, self.motif, self.period)
+        self.functions.calculate_function('F02', self.employee, self.motif, self.period)
+        assert self.payroll_calculator.get_rubrique_paie_record.call_count == 2
+    
+    def test_nested_runs_share_memo(self):
+        """Test nested scopes reuse the outer memo"""
+        with self.functions.memoized_run() as outer:
+            with self.functions.memoized_run() as inner:
+                assert inner is outer
+            assert self.functions.memo is outer
+    
+    def test_shared_memo_across_instances(self):
+        """Test a memo can be shared by several PayrollFunctions instances"""
+        other = PayrollFunctions(MockSystemParameters(), self.payroll_calculator)
+        memo = FunctionMemo()
+        
+        with self.functions.memoized_run(memo), other.memoized_run(memo):
+            self.functions.calculate_function('F02', self.employee, self.motif, self.period)
+            other.calculate_function('F02', self.employee, self.motif, self.period)
+        
+        assert memo.hits == 1
+        assert self.payroll_calculator.get_rubrique_paie_record.call_count == 1
+    
+    def test_memo_bounded_and_invalidated(self):
+        """Test least recently used entries are evicted and invalidation is per employee"""
+        memo = FunctionMemo(max_size=2)
+        memo.get_or_compute(('F01', 1, 1, None), lambda: Decimal('1'))
+        memo.get_or_compute(('F01', 2, 1, None), lambda: Decimal('2'))
+        memo.get_or_compute(('F01', 1, 1, None), lambda: Decimal('0'))
+        memo.get_or_compute(('F01', 3, 1, None), lambda: Decimal('3'))
+        
+        assert len(memo) == 2
+        assert memo.evictions == 1
+        assert memo.get_or_compute(('F01', 1, 1, None), lambda: Decimal('0')) == Decimal('1')
+        
+        memo.invalidate(MockEmployee())
+        assert len(memo) == 1
+        memo.invalidate()
+        assert len(memo) == 0
+        
+        with pytest.raises(ValueError):
+            FunctionMemo(max_size=0)
+    
+    def test_errors_not_memoized(self):
+        """Test failing functions return zero and are retried"""
+        self.payroll_calculator.get_njt_record = Mock(side_effect=[RuntimeError("db"), Mock(njt=20)])
+        
+        with self.functions.memoized_run():
+            assert self.functions.calculate_function('F01', self.employee, self.motif, self.period) == Decimal('0.00')
+            assert self.functions.calculate_function('F01', self.employee, self.motif, self.period) == Decimal('20')
+
+
+@pytest.mark.django_db
+class TestPayrollRunContext:
+    """Test bulk prefetching of F01-F24 lookups for a payroll run"""
+    
+    PERIOD = date(2024, 3, 31)
+    
+    @pytest.fixture
+    def run_data(self):
+        from core.models import (
+            Employee, EmployeeStatus, HousingGrid, Payroll, PayrollElement,
+            PayrollLineItem, PayrollMotif, SalaryGrade, SystemParameters, WorkedDays
+        )
+        
+        status = EmployeeStatus.objects.create(name="Permanent")
+        grade = SalaryGrade.objects.create(category="A1", level=1, base_salary=50000, status=status)
+        HousingGrid.objects.create(salary_grade=grade, marital_status='M', children_count=2, amount=8000)
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=self.PERIOD, next_period=date(2024, 4, 30),
+            closure_period=self.PERIOD, default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        base_salary = PayrollElement.objects.create(label="Salaire de Base", type='G')
+        bonus = PayrollElement.objects.create(label="Prime", type='G')
+        
+        employees = []
+        for index in range(12):
+            employee = Employee.objects.create(
+                first_name=f"E{index}", last_name="Test", salary_grade=grade,
+                marital_status="Marié", children_count=2,
+                last_departure_initial=date(2023, 12, 31) if index == 0 else None
+            )
+            employees.append(employee)
+            WorkedDays.objects.create(employee=employee, motif=motif, period=self.PERIOD,
+                                      worked_days=Decimal('26'))
+            PayrollLineItem.objects.create(
+                employee=employee, payroll_element=base_salary, motif=motif, period=self.PERIOD,
+                base_amount=Decimal('2000.00'), calculated_amount=Decimal('52000.00'), is_fixed=True
+            )
+            PayrollLineItem.objects.create(
+                employee=employee, payroll_element=bonus, motif=motif, period=self.PERIOD,
+                calculated_amount=Decimal('5000.00')
+            )
+            for month_end in (date(2023, 11, 30), date(2024, 2, 29)):
+                Payroll.objects.create(
+                    employee=employee, motif=motif, parameters=parameters, period=month_end,
+                    gross_taxable=Decimal('40000.00'), gross_non_taxable=Decimal('1000.00'),
+                    gross_deductions=Decimal('300.00'), net_deductions=Decimal('200.00')
+                )
+        
+        return {'employees': employees, 'motif': motif, 'parameters': parameters,
+                'base_salary': base_salary}
+    
+    def _context(self, run_data, employees):
+        from core.utils.payroll_calculations import PayrollRunContext
+        
+        context = PayrollRunContext(self.PERIOD, run_data['motif'], run_data['parameters'],
+                                    rubric_mapping={1: run_data['base_salary'].id})
+        return context.load(employees)
+    
+    def test_lookups_served_from_prefetched_indexes(self, run_data):
+        """Test F-function lookups return the stored values"""
+        employees = run_data['employees']
+        context = self._context(run_data, employees)
+        motif = run_data['motif']
+        
+        first, second = employees[0], employees[1]
+        assert context.get_njt_record(first, motif, self.PERIOD).njt == Decimal('26')
+        assert context.get_rubrique_paie_record(
+            first, context.get_used_rub_id(1), motif, self.PERIOD
+        ).base == Decimal('2000.00')
+        assert context.get_fixed_monthly_gross_salary(first, self.PERIOD) == Decimal('52000.00')
+        assert context.get_housing_allowance_base(first) == Decimal('8000')
+        
+        # Employee 0 left on 2023-12-31 so the November payroll is excluded
+        assert context.get_cumulative_amount_by_type(first, 'BI') == Decimal('40000.00')
+        assert context.get_cumulative_amount_by_type(second, 'BI') == Decimal('80000.00')
+        assert context.get_cumulative_amount_by_type(second, 'BNI') == Decimal('2000.00')
+        assert context.get_cumulative_amount_by_type(second, 'RET') == Decimal('1000.00')
+        
+        start_period, end_period = context.get_gross_12_months_window(self.PERIOD)
+        assert context.get_cumulative_gross_12_months(second, start_period, end_period) == Decimal('82000.00')
+    
+    def test_function_evaluation_runs_without_queries(self, run_data):
+        """Test evaluating F-functions for the whole run issues no query"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        employees = run_data['employees']
+        context = self._context(run_data, employees)
+        functions = context.payroll_functions()
+        
+        with CaptureQueriesContext(connection) as queries:
+            for employee in employees:
+                for code in ('F01', 'F02', 'F05', 'F06', 'F07', 'F09', 'F20'):
+                    functions.calculate_function(code, employee, run_data['motif'], self.PERIOD)
+        
+        assert len(queries) == 0
+        assert functions.calculate_function('F01', employees[3], run_data['motif'], self.PERIOD) == Decimal('26')
+    
+    def test_f08_prefetched_without_current_period(self, run_data):
+        """Test F08 ends its window at the run's period when no current period is set"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        employees = run_data['employees']
+        run_data['parameters'].current_period = None
+        context = self._context(run_data, employees)
+        functions = context.payroll_functions()
+        
+        with CaptureQueriesContext(connection) as queries:
+            totals = [functions.F08_cumulBrut12DerMois(employee) for employee in employees]
+        
+        assert len(queries) == 0
+        assert totals[1] == Decimal('82000.00')
+    
+    def test_net_salary_uses_composed_calculator(self, run_data):
+        """Test F21 reaches the contribution methods without inheriting the calculator"""
+        context = self._context(run_data, run_data['employees'])
+        functions = context.payroll_functions()
+        
+        assert functions.calculate_function('F21', run_data['employees'][0], run_data['motif'],
+                                            self.PERIOD) > Decimal('0.00')
+        assert not hasattr(context, 'calculate_quota_cessible')
+    
+    def test_load_query_count_independent_of_employee_count(self, run_data):
+        """Test bulk loading uses the same number of queries for any population"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        employees = run_data['employees']
+        with CaptureQueriesContext(connection) as small_run:
+            self._context(run_data, employees[:2])
+        with CaptureQueriesContext(connection) as full_run:
+            self._context(run_data, employees)
+        
+        assert len(small_run) == len(full_run)
+    
+    def test_lookup_outside_run_falls_back_to_query(self, run_data):
+        """Test lookups for another period are still answered"""
+        employees = run_data['employees']
+        context = self._context(run_data, employees[:1])
+        
+        assert context.get_njt_record(employees[0], run_data['motif'], date(2024, 2, 29)) is None
+        # Employees added after the initial load are loaded on demand
+        assert context.get_njt_record(employees[5], run_data['motif'], self.PERIOD).njt == Decimal('26')
+    
+    def test_prepare_run_binds_payroll_functions(self, run_data):
+        """Test PayrollCalculator.prepare_run binds functions to the context"""
+        calculator = PayrollCalculator(run_data['parameters'])
+        context = calculator.prepare_run(run_data['employees'], run_data['motif'], self.PERIOD)
+        
+        assert calculator.payroll_functions.pc is context
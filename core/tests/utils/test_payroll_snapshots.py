@@ -0,0 +1,169 @@
+"""
+Tests for core.utils.payroll_snapshots module.
+
+Checks that closed period snapshots round-trip, are never rewritten, and
+give the same report totals as the ORM aggregates.
+"""
+
+import pytest
+from dataclasses import replace
+from decimal import Decimal
+from datetime import date
+
+from core.utils.payroll_snapshots import PayrollSnapshotStore, PayrollSnapshotFrame
+
+
+@pytest.mark.django_db
+class TestPayrollSnapshotStore:
+    """Test writing and reading closed period snapshots"""
+
+    PERIODS = [date(2023, 1, 31), date(2023, 2, 28)]
+
+    @pytest.fixture
+    def payroll_data(self):
+        from core.models import Department, Employee, Payroll, PayrollMotif, SystemParameters
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        bonus_motif = PayrollMotif.objects.create(name="Prime")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=self.PERIODS[-1], next_period=date(2023, 3, 31),
+            closure_period=self.PERIODS[-1], default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        finance = Department.objects.create(name="Finance")
+        sales = Department.objects.create(name="Ventes")
+
+        employees = [
+            Employee.objects.create(first_name="Aicha", last_name="Sidi", department=finance, cnss_number="C1"),
+            Employee.objects.create(first_name="Moussa", last_name="Ba", department=sales),
+            Employee.objects.create(first_name="Fatma", last_name="Ely"),
+        ]
+        for month_index, period in enumerate(self.PERIODS):
+            for index, employee in enumerate(employees):
+                Payroll.objects.create(
+                    employee=employee, motif=motif, parameters=parameters, period=period,
+                    gross_taxable=Decimal('50000.25') * (index + 1) + month_index,
+                    net_salary=Decimal('41000.10') * (index + 1) + month_index,
+                    cnss_employee=Decimal('500.01'), its_total=Decimal('1250.50'),
+                    worked_days=Decimal('26'), overtime_hours=None if index else Decimal('4.5'),
+                )
+        Payroll.objects.create(
+            employee=employees[0], motif=bonus_motif, parameters=parameters, period=self.PERIODS[0],
+            gross_taxable=Decimal('10000'), net_salary=Decimal('9000'),
+        )
+
+        return {'employees': employees, 'motif': motif, 'bonus_motif': bonus_motif,
+                'finance': finance, 'sales': sales}
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        return PayrollSnapshotStore(root=tmp_path)
+
+    def test_write_and_load_round_trip(self, payroll_data, store):
+        """Test one file per motif is written and read back exactly"""
+        paths = store.write_period(self.PERIODS[0])
+
+        assert [path.name for path in paths] == [
+            f"motif_{payroll_data['motif'].id}.npz", f"motif_{payroll_data['bonus_motif'].id}.npz"
+        ]
+        frame = store.load(date(2023, 1, 1), date(2023, 1, 31))
+        assert len(frame) == 4
+        assert frame['net_salary'].tolist() == [4100010, 8200020, 12300030, 900000]
+        assert frame['overtime_hours'].tolist() == [450, 0, 0, 0]
+        assert frame['department_name'].tolist() == ["Finance", "Ventes", "", "Finance"]
+        assert frame['department_id'][2] == -1
+
+        only_bonus = store.load(date(2023, 1, 1), date(2023, 1, 31), motif_ids=[payroll_data['bonus_motif'].id])
+        assert only_bonus['net_salary'].tolist() == [900000]
+
+    def test_snapshots_are_append_only(self, payroll_data, store):
+        """Test a closed period is never rewritten"""
+        store.write_period(self.PERIODS[0])
+
+        with pytest.raises(FileExistsError):
+            store.write_period(self.PERIODS[0])
+
+    def test_covers_requires_every_month(self, payroll_data, store):
+        """Test coverage needs a snapshot for each month of the range"""
+        store.write_period(self.PERIODS[0])
+        assert store.covers(date(2023, 1, 1), date(2023, 1, 31))
+        assert not store.covers(date(2023, 1, 1), date(2023, 2, 28))
+
+        store.write_period(self.PERIODS[1])
+        assert store.covers(date(2023, 1, 1), date(2023, 2, 28))
+
+    def test_totals_match_orm_aggregates(self, payroll_data, store):
+        """Test snapshot totals equal the ORM sums for a filtered range"""
+        from django.db.models import Count, Sum
+        from core.models import Payroll
+
+        for period in self.PERIODS:
+            store.write_period(period)
+        frame = store.load(date(2023, 1, 1), date(2023, 2, 28)).filter(
+            {'department_ids': [payroll_data['finance'].id, payroll_data['sales'].id]}
+        )
+
+        expected = Payroll.objects.filter(
+            employee__department_id__in=[payroll_data['finance'].id, payroll_data['sales'].id]
+        ).aggregate(
+            total_employees=Count('employee', distinct=True), total_net_salary=Sum('net_salary'),
+            total_gross_taxable=Sum('gross_taxable'), total_its_total=Sum('its_total'),
+        )
+        totals = frame.totals()
+        for key, value in expected.items():
+            assert totals[key] == value
+
+        by_period = frame.totals_by('period')
+        assert list(by_period) == [date(2023, 1, 31), date(2023, 2, 28)]
+        assert by_period[date(2023, 2, 28)]['total_net_salary'] == Decimal('123002.30')
+
+    def test_employee_totals_rank_by_net_salary(self, payroll_data, store):
+        """Test per-employee totals are ordered like the top earners query"""
+        for period in self.PERIODS:
+            store.write_period(period)
+        top = store.load(date(2023, 1, 1), date(2023, 2, 28)).employee_totals(limit=2)
+
+        assert [row['employee__id'] for row in top] == [
+            payroll_data['employees'][2].id, payroll_data['employees'][1].id
+        ]
+        assert top[0]['total_net_salary'] == Decimal('246001.60')
+        assert top[0]['employee__department__name'] is None
+        assert top[1]['periods_worked'] == 2
+
+    def test_aggregator_reads_closed_periods_from_snapshots(self, payroll_data, store):
+        """Test cumulative reports use snapshots when the range is closed"""
+        from core.models import Payroll
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+
+        for period in self.PERIODS:
+            store.write_period(period)
+        snapshot_aggregator = CumulativeDataAggregator(cache_timeout=0, snapshot_store=store)
+        orm_aggregator = CumulativeDataAggregator(cache_timeout=0, use_snapshots=False, use_period_aggregates=False)
+
+        from_snapshot = snapshot_aggregator._get_period_summary(date(2023, 1, 1), 'year_over_year')
+        from_orm = orm_aggregator._get_period_summary(date(2023, 1, 1), 'year_over_year')
+        assert replace(from_snapshot, average_salary=None) == replace(from_orm, average_salary=None)
+        assert from_snapshot.average_salary.quantize(Decimal('0.01')) == from_orm.average_salary.quantize(Decimal('0.01'))
+
+        # Closed periods are served from the snapshots, not the live rows
+        Payroll.objects.filter(period=self.PERIODS[0]).delete()
+        assert snapshot_aggregator._get_period_summary(date(2023, 1, 1), 'month_over_month').total_employees == 3
+
+        series = snapshot_aggregator._get_time_series_data('net_salary', date(2023, 1, 1), date(2023, 2, 28))
+        assert [point['value'] for point in series] == [Decimal('255000.60'), Decimal('246003.60')]
+
+    def test_unsupported_filters_fall_back_to_orm(self, store):
+        """Test filters without a snapshot column are not served from snapshots"""
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+
+        aggregator = CumulativeDataAggregator(snapshot_store=store)
+        assert aggregator._snapshot_frame(date(2023, 1, 1), date(2023, 1, 31), {'employee_status': 'active'}) is None
+
+
+def test_empty_frame_aggregates_to_zeros():
+    """Test an empty frame aggregates to zeros"""
+    frame = PayrollSnapshotFrame.empty()
+
+    assert frame.totals()['total_net_salary'] == Decimal('0')
+    assert frame.totals_by('period') == {}
+    assert frame.employee_totals() == []
@@ -0,0 +1,313 @@
+"""
+Tests for core.utils.period_aggregates module.
+
+Checks that the monthly payroll rollup follows Payroll saves, moves and
+deletes, and that cumulative reports read the same totals from it as from
+the Payroll rows.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+
+from core.utils.period_aggregates import (
+    aggregate_totals,
+    deferred_aggregate_refresh,
+    rebuild_period_aggregates,
+    supports_aggregate_filters,
+)
+
+
+def test_supports_aggregate_filters():
+    """Test only rollup dimension filters are answered from the rollup"""
+    assert supports_aggregate_filters(None)
+    assert supports_aggregate_filters({'department_ids': [1], 'position_ids': []})
+    assert not supports_aggregate_filters({'salary_grade_ids': [2]})
+
+
+@pytest.mark.django_db
+class TestPayrollPeriodAggregate:
+    """Test the rollup maintenance and report reads"""
+
+    @pytest.fixture
+    def payroll_data(self):
+        from core.models import Department, Employee, Payroll, PayrollMotif, SystemParameters
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        bonus_motif = PayrollMotif.objects.create(name="Prime")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=date(2024, 3, 31), next_period=date(2024, 4, 30),
+            closure_period=date(2024, 3, 31), default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        finance = Department.objects.create(name="Finance")
+        sales = Department.objects.create(name="Ventes")
+        employees = [
+            Employee.objects.create(first_name="Aicha", last_name="Sidi", department=finance),
+            Employee.objects.create(first_name="Moussa", last_name="Ba", department=finance),
+            Employee.objects.create(first_name="Jean", last_name="Martin", department=sales, is_expatriate=True),
+        ]
+
+        periods = [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+        for month_index, period in enumerate(periods):
+            for index, employee in enumerate(employees):
+                Payroll.objects.create(
+                    employee=employee, motif=motif, parameters=parameters, period=period,
+                    gross_taxable=Decimal('60000.00') + 1000 * index, net_salary=Decimal('50000.50') + 100 * month_index,
+                    its_total=Decimal('2500.00'), rcnss=Decimal('9000.00'), worked_days=Decimal('26'),
+                )
+        Payroll.objects.create(
+            employee=employees[0], motif=bonus_motif, parameters=parameters, period=periods[0],
+            gross_taxable=Decimal('15000.00'), net_salary=Decimal('12000.00'),
+        )
+
+        return {'employees': employees, 'motif': motif, 'bonus_motif': bonus_motif, 'parameters': parameters,
+                'finance': finance, 'sales': sales, 'periods': periods}
+
+    def _orm_totals(self, **lookups):
+        from django.db.models import Count, Max, Min, Sum
+        from core.models import Payroll
+
+        return Payroll.objects.filter(**lookups).aggregate(
+            payroll_count=Count('id'), total_net_salary=Sum('net_salary'),
+            total_gross_taxable=Sum('gross_taxable'), max_gross_taxable=Max('gross_taxable'),
+            min_net_salary=Min('net_salary'), total_rcnss=Sum('rcnss'),
+        )
+
+    def _rollup_totals(self, start_period, end_period, filters=None):
+        totals = aggregate_totals(start_period, end_period, filters)[0]
+        return {key: totals[key] for key in (
+            'payroll_count', 'total_net_salary', 'total_gross_taxable', 'max_gross_taxable',
+            'min_net_salary', 'total_rcnss',
+        )}
+
+    def test_saves_maintain_rollup(self, payroll_data):
+        """Test the rollup equals the Payroll aggregates after saves"""
+        from core.models import PayrollPeriodAggregate
+
+        assert PayrollPeriodAggregate.objects.count() == 7
+        assert self._rollup_totals(date(2024, 1, 1), date(2024, 3, 31)) == self._orm_totals()
+        assert self._rollup_totals(date(2024, 1, 1), date(2024, 3, 31), {'department_ids': [payroll_data['finance'].id]}) == \
+            self._orm_totals(employee__department=payroll_data['finance'])
+
+        expatriates = PayrollPeriodAggregate.objects.filter(is_expatriate=True)
+        assert sorted(expatriates.values_list('payroll_count', flat=True)) == [1, 1, 1]
+
+    def test_moves_and_deletes_refresh_both_slices(self, payroll_data):
+        """Test a payroll moved to another month leaves no stale totals behind"""
+        from core.models import Payroll
+
+        payroll = Payroll.objects.get(employee=payroll_data['employees'][0], motif=payroll_data['bonus_motif'])
+        payroll.period = date(2024, 3, 31)
+        payroll.save()
+
+        january = aggregate_totals(date(2024, 1, 1), date(2024, 1, 31))[0]
+        assert january['payroll_count'] == 3
+        assert self._rollup_totals(date(2024, 3, 1), date(2024, 3, 31)) == self._orm_totals(period=date(2024, 3, 31))
+
+        Payroll.objects.filter(period=date(2024, 3, 31)).delete()
+        assert aggregate_totals(date(2024, 3, 1), date(2024, 3, 31))[0]['payroll_count'] == 0
+
+    def test_employee_department_change_moves_rollup_rows(self, payroll_data):
+        """Test rollup dimensions follow the employee's department"""
+        employee = payroll_data['employees'][1]
+        employee.department = payroll_data['sales']
+        employee.save()
+
+        sales_totals = aggregate_totals(date(2024, 1, 1), date(2024, 3, 31), {'department_ids': [payroll_data['sales'].id]})[0]
+        assert sales_totals['payroll_count'] == 6
+
+    def test_deferred_refresh_rebuilds_on_exit(self, payroll_data):
+        """Test bulk writers refresh each touched slice once, at the end of the block"""
+        from core.models import Payroll
+
+        with deferred_aggregate_refresh():
+            for payroll in Payroll.objects.filter(period=date(2024, 2, 29)):
+                payroll.net_salary += 1
+                payroll.save()
+            assert aggregate_totals(date(2024, 2, 1), date(2024, 2, 29))[0]['total_net_salary'] == Decimal('150301.50')
+
+        assert aggregate_totals(date(2024, 2, 1), date(2024, 2, 29))[0]['total_net_salary'] == Decimal('150304.50')
+
+    def test_loaded_payroll_save_reads_no_previous_slice(self, payroll_data):
+        """Test a loaded payroll knows its stored slice without a query before the update"""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import Payroll
+
+        payroll = Payroll.objects.get(employee=payroll_data['employees'][0], motif=payroll_data['bonus_motif'])
+        payroll.period = date(2024, 2, 29)
+        with CaptureQueriesContext(connection) as queries:
+            payroll.save()
+        assert not [query for query in queries.captured_queries
+                    if query['sql'].startswith('SELECT "paie"."period", "paie"."motif_id" FROM')
+                    and 'WHERE "paie"."id" =' in query['sql']]
+        assert aggregate_totals(date(2024, 1, 1), date(2024, 1, 31))[0]['payroll_count'] == 3
+
+        # Later saves compare with the slice written last
+        payroll.period = date(2024, 3, 31)
+        payroll.save()
+        assert aggregate_totals(date(2024, 2, 1), date(2024, 2, 29))[0]['payroll_count'] == 3
+        assert aggregate_totals(date(2024, 3, 1), date(2024, 3, 31))[0]['payroll_count'] == 4
+
+        deferred = Payroll.objects.only('id', 'net_salary').get(pk=payroll.pk)
+        deferred.period = date(2024, 1, 31)
+        deferred.save()
+        assert aggregate_totals(date(2024, 3, 1), date(2024, 3, 31))[0]['payroll_count'] == 3
+
+    def test_saves_update_their_row_in_place(self, payroll_data):
+        """Test single saves and deletes move their amounts without rebuilding the slice"""
+        from unittest.mock import patch
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import Employee, Payroll
+        from core.utils import period_aggregates
+
+        march = {'period': date(2024, 3, 31)}
+        payrolls = {payroll.employee_id: payroll for payroll in Payroll.objects.filter(**march)}
+        with patch.object(period_aggregates, 'refresh_period_aggregates') as refresh, \
+                CaptureQueriesContext(connection) as queries:
+            raised = payrolls[payroll_data['employees'][0].id]
+            raised.net_salary += Decimal('1000.25')
+            raised.save()
+            assert self._rollup_totals(date(2024, 3, 1), date(2024, 3, 31)) == self._orm_totals(**march)
+
+            # Lowering the highest amount of a row re-aggregates that row only
+            lowered = payrolls[payroll_data['employees'][1].id]
+            lowered.gross_taxable = Decimal('59000.00')
+            lowered.save()
+            assert self._rollup_totals(date(2024, 3, 1), date(2024, 3, 31)) == self._orm_totals(**march)
+
+            newcomer = Employee.objects.create(first_name="Fatou", last_name="Diallo",
+                                               department=payroll_data['sales'])
+            Payroll.objects.create(employee=newcomer, motif=payroll_data['motif'], parameters=payroll_data['parameters'],
+                                   period=march['period'], gross_taxable=Decimal('70000.00'),
+                                   net_salary=Decimal('58000.00'), rcnss=Decimal('9000.00'))
+            assert self._rollup_totals(date(2024, 3, 1), date(2024, 3, 31)) == self._orm_totals(**march)
+
+            payrolls[payroll_data['employees'][2].id].delete()
+            assert self._rollup_totals(date(2024, 3, 1), date(2024, 3, 31)) == self._orm_totals(**march)
+
+        refresh.assert_not_called()
+        assert not [query for query in queries.captured_queries
+                    if 'GROUP BY' in query['sql'] and 'FROM "paie"' in query['sql']]
+        sales = aggregate_totals(date(2024, 3, 1), date(2024, 3, 31), {'department_ids': [payroll_data['sales'].id]})[0]
+        assert sales['payroll_count'] == 1
+        assert sales['min_gross_taxable'] == sales['max_gross_taxable'] == Decimal('70000.00')
+
+    def test_rollup_rows_are_unique(self, payroll_data):
+        """Test a second row for the same dimensions is rejected, NULL department and direction included"""
+        from django.db import IntegrityError, transaction
+        from core.models import PayrollPeriodAggregate
+
+        row = PayrollPeriodAggregate.objects.filter(department=payroll_data['finance']).first()
+        assert row.direction_id is None
+        with pytest.raises(IntegrityError), transaction.atomic():
+            PayrollPeriodAggregate.objects.create(period=row.period, motif=row.motif, department=row.department,
+                                                  is_expatriate=row.is_expatriate)
+
+        with transaction.atomic():
+            PayrollPeriodAggregate.objects.create(period=row.period, motif=row.motif, is_expatriate=row.is_expatriate)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            PayrollPeriodAggregate.objects.create(period=row.period, motif=row.motif, is_expatriate=row.is_expatriate)
+
+    def test_payroll_run_refreshes_each_slice_once(self, payroll_data):
+        """Test payrolls saved during a payroll run rebuild their slice once, after the run"""
+        from unittest.mock import patch
+        from core.models import Payroll, PayrollElement, PayrollElementFormula
+        from core.utils import period_aggregates
+        from core.utils.formula_engine import PayrollIntegrationLayer
+
+        period = payroll_data['periods'][1]
+
+        class PersistingLayer(PayrollIntegrationLayer):
+            def _store_element_result(self, employee, element, motif, period, result):
+                super()._store_element_result(employee, element, motif, period, result)
+                payroll = Payroll.objects.get(employee=employee, motif=motif, period=period)
+                payroll.net_salary = result['amount']
+                payroll.save()
+
+        element = PayrollElement.objects.create(label="Net", type='G', auto_base_calculation=True)
+        PayrollElementFormula.objects.create(payroll_element=element, section='B', component_type='N',
+                                             numeric_value=Decimal('40000'))
+
+        with patch.object(period_aggregates, 'refresh_period_aggregates',
+                          wraps=period_aggregates.refresh_period_aggregates) as refresh:
+            PersistingLayer().process_payroll_batch(payroll_data['employees'], [element],
+                                                    payroll_data['motif'], period)
+
+        refresh.assert_called_once_with(date(2024, 2, 1), payroll_data['motif'].id)
+        assert aggregate_totals(date(2024, 2, 1), date(2024, 2, 29))[0]['total_net_salary'] == Decimal('120000.00')
+
+    def test_rebuild_backfills_missing_rows(self, payroll_data):
+        """Test a full rebuild restores a truncated rollup"""
+        from core.models import PayrollPeriodAggregate
+
+        PayrollPeriodAggregate.objects.all().delete()
+        assert rebuild_period_aggregates() == 7
+        assert self._rollup_totals(date(2024, 1, 1), date(2024, 3, 31)) == self._orm_totals()
+
+    def test_reports_read_the_rollup(self, payroll_data, django_assert_num_queries):
+        """Test cumulative report totals from the rollup match the Payroll rows"""
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+
+        rollup = CumulativeDataAggregator(cache_timeout=0, use_snapshots=False)
+        orm = CumulativeDataAggregator(cache_timeout=0, use_snapshots=False, use_period_aggregates=False)
+        periods = [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+        for period_type in ('month_over_month', 'quarter_over_quarter'):
+            from_rollup = rollup._get_period_summaries(periods, period_type)
+            from_orm = [orm._get_period_summary(period, period_type) for period in periods]
+            for rollup_summary, orm_summary in zip(from_rollup, from_orm):
+                assert rollup_summary.total_employees == orm_summary.total_employees
+                assert rollup_summary.total_net_salary == orm_summary.total_net_salary
+                assert rollup_summary.total_its == orm_summary.total_its
+
+        # Five years of monthly points come from one rollup query
+        with django_assert_num_queries(1):
+            series = rollup._get_time_series_data('net_salary', date(2020, 1, 1), date(2024, 12, 31))
+        assert len(series) == 60
+        assert [point['value'] for point in series[48:51]] == [
+            orm._get_time_series_data('net_salary', period, period)[0]['value'] for period in periods
+        ]
+
+        # Filters outside the rollup dimensions keep using the Payroll rows
+        assert rollup._get_period_summary(periods[0], 'month_over_month', {'salary_grade_ids': [99]}).total_employees == 0
+
+    def test_time_series_is_one_grouped_query(self, payroll_data, django_assert_num_queries):
+        """Test every metric of a range comes from one grouped Payroll query, gaps as zeros"""
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+
+        orm = CumulativeDataAggregator(cache_timeout=0, use_snapshots=False, use_period_aggregates=False)
+        with django_assert_num_queries(1):
+            series = orm._query_time_series(
+                ['net_salary', 'headcount', 'employee_count', 'productivity'], date(2023, 11, 1), date(2024, 3, 31)
+            )
+
+        assert series.periods[0] == date(2023, 11, 1) and len(series) == 5
+        assert series['net_salary'].tolist()[:2] == [0, 0]
+        assert series['headcount'].tolist() == [0, 0, 3, 3, 3]
+        assert series['employee_count'].tolist() == [0, 0, 4, 3, 3]
+        assert series.to_records('productivity')[3]['value'] == Decimal('50100.50')
+
+        quarters = orm._query_time_series(['net_salary', 'headcount'], date(2023, 11, 1), date(2024, 3, 31), per='quarter')
+        assert quarters.periods == [date(2023, 10, 1), date(2024, 1, 1)]
+        assert quarters.to_records('net_salary')[1]['value'] == self._orm_totals()['total_net_salary']
+        assert quarters['headcount'].tolist() == [0, 3]
+
+    def test_trend_analysis_reads_one_series(self, payroll_data):
+        """Test the trend analysis helpers share the time series of the range"""
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+
+        rollup = CumulativeDataAggregator(cache_timeout=0, use_snapshots=False)
+        analysis = rollup.get_trend_analysis_and_forecasting('net_salary', date(2023, 4, 1), date(2024, 3, 31))
+
+        assert analysis['analysis_period']['total_periods'] == 12
+        assert [point['value'] for point in analysis['time_series_data'][-3:]] == [
+            Decimal('162001.50'), Decimal('150301.50'), Decimal('150601.50')
+        ]
+        assert analysis['trend_statistics']['trend_slope'] > 0
+        assert analysis['seasonal_decomposition']['peak_month']['month'] == 1
+        assert analysis['forecast_results']['forecast_results'][0]['period'] == date(2024, 4, 1)
+        assert analysis['anomalies'] == []
+        assert rollup._get_monthly_breakdown(2024)[1]['total_employees'] == 3
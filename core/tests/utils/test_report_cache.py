@@ -0,0 +1,181 @@
+"""
+Tests for core.utils.report_cache module.
+
+Checks that report filters fingerprint canonically and that cached reports
+are kept until the payroll data of one of their months changes.
+"""
+
+import pytest
+from decimal import Decimal
+from datetime import date
+
+from core.utils.report_cache import ReportCache, filter_fingerprint, period_months
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    from core.utils.report_cache import report_cache
+
+    cache.clear()
+    report_cache.clear()
+    yield
+    cache.clear()
+    report_cache.clear()
+
+
+def test_filter_fingerprint_is_canonical():
+    """Test equal filters give one fingerprint whatever their ordering"""
+    from core.reports.payroll_summary import FilterCriteria
+
+    assert filter_fingerprint({'department_ids': [3, 1], 'direction_ids': []}) == \
+        filter_fingerprint({'department_ids': [1, 3]})
+    assert filter_fingerprint({'department_ids': [1]}) != filter_fingerprint({'department_ids': [2]})
+    assert filter_fingerprint(FilterCriteria(departments=[2, 1], salary_range_min=Decimal('100.0'))) == \
+        filter_fingerprint(FilterCriteria(departments=[1, 2], salary_range_min=Decimal('100')))
+    assert period_months(date(2023, 11, 30), date(2024, 2, 1)) == ['2023-11', '2023-12', '2024-01', '2024-02']
+
+
+def test_cached_until_month_version_changes():
+    """Test a bump only invalidates the reports reading that month"""
+    reports = ReportCache()
+    calls = []
+
+    def compute(name):
+        calls.append(name)
+        return {'report': name}
+
+    def get(name, start, end):
+        return reports.get_or_compute(name, start, end, {'filters': None}, lambda: compute(name))
+
+    get('january', date(2024, 1, 1), date(2024, 1, 31))
+    get('first_quarter', date(2024, 1, 1), date(2024, 3, 31))
+    get('january', date(2024, 1, 1), date(2024, 1, 31))
+    assert calls == ['january', 'first_quarter']
+    assert reports.get_stats() == {'hits': 1, 'misses': 2, 'size': 2, 'invalidations': 0}
+
+    reports.bump_version(date(2024, 3, 31))
+    get('january', date(2024, 1, 1), date(2024, 1, 31))
+    get('first_quarter', date(2024, 1, 1), date(2024, 3, 31))
+    assert calls == ['january', 'first_quarter', 'first_quarter']
+    assert reports.get_stats()['invalidations'] == 1
+
+
+def test_zero_timeout_disables_caching():
+    """Test a zero timeout always recomputes"""
+    reports = ReportCache()
+    calls = []
+
+    for _ in range(2):
+        reports.get_or_compute('report', date(2024, 1, 1), date(2024, 1, 31), {}, lambda: calls.append(1), timeout=0)
+    assert len(calls) == 2
+    assert reports.get_stats()['size'] == 0
+
+
+def test_entries_expire_after_default_timeout():
+    """Test results expire after a finite timeout and leave the process statistics"""
+    from unittest.mock import patch
+    from django.core.cache import cache
+    from core.utils.report_cache import REPORT_CACHE_TIMEOUT
+
+    reports = ReportCache()
+    assert reports.timeout == REPORT_CACHE_TIMEOUT
+
+    with patch.object(cache, 'set', wraps=cache.set) as cache_set:
+        reports.get_or_compute('report', date(2024, 1, 1), date(2024, 1, 31), {}, lambda: 1)
+    assert cache_set.call_args.args[2] == REPORT_CACHE_TIMEOUT
+
+    short = ReportCache(timeout=1)
+    with patch('core.utils.report_cache.time.monotonic', return_value=1000.0):
+        short.get_or_compute('report', date(2024, 2, 1), date(2024, 2, 29), {}, lambda: 1)
+        assert short.get_stats()['size'] == 1
+    with patch('core.utils.report_cache.time.monotonic', return_value=1001.0):
+        assert short.get_stats()['size'] == 0
+
+
+@pytest.mark.django_db
+class TestReportInvalidation:
+    """Test payroll writes invalidate the cached reports of their month"""
+
+    @pytest.fixture
+    def payroll_data(self):
+        from core.models import Employee, Payroll, PayrollElement, PayrollMotif, SystemParameters
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=date(2024, 2, 29), next_period=date(2024, 3, 31),
+            closure_period=date(2024, 2, 29), default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        employee = Employee.objects.create(first_name="Aicha", last_name="Sidi")
+        payrolls = [
+            Payroll.objects.create(employee=employee, motif=motif, parameters=parameters, period=period,
+                                   net_salary=Decimal('50000.00'))
+            for period in (date(2024, 1, 31), date(2024, 2, 29))
+        ]
+        element = PayrollElement.objects.create(label="Prime", type='G')
+        return {'employee': employee, 'motif': motif, 'payrolls': payrolls, 'element': element}
+
+    def test_payroll_correction_refreshes_report(self, payroll_data):
+        """Test a corrected payroll shows in the next report, other months stay cached"""
+        from core.reports.cumulative_reports import CumulativeDataAggregator
+        from core.utils.report_cache import report_cache
+
+        aggregator = CumulativeDataAggregator(use_snapshots=False)
+        trend = aggregator.get_trend_analysis_and_forecasting('net_salary', date(2024, 2, 1), date(2024, 2, 29))
+        january = aggregator.get_trend_analysis_and_forecasting('net_salary', date(2024, 1, 1), date(2024, 1, 31))
+        assert aggregator.get_trend_analysis_and_forecasting('net_salary', date(2024, 2, 1), date(2024, 2, 29)) == trend
+        assert report_cache.get_stats()['hits'] == 1
+
+        payroll = payroll_data['payrolls'][1]
+        payroll.net_salary = Decimal('52000.00')
+        payroll.save()
+
+        trend = aggregator.get_trend_analysis_and_forecasting('net_salary', date(2024, 2, 1), date(2024, 2, 29))
+        assert trend['time_series_data'][0]['value'] == Decimal('52000.00')
+        assert aggregator.get_trend_analysis_and_forecasting('net_salary', date(2024, 1, 1), date(2024, 1, 31)) == january
+        assert report_cache.get_stats()['hits'] == 2
+
+    def test_line_item_changes_bump_month_version(self, payroll_data):
+        """Test line item writes and deletes bump the version of their month"""
+        from core.models import PayrollLineItem
+        from core.utils.report_cache import report_cache
+
+        versions = report_cache.get_versions(['2024-01', '2024-02'])
+        item = PayrollLineItem.objects.create(
+            employee=payroll_data['employee'], payroll_element=payroll_data['element'], motif=payroll_data['motif'],
+            period=date(2024, 2, 29), base_amount=Decimal('1000'), quantity=Decimal('1'),
+            calculated_amount=Decimal('1000')
+        )
+        after_save = report_cache.get_versions(['2024-01', '2024-02'])
+        assert after_save['2024-01'] == versions['2024-01']
+        assert after_save['2024-02'] != versions['2024-02']
+
+        item.delete()
+        assert report_cache.get_versions(['2024-02'])['2024-02'] != after_save['2024-02']
+
+    def test_payroll_run_invalidates_each_month_once(self, payroll_data):
+        """Test writes inside a payroll run bump each month they touch once, on exit"""
+        from core.models import PayrollLineItem
+        from core.utils.incremental_recalculation import payroll_run_writes
+        from core.utils.report_cache import report_cache
+
+        versions = report_cache.get_versions(['2024-01', '2024-02'])
+        invalidations = report_cache.get_stats()['invalidations']
+
+        with payroll_run_writes():
+            for payroll in payroll_data['payrolls'] * 3:
+                payroll.save()
+            item = PayrollLineItem.objects.create(
+                employee=payroll_data['employee'], payroll_element=payroll_data['element'],
+                motif=payroll_data['motif'], period=date(2024, 2, 29), calculated_amount=Decimal('0')
+            )
+            for index in range(5):
+                item.calculated_amount = Decimal(index)
+                item.save()
+            assert report_cache.get_versions(['2024-01', '2024-02']) == versions
+
+        assert report_cache.get_stats()['invalidations'] == invalidations + 2
+        after_run = report_cache.get_versions(['2024-01', '2024-02'])
+        assert after_run['2024-01'] != versions['2024-01']
+        assert after_run['2024-02'] != versions['2024-02']
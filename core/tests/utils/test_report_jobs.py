@@ -0,0 +1,147 @@
+"""
+Tests for core.utils.report_jobs module.
+
+Checks that identical requests share one queued job, that workers store the
+result artifact and progress, and that retries, cancellation and expired
+leases leave the job in the expected state.
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from core.utils.report_jobs import (
+    REPORT_JOB_HANDLERS, ReportJobWorker, cancel_report_job, get_report_job_result,
+    register_report_job, requeue_stale_jobs, submit_report_job
+)
+
+
+@pytest.fixture
+def handlers():
+    """Test job handlers, removed after the test"""
+    calls = []
+
+    @register_report_job('test_report')
+    def test_report(params, progress):
+        calls.append(params)
+        for step in range(3):
+            progress(step, 3, f"Etape {step}")
+        return {'period': date(2024, 1, 31), 'total': Decimal('1500.50'), 'year': params['year']}
+
+    @register_report_job('test_failing_report')
+    def test_failing_report(params, progress):
+        calls.append(params)
+        raise RuntimeError("Base indisponible")
+
+    yield calls
+    REPORT_JOB_HANDLERS.pop('test_report', None)
+    REPORT_JOB_HANDLERS.pop('test_failing_report', None)
+
+
+@pytest.fixture
+def worker(tmp_path):
+    return ReportJobWorker(worker_id='test-worker', retry_delay=60, root=tmp_path)
+
+
+@pytest.mark.django_db
+class TestReportJobQueue:
+    """Test the report job lifecycle"""
+
+    def test_identical_requests_share_one_job(self, handlers, worker):
+        """Test in-flight deduplication and the stored artifact"""
+        from core.models import ReportJob
+
+        job = submit_report_job('test_report', {'year': 2024, 'filters': {'department_ids': [3, 1]}})
+        assert submit_report_job('test_report', {'filters': {'department_ids': [1, 3]}, 'year': 2024}).id == job.id
+        assert submit_report_job('test_report', {'year': 2023}).id != job.id
+
+        assert worker.run(exit_when_idle=True) == 2
+        assert len(handlers) == 2
+
+        job.refresh_from_db()
+        assert job.status == ReportJob.STATUS_SUCCEEDED
+        assert (job.progress, job.attempts, job.worker_id) == (100, 1, 'test-worker')
+        assert get_report_job_result(job) == {'period': '2024-01-31', 'total': '1500.50', 'year': 2024}
+
+        # A finished job does not absorb new requests
+        assert submit_report_job('test_report', {'year': 2024}).id != job.id
+
+        with pytest.raises(ValueError):
+            submit_report_job('unknown_report')
+
+    def test_failed_job_is_retried_with_backoff(self, handlers, worker):
+        """Test a failure requeues the job until its attempts are used"""
+        from core.models import ReportJob
+
+        job = submit_report_job('test_failing_report', max_attempts=2)
+        assert worker.run_once()
+        job.refresh_from_db()
+        assert job.status == ReportJob.STATUS_PENDING
+        assert "Base indisponible" in job.error
+        assert job.available_at > timezone.now() + timedelta(seconds=50)
+        assert not worker.run_once()
+
+        ReportJob.objects.filter(id=job.id).update(available_at=timezone.now())
+        assert worker.run_once()
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (ReportJob.STATUS_FAILED, 2)
+
+    def test_cancellation(self, handlers, worker):
+        """Test a pending job is cancelled at once and a running one at its next progress call"""
+        from core.models import ReportJob
+
+        pending = submit_report_job('test_report', {'year': 2022})
+        assert cancel_report_job(pending.id)
+        assert not worker.run_once()
+        pending.refresh_from_db()
+        assert pending.status == ReportJob.STATUS_CANCELLED
+
+        running = submit_report_job('test_report', {'year': 2021})
+        claimed = worker.claim_next()
+        assert cancel_report_job(running.id)
+        assert worker.run_job(claimed) == ReportJob.STATUS_CANCELLED
+        running.refresh_from_db()
+        assert running.status == ReportJob.STATUS_CANCELLED
+        assert not running.artifact_path
+
+    def test_expired_lease_is_requeued(self, handlers, worker):
+        """Test a job of a dead worker goes back to the queue and the old worker cannot finish it"""
+        from core.models import ReportJob
+
+        job = submit_report_job('test_report', {'year': 2024})
+        claimed = worker.claim_next()
+        ReportJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+
+        assert requeue_stale_jobs(lease_timeout=60) == 1
+        assert worker.run_job(claimed) == ReportJob.STATUS_CANCELLED
+
+        other = ReportJobWorker(worker_id='other-worker', root=worker.root)
+        assert other.run_once()
+        job.refresh_from_db()
+        assert (job.status, job.worker_id, job.attempts) == (ReportJob.STATUS_SUCCEEDED, 'other-worker', 2)
+
+    def test_cumulative_report_job(self, worker):
+        """Test a registered report runs in the worker with date parameters"""
+        from core.models import Employee, Payroll, PayrollMotif, ReportJob, SystemParameters
+
+        motif = PayrollMotif.objects.create(name="Salaire Normal")
+        parameters = SystemParameters.objects.create(
+            company_name="Test", current_period=date(2024, 2, 29), next_period=date(2024, 3, 31),
+            closure_period=date(2024, 2, 29), default_working_days=30,
+            non_taxable_allowance_ceiling=10000, net_account=411000
+        )
+        employee = Employee.objects.create(first_name="Aicha", last_name="Sidi")
+        Payroll.objects.create(employee=employee, motif=motif, parameters=parameters, period=date(2024, 1, 31),
+                               net_salary=Decimal('50000.00'))
+
+        job = submit_report_job('cumulative_trend_report', {
+            'metric': 'net_salary', 'start_period': date(2024, 1, 1), 'end_period': date(2024, 2, 29)
+        })
+        assert job.params['start_period'] == '2024-01-01'
+        assert worker.run_once()
+
+        job.refresh_from_db()
+        assert job.status == ReportJob.STATUS_SUCCEEDED
+        assert get_report_job_result(job)['report_type'] == 'trend_analysis'
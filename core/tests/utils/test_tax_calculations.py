@@ -14,7 +14,9 @@ from core.utils.tax_calculations import (
     CNSSCalculator,
     CNAMCalculator,
     ITSCalculator,
-    TaxCalculationService
+    ITSBracketTable,
+    TaxCalculationService,
+    TaxUtilities
 )
 
 
@@ -438,6 +440,89 @@ class TestITSCalculator:
         assert result == Decimal('0.00')
 
 
+def _legacy_its(taxable_income, brackets, currency_rate=Decimal('1.0')):
+    """Reference bracket-by-bracket ITSm loop"""
+    result = {'total': Decimal('0.00'), 'tranche1': Decimal('0.00'),
+              'tranche2': Decimal('0.00'), 'tranche3': Decimal('0.00')}
+    remaining = taxable_income
+    for i, bracket in enumerate(brackets):
+        if remaining <= 0:
+            break
+        if bracket['max'] is not None:
+            in_bracket = min(remaining, bracket['max'] - bracket['min'])
+        else:
+            in_bracket = remaining
+        tax = (in_bracket * bracket['rate'] / currency_rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        if i < 3:
+            result[f'tranche{i + 1}'] = tax
+        result['total'] += tax
+        remaining -= in_bracket
+    return result
+
+
+class TestITSBracketTable:
+    """Test precomputed ITS bracket tables"""
+    
+    INCOMES = [Decimal(x) for x in (
+        '0', '-50', '0.01', '4500.55', '8999.99', '9000', '9000.01', '15333.33',
+        '21000', '21000.01', '48765.43', '250000.07'
+    )]
+    
+    @pytest.mark.parametrize('is_expatriate', [False, True])
+    @pytest.mark.parametrize('tax_mode', ['G', 'T'])
+    def test_matches_bracket_loop(self, is_expatriate, tax_mode):
+        """Test table results equal the bracket-by-bracket computation"""
+        table = ITSBracketTable.for_year(2018, is_expatriate, tax_mode)
+        brackets = ITSCalculator.get_tax_brackets(2018, is_expatriate, tax_mode)
+        
+        for income in self.INCOMES:
+            result = table.calculate(income)
+            expected = _legacy_its(income, brackets)
+            for key in ('total', 'tranche1', 'tranche2', 'tranche3'):
+                assert result[key] == expected[key], (income, key)
+    
+    def test_currency_rate(self):
+        """Test bracket taxes are divided by the currency rate"""
+        table = ITSBracketTable.for_year(2018)
+        brackets = ITSCalculator.get_tax_brackets(2018)
+        
+        for income in self.INCOMES:
+            assert table.calculate(income, Decimal('0.7'))['total'] == _legacy_its(income, brackets, Decimal('0.7'))['total']
+    
+    def test_batch_matches_scalar(self):
+        """Test batch API returns the scalar results in input order"""
+        table = ITSBracketTable.for_year(2018, is_expatriate=True)
+        batch = table.calculate_batch(self.INCOMES)
+        
+        for index, income in enumerate(self.INCOMES):
+            expected = table.calculate(income)
+            for key in ('total', 'tranche1', 'tranche2', 'tranche3'):
+                assert batch[key][index] == expected[key], (income, key)
+    
+    def test_closed_brackets_from_system_parameters(self):
+        """Test income above the last closed bracket is not taxed"""
+        brackets = [{'min': 0, 'max': 1000, 'rate': 0.10}, {'min': 1000, 'max': 3000, 'rate': 0.20}]
+        table = ITSBracketTable.from_brackets(brackets)
+        
+        assert table.calculate(Decimal('5000'))['total'] == Decimal('500.00')
+        assert table.calculate_batch([Decimal('5000'), Decimal('1500')])['total'] == [Decimal('500.00'), Decimal('200.00')]
+    
+    def test_tables_are_shared_and_immutable(self):
+        """Test tables are built once per key and cannot be modified"""
+        assert ITSBracketTable.for_year(2018, True, 'T') is ITSBracketTable.for_year(2018, True, 'T')
+        
+        table = ITSBracketTable.for_year(2018)
+        with pytest.raises(AttributeError):
+            table.rates = (Decimal('0'),)
+        assert table.offsets == (Decimal('0.00'), Decimal('1350.00'), Decimal('4350.00'))
+    
+    def test_tranche_bases(self):
+        """Test income split across brackets"""
+        table = ITSBracketTable.for_year(2018)
+        
+        assert table.tranche_bases(Decimal('25000')) == [Decimal('9000'), Decimal('12000'), Decimal('4000')]
+
+
 class TestTaxCalculationService:
     """Test TaxCalculationService class methods"""
     
@@ -876,4 +961,70 @@ class TestTaxCalculationsIntegration:
                 assert decimal_places <= 2, f"{key} has more than 2 decimal places: {value}"
                 
                 # Verify proper rounding was applied
-                assert value == value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
\ No newline at end of file
+                assert value == value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+def _legacy_gross_from_net(net_amount, benefits_in_kind=Decimal('0'), abatement=Decimal('0'), **options):
+    """Reference BrutDuNet downward scan in steps of 1 MRU"""
+    max_gross = net_amount * Decimal('2') + benefits_in_kind
+    current_gross = net_amount
+    if net_amount > abatement:
+        for i in range(int(max_gross - net_amount - benefits_in_kind)):
+            test_gross = max_gross - Decimal(str(i))
+            if test_gross <= net_amount + benefits_in_kind:
+                break
+            current_gross = test_gross
+            net = TaxUtilities._calculate_net_from_gross(
+                test_gross, benefits_in_kind, options.get('apply_cnss', True),
+                options.get('apply_cnam', True), options.get('currency_rate', Decimal('1.0')),
+                options.get('is_expatriate', False), 2018, options.get('tax_mode', 'G'), abatement
+            )
+            if net <= net_amount:
+                return test_gross
+    return current_gross
+
+
+class TestGrossFromNet:
+    """Test TaxUtilities.calculate_gross_from_net against the BrutDuNet scan"""
+    
+    @pytest.mark.parametrize('net_amount', [
+        Decimal('5000'), Decimal('7650'), Decimal('14250.50'), Decimal('17890'), Decimal('26000')
+    ])
+    @pytest.mark.parametrize('options', [
+        {},
+        {'is_expatriate': True},
+        {'tax_mode': 'T', 'apply_cnss': False},
+        {'benefits_in_kind': Decimal('3000')},
+        {'abatement': Decimal('6000')},
+    ])
+    def test_matches_legacy_scan(self, net_amount, options):
+        """Test bisection returns the same gross as the step-by-step scan"""
+        options = dict(options)
+        abatement = options.pop('abatement', Decimal('0'))
+        benefits_in_kind = options.pop('benefits_in_kind', Decimal('0'))
+        system_parameters = Mock(tax_abatement=abatement)
+        
+        result = TaxUtilities.calculate_gross_from_net(
+            net_amount, benefits_in_kind=benefits_in_kind,
+            system_parameters=system_parameters, **options
+        )
+        
+        assert result == _legacy_gross_from_net(net_amount, benefits_in_kind, abatement, **options)
+    
+    def test_gross_yields_target_net(self):
+        """Test the returned gross is the largest 1 MRU step not above the target net"""
+        net_amount = Decimal('200000')
+        gross = TaxUtilities.calculate_gross_from_net(net_amount)
+        
+        def net_of(amount):
+            return TaxUtilities._calculate_net_from_gross(
+                amount, Decimal('0'), True, True, Decimal('1.0'), False, 2018, 'G', Decimal('0')
+            )
+        
+        assert net_of(gross) <= net_amount
+        assert net_of(gross + 1) > net_amount
+    
+    def test_net_below_abatement_is_returned(self):
+        """Test net amounts below the abatement are not grossed up"""
+        system_parameters = Mock(tax_abatement=Decimal('6000'))
+        
+        assert TaxUtilities.calculate_gross_from_net(Decimal('5000'), system_parameters=system_parameters) == Decimal('5000')
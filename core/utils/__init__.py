@@ -19,7 +19,9 @@ from .date_utils import (
 from .formula_engine import (
     FormulaEngine,
     FormulaCalculationError,
-    PayrollFormulaEvaluator
+    PayrollFormulaEvaluator,
+    FormulaCompiler,
+    CompiledFormula
 )
 
 # Payroll calculation logic
@@ -27,7 +29,14 @@ from .payroll_calculations import (
     PayrollFunctions,
     PayrollCalculator,
     OvertimeCalculator,
-    InstallmentCalculator
+    InstallmentCalculator,
+    PayrollRunContext
+)
+
+# Incremental recalculation from tracked changes
+from .incremental_recalculation import (
+    IncrementalPayrollRecalculator,
+    change_tracking_suspended
 )
 
 # Tax calculation utilities
@@ -35,6 +44,7 @@ from .tax_calculations import (
     CNSSCalculator,
     CNAMCalculator,
     ITSCalculator,
+    ITSBracketTable,
     TaxCalculationService
 )
 
@@ -108,17 +118,23 @@ __all__ = [
     'FormulaEngine',
     'FormulaCalculationError',
     'PayrollFormulaEvaluator',
+    'FormulaCompiler',
+    'CompiledFormula',
     
     # Payroll calculations
     'PayrollFunctions',
     'PayrollCalculator',
     'OvertimeCalculator',
     'InstallmentCalculator',
+    'PayrollRunContext',
+    'IncrementalPayrollRecalculator',
+    'change_tracking_suspended',
     
     # Tax calculations
     'CNSSCalculator',
     'CNAMCalculator',
     'ITSCalculator',
+    'ITSBracketTable',
     'TaxCalculationService',
     
     # Text utilities
@@ -0,0 +1,332 @@
+# batch_calculations.py
+"""
+Vectorized whole-population payroll calculation
+Columnar equivalent of PayrollCalculator.calculate_payroll for a full period/motif
+
+All money columns are held as integer cents so sums are exact, and every
+rounding step reproduces Decimal.quantize(Decimal('0.01'), ROUND_HALF_UP)
+from the scalar path, giving results identical to the cent.
+"""
+
+from decimal import Decimal
+from typing import Dict, List, Tuple, Any
+
+from .tax_calculations import ITSBracketTable
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Largest intermediate product kept in int64 arrays; above it Python ints are used
+_INT64_SAFE_LIMIT = 2 ** 62
+
+def to_cents(amount) -> int:
+    """
+    Convert a money amount to integer cents
+
+    Raises:
+        ValueError: If amount has sub-cent precision
+    """
+    cents = Decimal(str(amount if amount is not None else 0)) * 100
+    if cents != cents.to_integral_value():
+        raise ValueError(f"Amount {amount} has sub-cent precision")
+    return int(cents)
+
+
+def rate_to_fraction(rate) -> Tuple[int, int]:
+    """
+    Convert a Decimal rate to an exact (numerator, denominator) pair
+
+    Args:
+        rate: Rate as Decimal, float or str (e.g. Decimal('0.01'))
+
+    Returns:
+        Tuple (numerator, 10 ** exponent)
+    """
+    rate = Decimal(str(rate if rate is not None else 0))
+    exponent = max(0, -rate.as_tuple().exponent)
+    denominator = 10 ** exponent
+    return int(rate * denominator), denominator
+
+
+def _array(values: List[int]):
+    """Build an integer array, falling back to Python ints when out of int64 range"""
+    if values and max(abs(v) for v in values) >= _INT64_SAFE_LIMIT:
+        return np.array(values, dtype=object)
+    return np.array(values, dtype=np.int64)
+
+
+def _multiply_round(cents, numerators, denominator: int):
+    """
+    Multiply cents by rate fractions and round half up to whole cents
+
+    Equivalent to (amount * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+    """
+    numerators = np.asarray(numerators)
+    bound = int(np.max(np.abs(cents), initial=0)) * int(np.max(np.abs(numerators), initial=0)) * 2
+    if bound + denominator >= _INT64_SAFE_LIMIT:
+        cents = np.asarray(cents).astype(object)
+        numerators = numerators.astype(object)
+
+    product = cents * numerators
+    magnitude = (np.abs(product) * 2 + denominator) // (2 * denominator)
+    return np.where(product < 0, -magnitude, magnitude)
+
+
+class PayrollLineItemColumns:
+    """
+    Columnar view of PayrollLineItem rows for one period/motif
+
+    One entry per line item: owning employee index, amount in cents and the
+    payroll element flags used by the calculator.
+    """
+
+    def __init__(self, employee_ids: List[int]):
+        self.employee_ids = list(employee_ids)
+        self.employee_index = {employee_id: i for i, employee_id in enumerate(self.employee_ids)}
+        self._rows = {
+            'employee': [], 'amount': [], 'type': [], 'deduction_from': [],
+            'affects_cnss': [], 'affects_cnam': [], 'affects_its': [], 'is_benefit_in_kind': [],
+        }
+
+    def add(self, employee_id: int, amount, element_type: str, deduction_from: str,
+            affects_cnss: bool, affects_cnam: bool, affects_its: bool, is_benefit_in_kind: bool):
+        """Append one line item row"""
+        index = self.employee_index.get(employee_id)
+        if index is None:
+            return
+        rows = self._rows
+        rows['employee'].append(index)
+        rows['amount'].append(to_cents(amount))
+        rows['type'].append(element_type or '')
+        rows['deduction_from'].append(deduction_from or '')
+        rows['affects_cnss'].append(bool(affects_cnss))
+        rows['affects_cnam'].append(bool(affects_cnam))
+        rows['affects_its'].append(bool(affects_its))
+        rows['is_benefit_in_kind'].append(bool(is_benefit_in_kind))
+
+    @classmethod
+    def from_line_items(cls, employee_ids: List[int], line_items_by_employee: Dict[int, List]) -> 'PayrollLineItemColumns':
+        """
+        Build columns from line item objects (as used by calculate_payroll)
+
+        Args:
+            employee_ids: Employees in result order
+            line_items_by_employee: {employee_id: [items with .amount and .payroll_element]}
+        """
+        columns = cls(employee_ids)
+        for employee_id, items in line_items_by_employee.items():
+            for item in items:
+                element = item.payroll_element
+                columns.add(
+                    employee_id, item.amount, element.type, element.deduction_from,
+                    element.affects_cnss, element.affects_cnam, element.affects_its,
+                    element.is_benefit_in_kind
+                )
+        return columns
+
+    @classmethod
+    def from_database(cls, employee_ids: List[int], motif, period) -> 'PayrollLineItemColumns':
+        """
+        Load all PayrollLineItem rows of a period/motif in a single query
+
+        Args:
+            employee_ids: Employees in result order
+            motif: PayrollMotif instance
+            period: Payroll period date
+        """
+        from core.models import PayrollLineItem
+
+        columns = cls(employee_ids)
+        rows = PayrollLineItem.objects.filter(
+            motif=motif, period=period, employee_id__in=employee_ids
+        ).values_list(
+            'employee_id', 'calculated_amount', 'payroll_element__type',
+            'payroll_element__deduction_from', 'payroll_element__affects_cnss',
+            'payroll_element__affects_cnam', 'payroll_element__affects_its',
+            'payroll_element__is_benefit_in_kind'
+        )
+        for row in rows.iterator(chunk_size=5000):
+            columns.add(*row)
+        return columns
+
+    def __len__(self):
+        return len(self._rows['employee'])
+
+    def to_arrays(self) -> Dict[str, Any]:
+        """Convert accumulated rows to NumPy arrays"""
+        rows = self._rows
+        return {
+            'employee': np.array(rows['employee'], dtype=np.int64),
+            'amount': _array(rows['amount']),
+            'type': np.array(rows['type'], dtype=object),
+            'deduction_from': np.array(rows['deduction_from'], dtype=object),
+            'affects_cnss': np.array(rows['affects_cnss'], dtype=bool),
+            'affects_cnam': np.array(rows['affects_cnam'], dtype=bool),
+            'affects_its': np.array(rows['affects_its'], dtype=bool),
+            'is_benefit_in_kind': np.array(rows['is_benefit_in_kind'], dtype=bool),
+        }
+
+
+class VectorizedPayrollEngine:
+    """
+    Whole-population payroll engine - vectorized PaieClass.paieCalcule
+
+    Computes gross, CNSS/CNAM bases, contributions, ITS brackets and net for
+    every employee of a period/motif with array operations. Uses the same
+    system_parameters interface as PayrollCalculator.
+    """
+
+    def __init__(self, system_parameters):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for vectorized payroll calculation")
+        self.system_parameters = system_parameters
+
+    def calculate(self, employees: List, motif, columns: PayrollLineItemColumns) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Calculate payroll for all employees
+
+        Args:
+            employees: Employee instances, in the order of columns.employee_ids
+            motif: PayrollMotif instance
+            columns: Line item columns for the period/motif
+
+        Returns:
+            {employee_id: result dict with the keys of calculate_payroll}
+        """
+        count = len(employees)
+        arrays = columns.to_arrays()
+        employee_rows = arrays['employee']
+        amounts = arrays['amount']
+        element_type = arrays['type']
+
+        is_gain = element_type == 'G'
+        is_retenue = element_type == 'R'
+
+        def total(mask):
+            sums = np.zeros(count, dtype=amounts.dtype)
+            np.add.at(sums, employee_rows[mask], amounts[mask])
+            return sums
+
+        gross_gains = total(is_gain)
+        gross_deductions = total(is_retenue & (arrays['deduction_from'] == 'Brut'))
+        net_deductions = total(is_retenue & (arrays['deduction_from'] == 'Net'))
+        cnss_base = total(is_gain & arrays['affects_cnss'])
+        cnam_base = total(is_gain & arrays['affects_cnam'])
+        its_base = total(is_gain & arrays['affects_its'])
+        benefits_in_kind = total(is_gain & arrays['is_benefit_in_kind'])
+
+        # Apply deductions to bases
+        cnss_base = np.maximum(cnss_base - gross_deductions, 0)
+        cnam_base = np.maximum(cnam_base - gross_deductions, 0)
+        its_base = np.maximum(its_base - gross_deductions, 0)
+
+        # Contribution eligibility per employee
+        subject_cnss = np.array([e.is_subject_to_cnss() for e in employees], dtype=bool)
+        subject_cnam = np.array([e.is_subject_to_cnam() for e in employees], dtype=bool)
+        subject_its = np.array([e.is_subject_to_its() for e in employees], dtype=bool)
+        subject_cnss &= bool(motif.employee_subject_to_cnss)
+        subject_cnam &= bool(motif.employee_subject_to_cnam)
+        subject_its &= bool(motif.employee_subject_to_its)
+
+        params = self.system_parameters
+        zeros = np.zeros(count, dtype=amounts.dtype)
+
+        # CNSS (with ceiling)
+        cnss_taxable = np.minimum(cnss_base, to_cents(params.get_cnss_ceiling()))
+        numerator, denominator = rate_to_fraction(params.get_cnss_rate_employee())
+        cnss_employee = np.where(subject_cnss, _multiply_round(cnss_taxable, numerator, denominator), zeros)
+        numerators, denominator = self._employer_rates(
+            employees, params.get_cnss_rate_employer(), 'cnss_reimbursement_rate'
+        )
+        employer_cnss = np.where(subject_cnss, _multiply_round(cnss_taxable, numerators, denominator), zeros)
+
+        # CNAM (no ceiling)
+        numerator, denominator = rate_to_fraction(params.get_cnam_rate_employee())
+        cnam_employee = np.where(subject_cnam, _multiply_round(cnam_base, numerator, denominator), zeros)
+        numerators, denominator = self._employer_rates(
+            employees, params.get_cnam_rate_employer(), 'cnam_reimbursement_rate'
+        )
+        employer_cnam = np.where(subject_cnam, _multiply_round(cnam_base, numerators, denominator), zeros)
+
+        # ITS
+        is_expatriate = np.array([bool(e.is_expatriate) for e in employees], dtype=bool)
+        tranches, its_total = self._calculate_its(its_base, cnss_employee, cnam_employee, is_expatriate)
+        tranches = [np.where(subject_its, tranche, zeros) for tranche in tranches]
+        its_total = np.where(subject_its, its_total, zeros)
+
+        net_salary = (
+            gross_gains - cnss_employee - cnam_employee - its_total
+            - gross_deductions - net_deductions - benefits_in_kind
+        )
+
+        columns_out = {
+            'gross_taxable': its_base,
+            'gross_non_taxable': gross_gains - its_base,
+            'cnss_employee': cnss_employee,
+            'cnam_employee': cnam_employee,
+            'its_total': its_total,
+            'its_tranche1': tranches[0],
+            'its_tranche2': tranches[1],
+            'its_tranche3': tranches[2],
+            'net_salary': net_salary,
+            'employer_cnss': employer_cnss,
+            'employer_cnam': employer_cnam,
+            'benefits_in_kind': benefits_in_kind,
+        }
+
+        results = {}
+        for i, employee in enumerate(employees):
+            results[employee.id] = {
+                key: Decimal(int(values[i])).scaleb(-2) for key, values in columns_out.items()
+            }
+        return results
+
+    def _employer_rates(self, employees: List, base_rate, reimbursement_attr: str):
+        """Per-employee employer rates as numerators over a common denominator"""
+        base_rate = Decimal(str(base_rate))
+        fractions = []
+        for employee in employees:
+            reimbursement_rate = getattr(employee, reimbursement_attr, None)
+            if reimbursement_rate:
+                rate = base_rate * (Decimal('1.00') + reimbursement_rate)
+            else:
+                rate = base_rate
+            fractions.append(rate_to_fraction(rate))
+
+        denominator = max((d for _, d in fractions), default=1)
+        numerators = [n * (denominator // d) for n, d in fractions]
+        return _array(numerators), denominator
+
+    def _calculate_its(self, taxable_income, cnss_amount, cnam_amount, is_expatriate) -> Tuple[List, Any]:
+        """
+        Vectorized PayrollCalculator._calculate_its
+
+        Returns:
+            Tuple (tax arrays for tranche 1, 2 and 3, total tax array)
+        """
+        params = self.system_parameters
+        taxable_income = taxable_income.copy()
+        if params.deduct_cnss_from_its:
+            taxable_income = taxable_income - cnss_amount
+        if params.deduct_cnam_from_its:
+            taxable_income = taxable_income - cnam_amount
+
+        # Apply abatement
+        remaining = np.maximum(taxable_income - to_cents(params.tax_abatement), 0)
+
+        # Same bracket tables as the scalar path (7.5% first bracket for expatriates)
+        brackets = params.get_its_brackets()
+        national_tranches, national_total = ITSBracketTable.from_brackets(brackets).calculate_cents_batch(remaining)
+        expatriate_tranches, expatriate_total = ITSBracketTable.from_brackets(
+            brackets, first_rate=Decimal('0.075')
+        ).calculate_cents_batch(remaining)
+
+        tranches = [np.zeros_like(remaining) for _ in range(3)]
+        for i in range(min(3, len(national_tranches))):
+            tranches[i] = np.where(is_expatriate, expatriate_tranches[i], national_tranches[i])
+        total = np.where(is_expatriate, expatriate_total, national_total)
+
+        return tranches, total
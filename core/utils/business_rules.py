@@ -18,7 +18,7 @@ Integrates with existing enhanced utilities (payroll_calculations, tax_calculati
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import Dict, List, Optional, Union, Tuple
+from typing import Dict, List, Optional, Union, Tuple, Any
 # Cleaned up imports - removed unused Any
 import math
 import warnings
@@ -102,8 +102,10 @@ class PayrollBusinessRules:
             'F21', 'F22', 'F23', 'F24'
         ]
         
-        for code in function_codes:
-            functions[code] = self.calculate_payroll_function(code, employee, motif, period)
+        # F03, F11, F14 and F21 reuse the F02, F10, F12 and F09 results
+        with self.payroll_functions.memoized_run():
+            for code in function_codes:
+                functions[code] = self.calculate_payroll_function(code, employee, motif, period)
         
         return functions
     
@@ -21,8 +21,7 @@ import logging
 import operator
 import threading
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP, getcontext
-from typing import Union, Dict, List, Optional, Callable, Tuple, Set
-# Cleaned up imports - removed unused Any
+from typing import Union, Dict, List, Optional, Callable, Tuple, Set, Any
 from functools import lru_cache, wraps
 from collections import OrderedDict, defaultdict
 import time
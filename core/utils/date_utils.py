@@ -6,8 +6,7 @@ Converted from Java date utilities in GeneralLib.java and other date functions
 
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import List, Optional, Tuple, Union, Dict
-# Cleaned up imports - removed unused Any
+from typing import List, Optional, Tuple, Union, Dict, Any
 import calendar
 import math
 import warnings
@@ -0,0 +1,258 @@
+# email_dispatch.py
+"""
+Batched email dispatch over persistent connections
+Sends large mailings (payslip distributions) without one connection per message
+
+EmailDispatcher.dispatch() takes (key, message) pairs, usually from a
+generator so that messages are built while earlier ones are sent, and yields
+an EmailDelivery per message as soon as it is sent or has failed:
+
+- Connections: an EmailConnectionPool opens at most one backend connection
+  (SMTP session) per worker thread, keeps it open for all the messages the
+  worker sends and reopens it once if the server dropped it.
+- Concurrency: messages are sent by max_workers threads, and at most
+  max_in_flight messages are built and waiting, so memory stays flat for
+  any number of recipients.
+- Rate limits: a DomainRateLimiter spaces the messages sent to each
+  recipient domain, with a default limit and limits per domain.
+
+Callers write the delivery statuses back themselves, in batches.
+
+Usage:
+    dispatcher = EmailDispatcher(max_workers=4, rate_limits={'default': 60, 'gmail.com': 20})
+    for delivery in dispatcher.dispatch((record.id, build_message(record)) for record in records):
+        ...
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import make_msgid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.utils import DNS_NAME
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Threads sending messages, each on its own connection
+DEFAULT_MAX_WORKERS = 4
+
+# Key of the limit applied to domains without their own limit
+DEFAULT_DOMAIN = 'default'
+
+# Refusals the server answered: the session stays usable for other messages
+SESSION_PRESERVING_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+@dataclass
+class EmailDelivery:
+    """Outcome of sending one message"""
+    key: Any
+    sent: bool
+    message_id: str = ""
+    sent_time: Optional[datetime] = None
+    error: str = ""
+
+
+class DomainRateLimiter:
+    """
+    Spaces the messages sent to each recipient domain
+
+    rate_limits maps domains to messages per minute; the 'default' entry
+    applies to the other domains. A domain without a limit is not spaced.
+    """
+
+    def __init__(self, rate_limits: Optional[Dict[str, int]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate_limits = {domain.lower(): limit for domain, limit in (rate_limits or {}).items()}
+        self._clock = clock
+        self._sleep = sleep
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def interval(self, domain: str) -> float:
+        """Seconds between two messages to a domain"""
+        limit = self.rate_limits.get(domain, self.rate_limits.get(DEFAULT_DOMAIN))
+        return 60.0 / limit if limit else 0.0
+
+    def acquire(self, address: str) -> float:
+        """Wait for the next slot of the address domain, return the seconds waited"""
+        domain = address.rpartition('@')[2].lower()
+        interval = self.interval(domain)
+        if not interval:
+            return 0.0
+
+        # Slots are reserved under the lock and waited for outside it
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + interval
+
+        delay = slot - now
+        if delay > 0:
+            self._sleep(delay)
+        return delay
+
+
+class EmailConnectionPool:
+    """
+    Persistent email backend connections shared by sending threads
+
+    Connections are opened on demand, up to size, and returned to the pool
+    after each message instead of being closed.
+    """
+
+    def __init__(self, size: int = DEFAULT_MAX_WORKERS, backend: Optional[str] = None, **backend_kwargs):
+        self.size = size
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self.opened_count = 0
+        self._idle: List[Any] = []
+        self._open: List[Any] = []
+        self._available = threading.Condition()
+
+    def _open_connection(self):
+        connection = get_connection(self.backend, fail_silently=False, **self.backend_kwargs)
+        connection.open()
+        with self._available:
+            self.opened_count += 1
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection: an idle one, a new one under size, or wait for one"""
+        with self._available:
+            while not self._idle and len(self._open) >= self.size:
+                self._available.wait()
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = None
+                self._open.append(None)
+
+        try:
+            if connection is None:
+                connection = self._open_connection()
+                with self._available:
+                    self._open[self._open.index(None)] = connection
+            yield connection
+        except SESSION_PRESERVING_ERRORS:
+            with self._available:
+                self._idle.append(connection)
+                self._available.notify()
+            raise
+        except Exception:
+            # The connection may be in any state: drop it
+            self.discard(connection)
+            raise
+        else:
+            with self._available:
+                self._idle.append(connection)
+                self._available.notify()
+
+    def discard(self, connection):
+        """Close a connection and free its place in the pool"""
+        with self._available:
+            self._open.remove(connection)
+            self._available.notify()
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Email connection close error: {str(e)}")
+
+    def close(self):
+        """Close every idle connection"""
+        with self._available:
+            idle, self._idle = self._idle, []
+            for connection in idle:
+                self._open.remove(connection)
+        for connection in idle:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.warning(f"Email connection close error: {str(e)}")
+
+
+class EmailDispatcher:
+    """Sends messages with bounded concurrency over pooled connections"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 rate_limits: Optional[Dict[str, int]] = None,
+                 max_in_flight: Optional[int] = None,
+                 backend: Optional[str] = None,
+                 rate_limiter: Optional[DomainRateLimiter] = None,
+                 **backend_kwargs):
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max_in_flight or self.max_workers * 4
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self.rate_limiter = rate_limiter or DomainRateLimiter(rate_limits)
+        self.connections_opened = 0
+
+    def dispatch(self, messages: Iterable[Tuple[Any, EmailMessage]]) -> Iterator[EmailDelivery]:
+        """
+        Send messages and yield their deliveries in completion order
+
+        Args:
+            messages: (key, message) pairs, the key is returned in the delivery
+
+        Yields:
+            EmailDelivery of each message
+        """
+        pool = EmailConnectionPool(self.max_workers, self.backend, **self.backend_kwargs)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers,
+                                    thread_name_prefix='email-dispatch') as executor:
+                pending = set()
+                for key, message in messages:
+                    if len(pending) >= self.max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield future.result()
+                    pending.add(executor.submit(self._send, pool, key, message))
+
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+        finally:
+            pool.close()
+            self.connections_opened += pool.opened_count
+
+    def _send(self, pool: EmailConnectionPool, key: Any, message: EmailMessage) -> EmailDelivery:
+        """Send one message, on a fresh connection again if the server dropped the pooled one"""
+        # The Message-ID is set here so that it can be stored with the delivery
+        message.extra_headers.setdefault('Message-ID', make_msgid(domain=DNS_NAME))
+        message_id = message.extra_headers['Message-ID']
+
+        try:
+            for domain in sorted({address.rpartition('@')[2].lower() for address in message.recipients()}):
+                self.rate_limiter.acquire(f"@{domain}")
+
+            for attempt in range(2):
+                try:
+                    with pool.connection() as connection:
+                        sent = connection.send_messages([message])
+                    break
+                except smtplib.SMTPServerDisconnected:
+                    if attempt:
+                        raise
+                    logger.info("Email connection dropped by the server, reconnecting")
+
+            if not sent:
+                return EmailDelivery(key, False, message_id, error="Message non envoyé")
+            return EmailDelivery(key, True, message_id, sent_time=timezone.now())
+
+        except Exception as e:
+            logger.error(f"Email send error: {str(e)}")
+            return EmailDelivery(key, False, message_id, error=str(e))
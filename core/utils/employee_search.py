@@ -0,0 +1,447 @@
+# employee_search.py
+"""
+Employee search index
+Prefix and typo-tolerant employee search on a dedicated index table
+
+Each employee has one EmployeeSearchIndex row holding the normalized tokens
+of its searchable columns: names in Latin and Arabic script (accents,
+diacritics and letter variants folded, Arabic through
+ArabicTextUtils.normalize_arabic_text), NNI, CNSS/CNAM numbers, phone and
+email. Identifiers are also indexed without their separators. The row is
+refreshed by core.signals when the employee is saved.
+
+Matching:
+- On SQLite the index rows are mirrored into an FTS5 table by triggers
+  (install_search_backend) and every query term is a prefix query on it.
+- Other backends match the tokens of the index rows with LIKE; on PostgreSQL
+  a pg_trgm GIN index makes these lookups indexed.
+- Typo tolerance: query terms of 4 characters or more are also matched
+  against the indexed words within one or two edits, found through a trigram
+  index of the vocabulary kept in memory and rebuilt when the index changes.
+
+Employees created with bulk_create() or changed with update() do not send
+signals: run `manage.py rebuild_employee_search_index` afterwards.
+
+Usage:
+    Employee.objects.filter(search_condition("moham sidi"))
+    search_employees("mouhamed", limit=20)  # employee ids, best matches first
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+import uuid
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .text_utils import ArabicTextUtils
+
+logger = logging.getLogger(__name__)
+
+# Employee columns of the search document
+SEARCH_FIELDS = (
+    'first_name', 'last_name', 'father_name', 'mother_name',
+    'national_id', 'cnss_number', 'cnam_number', 'phone', 'email'
+)
+
+# Columns also indexed without separators ("22 45 10 10" -> "22451010")
+IDENTIFIER_FIELDS = ('national_id', 'cnss_number', 'cnam_number', 'phone')
+
+INDEX_TABLE = 'rechercheemploye'
+FTS_TABLE = 'rechercheemploye_fts'
+
+SEARCH_VOCABULARY_VERSION_KEY = "employee_search:version"
+
+# Typo tolerance: minimum term length, and trigram similarity of the candidates
+FUZZY_MIN_LENGTH = 4
+FUZZY_MIN_SIMILARITY = 0.3
+FUZZY_MAX_CANDIDATES = 5
+
+# Arabic letter variants folded after hamza carriers are reduced to their base letter
+_ARABIC_FOLDING = str.maketrans({
+    'ي': 'ى',  # Yeh -> Alef Maksura (as ArabicTextUtils.normalize_arabic_text)
+    'ی': 'ى',  # Farsi Yeh
+    'ة': 'ه',  # Teh Marbuta -> Heh
+    'ک': 'ك',  # Keheh -> Kaf
+})
+
+_TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+FTS_SETUP_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"content, content='{INDEX_TABLE}', content_rowid='employee_id', prefix='2 3')",
+    f"CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_ai AFTER INSERT ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.employee_id, new.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_ad AFTER DELETE ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.employee_id, old.content); END",
+    f"CREATE TRIGGER IF NOT EXISTS {INDEX_TABLE}_au AFTER UPDATE ON {INDEX_TABLE} BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, content) VALUES ('delete', old.employee_id, old.content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, content) VALUES (new.employee_id, new.content); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+FTS_TEARDOWN_SQL = (
+    f"DROP TRIGGER IF EXISTS {INDEX_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {INDEX_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {INDEX_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+TRIGRAM_SETUP_SQL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"CREATE INDEX IF NOT EXISTS {INDEX_TABLE}_content_trgm ON {INDEX_TABLE} USING gin (content gin_trgm_ops)",
+)
+
+
+# ========== NORMALIZATION ==========
+
+def normalize_search_text(text: str) -> str:
+    """
+    Fold text for matching: lower case, no Latin accents, no Arabic
+    diacritics or tatweel, hamza carriers and letter variants unified
+    """
+    if not text:
+        return ""
+    text = ArabicTextUtils.normalize_arabic_text(str(text))
+    text = ArabicTextUtils.remove_arabic_diacritics(text).lower()
+    # Decomposition splits accents and hamza marks from their base letter
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return text.translate(_ARABIC_FOLDING)
+
+
+def search_tokens(text: str) -> List[str]:
+    """Distinct normalized words of a text, in order"""
+    return list(dict.fromkeys(_TOKEN_PATTERN.findall(normalize_search_text(text))))
+
+
+def search_document(values: Dict[str, str]) -> str:
+    """
+    Index content of an employee
+
+    Args:
+        values: Employee column values by name (SEARCH_FIELDS)
+
+    Returns:
+        Space-separated tokens, with a leading and trailing space so every
+        token can be matched as ' token'
+    """
+    tokens = []
+    for name in SEARCH_FIELDS:
+        words = _TOKEN_PATTERN.findall(normalize_search_text(values.get(name) or ''))
+        tokens.extend(words)
+        if name in IDENTIFIER_FIELDS and len(words) > 1:
+            tokens.append(''.join(words))
+    tokens = list(dict.fromkeys(tokens))
+    return f" {' '.join(tokens)} " if tokens else ''
+
+
+# ========== INDEX MAINTENANCE ==========
+
+def update_employee_search_entry(employee) -> bool:
+    """
+    Refresh the index row of a saved employee
+
+    Returns:
+        True if the indexed content changed
+    """
+    from ..models import EmployeeSearchIndex
+
+    content = search_document({name: getattr(employee, name, '') for name in SEARCH_FIELDS})
+    current = EmployeeSearchIndex.objects.filter(employee_id=employee.pk).values_list('content', flat=True).first()
+    if current == content:
+        return False
+    if current is None:
+        EmployeeSearchIndex.objects.create(employee_id=employee.pk, content=content)
+    else:
+        EmployeeSearchIndex.objects.filter(employee_id=employee.pk).update(content=content)
+    invalidate_search_vocabulary()
+    return True
+
+
+def rebuild_employee_search_index(batch_size: int = 1000) -> int:
+    """
+    Rebuild the index rows of every employee
+
+    Returns:
+        Number of employees indexed
+    """
+    from ..models import Employee, EmployeeSearchIndex
+
+    count = 0
+    with transaction.atomic():
+        EmployeeSearchIndex.objects.all().delete()
+        batch = []
+        for values in Employee.objects.order_by('id').values('id', *SEARCH_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(EmployeeSearchIndex(employee_id=values['id'], content=search_document(values)))
+            if len(batch) >= batch_size:
+                EmployeeSearchIndex.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        EmployeeSearchIndex.objects.bulk_create(batch)
+        count += len(batch)
+    invalidate_search_vocabulary()
+    return count
+
+
+def install_search_backend(schema_connection=None) -> bool:
+    """
+    Create the database-side search structures (idempotent)
+
+    SQLite: the FTS5 table and the triggers copying the index rows into it.
+    PostgreSQL: a pg_trgm GIN index on the index content.
+
+    Returns:
+        True if a backend-specific index is available
+    """
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor == 'sqlite':
+        statements = FTS_SETUP_SQL
+    elif schema_connection.vendor == 'postgresql':
+        statements = TRIGRAM_SETUP_SQL
+    else:
+        return False
+
+    try:
+        with transaction.atomic(using=schema_connection.alias), schema_connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    except DatabaseError as e:
+        # No FTS5 module in this SQLite build / no right to create the extension
+        logger.warning(f"Employee search falls back to token matching: {e}")
+        return False
+    finally:
+        _fts_tables.pop(schema_connection.alias, None)
+    return True
+
+
+def uninstall_search_backend(schema_connection=None):
+    """Drop the FTS5 table and its triggers"""
+    schema_connection = schema_connection or connection
+    if schema_connection.vendor == 'sqlite':
+        with schema_connection.cursor() as cursor:
+            for statement in FTS_TEARDOWN_SQL:
+                cursor.execute(statement)
+    _fts_tables.pop(schema_connection.alias, None)
+
+
+_fts_tables: Dict[str, bool] = {}
+
+
+def fts_enabled(using: str = 'default') -> bool:
+    """Whether the FTS5 table of the index exists on a SQLite database"""
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return False
+    if using not in _fts_tables:
+        with db.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_tables[using] = cursor.fetchone() is not None
+    return _fts_tables[using]
+
+
+# ========== TYPO TOLERANCE ==========
+
+def _trigrams(token: str) -> List[str]:
+    padded = f"  {token} "
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def _edit_distance(first: str, second: str, limit: int) -> int:
+    """Optimal string alignment distance, returns limit + 1 once above limit"""
+    if abs(len(first) - len(second)) > limit:
+        return limit + 1
+    before_previous, previous_row = None, None
+    row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        before_previous, previous_row, row = previous_row, row, [i] + [0] * len(second)
+        for j, second_char in enumerate(second, 1):
+            cost = first_char != second_char
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first_char == second[j - 2] and first[i - 2] == second_char:
+                row[j] = min(row[j], before_previous[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+    return row[-1]
+
+
+def max_typos(term: str) -> int:
+    """Edits tolerated for a query term"""
+    if len(term) < FUZZY_MIN_LENGTH or term.isdigit():
+        return 0
+    return 1 if len(term) <= 7 else 2
+
+
+class SearchVocabulary:
+    """
+    Indexed words with a trigram index, to find the words close to a
+    misspelled query term
+
+    Build with SearchVocabulary.build() or get the shared instance with
+    get_search_vocabulary().
+    """
+
+    def __init__(self, words: Iterable[str], version: Optional[str] = None):
+        self.version = version
+        self.trigram_counts = {}
+        self.trigram_words = defaultdict(list)
+        for word in set(words):
+            grams = _trigrams(word)
+            self.trigram_counts[word] = len(grams)
+            for gram in grams:
+                self.trigram_words[gram].append(word)
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'SearchVocabulary':
+        """Read the words of every index row with one query"""
+        from ..models import EmployeeSearchIndex
+
+        words = set()
+        for content in EmployeeSearchIndex.objects.values_list('content', flat=True).iterator(chunk_size=2000):
+            words.update(content.split())
+        return cls((word for word in words if not word.isdigit()), version)
+
+    def similar_words(self, term: str, limit: int = FUZZY_MAX_CANDIDATES) -> List[str]:
+        """Indexed words within max_typos(term) edits of a term, closest first"""
+        typos = max_typos(term)
+        if not typos:
+            return []
+
+        term_grams = _trigrams(term)
+        shared = Counter()
+        for gram in term_grams:
+            shared.update(self.trigram_words.get(gram, ()))
+
+        candidates = []
+        for word, count in shared.items():
+            similarity = count / (len(term_grams) + self.trigram_counts[word] - count)
+            if word == term or similarity < FUZZY_MIN_SIMILARITY:
+                continue
+            distance = _edit_distance(term, word, typos)
+            if distance <= typos:
+                candidates.append((distance, -similarity, word))
+        return [word for _, _, word in sorted(candidates)[:limit]]
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def _current_version() -> str:
+    version = cache.get(SEARCH_VOCABULARY_VERSION_KEY)
+    if version is None:
+        cache.add(SEARCH_VOCABULARY_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SEARCH_VOCABULARY_VERSION_KEY, '')
+    return version
+
+
+def get_search_vocabulary() -> SearchVocabulary:
+    """Shared vocabulary, rebuilt when the index changed since it was built"""
+    global _vocabulary
+
+    version = _current_version()
+    with _vocabulary_lock:
+        if _vocabulary is None or _vocabulary.version != version:
+            _vocabulary = SearchVocabulary.build(version)
+        return _vocabulary
+
+
+def invalidate_search_vocabulary():
+    """Make every process rebuild its search vocabulary on next use"""
+    def bump():
+        cache.set(SEARCH_VOCABULARY_VERSION_KEY, uuid.uuid4().hex, None)
+
+    bump()
+    if connection.in_atomic_block:
+        transaction.on_commit(bump)
+
+
+# ========== QUERIES ==========
+
+def expand_search_terms(text: str, fuzzy: bool = True) -> List[List[str]]:
+    """
+    Alternatives of each query term: the term itself (matched as a prefix)
+    followed by the indexed words it may be a misspelling of
+    """
+    terms = search_tokens(text)
+    if not fuzzy or not any(max_typos(term) for term in terms):
+        return [[term] for term in terms]
+    vocabulary = get_search_vocabulary()
+    return [[term] + vocabulary.similar_words(term) for term in terms]
+
+
+def _fts_query(alternatives: List[List[str]]) -> str:
+    """FTS5 MATCH expression: every term, each as a prefix or one of its corrections"""
+    groups = []
+    for term, *corrections in alternatives:
+        options = [f'"{term}"*'] + [f'"{word}"' for word in corrections]
+        groups.append(f"({' OR '.join(options)})")
+    return ' AND '.join(groups)
+
+
+def search_condition(text: str, fuzzy: bool = True, using: str = 'default') -> Q:
+    """
+    Filter of the employees matching every term of a search text
+
+    Args:
+        text: Search text (names in Latin or Arabic script, identifiers, email...)
+        fuzzy: Also match misspelled terms
+        using: Database alias
+
+    Returns:
+        Q object for Employee querysets (matches everything for an empty text)
+    """
+    alternatives = expand_search_terms(text, fuzzy)
+    if not alternatives:
+        return Q()
+
+    if fts_enabled(using):
+        return Q(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [_fts_query(alternatives)]
+        ))
+
+    condition = Q()
+    for term, *corrections in alternatives:
+        term_condition = Q(search_entry__content__contains=f' {term}')
+        for word in corrections:
+            term_condition |= Q(search_entry__content__contains=f' {word} ')
+        condition &= term_condition
+    return condition
+
+
+def search_employees(text: str, limit: int = 50, fuzzy: bool = True, using: str = 'default') -> List[int]:
+    """
+    Ids of the employees matching a search text, best matches first
+
+    FTS5 ranks with bm25; other backends put employees matching every
+    term as typed (without corrections) first, then order by name.
+    """
+    from ..models import Employee
+
+    alternatives = expand_search_terms(text, fuzzy)
+    if not alternatives:
+        return []
+
+    if fts_enabled(using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+                [_fts_query(alternatives), limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    employees = Employee.objects.using(using).filter(search_condition(text, fuzzy, using))
+    exact = Q()
+    for term, *_ in alternatives:
+        exact &= Q(search_entry__content__contains=f' {term}')
+    ids = list(employees.filter(exact).order_by('last_name', 'first_name', 'id').values_list('id', flat=True)[:limit])
+    if len(ids) < limit:
+        ids += list(employees.exclude(id__in=ids).order_by('last_name', 'first_name', 'id').values_list(
+            'id', flat=True
+        )[:limit - len(ids)])
+    return ids
@@ -0,0 +1,293 @@
+# employee_snapshot.py
+"""
+In-memory employee dimension snapshot for HR dashboards
+
+Holds one NumPy array per employee attribute the dashboards count on: ids,
+organizational ids, birth/hire/termination/contract-end dates, status flags
+and missing-registration flags. The snapshot is built from a single
+values_list() query and rebuilt lazily after an Employee is saved or deleted
+(core.signals bumps a version token in the Django cache, so every process
+sees the change). Status, age and seniority distributions, contract-expiry
+windows and missing-registration counts are then computed with vectorized
+operations instead of one Python pass and one count() query per metric.
+
+Usage:
+    snapshot = get_employee_snapshot()
+    selected = snapshot.select(filters)
+    counts = snapshot.dashboard_counts(selected, date.today())
+"""
+
+import logging
+import threading
+import uuid
+from datetime import date
+from typing import Any, Dict, Optional
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .date_utils import DateCalculator
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_SNAPSHOT_VERSION_KEY = "employee_snapshot:version"
+
+# Organizational ids stored as int64 (-1 when empty)
+DIMENSION_COLUMNS = ('department_id', 'direction_id', 'general_direction_id', 'position_id')
+
+# Dates stored as datetime64[D] (NaT when empty)
+DATE_COLUMNS = ('birth_date', 'hire_date', 'termination_date', 'contract_end_date')
+
+# Boolean employee flags
+FLAG_COLUMNS = ('is_active', 'is_expatriate', 'on_leave')
+
+# Registration numbers stored as "missing" flags
+REGISTRATION_COLUMNS = {
+    'national_id': 'missing_nni',
+    'cnss_number': 'missing_cnss',
+    'cnam_number': 'missing_cnam',
+}
+
+# Report filter keys (EmployeeReportFilter) answered from the id columns
+ID_FILTERS = {
+    'employee_ids': 'id',
+    'departments': 'department_id',
+    'directions': 'direction_id',
+    'general_directions': 'general_direction_id',
+    'positions': 'position_id',
+}
+
+# Probation period after hiring (EmployeeDataExtractor._get_employment_status)
+PROBATION_MONTHS = 6
+
+# Upper bounds of the dashboard age buckets (inclusive) and seniority buckets (exclusive)
+AGE_BUCKETS = (('18-25', 25), ('26-35', 35), ('36-45', 45), ('46-55', 55), ('55+', None))
+SENIORITY_BUCKETS = (('0-2 ans', 2), ('2-5 ans', 5), ('5-10 ans', 10), ('10-15 ans', 15), ('15+ ans', None))
+
+
+def _add_months(dates, months: int):
+    """Add months to a datetime64[D] array, clamping the day to the month length"""
+    month_starts = dates.astype('datetime64[M]')
+    days = (dates - month_starts.astype('datetime64[D]')).astype('timedelta64[D]')
+    target = month_starts + months
+    month_lengths = (target + 1).astype('datetime64[D]') - target.astype('datetime64[D]')
+    return target.astype('datetime64[D]') + np.minimum(days, month_lengths - np.timedelta64(1, 'D'))
+
+
+class EmployeeSnapshot:
+    """
+    Column arrays of every employee, one row per employee
+
+    Build with EmployeeSnapshot.build() or get the shared instance with
+    get_employee_snapshot().
+    """
+
+    def __init__(self, columns: Dict[str, Any], version: Optional[str] = None):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for employee snapshots")
+        self.columns = columns
+        self.version = version
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'EmployeeSnapshot':
+        """Read every employee with one query"""
+        from ..models import Employee
+
+        names = ('id',) + DIMENSION_COLUMNS + DATE_COLUMNS + FLAG_COLUMNS + tuple(REGISTRATION_COLUMNS)
+        rows = list(Employee.objects.order_by('id').values_list(*names))
+        values = dict(zip(names, zip(*rows))) if rows else {name: () for name in names}
+
+        columns = {'id': np.array(values['id'], dtype=np.int64)}
+        for name in DIMENSION_COLUMNS:
+            columns[name] = np.array([-1 if value is None else value for value in values[name]], dtype=np.int64)
+        for name in DATE_COLUMNS:
+            columns[name] = np.array(values[name], dtype='datetime64[D]')
+        for name in FLAG_COLUMNS:
+            columns[name] = np.array(values[name], dtype=bool)
+        for name, flag in REGISTRATION_COLUMNS.items():
+            columns[flag] = np.array([not value for value in values[name]], dtype=bool)
+        columns['probation_end'] = _add_months(columns['hire_date'], PROBATION_MONTHS)
+        return cls(columns, version)
+
+    # ========== SELECTION ==========
+
+    def select(self, filters=None):
+        """
+        Boolean mask of the employees matching report filters
+
+        Filters the arrays can answer are applied in memory; a text search
+        falls back to one id query on EmployeeDataExtractor's queryset.
+        """
+        selected = np.ones(len(self), dtype=bool)
+        if not filters:
+            return selected
+
+        if getattr(filters, 'search_text', None):
+            from ..reports.employee_reports import EmployeeDataExtractor
+
+            ids = EmployeeDataExtractor.get_base_employee_queryset(filters).prefetch_related(None).values_list(
+                'id', flat=True
+            )
+            return np.isin(self.columns['id'], np.fromiter(ids, dtype=np.int64))
+
+        for key, column in ID_FILTERS.items():
+            values = getattr(filters, key, None)
+            if values:
+                selected &= np.isin(self.columns[column], np.array(values, dtype=np.int64))
+        for key in ('is_active', 'is_expatriate'):
+            value = getattr(filters, key, None)
+            if value is not None:
+                selected &= self.columns[key] == value
+
+        # Date bounds, as EmployeeDataExtractor.get_base_employee_queryset applies them
+        today = date.today()
+        bounds = [
+            ('hire_date', '>=', filters.hire_date_from),
+            ('hire_date', '<=', filters.hire_date_to),
+            ('termination_date', '>=', filters.termination_date_from),
+            ('termination_date', '<=', filters.termination_date_to),
+        ]
+        if filters.age_from:
+            bounds.append(('birth_date', '<=', DateCalculator.add_years(today, -filters.age_from)))
+        if filters.age_to:
+            bounds.append(('birth_date', '>=', DateCalculator.add_years(today, -filters.age_to - 1)))
+        if filters.seniority_from:
+            bounds.append(('hire_date', '<=', DateCalculator.add_years(today, -filters.seniority_from)))
+        if filters.seniority_to:
+            bounds.append(('hire_date', '>=', DateCalculator.add_years(today, -filters.seniority_to - 1)))
+        for column, operator, bound in bounds:
+            if bound:
+                bound = np.datetime64(bound, 'D')
+                selected &= self.columns[column] >= bound if operator == '>=' else self.columns[column] <= bound
+
+        for key in ('missing_nni', 'missing_cnss', 'missing_cnam'):
+            if getattr(filters, key, None):
+                selected &= self.columns[key]
+        return selected
+
+    # ========== DASHBOARD METRICS ==========
+
+    def employment_statuses(self, today: date):
+        """
+        Employment status of each employee (EmployeeStatusType values)
+
+        Same rules as EmployeeDataExtractor._get_employment_status.
+        """
+        today = np.datetime64(today, 'D')
+        active = self.columns['is_active']
+        statuses = np.full(len(self), 'active', dtype='<U10')
+        statuses[active & (today <= self.columns['probation_end'])] = 'probation'
+        statuses[active & self.columns['on_leave']] = 'on_leave'
+        statuses[~active] = 'inactive'
+        statuses[~active & ~np.isnat(self.columns['termination_date'])] = 'terminated'
+        return statuses
+
+    def ages(self, today: date):
+        """Age in years (DateCalculator.age_years), -1 without birth date"""
+        days = (np.datetime64(today, 'D') - self.columns['birth_date']).astype(np.int64)
+        return np.where(np.isnat(self.columns['birth_date']), -1, days // 365)
+
+    def seniorities(self, today: date):
+        """Complete years since hiring (SeniorityCalculator), -1 without hire date"""
+        hire_dates = self.columns['hire_date']
+        months = hire_dates.astype('datetime64[M]')
+        years = hire_dates.astype('datetime64[Y]').astype(np.int64) + 1970
+        # (month, day) keys: no complete year until the hiring anniversary
+        month_days = ((months.astype(np.int64) % 12 + 1) * 100
+                      + (hire_dates - months.astype('datetime64[D]')).astype(np.int64) + 1)
+        seniority = today.year - years - (today.month * 100 + today.day < month_days)
+        return np.where(np.isnat(hire_dates), -1, seniority)
+
+    def dashboard_counts(self, selected, today: date, expiry_days: int = 90) -> Dict[str, Any]:
+        """
+        Counts of the HR dashboard for the selected employees
+
+        Args:
+            selected: Boolean mask (see select)
+            today: Reference date
+            expiry_days: Contract expiry alert window
+
+        Returns:
+            Employee counts, status/age/seniority distributions and alerts
+        """
+        total = int(selected.sum())
+        active = int((selected & self.columns['is_active']).sum())
+
+        labels, counts = np.unique(self.employment_statuses(today)[selected], return_counts=True)
+
+        ages = self.ages(today)[selected]
+        ages = ages[ages >= 0]
+        age_counts = np.bincount(
+            np.digitize(ages, [bound for _, bound in AGE_BUCKETS[:-1]], right=True), minlength=len(AGE_BUCKETS)
+        )
+
+        seniorities = self.seniorities(today)[selected]
+        seniorities = seniorities[seniorities >= 0]
+        seniority_counts = np.bincount(
+            np.digitize(seniorities, [bound for _, bound in SENIORITY_BUCKETS[:-1]]),
+            minlength=len(SENIORITY_BUCKETS)
+        )
+
+        days_to_expiry = (self.columns['contract_end_date'] - np.datetime64(today, 'D')).astype(np.int64)
+        expiring = (selected & self.columns['is_active'] & ~np.isnat(self.columns['contract_end_date'])
+                    & (days_to_expiry >= 0) & (days_to_expiry <= expiry_days))
+
+        return {
+            'employee_counts': {'total': total, 'active': active, 'inactive': total - active},
+            'status_distribution': {str(label): int(count) for label, count in zip(labels, counts)},
+            'age_distribution': {label: int(count) for (label, _), count in zip(AGE_BUCKETS, age_counts)},
+            'seniority_distribution': {
+                label: int(count) for (label, _), count in zip(SENIORITY_BUCKETS, seniority_counts)
+            },
+            'contracts_expiring_soon': int(expiring.sum()),
+            'missing_nni': int((selected & self.columns['missing_nni']).sum()),
+            'missing_cnss': int((selected & self.columns['missing_cnss']).sum()),
+            'missing_cnam': int((selected & self.columns['missing_cnam']).sum()),
+        }
+
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def _current_version() -> str:
+    version = cache.get(EMPLOYEE_SNAPSHOT_VERSION_KEY)
+    if version is None:
+        cache.add(EMPLOYEE_SNAPSHOT_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(EMPLOYEE_SNAPSHOT_VERSION_KEY, '')
+    return version
+
+
+def get_employee_snapshot() -> EmployeeSnapshot:
+    """Shared employee snapshot, rebuilt when employees changed since it was built"""
+    global _snapshot
+
+    # Read the version before the rows so a concurrent change triggers another rebuild
+    version = _current_version()
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = EmployeeSnapshot.build(version)
+        return _snapshot
+
+
+def invalidate_employee_snapshot():
+    """Make every process rebuild its employee snapshot on next use"""
+    def bump():
+        cache.set(EMPLOYEE_SNAPSHOT_VERSION_KEY, uuid.uuid4().hex, None)
+
+    bump()
+    if connection.in_atomic_block:
+        # Again on commit so a snapshot built from the uncommitted rows meanwhile is not kept
+        transaction.on_commit(bump)
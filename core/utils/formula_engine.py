@@ -6,15 +6,21 @@ Supports payroll element formulas with functions, variables, and cross-reference
 """
 
 # Standard library imports
+import os
 import re
+import hashlib
 import logging
 import time
 import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from typing import Union, Tuple, Optional, Dict, List, Set, Any
+from typing import Union, Tuple, Optional, Dict, List, Set, Any, Callable, NamedTuple
 from functools import lru_cache
 from collections import defaultdict, OrderedDict
 
+from .worker_pools import initialize_worker_django, prepare_worker_pool, worker_pool_context
+
 # Cleaned up imports - removed unused datetime, date
 
 
@@ -231,6 +237,387 @@ class FormulaEngine:
         return self.error_message
 
 
+# ========== FORMULA COMPILATION ==========
+
+# Versions of formulas that are not stored in the database (elements built
+# in memory), bumped by invalidate_compiled_formulas(). Formulas of
+# PayrollElement rows are versioned by the content of their rows instead.
+_formula_versions = defaultdict(int)
+_global_formula_version = 0
+_formula_version_lock = threading.Lock()
+
+
+def invalidate_compiled_formulas(payroll_element_id: Optional[int] = None):
+    """
+    Invalidate compiled formulas of elements that are not stored in the database
+
+    Compiled formulas of PayrollElement rows need no invalidation: they are
+    checked against the formula rows stored in the database.
+
+    Args:
+        payroll_element_id: Element whose formula components changed, or None
+            to invalidate every compiled formula
+    """
+    global _global_formula_version
+    with _formula_version_lock:
+        if payroll_element_id is None:
+            _global_formula_version += 1
+        else:
+            _formula_versions[payroll_element_id] += 1
+
+
+def get_formula_version(payroll_element_id: int) -> Tuple[int, int]:
+    """Get the current formula version stamp of an element not stored in the database"""
+    return (_global_formula_version, _formula_versions.get(payroll_element_id, 0))
+
+
+def formula_components_digest(components) -> str:
+    """Hash formula components, as stored in PayrollElementFormula rows"""
+    digest = hashlib.sha256()
+    for component in components:
+        digest.update(repr((
+            getattr(component, 'component_type', None),
+            getattr(component, 'text_value', None),
+            getattr(component, 'numeric_value', None),
+        )).encode())
+    return digest.hexdigest()
+
+
+class CompiledFormula:
+    """
+    Pre-parsed payroll element formula - compiled form of PaieClass.formulRubrique
+
+    The expression tree is built once from the PayrollElementFormula rows.
+    Functions (F tokens) and rubrique references (R tokens) are kept as typed
+    slots whose values are bound at evaluation time, so evaluating a formula
+    for a new employee does not rebuild or re-parse any expression string.
+    """
+
+    def __init__(self, evaluator, slots: List[Tuple[str, Union[str, int]]], source: str):
+        self._evaluator = evaluator
+        self.slots = slots
+        self.source = source
+
+    @property
+    def function_slots(self) -> List[str]:
+        """Function codes bound at evaluation time"""
+        return [value for slot_type, value in self.slots if slot_type == 'F']
+
+    @property
+    def reference_slots(self) -> List[int]:
+        """Rubrique IDs bound at evaluation time"""
+        return [value for slot_type, value in self.slots if slot_type == 'R']
+
+    @property
+    def is_static(self) -> bool:
+        """Check if formula has no function or reference slots"""
+        return not self.slots
+
+    def evaluate(self, resolve_function=None, resolve_reference=None) -> Decimal:
+        """
+        Evaluate compiled formula with slot values bound by the resolvers
+
+        Args:
+            resolve_function: Callable taking a function code (e.g. 'F02')
+            resolve_reference: Callable taking a rubrique ID
+
+        Returns:
+            Decimal result of the formula
+
+        Raises:
+            FormulaCalculationError: On division by zero or invalid formula
+        """
+        values = []
+        for slot_type, value in self.slots:
+            resolver = resolve_function if slot_type == 'F' else resolve_reference
+            values.append(self._to_decimal(resolver(value) if resolver else 0))
+        return self._evaluator(values)
+
+    @staticmethod
+    def _to_decimal(value) -> Decimal:
+        """Convert slot value to Decimal"""
+        if isinstance(value, Decimal):
+            return value
+        try:
+            return Decimal(str(value if value is not None else 0))
+        except InvalidOperation:
+            raise FormulaCalculationError(f"Nombre invalide: {value}")
+
+    def __repr__(self):
+        return f"CompiledFormula({self.source!r})"
+
+
+class FormulaCompiler:
+    """
+    Compiles PayrollElementFormula components into CompiledFormula objects
+
+    Follows the same grammar as FormulaEngine (Java Calcul.class) so a compiled
+    formula gives the same result as building and parsing the formula string.
+    Compiled formulas are cached per (element, section) and checked against
+    the element's formula rows in the database, so a formula changed by
+    another process or by a bulk update is recompiled. Within a run the
+    check is skipped: the run's formula version (FormulaDependencyCache)
+    stamps the formulas compiled or checked for it.
+    """
+
+    # Marker used for F/R slots in the compile-time template
+    SLOT_MARKER = '$'
+
+    def __init__(self):
+        self._compiled_cache = {}
+        self._cache_lock = threading.RLock()
+        self._stats = {'compilations': 0, 'cache_hits': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def get_compiled_formula(self, payroll_element, section: str, components=None,
+                             version: Optional[str] = None) -> CompiledFormula:
+        """
+        Get compiled formula for an element section, compiling it if needed
+
+        Args:
+            payroll_element: PayrollElement instance
+            section: 'B' for base, 'N' for number
+            components: Optional formula components (fetched by caller)
+            version: Formula version of the current run; a formula already
+                checked under this version is reused without a query
+
+        Returns:
+            CompiledFormula instance
+        """
+        cache_key = (payroll_element.id, section)
+        stored = hasattr(payroll_element, '_meta')
+        # Elements built in memory have no rows to check: versioned locally
+        stamp = version if stored else get_formula_version(payroll_element.id)
+
+        with self._cache_lock:
+            cached = self._compiled_cache.get(cache_key)
+            if cached is not None and stamp is not None and cached[0] == stamp:
+                self._stats['cache_hits'] += 1
+                return cached[2]
+
+        if components is None:
+            components = self._get_formula_components(payroll_element, section)
+        digest = formula_components_digest(components) if stored else None
+
+        with self._cache_lock:
+            cached = self._compiled_cache.get(cache_key)
+            if cached is not None and digest is not None and cached[1] == digest:
+                # Formula rows unchanged: stamp the compiled formula for this run
+                self._compiled_cache[cache_key] = (stamp, digest, cached[2])
+                self._stats['cache_hits'] += 1
+                return cached[2]
+
+        compiled = self.compile_components(components)
+
+        with self._cache_lock:
+            self._compiled_cache[cache_key] = (stamp, digest, compiled)
+            self._stats['compilations'] += 1
+
+        return compiled
+
+    def compile_components(self, components) -> CompiledFormula:
+        """
+        Compile formula components into a CompiledFormula
+
+        Args:
+            components: Iterable of PayrollElementFormula instances ordered by ID
+
+        Returns:
+            CompiledFormula instance (invalid expressions raise
+            FormulaCalculationError when evaluated, like FormulaEngine)
+        """
+        template_parts = []
+        source_parts = []
+        slots = []
+
+        for component in components:
+            component_type = getattr(component, 'component_type', 'O')
+
+            if component_type == 'O':  # Operator
+                text_value = getattr(component, 'text_value', '') or ''
+                template_parts.append(text_value)
+                source_parts.append(text_value)
+
+            elif component_type == 'N':  # Number
+                numeric_value = getattr(component, 'numeric_value', 0)
+                if numeric_value is None:
+                    template_parts.append('0')
+                    source_parts.append('0')
+                elif numeric_value > 0:
+                    template_parts.append(str(numeric_value))
+                    source_parts.append(str(numeric_value))
+
+            elif component_type in ('F', 'R'):  # Function or rubrique reference
+                text_value = getattr(component, 'text_value', '') or ''
+                if component_type == 'R':
+                    try:
+                        slot_value = int(text_value)
+                    except (TypeError, ValueError):
+                        slot_value = None
+                    source_parts.append(f"R{text_value}")
+                else:
+                    slot_value = text_value
+                    source_parts.append(text_value)
+
+                if slot_value is None:
+                    template_parts.append('0')
+                else:
+                    slots.append((component_type, slot_value))
+                    template_parts.append(self.SLOT_MARKER)
+
+            else:
+                template_parts.append('0')
+                source_parts.append('0')
+
+        template = re.sub(r'\s+', '', ''.join(template_parts))
+        source = ' '.join(source_parts) or '0'
+
+        try:
+            if template:
+                constant, evaluator = _FormulaTemplateParser(template, self.SLOT_MARKER).parse()
+            else:
+                constant, evaluator = Decimal('0'), None
+        except FormulaCalculationError as e:
+            # Keep legacy behaviour: invalid formulas fail when evaluated
+            error_message = str(e)
+
+            def evaluator(values):
+                raise FormulaCalculationError(error_message)
+            constant = None
+
+        if evaluator is None:
+            evaluator = lambda values: constant
+        return CompiledFormula(evaluator, slots, source)
+
+    def _get_formula_components(self, payroll_element, section):
+        """Get formula components ordered by ID"""
+        try:
+            if hasattr(payroll_element, 'formulas'):
+                return list(payroll_element.formulas.filter(section=section).order_by('id'))
+            return []
+        except Exception:
+            return []
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get compilation statistics"""
+        with self._cache_lock:
+            stats = self._stats.copy()
+            stats['compiled_formulas'] = len(self._compiled_cache)
+        return stats
+
+    def clear_cache(self):
+        """Clear compiled formula cache"""
+        with self._cache_lock:
+            self._compiled_cache.clear()
+
+
+class _FormulaTemplateParser:
+    """
+    Recursive descent parser turning a formula template into closures
+
+    Mirrors FormulaEngine._parse_expression/_parse_term/_parse_operand with slot
+    markers accepted as operands. Nodes are (constant, evaluator) pairs where
+    constant is set when the subtree has no slots, so static parts are folded
+    at compile time.
+    """
+
+    def __init__(self, template: str, slot_marker: str):
+        self.template = template + ";"
+        self.position = 0
+        self.slot_marker = slot_marker
+        self.slot_count = 0
+
+    def parse(self):
+        """Parse complete template"""
+        node = self._parse_expression()
+        if self.position != len(self.template) - 1:
+            raise FormulaCalculationError("La chaine ne se termine pas correctement")
+        return node
+
+    def _parse_expression(self):
+        node = self._parse_term()
+        while self.template[self.position] in '+-':
+            operator = self.template[self.position]
+            self.position += 1
+            node = self._combine(operator, node, self._parse_term())
+        return node
+
+    def _parse_term(self):
+        node = self._parse_operand()
+        while self.template[self.position] in '*/':
+            operator = self.template[self.position]
+            self.position += 1
+            node = self._combine(operator, node, self._parse_operand())
+        return node
+
+    def _parse_operand(self):
+        char = self.template[self.position]
+
+        if char == '(':
+            self.position += 1
+            node = self._parse_expression()
+            if self.template[self.position] != ')':
+                raise FormulaCalculationError("Il manque une parenthèse fermante")
+            self.position += 1
+            return node
+
+        if char == self.slot_marker:
+            self.position += 1
+            value_position = self.slot_count
+            self.slot_count += 1
+            return (None, lambda values: values[value_position])
+
+        return (self._parse_number(), None)
+
+    def _parse_number(self) -> Decimal:
+        integer_part = self._parse_digits()
+        if self.template[self.position] == '.':
+            self.position += 1
+            decimal_part = self._parse_digits()
+            if self.template[self.position] == '.':
+                raise FormulaCalculationError("Expression invalide")
+            return Decimal(f"{integer_part}.{decimal_part}")
+        return Decimal(integer_part)
+
+    def _parse_digits(self) -> str:
+        start = self.position
+        while self.template[self.position].isdigit():
+            self.position += 1
+        if self.position == start:
+            context = self.template[:self.position + 1] + "<--"
+            raise FormulaCalculationError(f"J'attendais un chiffre; caractère trouvé! {context}")
+        return self.template[start:self.position]
+
+    @staticmethod
+    def _combine(operator: str, left, right):
+        """Combine two nodes, folding constants where possible"""
+        left_constant, left_eval = left
+        right_constant, right_eval = right
+
+        if left_constant is not None and right_constant is not None:
+            return (_FormulaTemplateParser._apply(operator, left_constant, right_constant), None)
+
+        if left_eval is None:
+            left_eval = lambda values, constant=left_constant: constant
+        if right_eval is None:
+            right_eval = lambda values, constant=right_constant: constant
+
+        apply = _FormulaTemplateParser._apply
+        return (None, lambda values: apply(operator, left_eval(values), right_eval(values)))
+
+    @staticmethod
+    def _apply(operator: str, left: Decimal, right: Decimal) -> Decimal:
+        if operator == '+':
+            return left + right
+        if operator == '-':
+            return left - right
+        if operator == '*':
+            return left * right
+        if right == 0:
+            raise FormulaCalculationError("Division par 0")
+        return left / right
+
+
 class PayrollFormulaBuilder:
     """
     Complete payroll formula building system
@@ -248,6 +635,9 @@ class PayrollFormulaBuilder:
         self._cache_lock = threading.RLock()
         self._formula_optimizer = FormulaOptimizer()
         self._system_mapper = SystemRubricMapper()
+        self._formula_compiler = FormulaCompiler()
+        # Formula version of the run in progress (see formula_version_scope)
+        self.formula_version = None
         
     def build_formula_string(self, payroll_element, employee, motif, section: str, period) -> str:
         """
@@ -405,6 +795,71 @@ class PayrollFormulaBuilder:
         """Set reference to main payroll calculator for cross-references"""
         self._payroll_calculator = payroll_calculator
     
+    def get_compiled_formula(self, payroll_element, section: str) -> CompiledFormula:
+        """
+        Get compiled formula for an element section
+
+        Args:
+            payroll_element: PayrollElement instance
+            section: 'B' for base, 'N' for number
+
+        Returns:
+            CompiledFormula reused until the element's formula rows change
+        """
+        return self._formula_compiler.get_compiled_formula(
+            payroll_element, section, version=self.formula_version
+        )
+
+    @contextmanager
+    def formula_version_scope(self, version: Optional[str]):
+        """
+        Scope of a run over formulas of a known version
+
+        Compiled formulas are checked against the database once for the run
+        instead of at every evaluation.
+
+        Args:
+            version: FormulaDependencyCache.formula_version of the run's
+                elements, None to check at every evaluation
+        """
+        previous = self.formula_version
+        self.formula_version = version
+        try:
+            yield
+        finally:
+            self.formula_version = previous
+
+    def evaluate_compiled(self, payroll_element, employee, motif, section: str, period) -> Decimal:
+        """
+        Evaluate compiled formula for an employee - replaces build + parse
+
+        Args:
+            payroll_element: PayrollElement instance
+            employee: Employee instance
+            motif: PayrollMotif instance
+            section: 'B' for base, 'N' for number
+            period: Calculation period
+
+        Returns:
+            Formula result
+
+        Raises:
+            FormulaCalculationError: If formula cannot be evaluated
+        """
+        compiled = self.get_compiled_formula(payroll_element, section)
+        if compiled.is_static:
+            return compiled.evaluate()
+
+        def resolve_function(function_code):
+            if self.payroll_functions and hasattr(self.payroll_functions, 'calculate_function'):
+                return self.payroll_functions.calculate_function(function_code, employee, motif, period)
+            return Decimal('0')
+
+        def resolve_reference(rubrique_id):
+            return self._get_rubrique_amount(employee, rubrique_id, motif, period)
+
+        return compiled.evaluate(resolve_function, resolve_reference)
+
     def calculate_base(self, payroll_element, employee, motif, period) -> Decimal:
         """
         Calculate base amount - equivalent to PaieClass.baseRbrique
@@ -419,9 +874,7 @@ class PayrollFormulaBuilder:
             Calculated base amount
         """
         try:
-            formula_string = self.build_formula_string(payroll_element, employee, motif, 'B', period)
-            engine = FormulaEngine()
-            return engine.calculate(formula_string)
+            return self.evaluate_compiled(payroll_element, employee, motif, 'B', period)
         except Exception as e:
             self.logger.error(f"Error calculating base for element {payroll_element.id}: {str(e)}")
             return Decimal('0.00')
@@ -440,9 +893,7 @@ class PayrollFormulaBuilder:
             Calculated number/quantity
         """
         try:
-            formula_string = self.build_formula_string(payroll_element, employee, motif, 'N', period)
-            engine = FormulaEngine()
-            return engine.calculate(formula_string)
+            return self.evaluate_compiled(payroll_element, employee, motif, 'N', period)
         except Exception as e:
             self.logger.error(f"Error calculating number for element {payroll_element.id}: {str(e)}")
             return Decimal('0.00')
@@ -503,6 +954,7 @@ class PayrollFormulaBuilder:
     def clear_cache(self):
         """Clear the formula cache"""
         self._formula_cache.clear()
+        self._formula_compiler.clear_cache()
 
 
 class PayrollFormulaEvaluator:
@@ -1041,8 +1493,26 @@ class PayrollFormulaEvaluator:
             self._performance_stats['cache_hits'] / 
             max(1, self._performance_stats['cache_hits'] + self._performance_stats['cache_misses'])
         ) * 100
+        
+        # F01-F24 run memo counters
+        functions = self._payroll_functions_instance
+        if functions is not None and hasattr(functions, 'get_memo_stats'):
+            for name, value in functions.get_memo_stats().items():
+                stats[f'function_memo_{name}'] = value
         return stats
     
+    def memoized_run(self):
+        """
+        Scope of a payroll run memoizing F01-F24 results
+        
+        Returns a no-op context when the payroll functions do not support
+        memoization.
+        """
+        functions = self._payroll_functions_instance
+        if functions is None or not hasattr(functions, 'memoized_run'):
+            return nullcontext()
+        return functions.memoized_run()
+    
     def clear_caches(self):
         """Clear all caches and reset performance stats"""
         self._evaluation_cache.clear()
@@ -1087,16 +1557,8 @@ class PayrollFormulaEvaluator:
         Returns:
             Dictionary mapping element IDs to their calculation results
         """
-        # Build dependency graph
-        dependency_graph = {}
-        for element in payroll_elements:
-            deps = self._extract_dependencies(element, 'B').union(
-                self._extract_dependencies(element, 'N')
-            )
-            dependency_graph[element.id] = deps
-        
-        # Get optimal evaluation order
-        evaluation_order = self._circular_dependency_detector.get_evaluation_order(dependency_graph)
+        # Evaluation order of this formula version (computed once per version)
+        evaluation_order = get_dependency_plan(payroll_elements, self._build_dependency_graph).evaluation_order
         
         # Evaluate in order
         results = {}
@@ -1109,6 +1571,16 @@ class PayrollFormulaEvaluator:
                 results[element_id] = result
         
         return results
+    
+    def _build_dependency_graph(self, payroll_elements: List) -> Dict[int, Set[int]]:
+        """Build the R-reference dependency graph of payroll elements"""
+        dependency_graph = {}
+        for element in payroll_elements:
+            deps = self._extract_dependencies(element, 'B').union(
+                self._extract_dependencies(element, 'N')
+            )
+            dependency_graph[element.id] = deps
+        return dependency_graph
 
 
 # ========== CIRCULAR DEPENDENCY DETECTION ==========
@@ -1263,53 +1735,361 @@ class CircularDependencyDetector:
         return modified_graph
 
 
+class FormulaDependencyPlan(NamedTuple):
+    """Dependency analysis of a set of payroll element formulas"""
+    version: Optional[str]
+    graph: Dict[int, Set[int]]
+    evaluation_order: List[int]
+    cycles: List[List[int]]
+
+
+class FormulaDependencyCache:
+    """
+    Dependency plans (graph, evaluation order, cycles) keyed by formula version
+    
+    The version hashes the element ids and their PayrollElementFormula rows
+    with a single query, so a plan is reused across runs and, through the
+    Django cache, across processes until any formula row changes. Elements
+    that are not model instances are analysed without caching.
+    """
+    
+    CACHE_KEY_PREFIX = 'payroll_formula_plan'
+    
+    def __init__(self, max_plans: int = 32):
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+    
+    def formula_version(self, payroll_elements: List) -> Optional[str]:
+        """
+        Hash the formula definitions of payroll elements
+        
+        Returns:
+            Hex digest, or None when the elements are not model instances
+        """
+        if not payroll_elements or not all(hasattr(element, '_meta') for element in payroll_elements):
+            return None
+        
+        element_ids = sorted(element.id for element in payroll_elements)
+        try:
+            from core.models import PayrollElementFormula
+            rows = PayrollElementFormula.objects.filter(
+                payroll_element_id__in=element_ids
+            ).order_by('payroll_element_id', 'section', 'id').values_list(
+                'payroll_element_id', 'section', 'component_type', 'text_value', 'numeric_value'
+            )
+            digest = hashlib.sha256(repr(element_ids).encode())
+            for row in rows:
+                digest.update(repr(row).encode())
+            return digest.hexdigest()
+        except Exception as e:
+            self.logger.warning(f"Cannot compute formula version: {str(e)}")
+            return None
+    
+    def get_plan(self, payroll_elements: List,
+                 build_graph: Callable[[List], Dict[int, Set[int]]]) -> FormulaDependencyPlan:
+        """
+        Get the dependency plan of payroll elements
+        
+        Args:
+            payroll_elements: PayrollElement instances
+            build_graph: Builds the dependency graph on a cache miss
+            
+        Returns:
+            FormulaDependencyPlan of the current formula version
+        """
+        version = self.formula_version(payroll_elements)
+        if version is None:
+            return self._build_plan(None, payroll_elements, build_graph)
+        
+        with self._lock:
+            plan = self._plans.get(version)
+            if plan is not None:
+                self._plans.move_to_end(version)
+                self.hits += 1
+                return plan
+        
+        cache_key = f"{self.CACHE_KEY_PREFIX}_{version}"
+        plan = self._get_shared(cache_key)
+        if plan is None:
+            plan = self._build_plan(version, payroll_elements, build_graph)
+            self._set_shared(cache_key, plan)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+        
+        with self._lock:
+            self._plans[version] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        return plan
+    
+    def _build_plan(self, version: Optional[str], payroll_elements: List,
+                    build_graph: Callable[[List], Dict[int, Set[int]]]) -> FormulaDependencyPlan:
+        detector = CircularDependencyDetector()
+        graph = build_graph(payroll_elements)
+        return FormulaDependencyPlan(
+            version=version,
+            graph=graph,
+            evaluation_order=detector.get_evaluation_order(graph),
+            cycles=detector.detect_cycles(graph),
+        )
+    
+    def _get_shared(self, cache_key: str) -> Optional[FormulaDependencyPlan]:
+        try:
+            from django.core.cache import cache
+            return cache.get(cache_key)
+        except Exception:
+            return None
+    
+    def _set_shared(self, cache_key: str, plan: FormulaDependencyPlan):
+        try:
+            from django.core.cache import cache
+            cache.set(cache_key, plan, timeout=None)
+        except Exception as e:
+            self.logger.warning(f"Cannot store formula dependency plan: {str(e)}")
+    
+    def clear(self):
+        """Drop the plans of this process"""
+        with self._lock:
+            self._plans.clear()
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get plan cache statistics"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'plans': len(self._plans)}
+
+
+_dependency_plan_cache = FormulaDependencyCache()
+
+
+def get_dependency_plan(payroll_elements: List,
+                        build_graph: Callable[[List], Dict[int, Set[int]]]) -> FormulaDependencyPlan:
+    """Get the cached dependency plan of payroll elements for the current formulas"""
+    return _dependency_plan_cache.get_plan(list(payroll_elements), build_graph)
+
+
+def find_formula_cycle(payroll_element_id: int, extra_references: Set[int] = ()) -> List[int]:
+    """
+    Find a reference cycle through a payroll element in the stored formulas
+    
+    Args:
+        payroll_element_id: Element whose formula is being saved
+        extra_references: Rubrique references about to be added to the element
+        
+    Returns:
+        Cycle as a list of element ids starting and ending with the element,
+        or an empty list
+    """
+    from core.models import PayrollElementFormula
+    
+    graph = defaultdict(set)
+    for element_id, text_value in PayrollElementFormula.objects.filter(
+        component_type='R'
+    ).values_list('payroll_element_id', 'text_value'):
+        try:
+            graph[element_id].add(int(text_value))
+        except (TypeError, ValueError):
+            continue
+    graph[payroll_element_id].update(extra_references)
+    
+    # Breadth-first search back to the element, keeping the first parent of each node
+    parents = {}
+    queue = [payroll_element_id]
+    while queue:
+        node = queue.pop(0)
+        for reference in graph.get(node, ()):
+            if reference == payroll_element_id:
+                path = [node]
+                while node != payroll_element_id:
+                    node = parents[node]
+                    path.insert(0, node)
+                return path + [payroll_element_id]
+            if reference not in parents:
+                parents[reference] = node
+                queue.append(reference)
+    return []
+
+
 # ========== ENHANCED INTEGRATION LAYER ==========
 
 class PayrollIntegrationLayer:
     """
     Integration layer between formula engine and payroll processing
     Handles coordination between formula evaluation and payroll calculations
+    
+    With workers > 1, process_payroll_batch shards employees across a
+    process pool; the parent closes its database connections first, each
+    worker process opens its own and compiles the element formulas once
+    before processing its shards. Inside a transaction the run stays
+    serial, workers would not see its uncommitted rows.
+    
+    A run recomputes every payroll: results persisted while it runs (by an
+    override of _store_element_result) are not tracked as payroll changes.
     """
     
-    def __init__(self, payroll_functions=None, system_parameters=None):
+    # Default number of employees per shard in parallel runs
+    DEFAULT_SHARD_SIZE = 200
+    
+    def __init__(self, payroll_functions=None, system_parameters=None,
+                 workers: int = 1, shard_size: int = DEFAULT_SHARD_SIZE):
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        if shard_size < 1:
+            raise ValueError(f"shard_size must be at least 1, got {shard_size}")
         self.formula_evaluator = PayrollFormulaEvaluator(payroll_functions, system_parameters)
         self.dependency_detector = CircularDependencyDetector()
         self.logger = logging.getLogger(__name__)
+        self.workers = workers
+        self.shard_size = shard_size
+        self.last_run_report = None
         self._element_cache = {}
         self._dependency_cache = {}
     
     def process_payroll_batch(self, employees: List, payroll_elements: List, 
-                            motif, period) -> Dict[int, Dict[int, Dict[str, Decimal]]]:
+                            motif, period, workers: Optional[int] = None,
+                            shard_size: Optional[int] = None) -> Dict[int, Dict[int, Dict[str, Decimal]]]:
         """
         Process payroll for multiple employees with optimized evaluation
         
+        Results are returned in the order of the employees list whatever the
+        number of workers; timing and errors of each shard are available in
+        last_run_report, with the F01-F24 memo counters of shards run in
+        worker processes (each shard is one memoized run).
+        
         Args:
             employees: List of Employee instances
             payroll_elements: List of PayrollElement instances
             motif: PayrollMotif instance
             period: Calculation period
+            workers: Number of worker processes (defaults to self.workers)
+            shard_size: Employees per shard (defaults to self.shard_size)
             
         Returns:
             Nested dict: {employee_id: {element_id: {base, number, amount}}}
         """
+        workers = self.workers if workers is None else workers
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        shard_size = shard_size or self.shard_size
+        employees = list(employees)
+        started = time.perf_counter()
+        
+        # Evaluation order of this formula version (computed once per version)
+        plan = get_dependency_plan(payroll_elements, self._build_dependency_graph)
+        evaluation_order = plan.evaluation_order
+        formula_builder = self.formula_evaluator.formula_builder
+        
+        shards = [employees[i:i + shard_size] for i in range(0, len(employees), shard_size)]
+        if workers > 1 and len(shards) > 1 and not prepare_worker_pool():
+            workers = 1
+        if workers > 1 and len(shards) > 1:
+            shard_reports = self._process_shards_in_pool(
+                shards, payroll_elements, motif, period, evaluation_order, workers, plan.version
+            )
+        else:
+            with _payroll_run_writes(), formula_builder.formula_version_scope(plan.version), \
+                    self.formula_evaluator.memoized_run():
+                shard_reports = [
+                    self._process_shard(index, shard, payroll_elements, motif, period, evaluation_order)
+                    for index, shard in enumerate(shards)
+                ]
+        
+        # Merge shard results deterministically in employee order
+        shard_results = {}
+        errors = {}
+        for report in shard_reports:
+            shard_results.update(report.pop('results'))
+            errors.update(report['errors'])
+        
         results = {}
+        for employee in employees:
+            employee_results = shard_results.get(employee.id, {})
+            results[employee.id] = employee_results
+            for element_id, element_result in employee_results.items():
+                key = f"{employee.id}_{element_id}_{motif.id}_{period}"
+                self._element_cache[key] = element_result['amount']
+        
+        self.last_run_report = {
+            'workers': workers if len(shards) > 1 else 1,
+            'shard_size': shard_size,
+            'employees': len(employees),
+            'elapsed': time.perf_counter() - started,
+            'shards': shard_reports,
+            'errors': errors,
+        }
         
-        # Build dependency graph once for all employees
-        dependency_graph = self._build_dependency_graph(payroll_elements)
-        evaluation_order = self.dependency_detector.get_evaluation_order(dependency_graph)
+        return results
+    
+    def _process_shard(self, shard_index: int, employees: List, payroll_elements: List, motif,
+                       period, evaluation_order: List[int]) -> Dict[str, Any]:
+        """Process one shard of employees and report its results, errors and timing"""
+        started = time.perf_counter()
+        results = {}
+        errors = {}
         
         for employee in employees:
             try:
-                employee_results = self._process_employee_payroll(
+                results[employee.id] = self._process_employee_payroll(
                     employee, payroll_elements, motif, period, evaluation_order
                 )
-                results[employee.id] = employee_results
                 
             except Exception as e:
                 self.logger.error(f"Error processing payroll for employee {employee.id}: {str(e)}")
                 results[employee.id] = {}
+                errors[employee.id] = str(e)
         
-        return results
+        return {
+            'shard': shard_index,
+            'employee_ids': [employee.id for employee in employees],
+            'results': results,
+            'errors': errors,
+            'elapsed': time.perf_counter() - started,
+            'pid': os.getpid(),
+        }
+    
+    def _process_shards_in_pool(self, shards: List[List], payroll_elements: List, motif, period,
+                                evaluation_order: List[int], workers: int,
+                                formula_version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Process shards in a process pool, collecting reports as shards complete"""
+        reports = [None] * len(shards)
+        initargs = (
+            self.formula_evaluator.formula_builder.payroll_functions,
+            self.formula_evaluator.formula_builder.system_parameters,
+            payroll_elements, motif, period, evaluation_order, formula_version,
+        )
+        
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                                 mp_context=worker_pool_context(),
+                                 initializer=_initialize_payroll_worker,
+                                 initargs=initargs) as executor:
+            futures = {
+                executor.submit(_process_payroll_shard, index, shard): index
+                for index, shard in enumerate(shards)
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    reports[index] = future.result()
+                except Exception as e:
+                    # The worker itself failed: report every employee of the shard
+                    self.logger.error(f"Error processing payroll shard {index}: {str(e)}")
+                    employee_ids = [employee.id for employee in shards[index]]
+                    reports[index] = {
+                        'shard': index,
+                        'employee_ids': employee_ids,
+                        'results': {employee_id: {} for employee_id in employee_ids},
+                        'errors': {employee_id: str(e) for employee_id in employee_ids},
+                        'elapsed': None,
+                        'pid': None,
+                    }
+        
+        return reports
     
     def _process_employee_payroll(self, employee, payroll_elements: List, motif, period, 
                                 evaluation_order: List[int]) -> Dict[int, Dict[str, Decimal]]:
@@ -1324,15 +2104,6 @@ class PayrollIntegrationLayer:
             if element_id in element_map:
                 element = element_map[element_id]
                 try:
-                    # Create cache key for this evaluation
-                    cache_key = f"emp_{employee.id}_elem_{element_id}_motif_{motif.id}_period_{period}"
-                    
-                    # Evaluate with caching
-                    result = self.formula_evaluator.evaluate_formula_with_caching(
-                        "", cache_key, self._build_evaluation_context(employee, element, motif, period)
-                    )
-                    
-                    # Actually evaluate the element properly
                     element_result = self.formula_evaluator.evaluate_payroll_element(
                         element, employee, motif, period
                     )
@@ -1379,14 +2150,9 @@ class PayrollIntegrationLayer:
         if self.formula_evaluator._payroll_functions_instance:
             pf = self.formula_evaluator._payroll_functions_instance
             
-            # Standard payroll functions F01-F24
-            context.update({
-                'F01': pf.F01_NJT(employee, motif, period),
-                'F02': pf.F02_sbJour(employee, motif, period),
-                'F03': pf.F03_sbHoraire(employee, motif, period),
-                'F04': pf.F04_TauxAnciennete(employee, period),
-                # Add more functions as needed...
-            })
+            # Standard payroll functions F01-F24, shared with the run memo
+            for function_code in ('F01', 'F02', 'F03', 'F04'):
+                context[function_code] = pf.calculate_function(function_code, employee, motif, period)
         
         return context
     
@@ -1401,6 +2167,59 @@ class PayrollIntegrationLayer:
         return self._element_cache.get(key, Decimal('0.00'))
 
 
+# Per-process state of parallel payroll workers
+_payroll_worker_state = {}
+
+
+def _payroll_run_writes():
+    """Scope of the writes of a run (results stored by _store_element_result overrides)"""
+    try:
+        from .incremental_recalculation import payroll_run_writes
+    except ImportError:
+        return nullcontext()
+    return payroll_run_writes()
+
+
+def _initialize_payroll_worker(payroll_functions, system_parameters, payroll_elements,
+                               motif, period, evaluation_order, formula_version=None):
+    """Set up a payroll worker process: Django and compiled formulas"""
+    # The parent closed its connections, the worker opens its own on first query
+    initialize_worker_django()
+    
+    layer = PayrollIntegrationLayer(payroll_functions, system_parameters)
+    # Formulas compiled here are stamped with the run's version, shards reuse them
+    layer.formula_evaluator.formula_builder.formula_version = formula_version
+    for element in payroll_elements:
+        for section in ('B', 'N'):
+            try:
+                layer.formula_evaluator.formula_builder.get_compiled_formula(element, section)
+            except Exception:
+                # Compilation errors surface again when the element is evaluated
+                pass
+    
+    _payroll_worker_state.update({
+        'layer': layer,
+        'payroll_elements': payroll_elements,
+        'motif': motif,
+        'period': period,
+        'evaluation_order': evaluation_order,
+    })
+
+
+def _process_payroll_shard(shard_index: int, employees: List) -> Dict[str, Any]:
+    """Process a shard of employees in a worker process, memoizing F01-F24 for the shard"""
+    state = _payroll_worker_state
+    layer = state['layer']
+    with _payroll_run_writes(), layer.formula_evaluator.memoized_run() as memo:
+        report = layer._process_shard(
+            shard_index, employees, state['payroll_elements'], state['motif'],
+            state['period'], state['evaluation_order']
+        )
+        if memo is not None:
+            report['function_memo'] = memo.get_stats()
+    return report
+
+
 # ========== SYSTEM RUBRIC MAPPING AND UTILITIES ==========
 
 class SystemRubricMapper:
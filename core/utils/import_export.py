@@ -19,13 +19,15 @@ import logging
 import traceback
 from datetime import datetime, date
 from decimal import Decimal, InvalidOperation
-from typing import Dict, List, Optional, Tuple, Any, Callable, Union
+from typing import Dict, List, Optional, Tuple, Any, Callable, Iterable, Union
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from io import BytesIO, StringIO
+from itertools import chain
 
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
     from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
@@ -471,12 +473,16 @@ class ExcelProcessor:
             logger.error(f"Error creating template {template_type}: {str(e)}")
             return False
     
-    def export_to_excel(self, data: List[Dict], file_path: str, sheet_name: str = "Export") -> bool:
+    def export_to_excel(self, data: Iterable[Dict], file_path: str, sheet_name: str = "Export") -> bool:
         """
         Export data to Excel file.
         
+        Uses a write-only workbook: rows are written as they are read, so
+        data can be a generator (e.g. a queryset iterator) and memory stays
+        flat on large exports.
+        
         Args:
-            data: List of dictionaries containing data
+            data: Dictionaries containing data (list or iterator)
             file_path: Output file path
             sheet_name: Sheet name
             
@@ -484,34 +490,40 @@ class ExcelProcessor:
             Success status
         """
         try:
-            workbook = openpyxl.Workbook()
-            worksheet = workbook.active
-            worksheet.title = sheet_name
+            workbook = openpyxl.Workbook(write_only=True)
+            worksheet = workbook.create_sheet(sheet_name)
             
-            if not data:
+            rows = iter(data)
+            first_row = next(rows, None)
+            if first_row is None:
                 # Create empty file with headers
-                worksheet.cell(row=1, column=1, value="No data to export")
+                worksheet.append(["No data to export"])
                 workbook.save(file_path)
                 workbook.close()
                 return True
             
             # Get headers from first row
-            headers = list(data[0].keys())
+            headers = list(first_row.keys())
             
             # Write headers with formatting
             header_font = Font(bold=True, color="FFFFFF")
             header_fill = PatternFill("solid", fgColor="366092")
             
+            header_cells = []
             for col_idx, header in enumerate(headers, 1):
-                cell = worksheet.cell(row=1, column=col_idx, value=header)
+                cell = WriteOnlyCell(worksheet, value=header)
                 cell.font = header_font
                 cell.fill = header_fill
                 cell.alignment = Alignment(horizontal="center")
+                header_cells.append(cell)
                 worksheet.column_dimensions[get_column_letter(col_idx)].width = 15
+            worksheet.append(header_cells)
             
             # Write data
-            for row_idx, row_data in enumerate(data, 2):
-                for col_idx, header in enumerate(headers, 1):
+            row_count = 0
+            for row_data in chain([first_row], rows):
+                values = []
+                for header in headers:
                     value = row_data.get(header, "")
                     
                     # Format special data types
@@ -524,12 +536,14 @@ class ExcelProcessor:
                     elif value is None:
                         value = ""
                     
-                    worksheet.cell(row=row_idx, column=col_idx, value=value)
+                    values.append(value)
+                worksheet.append(values)
+                row_count += 1
             
             workbook.save(file_path)
             workbook.close()
             
-            logger.info(f"Exported {len(data)} rows to Excel: {file_path}")
+            logger.info(f"Exported {row_count} rows to Excel: {file_path}")
             return True
             
         except Exception as e:
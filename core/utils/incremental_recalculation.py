@@ -0,0 +1,464 @@
+# incremental_recalculation.py
+"""
+Incremental payroll recalculation driven by change tracking
+Recomputes only the rubriques and payrolls affected by late corrections
+
+Signal handlers (core.signals) record a PayrollChange row whenever a
+PayrollLineItem, WorkedDays, InstallmentTranche or payroll-relevant Employee
+field changes. IncrementalPayrollRecalculator turns the pending changes into
+the minimal set of payrolls and payroll elements to recompute, following the
+R-reference dependency graph of the element formulas, and updates the
+affected line items and Payroll rows only.
+"""
+
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .formula_engine import PayrollIntegrationLayer, PayrollAmountCalculator, get_dependency_plan
+from .period_aggregates import deferred_aggregate_refresh, schedule_aggregate_refresh
+from .report_cache import deferred_report_invalidation, invalidate_report_period
+
+logger = logging.getLogger(__name__)
+
+# Employee fields read by the F01-F24 payroll functions
+EMPLOYEE_FIELD_FUNCTIONS = {
+    'contract_hours_per_week': {'F03', 'F11'},
+    'seniority_date': {'F04', 'F12', 'F13', 'F14', 'F19', 'F23'},
+    'last_departure_initial': {'F05', 'F06', 'F07'},
+    'cumulative_12dm_initial': {'F08'},
+    'psra_rate': {'F15'},
+    'notice_months': {'F16'},
+    'origin_id': {'F18'},
+    'salary_grade_id': {'F20'},
+    'marital_status': {'F20'},
+    'children_count': {'F20', 'F22'},
+}
+
+# Employee fields only affecting contributions and ITS (Payroll totals)
+EMPLOYEE_TOTAL_FIELDS = {
+    'cnss_detached', 'cnam_detached', 'its_exempt', 'is_expatriate',
+    'cnss_reimbursement_rate', 'cnam_reimbursement_rate',
+}
+
+TRACKED_EMPLOYEE_FIELDS = sorted(set(EMPLOYEE_FIELD_FUNCTIONS) | EMPLOYEE_TOTAL_FIELDS)
+
+# PayrollLineItem fields whose changes are recorded
+TRACKED_LINE_ITEM_FIELDS = ['base_amount', 'calculated_amount', 'quantity']
+
+# WorkedDays fields whose changes are recorded
+TRACKED_WORKED_DAYS_FIELDS = ['worked_days']
+
+# Functions reading the period's line items and worked days
+LINE_ITEM_FUNCTIONS = {'F02', 'F09'}
+WORKED_DAYS_FUNCTIONS = {'F01'}
+
+# Functions computed from other functions
+DERIVED_FUNCTIONS = {
+    'F03': {'F02'},
+    'F11': {'F10'},
+    'F21': {'F09'},
+}
+
+# Payroll fields updated from PayrollCalculator.calculate_payroll results
+PAYROLL_RESULT_FIELDS = {
+    'gross_taxable': 'gross_taxable',
+    'gross_non_taxable': 'gross_non_taxable',
+    'cnss_employee': 'cnss_employee',
+    'cnam_employee': 'cnam_employee',
+    'its_total': 'its_total',
+    'its_tranche1': 'its_tranche1',
+    'its_tranche2': 'its_tranche2',
+    'its_tranche3': 'its_tranche3',
+    'net_salary': 'net_salary',
+    'rcnss': 'employer_cnss',
+    'rcnam': 'employer_cnam',
+    'avnat_base': 'benefits_in_kind',
+}
+
+_tracking_state = threading.local()
+
+
+@contextmanager
+def change_tracking_suspended():
+    """Do not record payroll changes for writes made inside the block"""
+    previous = getattr(_tracking_state, 'suspended', False)
+    _tracking_state.suspended = True
+    try:
+        yield
+    finally:
+        _tracking_state.suspended = previous
+
+
+@contextmanager
+def payroll_run_writes():
+    """
+    Scope of a full payroll run or bulk write
+
+    The run recomputes every payroll it writes: its writes are not recorded
+    as payroll changes, and each rollup slice it touches is rebuilt, and the
+    cached reports of each month it touches invalidated, once on exit
+    instead of at every Payroll and PayrollLineItem save.
+    """
+    with change_tracking_suspended(), deferred_report_invalidation(), deferred_aggregate_refresh():
+        yield
+
+
+def is_change_tracking_suspended() -> bool:
+    """Check if payroll change tracking is suspended in this thread"""
+    return getattr(_tracking_state, 'suspended', False)
+
+
+def record_payroll_change(employee_id: int, source: str, motif_id: Optional[int] = None,
+                          period=None, payroll_element_id: Optional[int] = None,
+                          changed_fields: Iterable[str] = ()):
+    """
+    Record a change for the next incremental recalculation
+
+    Returns:
+        Created PayrollChange, or None while tracking is suspended
+    """
+    if is_change_tracking_suspended():
+        return None
+
+    from core.models import PayrollChange
+    return PayrollChange.objects.create(
+        employee_id=employee_id,
+        motif_id=motif_id,
+        period=period,
+        source=source,
+        payroll_element_id=payroll_element_id,
+        changed_fields=','.join(sorted(changed_fields)),
+    )
+
+
+def expand_functions(function_codes: Iterable[str]) -> Set[str]:
+    """Add functions derived from the given ones (e.g. F03 from F02)"""
+    codes = set(function_codes)
+    changed = True
+    while changed:
+        derived = {code for code, sources in DERIVED_FUNCTIONS.items() if sources & codes}
+        changed = not derived <= codes
+        codes |= derived
+    return codes
+
+
+class IncrementalPayrollRecalculator:
+    """
+    Recompute payrolls affected by tracked changes
+
+    Usage:
+        recalculator = IncrementalPayrollRecalculator(PayrollCalculator(params))
+        summary = recalculator.recalculate(period)
+    """
+
+    def __init__(self, payroll_calculator, payroll_elements: Optional[List] = None,
+                 system_parameters=None):
+        """
+        Args:
+            payroll_calculator: PayrollCalculator used for the Payroll totals
+            payroll_elements: Elements to consider (defaults to all elements)
+            system_parameters: Parameters for the payroll functions
+                (defaults to the calculator's)
+        """
+        self.payroll_calculator = payroll_calculator
+        self.system_parameters = (
+            system_parameters if system_parameters is not None
+            else payroll_calculator.system_parameters
+        )
+        self._payroll_elements = payroll_elements
+        self._elements = None
+        self._dependents = None
+        self._function_users = None
+        self._evaluation_order = None
+        self.logger = logger
+
+    # ========== DEPENDENCY ANALYSIS ==========
+
+    def _ensure_dependency_graph(self):
+        if self._elements is not None:
+            return
+
+        elements = self._payroll_elements
+        if elements is None:
+            from core.models import PayrollElement
+            elements = list(PayrollElement.objects.all())
+
+        layer = PayrollIntegrationLayer()
+        plan = get_dependency_plan(elements, layer._build_dependency_graph)
+        graph = plan.graph
+
+        dependents = defaultdict(set)
+        for element_id, references in graph.items():
+            for reference in references:
+                dependents[reference].add(element_id)
+
+        function_users = defaultdict(set)
+        for element in elements:
+            dependencies = layer.formula_evaluator.get_formula_dependencies(element)
+            for section_dependencies in dependencies.values():
+                for dependency in section_dependencies:
+                    if dependency.startswith('F'):
+                        function_users[dependency].add(element.id)
+
+        self._elements = {element.id: element for element in elements}
+        self._dependents = dependents
+        self._function_users = function_users
+        self._evaluation_order = plan.evaluation_order
+
+    def affected_elements(self, changed_element_ids: Iterable[int] = (),
+                          function_codes: Iterable[str] = ()) -> Set[int]:
+        """
+        Get the auto-calculated elements to recompute
+
+        Args:
+            changed_element_ids: Elements whose line item changed (kept as entered)
+            function_codes: Payroll functions whose inputs changed
+
+        Returns:
+            Ids of elements using a changed function or referencing, directly
+            or through other elements, a changed element
+        """
+        self._ensure_dependency_graph()
+
+        seeds = set()
+        for code in expand_functions(function_codes):
+            seeds |= self._function_users.get(code, set())
+        for element_id in changed_element_ids:
+            seeds |= self._dependents.get(element_id, set())
+
+        affected = set(seeds)
+        queue = deque(seeds)
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+
+        return {element_id for element_id in affected if self._is_auto_calculated(element_id)}
+
+    def _is_auto_calculated(self, element_id: int) -> bool:
+        element = self._elements.get(element_id)
+        return bool(element is not None and (
+            getattr(element, 'auto_base_calculation', False)
+            or getattr(element, 'auto_quantity_calculation', False)
+        ))
+
+    def plan(self, changes: List, period=None) -> Dict[Tuple[int, int, object], Set[int]]:
+        """
+        Get the payrolls and elements to recompute for a list of changes
+
+        Args:
+            changes: PayrollChange instances
+            period: Period used for changes without a period (employee
+                changes); defaults to the employee's latest payroll period
+
+        Returns:
+            Dict {(employee_id, motif_id, period): element ids to recompute};
+            an empty set still recomputes the payroll totals
+        """
+        from core.models import PayrollChange
+
+        plan = defaultdict(set)
+        open_keys = self._open_change_keys(
+            [change for change in changes if change.period is None or change.motif_id is None], period
+        )
+
+        for change in changes:
+            if change.source == PayrollChange.SOURCE_LINE_ITEM:
+                element_ids = self.affected_elements(
+                    [change.payroll_element_id] if change.payroll_element_id else [],
+                    LINE_ITEM_FUNCTIONS
+                )
+            elif change.source == PayrollChange.SOURCE_WORKED_DAYS:
+                element_ids = self.affected_elements(function_codes=WORKED_DAYS_FUNCTIONS)
+            elif change.source == PayrollChange.SOURCE_EMPLOYEE:
+                function_codes = set()
+                for field in change.changed_field_names:
+                    function_codes |= EMPLOYEE_FIELD_FUNCTIONS.get(field, set())
+                element_ids = self.affected_elements(function_codes=function_codes)
+            else:
+                # Installments only change the payroll totals
+                element_ids = set()
+
+            if change.period is not None and change.motif_id is not None:
+                keys = [(change.employee_id, change.motif_id, change.period)]
+            else:
+                keys = [
+                    key for key in open_keys.get(change.employee_id, [])
+                    if change.motif_id is None or key[1] == change.motif_id
+                ]
+            for key in keys:
+                plan[key] |= element_ids
+
+        return dict(plan)
+
+    def _open_change_keys(self, changes: List, period=None) -> Dict[int, List[Tuple[int, int, object]]]:
+        """Payroll keys of employees with changes lacking a period or motif"""
+        if not changes:
+            return {}
+
+        from django.db.models import Max
+        from core.models import Payroll
+
+        employee_ids = {change.employee_id for change in changes}
+        payrolls = Payroll.objects.filter(employee_id__in=employee_ids)
+        if period is None:
+            latest = dict(payrolls.values('employee_id').order_by().annotate(
+                latest=Max('period')
+            ).values_list('employee_id', 'latest'))
+        else:
+            payrolls = payrolls.filter(period=period)
+            latest = None
+
+        keys = defaultdict(list)
+        for employee_id, motif_id, payroll_period in payrolls.values_list('employee_id', 'motif_id', 'period'):
+            if latest is None or latest.get(employee_id) == payroll_period:
+                keys[employee_id].append((employee_id, motif_id, payroll_period))
+        return keys
+
+    # ========== RECALCULATION ==========
+
+    def recalculate(self, period=None, changes: Optional[List] = None) -> Dict[str, int]:
+        """
+        Recalculate the payrolls affected by pending changes
+
+        Args:
+            period: Restrict to changes of this period (and changes without period)
+            changes: Explicit PayrollChange list (defaults to unprocessed changes)
+
+        Returns:
+            Summary with the number of changes, payrolls, employees and line items
+        """
+        from django.db import transaction
+        from django.db.models import Q
+        from django.utils import timezone
+        from core.models import PayrollChange
+
+        if changes is None:
+            pending = PayrollChange.objects.filter(processed_at__isnull=True)
+            if period is not None:
+                pending = pending.filter(Q(period=period) | Q(period__isnull=True))
+            changes = list(pending)
+
+        summary = {'changes': len(changes), 'payrolls': 0, 'employees': 0, 'line_items': 0}
+        if not changes:
+            return summary
+
+        plan = self.plan(changes, period)
+
+        groups = defaultdict(dict)
+        for (employee_id, motif_id, payroll_period), element_ids in plan.items():
+            groups[(motif_id, payroll_period)][employee_id] = element_ids
+
+        with transaction.atomic(), payroll_run_writes():
+            for (motif_id, payroll_period), targets in groups.items():
+                line_items, payrolls = self._recalculate_group(motif_id, payroll_period, targets)
+                summary['line_items'] += line_items
+                summary['payrolls'] += payrolls
+                summary['employees'] += len(targets)
+                # Bulk writes bypass the rollup and report cache signals
+                if payrolls:
+                    schedule_aggregate_refresh(payroll_period, motif_id)
+                if line_items or payrolls:
+                    invalidate_report_period(payroll_period)
+
+            PayrollChange.objects.filter(
+                id__in=[change.id for change in changes if change.id is not None]
+            ).update(processed_at=timezone.now())
+
+        self.logger.info(
+            f"Incremental recalculation: {summary['changes']} changes, "
+            f"{summary['payrolls']} payrolls, {summary['line_items']} line items"
+        )
+        return summary
+
+    def _recalculate_group(self, motif_id: int, period, targets: Dict[int, Set[int]]) -> Tuple[int, int]:
+        """Recompute elements and totals of employees sharing a motif and period"""
+        from core.models import Employee, Payroll, PayrollLineItem, PayrollMotif
+        from .payroll_calculations import PayrollRunContext
+
+        self._ensure_dependency_graph()
+        motif = PayrollMotif.objects.get(id=motif_id)
+        employees = Employee.objects.in_bulk(list(targets))
+
+        items_by_employee = defaultdict(dict)
+        for item in PayrollLineItem.objects.filter(
+            employee_id__in=list(targets), motif_id=motif_id, period=period
+        ).select_related('payroll_element'):
+            items_by_employee[item.employee_id][item.payroll_element_id] = item
+
+        run_context = PayrollRunContext(period, motif, self.system_parameters).load(employees.values())
+        layer = PayrollIntegrationLayer(run_context.payroll_functions(), self.system_parameters)
+        builder = layer.formula_evaluator.formula_builder
+        builder.set_payroll_calculator(layer)
+
+        updated_items = []
+        new_items = []
+        with layer.formula_evaluator.memoized_run():
+            for employee_id, element_ids in targets.items():
+                employee = employees[employee_id]
+                items = items_by_employee[employee_id]
+
+                # Unchanged elements are read back from their stored amounts
+                for item in items.values():
+                    layer._store_element_result(employee, item.payroll_element, motif, period,
+                                                {'amount': item.calculated_amount})
+
+                for element_id in self._evaluation_order:
+                    if element_id not in element_ids:
+                        continue
+                    element = self._elements[element_id]
+                    item = items.get(element_id)
+
+                    if element.auto_base_calculation:
+                        base = builder.calculate_base(element, employee, motif, period)
+                    else:
+                        base = item.base_amount if item and item.base_amount is not None else Decimal('0.00')
+                    if element.auto_quantity_calculation:
+                        number = builder.calculate_number(element, employee, motif, period)
+                    else:
+                        number = item.quantity if item and item.quantity is not None else Decimal('1.00')
+                    amount = PayrollAmountCalculator.round_payroll_amount(base * number)
+
+                    if item is None:
+                        if amount:
+                            item = PayrollLineItem(
+                                employee=employee, payroll_element=element, motif=motif, period=period,
+                                base_amount=base, quantity=number, calculated_amount=amount
+                            )
+                            items[element_id] = item
+                            new_items.append(item)
+                    elif (item.base_amount, item.quantity, item.calculated_amount) != (base, number, amount):
+                        item.base_amount, item.quantity, item.calculated_amount = base, number, amount
+                        updated_items.append(item)
+
+                    layer._store_element_result(employee, element, motif, period, {'amount': amount})
+
+        if updated_items:
+            PayrollLineItem.objects.bulk_update(updated_items, ['base_amount', 'quantity', 'calculated_amount'])
+        if new_items:
+            PayrollLineItem.objects.bulk_create(new_items)
+
+        payrolls = list(Payroll.objects.filter(
+            employee_id__in=list(targets), motif_id=motif_id, period=period
+        ))
+        for payroll in payrolls:
+            employee = employees[payroll.employee_id]
+            result = self.payroll_calculator.calculate_payroll(
+                employee, motif,
+                payroll.payroll_from_date or period, payroll.payroll_to_date or period,
+                line_items=list(items_by_employee[payroll.employee_id].values())
+            )
+            for field, result_key in PAYROLL_RESULT_FIELDS.items():
+                setattr(payroll, field, result[result_key])
+            worked_days = run_context.get_njt_record(employee, motif, period)
+            payroll.worked_days = worked_days.njt if worked_days else Decimal('0.00')
+
+        if payrolls:
+            Payroll.objects.bulk_update(payrolls, list(PAYROLL_RESULT_FIELDS) + ['worked_days'])
+
+        return len(updated_items) + len(new_items), len(payrolls)
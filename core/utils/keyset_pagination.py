@@ -0,0 +1,115 @@
+# keyset_pagination.py
+"""
+Keyset (seek) pagination for report querysets
+
+Reports page through rows ordered on a tuple of columns ending with a unique
+one (usually the primary key). Instead of an OFFSET, the next page is selected
+with a WHERE clause comparing the ordering tuple to the last row returned, so
+every page costs the same whatever its position and rows inserted meanwhile do
+not shift the following pages.
+
+The position is handed to clients as an opaque cursor: the ordering values of
+the last row, JSON-encoded then base64-encoded.
+
+Usage:
+    page = paginate_keyset(
+        Employee.objects.values('id', 'last_name'), ('last_name', 'id'),
+        page_size=50, cursor=request.GET.get('cursor')
+    )
+    page.rows, page.next_cursor
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    """One page of rows and the cursor of the following page"""
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the ordering values of a row as an opaque cursor"""
+    payload = json.dumps(list(values), cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor made by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or has not `size` values
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}")
+    return values
+
+
+def keyset_filter(ordering: Sequence[str], values: Sequence[Any]) -> Q:
+    """
+    Condition selecting the rows after `values` in `ordering`
+
+    (a, b, c) > (x, y, z) is expanded to
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+    with < for the descending ('-' prefixed) columns.
+    """
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        column = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{column}__{lookup}': value})
+        equal &= Q(**{column: value})
+    return condition
+
+
+def paginate_keyset(queryset, ordering: Sequence[str], page_size: Optional[int] = None,
+                    cursor: Optional[str] = None) -> KeysetPage:
+    """
+    Read one page of a values() queryset
+
+    Args:
+        queryset: values() queryset returning every ordering column; ordering
+            columns must not be NULL and the last one must be unique
+        ordering: Column names, '-' prefixed for descending order
+        page_size: Rows per page (None reads every remaining row)
+        cursor: next_cursor of the previous page (None for the first page)
+
+    Returns:
+        KeysetPage with the rows and the next page cursor (None on the last page)
+    """
+    if page_size is not None and page_size < 1:
+        raise ValueError("page_size must be positive")
+
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+
+    if page_size is None:
+        return KeysetPage(list(queryset))
+
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return KeysetPage(rows)
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return KeysetPage(rows, encode_cursor([last[name.lstrip('-')] for name in ordering]))
@@ -7,11 +7,83 @@ Equivalent to FonctionsPaie.java and core methods from PaieClass.java
 from decimal import Decimal, ROUND_HALF_UP
 from datetime import datetime, date
 # Cleaned up imports - removed unused timedelta
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 from django.utils import timezone
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, NamedTuple, Optional, Union
 from .formula_engine import PayrollFormulaEvaluator, FormulaCalculationError
+from .tax_calculations import ITSBracketTable
 from .date_utils import DateCalculator
 import math
+import threading
+
+
+class FunctionMemo:
+    """
+    Bounded memo of F01-F24 results for one payroll run
+    
+    Entries are keyed by (function code, employee id, motif id, period),
+    leaving out the arguments a function does not read, so that e.g. F10 is
+    shared by all employees. Results are only valid while the function inputs
+    (line items, worked days, employee fields) are unchanged: call
+    invalidate() for an employee whose inputs are written during the run.
+    Least recently used entries are evicted beyond max_size.
+    """
+    
+    DEFAULT_MAX_SIZE = 50000
+    
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ValueError(f"max_size must be at least 1, got {max_size}")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_or_compute(self, key: tuple, compute) -> Decimal:
+        """Get a memoized result, computing and storing it on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        
+        # Computed outside the lock: functions may look up other functions
+        value = compute()
+        
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def invalidate(self, employee=None):
+        """Drop the results of one employee, or all results"""
+        with self._lock:
+            if employee is None:
+                self._entries.clear()
+                return
+            employee_id = getattr(employee, 'id', employee)
+            for key in [key for key in self._entries if key[1] == employee_id]:
+                del self._entries[key]
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters and current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+            }
+    
+    def __len__(self):
+        return len(self._entries)
 
 
 class PayrollFunctions:
@@ -19,11 +91,105 @@ class PayrollFunctions:
     24 Core Payroll Functions (F01-F24)
     Converted from Java FonctionsPaie.class
     These are the standard Mauritanian payroll calculation functions
+    
+    Inside memoized_run(), results are memoized per (function, employee,
+    motif, period) for the duration of the run.
     """
     
-    def __init__(self, system_parameters, payroll_calculator):
+    # Method and arguments of each function; the arguments also form the memo key
+    FUNCTION_SIGNATURES = {
+        'F01': ('F01_NJT', ('employee', 'motif', 'period')),
+        'F02': ('F02_sbJour', ('employee', 'motif', 'period')),
+        'F03': ('F03_sbHoraire', ('employee', 'motif', 'period')),
+        'F04': ('F04_TauxAnciennete', ('employee', 'period')),
+        'F05': ('F05_cumulBIDerDepart', ('employee',)),
+        'F06': ('F06_cumulBNIDerDepart', ('employee',)),
+        'F07': ('F07_cumulRETDerDepart', ('employee',)),
+        'F08': ('F08_cumulBrut12DerMois', ('employee',)),
+        'F09': ('F09_salaireBrutMensuelFixe', ('employee', 'period')),
+        'F10': ('F10_smig', ()),
+        'F11': ('F11_smigHoraire', ('employee',)),
+        'F12': ('F12_TauxLicenciement', ('employee', 'period')),
+        'F13': ('F13_TauxLicenciementCollectif', ('employee', 'period')),
+        'F14': ('F14_TauxRetraite', ('employee', 'period')),
+        'F15': ('F15_TauxPSRA', ('employee',)),
+        'F16': ('F16_TauxPreavis', ('employee',)),
+        'F17': ('F17_CumulNJTMC', ('employee',)),
+        'F18': ('F18_NbSmigRegion', ('employee',)),
+        'F19': ('F19_TauxPresence', ('employee', 'period')),
+        'F20': ('F20_BaseIndLogement', ('employee',)),
+        'F21': ('F21_salaireNet', ('employee', 'period')),
+        'F22': ('F22_NbEnfants', ('employee',)),
+        'F23': ('F23_TauxAncienneteSpeciale', ('employee', 'period')),
+        'F24': ('F24_augmentationSalaireFixe', ('employee', 'period')),
+    }
+    
+    def __init__(self, system_parameters, payroll_calculator, memo: Optional[FunctionMemo] = None):
         self.system_parameters = system_parameters
         self.pc = payroll_calculator  # Reference to main payroll calculator
+        self.memo = memo
+        self._memo_totals = {'hits': 0, 'misses': 0, 'evictions': 0}
+    
+    def __getstate__(self):
+        # Worker processes start their own run scope
+        state = self.__dict__.copy()
+        state['memo'] = None
+        return state
+    
+    @contextmanager
+    def memoized_run(self, memo: Optional[FunctionMemo] = None,
+                     max_size: int = FunctionMemo.DEFAULT_MAX_SIZE):
+        """
+        Memoize function results for the duration of a payroll run
+        
+        Nested scopes reuse the outer memo; the memo is dropped when the
+        outermost scope exits and its counters are kept in get_memo_stats.
+        
+        Args:
+            memo: Memo to share with other PayrollFunctions instances
+            max_size: Size bound of the memo created for the run
+        """
+        if self.memo is not None and memo is None:
+            yield self.memo
+            return
+        
+        previous = self.memo
+        owned = memo is None
+        self.memo = FunctionMemo(max_size) if owned else memo
+        try:
+            yield self.memo
+        finally:
+            if owned:
+                for counter in self._memo_totals:
+                    self._memo_totals[counter] += getattr(self.memo, counter)
+            self.memo = previous
+    
+    def get_memo_stats(self) -> Dict[str, int]:
+        """Get memo counters of past runs plus the active run"""
+        stats = dict(self._memo_totals, size=0)
+        if self.memo is not None:
+            memo_stats = self.memo.get_stats()
+            for counter in self._memo_totals:
+                stats[counter] += memo_stats[counter]
+            stats['size'] = memo_stats['size']
+        return stats
+    
+    def _function_value(self, function_code: str, employee=None, motif=None, period=None) -> Decimal:
+        """Evaluate a function through the run memo when one is active"""
+        method_name, arguments = self.FUNCTION_SIGNATURES[function_code]
+        values = {'employee': employee, 'motif': motif, 'period': period}
+        method = getattr(self, method_name)
+        args = [values[argument] for argument in arguments]
+        if self.memo is None:
+            return method(*args)
+        
+        key = (
+            function_code,
+            getattr(employee, 'id', employee) if 'employee' in arguments else None,
+            getattr(motif, 'id', motif) if 'motif' in arguments else None,
+            period if 'period' in arguments else None,
+        )
+        return self.memo.get_or_compute(key, lambda: method(*args))
         
     def F01_NJT(self, employee, motif, period) -> Decimal:
         """
@@ -48,7 +214,7 @@ class PayrollFunctions:
         F03 - Salaire de Base Horaire (Hourly Base Salary)
         Calculates hourly rate from daily salary and contract hours
         """
-        daily_salary = self.F02_sbJour(employee, motif, period)
+        daily_salary = self._function_value('F02', employee, motif, period)
         if daily_salary > 0 and employee.contract_hours_per_week:
             monthly_salary = daily_salary * Decimal('30')
             monthly_hours = Decimal(str(employee.contract_hours_per_week)) * Decimal('52') / Decimal('12')
@@ -140,17 +306,22 @@ class PayrollFunctions:
         F08 - Cumul Brut 12 Derniers Mois (12-month gross salary cumulative)
         Used for end-of-service benefits calculation
         """
+        # Without a current period, a run context ends the window at its period
+        current_period = self.system_parameters.current_period or getattr(self.pc, 'period', None)
+        if current_period is None:
+            raise ValueError("F08 requires the current period of the system parameters")
+        
         # Calculate period 13 months ago (390 days)
-        start_period = DateCalculator.add_days(self.system_parameters.current_period, -390)
+        start_period = DateCalculator.add_days(current_period, -390)
         # Set to 28th of month to ensure valid date
         start_period = start_period.replace(day=28)
         
         cumulative_gross = self.pc.get_cumulative_gross_12_months(
-            employee, start_period, self.system_parameters.current_period
+            employee, start_period, current_period
         )
         
         # Add initial cumulative amount from employee record
-        return cumulative_gross + Decimal(str(employee.cumul_12_months_initial or 0))
+        return cumulative_gross + Decimal(str(employee.cumulative_12dm_initial or 0))
     
     def F09_salaireBrutMensuelFixe(self, employee, period) -> Decimal:
         """
@@ -172,7 +343,7 @@ class PayrollFunctions:
         Calculates hourly minimum wage based on contract hours
         """
         if employee.contract_hours_per_week:
-            return self.F10_smig() * Decimal(str(employee.contract_hours_per_week)) * Decimal('4')
+            return self._function_value('F10') * Decimal(str(employee.contract_hours_per_week)) * Decimal('4')
         return Decimal('0.00')
     
     def F12_TauxLicenciement(self, employee, period) -> Decimal:
@@ -236,7 +407,7 @@ class PayrollFunctions:
             
         seniority_days = DateCalculator.get_days_between(employee.seniority_date, period) + 2
         seniority_years = seniority_days / 365.0
-        dismissal_rate = self.F12_TauxLicenciement(employee, period)
+        dismissal_rate = self._function_value('F12', employee, period=period)
         
         if 1.0 < seniority_years <= 5.0:
             return Decimal('0.3') * dismissal_rate
@@ -305,7 +476,7 @@ class PayrollFunctions:
         F21 - Salaire Net (Net Salary)
         Calculates net salary after all deductions (CNSS, CNAM, ITS)
         """
-        gross_salary = self.F09_salaireBrutMensuelFixe(employee, period)
+        gross_salary = self._function_value('F09', employee, period=period)
         
         if gross_salary <= 0:
             return Decimal('0.00')
@@ -351,56 +522,98 @@ class PayrollFunctions:
         Returns:
             Calculated value for the function
         """
-        if not function_code:
+        if function_code not in self.FUNCTION_SIGNATURES:
             return Decimal('0.00')
-            
-        function_map = {
-            'F01': lambda: self.F01_NJT(employee, motif, period),
-            'F02': lambda: self.F02_sbJour(employee, motif, period),
-            'F03': lambda: self.F03_sbHoraire(employee, motif, period),
-            'F04': lambda: self.F04_TauxAnciennete(employee, period),
-            'F05': lambda: self.F05_cumulBIDerDepart(employee),
-            'F06': lambda: self.F06_cumulBNIDerDepart(employee),
-            'F07': lambda: self.F07_cumulRETDerDepart(employee),
-            'F08': lambda: self.F08_cumulBrut12DerMois(employee),
-            'F09': lambda: self.F09_salaireBrutMensuelFixe(employee, period),
-            'F10': lambda: self.F10_smig(),
-            'F11': lambda: self.F11_smigHoraire(employee),
-            'F12': lambda: self.F12_TauxLicenciement(employee, period),
-            'F13': lambda: self.F13_TauxLicenciementCollectif(employee, period),
-            'F14': lambda: self.F14_TauxRetraite(employee, period),
-            'F15': lambda: self.F15_TauxPSRA(employee),
-            'F16': lambda: self.F16_TauxPreavis(employee),
-            'F17': lambda: self.F17_CumulNJTMC(employee),
-            'F18': lambda: self.F18_NbSmigRegion(employee),
-            'F19': lambda: self.F19_TauxPresence(employee, period),
-            'F20': lambda: self.F20_BaseIndLogement(employee),
-            'F21': lambda: self.F21_salaireNet(employee, period),
-            'F22': lambda: self.F22_NbEnfants(employee),
-            'F23': lambda: self.F23_TauxAncienneteSpeciale(employee, period),
-            'F24': lambda: self.F24_augmentationSalaireFixe(employee, period),
-        }
         
-        function_callable = function_map.get(function_code)
-        if function_callable:
-            try:
-                return function_callable()
-            except Exception as e:
-                # Log error and return 0
-                print(f"Error calculating {function_code}: {str(e)}")
-                return Decimal('0.00')
-        
-        return Decimal('0.00')
+        try:
+            return self._function_value(function_code, employee, motif, period)
+        except Exception as e:
+            # Log error and return 0
+            print(f"Error calculating {function_code}: {str(e)}")
+            return Decimal('0.00')
 
 
 class PayrollCalculator:
     """Core payroll calculation engine converted from PaieClass.paieCalcule"""
     
-    def __init__(self, system_parameters):
+    # Calculation modes for batch runs
+    MODE_SCALAR = 'scalar'
+    MODE_VECTORIZED = 'vectorized'
+    CALCULATION_MODES = [MODE_SCALAR, MODE_VECTORIZED]
+    
+    def __init__(self, system_parameters, calculation_mode: str = MODE_SCALAR):
+        if calculation_mode not in self.CALCULATION_MODES:
+            raise ValueError(f"Unknown calculation mode: {calculation_mode}")
         self.system_parameters = system_parameters
+        self.calculation_mode = calculation_mode
         self.payroll_functions = PayrollFunctions(system_parameters, self)
     
-    def calculate_payroll(self, employee, motif, period_start, period_end):
+    def prepare_run(self, employees, motif, period) -> 'PayrollRunContext':
+        """
+        Prefetch F01-F24 lookups for a whole payroll run
+        
+        Binds payroll_functions to a PayrollRunContext loaded for the given
+        employees so function lookups are served without per-employee queries.
+        
+        Args:
+            employees: Employee instances of the run
+            motif: PayrollMotif instance
+            period: Payroll period
+            
+        Returns:
+            The loaded PayrollRunContext
+        """
+        context = PayrollRunContext(period, motif, self.system_parameters).load(employees)
+        self.payroll_functions = context.payroll_functions()
+        return context
+    
+    def calculate_payroll_batch(self, employees, motif, period_start, period_end,
+                                line_items_by_employee: Optional[Dict[int, List]] = None) -> Dict[int, Dict[str, Decimal]]:
+        """
+        Calculate payroll for a whole population in the configured mode
+        
+        In vectorized mode all line items of the period/motif are loaded into
+        columnar arrays and every employee is calculated at once; results are
+        identical to calling calculate_payroll for each employee. In scalar
+        mode the same PayrollLineItem rows are loaded in one query.
+        
+        Args:
+            employees: List of Employee instances
+            motif: PayrollMotif instance
+            period_start: Start date of payroll period
+            period_end: End date of payroll period
+            line_items_by_employee: Optional preloaded {employee_id: [line items]}
+            
+        Returns:
+            Dict {employee_id: calculate_payroll result}
+        """
+        employees = list(employees)
+        
+        if self.calculation_mode == self.MODE_VECTORIZED:
+            from .batch_calculations import NUMPY_AVAILABLE, VectorizedPayrollEngine, PayrollLineItemColumns
+            
+            if NUMPY_AVAILABLE:
+                employee_ids = [employee.id for employee in employees]
+                if line_items_by_employee is None:
+                    columns = PayrollLineItemColumns.from_database(employee_ids, motif, period_start)
+                else:
+                    columns = PayrollLineItemColumns.from_line_items(employee_ids, line_items_by_employee)
+                return VectorizedPayrollEngine(self.system_parameters).calculate(employees, motif, columns)
+        
+        if line_items_by_employee is None:
+            line_items_by_employee = self._load_payroll_line_items(
+                [employee.id for employee in employees], motif, period_start
+            )
+        
+        results = {}
+        for employee in employees:
+            results[employee.id] = self.calculate_payroll(
+                employee, motif, period_start, period_end,
+                line_items=line_items_by_employee.get(employee.id, [])
+            )
+        return results
+    
+    def calculate_payroll(self, employee, motif, period_start, period_end, line_items=None):
         """
         Main payroll calculation method - equivalent to PaieClass.paieCalcule
         
@@ -409,6 +622,7 @@ class PayrollCalculator:
             motif: PayrollMotif instance
             period_start: Start date of payroll period
             period_end: End date of payroll period
+            line_items: Optional preloaded line items for this employee
             
         Returns:
             Dict with all calculated payroll values
@@ -429,7 +643,8 @@ class PayrollCalculator:
         }
         
         # Get all payroll line items for this employee/period
-        line_items = self._get_payroll_line_items(employee, motif, period_start)
+        if line_items is None:
+            line_items = self._get_payroll_line_items(employee, motif, period_start)
         
         # Calculate gross amounts
         gross_gains = sum(item.amount for item in line_items 
@@ -498,10 +713,28 @@ class PayrollCalculator:
         return result
     
     def _get_payroll_line_items(self, employee, motif, period):
-        """Get payroll line items for calculation"""
-        # This would query the PayrollLineItem model
-        # Placeholder - actual implementation would fetch from database
-        return []
+        """Get payroll line items of an employee for calculation"""
+        return self._load_payroll_line_items([employee.id], motif, period).get(employee.id, [])
+    
+    def _load_payroll_line_items(self, employee_ids: List[int], motif, period) -> Dict[int, List]:
+        """
+        Load the PayrollLineItem rows of a period/motif in a single query
+        
+        Same rows as PayrollLineItemColumns.from_database, with their payroll
+        element.
+        
+        Returns:
+            {employee_id: [line items]}
+        """
+        from core.models import PayrollLineItem
+        
+        line_items = defaultdict(list)
+        rows = PayrollLineItem.objects.filter(
+            motif=motif, period=period, employee_id__in=employee_ids
+        ).select_related('payroll_element').order_by('id')
+        for item in rows.iterator(chunk_size=5000):
+            line_items[item.employee_id].append(item)
+        return line_items
     
     def _calculate_cnss_employee(self, base_amount):
         """Calculate employee CNSS contribution"""
@@ -555,49 +788,20 @@ class PayrollCalculator:
         # Apply abatement
         taxable_income = max(Decimal('0.00'), taxable_income - self.system_parameters.tax_abatement)
         
-        # Get tax brackets
-        brackets = self.system_parameters.get_its_brackets()
+        # Shared precomputed table for the configured brackets
+        # (7.5% first bracket for expatriates vs 15% for nationals)
+        its_table = ITSBracketTable.from_brackets(
+            self.system_parameters.get_its_brackets(),
+            first_rate=Decimal('0.075') if is_expatriate else None
+        )
+        its = its_table.calculate(taxable_income)
         
-        result = {
-            'total': Decimal('0.00'),
-            'tranche1': Decimal('0.00'),
-            'tranche2': Decimal('0.00'),
-            'tranche3': Decimal('0.00'),
+        return {
+            'total': its['total'],
+            'tranche1': its['tranche1'],
+            'tranche2': its['tranche2'],
+            'tranche3': its['tranche3'],
         }
-        
-        remaining_income = taxable_income
-        tranche_names = ['tranche1', 'tranche2', 'tranche3']
-        
-        for i, bracket in enumerate(brackets):
-            if remaining_income <= 0:
-                break
-            
-            bracket_min = Decimal(str(bracket['min']))
-            bracket_max = Decimal(str(bracket['max'])) if bracket['max'] != float('inf') else None
-            bracket_rate = Decimal(str(bracket['rate']))
-            
-            # Adjust rate for expatriates on first bracket
-            if i == 0 and is_expatriate:
-                bracket_rate = Decimal('0.075')  # 7.5% for expatriates vs 15% for nationals
-            
-            # Calculate taxable amount in this bracket
-            if bracket_max:
-                bracket_width = bracket_max - bracket_min
-                taxable_in_bracket = min(remaining_income, bracket_width)
-            else:
-                taxable_in_bracket = remaining_income
-            
-            # Calculate tax for this bracket
-            bracket_tax = (taxable_in_bracket * bracket_rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-            
-            # Store in appropriate tranche
-            if i < len(tranche_names):
-                result[tranche_names[i]] = bracket_tax
-            
-            result['total'] += bracket_tax
-            remaining_income -= taxable_in_bracket
-        
-        return result
 
 
 class PayrollFunctionsStatic:
@@ -1506,6 +1710,294 @@ class InstallmentCalculator:
         return Decimal('0.00')
 
 
+class WorkedDaysRecord(NamedTuple):
+    """In-memory worked days row (njtsalarie) served to F01"""
+    njt: Decimal
+
+
+class RubriquePaieRecord(NamedTuple):
+    """In-memory payroll line item row (rubriquepaie) served to F02/F09"""
+    base: Decimal
+    quantity: Decimal
+    amount: Decimal
+    is_fixed: bool
+    element_type: str
+
+
+class PayrollRunContext:
+    """
+    Prefetched lookups for a monthly payroll run
+    
+    Replaces the per-employee database lookups used by PayrollFunctions
+    (F01-F24) with in-memory indexes built from a few set-based queries
+    for the run's period and motif, so the number of queries of a run
+    does not grow with the number of employees. Lookups for employees,
+    motifs or periods outside the loaded run fall back to a direct query.
+    The F08 window ends at the current period of the system parameters,
+    or at the run's period when none is set.
+    
+    Contribution and tax amounts (F21) are delegated to an
+    InstallmentCalculator.
+    
+    Usage:
+        context = PayrollRunContext(period, motif).load(employees)
+        functions = context.payroll_functions()
+        functions.calculate_function('F01', employee, motif, period)
+    """
+    
+    # Cumulative type codes (F05-F07) mapped to Payroll fields
+    CUMULATIVE_FIELDS = {
+        'BI': ('gross_taxable',),
+        'BNI': ('gross_non_taxable',),
+        'RET': ('gross_deductions', 'net_deductions'),
+    }
+    
+    def __init__(self, period: date, motif, system_parameters=None,
+                 rubric_mapping: Optional[Dict[int, int]] = None):
+        self.period = period
+        self.motif = motif
+        self.motif_id = getattr(motif, 'id', motif)
+        self.system_parameters = system_parameters
+        self.rubric_mapping = rubric_mapping or {}
+        self.calculator = InstallmentCalculator()
+        self.calculator.system_parameters = system_parameters
+        
+        self._employee_ids = set()
+        self._worked_days = {}
+        self._line_items = {}
+        self._fixed_gross = {}
+        self._cumulatives = {}
+        self._gross_12_months = {}
+        self._housing_grid = None
+        self._gross_12_months_window = None
+    
+    def load(self, employees) -> 'PayrollRunContext':
+        """
+        Bulk-load worked days, line items, payroll history and housing grid
+        
+        Args:
+            employees: Employee instances or ids; may be called again to
+                extend the run with more employees
+            
+        Returns:
+            self, to allow chaining
+        """
+        employee_ids = {getattr(employee, 'id', employee) for employee in employees}
+        employee_ids -= self._employee_ids
+        
+        if self.system_parameters is None:
+            from core.models import SystemParameters
+            self.system_parameters = SystemParameters.objects.first()
+            self.calculator.system_parameters = self.system_parameters
+        if self._gross_12_months_window is None:
+            current_period = getattr(self.system_parameters, 'current_period', None) or self.period
+            self._gross_12_months_window = self.get_gross_12_months_window(current_period)
+        if self._housing_grid is None:
+            self._load_housing_grid()
+        
+        if employee_ids:
+            self._load_worked_days(employee_ids)
+            self._load_line_items(employee_ids)
+            self._load_payroll_history(employee_ids)
+            self._employee_ids |= employee_ids
+        
+        return self
+    
+    def payroll_functions(self) -> PayrollFunctions:
+        """Get PayrollFunctions bound to this context"""
+        return PayrollFunctions(self.system_parameters, self)
+    
+    @staticmethod
+    def get_gross_12_months_window(current_period: date):
+        """
+        Get the (start, end) periods of the F08 12-month gross cumulative
+        
+        Mirrors the window computed by PayrollFunctions.F08_cumulBrut12DerMois
+        """
+        start_period = DateCalculator.add_days(current_period, -390).replace(day=28)
+        return start_period, current_period
+    
+    # ========== BULK LOADERS ==========
+    
+    def _load_worked_days(self, employee_ids):
+        from core.models import WorkedDays
+        
+        rows = WorkedDays.objects.filter(
+            employee_id__in=employee_ids, motif_id=self.motif_id, period=self.period
+        ).values_list('employee_id', 'worked_days')
+        for employee_id, worked_days in rows:
+            self._worked_days[employee_id] = WorkedDaysRecord(worked_days or Decimal('0.00'))
+    
+    def _load_line_items(self, employee_ids):
+        from core.models import PayrollLineItem
+        
+        rows = PayrollLineItem.objects.filter(
+            employee_id__in=employee_ids, motif_id=self.motif_id, period=self.period
+        ).values_list(
+            'employee_id', 'payroll_element_id', 'base_amount', 'quantity',
+            'calculated_amount', 'is_fixed', 'payroll_element__type'
+        )
+        for employee_id, element_id, base, quantity, amount, is_fixed, element_type in rows:
+            record = RubriquePaieRecord(
+                base or Decimal('0.00'), quantity or Decimal('0.00'),
+                amount or Decimal('0.00'), is_fixed, element_type
+            )
+            self._line_items[(employee_id, element_id)] = record
+            if is_fixed and element_type == 'G':
+                self._fixed_gross[employee_id] = self._fixed_gross.get(employee_id, Decimal('0.00')) + record.amount
+    
+    def _load_payroll_history(self, employee_ids):
+        from django.db.models import Sum
+        from core.models import Payroll
+        
+        since_last_departure = self._since_last_departure_filter()
+        aggregates = {
+            f'total_{field}': Sum(field, filter=since_last_departure)
+            for fields in self.CUMULATIVE_FIELDS.values() for field in fields
+        }
+        window = self._period_range_filter(*self._gross_12_months_window)
+        aggregates['gross_12_taxable'] = Sum('gross_taxable', filter=window)
+        aggregates['gross_12_non_taxable'] = Sum('gross_non_taxable', filter=window)
+        
+        rows = Payroll.objects.filter(employee_id__in=employee_ids).values(
+            'employee_id'
+        ).order_by().annotate(**aggregates)
+        for row in rows:
+            employee_id = row['employee_id']
+            for code, fields in self.CUMULATIVE_FIELDS.items():
+                self._cumulatives[(employee_id, code)] = sum(
+                    (row[f'total_{field}'] or Decimal('0.00') for field in fields), Decimal('0.00')
+                )
+            self._gross_12_months[employee_id] = (
+                (row['gross_12_taxable'] or Decimal('0.00'))
+                + (row['gross_12_non_taxable'] or Decimal('0.00'))
+            )
+    
+    def _load_housing_grid(self):
+        from core.models import HousingGrid
+        
+        self._housing_grid = {
+            (grade_id, marital_status, children_count): amount or Decimal('0.00')
+            for grade_id, marital_status, children_count, amount in HousingGrid.objects.values_list(
+                'salary_grade_id', 'marital_status', 'children_count', 'amount'
+            )
+        }
+    
+    def _since_last_departure_filter(self):
+        from django.db.models import F, Q
+        
+        return Q(period__lt=self.period) & (
+            Q(employee__last_departure_initial__isnull=True)
+            | Q(period__gt=F('employee__last_departure_initial'))
+        )
+    
+    @staticmethod
+    def _period_range_filter(start_period, end_period):
+        from django.db.models import Q
+        
+        return Q(period__gte=start_period, period__lte=end_period)
+    
+    def _is_loaded(self, employee, motif=None, period=None) -> bool:
+        if motif is not None and getattr(motif, 'id', motif) != self.motif_id:
+            return False
+        if period is not None and period != self.period:
+            return False
+        employee_id = getattr(employee, 'id', employee)
+        if employee_id not in self._employee_ids:
+            self.load([employee_id])
+        return True
+    
+    # ========== LOOKUPS USED BY PayrollFunctions ==========
+    
+    def get_njt_record(self, employee, motif, period):
+        """Get worked days record (F01)"""
+        if self._is_loaded(employee, motif, period):
+            return self._worked_days.get(employee.id)
+        
+        from core.models import WorkedDays
+        worked_days = WorkedDays.objects.filter(
+            employee=employee, motif=motif, period=period
+        ).values_list('worked_days', flat=True).first()
+        return WorkedDaysRecord(worked_days or Decimal('0.00')) if worked_days is not None else None
+    
+    def get_rubrique_paie_record(self, employee, rubric_id, motif, period):
+        """Get payroll line item record of a payroll element (F02)"""
+        if self._is_loaded(employee, motif, period):
+            return self._line_items.get((employee.id, rubric_id))
+        
+        from core.models import PayrollLineItem
+        line_item = PayrollLineItem.objects.filter(
+            employee=employee, payroll_element_id=rubric_id, motif=motif, period=period
+        ).select_related('payroll_element').first()
+        if line_item is None:
+            return None
+        return RubriquePaieRecord(
+            line_item.base_amount or Decimal('0.00'), line_item.quantity or Decimal('0.00'),
+            line_item.calculated_amount or Decimal('0.00'), line_item.is_fixed,
+            line_item.payroll_element.type
+        )
+    
+    def get_used_rub_id(self, system_id):
+        """Get the payroll element id used for a system rubric"""
+        return self.rubric_mapping.get(system_id, system_id)
+    
+    def get_cumulative_amount_by_type(self, employee, type_code):
+        """Get cumulative BI/BNI/RET amounts since last departure (F05-F07)"""
+        if type_code not in self.CUMULATIVE_FIELDS:
+            return Decimal('0.00')
+        self._is_loaded(employee)
+        return self._cumulatives.get((employee.id, type_code), Decimal('0.00'))
+    
+    def get_cumulative_gross_12_months(self, employee, start_period, end_period):
+        """Get cumulative gross salary over a period window (F08)"""
+        self._is_loaded(employee)
+        if self._gross_12_months_window == (start_period, end_period):
+            return self._gross_12_months.get(employee.id, Decimal('0.00'))
+        
+        from django.db.models import Sum
+        from core.models import Payroll
+        totals = Payroll.objects.filter(
+            self._period_range_filter(start_period, end_period), employee=employee
+        ).aggregate(taxable=Sum('gross_taxable'), non_taxable=Sum('gross_non_taxable'))
+        return (totals['taxable'] or Decimal('0.00')) + (totals['non_taxable'] or Decimal('0.00'))
+    
+    def get_fixed_monthly_gross_salary(self, employee, period):
+        """Get the sum of fixed gain line items of the period (F09)"""
+        if self._is_loaded(employee, period=period):
+            return self._fixed_gross.get(employee.id, Decimal('0.00'))
+        
+        from django.db.models import Sum
+        from core.models import PayrollLineItem
+        total = PayrollLineItem.objects.filter(
+            employee=employee, motif_id=self.motif_id, period=period,
+            is_fixed=True, payroll_element__type='G'
+        ).aggregate(total=Sum('calculated_amount'))['total']
+        return total or Decimal('0.00')
+    
+    def get_housing_allowance_base(self, employee):
+        """Get housing allowance from the housing grid (F20)"""
+        if self._housing_grid is None:
+            self._load_housing_grid()
+        marital_status = (employee.marital_status or '')[:1].upper()
+        key = (employee.salary_grade_id, marital_status, employee.children_count or 0)
+        return self._housing_grid.get(key, Decimal('0.00'))
+    
+    def get_salary_increase(self, employee, period):
+        """Get salary increase amount (F24) - no increase source in this schema"""
+        return Decimal('0.00')
+    
+    # ========== CONTRIBUTIONS AND TAX (F21) ==========
+    
+    def calculate_cnss_employee(self, *args, **kwargs) -> Decimal:
+        return self.calculator.calculate_cnss_employee(*args, **kwargs)
+    
+    def calculate_cnam_employee(self, *args, **kwargs) -> Decimal:
+        return self.calculator.calculate_cnam_employee(*args, **kwargs)
+    
+    def calculate_its_total(self, *args, **kwargs) -> Decimal:
+        return self.calculator.calculate_its_total(*args, **kwargs)
+
+
 class PayrollValidationError(Exception):
     """Custom exception for payroll calculation validation errors"""
     pass
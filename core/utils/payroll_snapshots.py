@@ -0,0 +1,430 @@
+# payroll_snapshots.py
+"""
+Columnar snapshots of closed payroll periods for analytics reads
+
+Each closed period/motif is written once as a NumPy .npz file holding the
+Payroll results as integer-cent columns, with the employee dimensions
+(department, direction, position, salary grade, names) denormalized at
+close time. The reader loads a range of periods into a PayrollSnapshotFrame
+that filters and aggregates in memory, so YTD, multi-period and trend
+reports no longer issue one aggregate query per period.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .batch_calculations import to_cents
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Payroll money fields stored as integer cents
+MONEY_COLUMNS = (
+    'gross_taxable', 'gross_non_taxable', 'net_salary', 'cnss_employee', 'cnam_employee',
+    'its_total', 'rcnss', 'rcnam', 'gross_deductions', 'net_deductions',
+)
+
+# Payroll quantity fields stored as integer hundredths
+QUANTITY_COLUMNS = ('worked_days', 'overtime_hours')
+
+# Employee dimensions stored as ids (-1 when empty)
+DIMENSION_COLUMNS = {
+    'department_id': 'employee__department_id',
+    'direction_id': 'employee__direction_id',
+    'position_id': 'employee__position_id',
+    'salary_grade_id': 'employee__salary_grade_id',
+}
+
+# Employee attributes stored as text
+TEXT_COLUMNS = {
+    'first_name': 'employee__first_name',
+    'last_name': 'employee__last_name',
+    'department_name': 'employee__department__name',
+    'direction_name': 'employee__direction__name',
+}
+
+# Report filter keys (CumulativeDataAggregator._apply_filters) and their columns
+FILTER_COLUMNS = {
+    'department_ids': 'department_id',
+    'direction_ids': 'direction_id',
+    'position_ids': 'position_id',
+    'salary_grade_ids': 'salary_grade_id',
+}
+
+
+def _month_start(period: date) -> date:
+    return date(period.year, period.month, 1)
+
+
+def _months(start_period: date, end_period: date) -> List[date]:
+    """First day of every month between two periods (inclusive)"""
+    months = []
+    current = _month_start(start_period)
+    while current <= end_period:
+        months.append(current)
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+    return months
+
+
+def _cents_to_decimal(cents) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+class PayrollSnapshotFrame:
+    """
+    In-memory columns of payroll results over one or more periods
+
+    Money columns are integer cents and quantity columns integer hundredths;
+    aggregation helpers return Decimal values like the ORM aggregates.
+    """
+
+    def __init__(self, columns: Dict[str, 'np.ndarray']):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns['employee_id'])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @classmethod
+    def concatenate(cls, frames: List['PayrollSnapshotFrame']) -> 'PayrollSnapshotFrame':
+        """Stack frames of the same schema"""
+        if not frames:
+            return cls.empty()
+        return cls({
+            name: np.concatenate([frame.columns[name] for frame in frames])
+            for name in frames[0].columns
+        })
+
+    @classmethod
+    def empty(cls) -> 'PayrollSnapshotFrame':
+        columns = {
+            'employee_id': np.zeros(0, dtype=np.int64),
+            'motif_id': np.zeros(0, dtype=np.int64),
+            'period': np.zeros(0, dtype='datetime64[D]'),
+            'has_cnss_number': np.zeros(0, dtype=bool),
+            'has_cnam_number': np.zeros(0, dtype=bool),
+        }
+        for name in MONEY_COLUMNS + QUANTITY_COLUMNS + tuple(DIMENSION_COLUMNS):
+            columns[name] = np.zeros(0, dtype=np.int64)
+        for name in TEXT_COLUMNS:
+            columns[name] = np.zeros(0, dtype='<U1')
+        return cls(columns)
+
+    def select(self, mask) -> 'PayrollSnapshotFrame':
+        """Rows where mask is true"""
+        return PayrollSnapshotFrame({name: values[mask] for name, values in self.columns.items()})
+
+    def filter(self, filters: Optional[Dict] = None, start_period: date = None,
+               end_period: date = None) -> 'PayrollSnapshotFrame':
+        """
+        Apply report filters and a period range
+
+        Args:
+            filters: Report filters ('department_ids', 'direction_ids',
+                'position_ids', 'salary_grade_ids')
+            start_period: First period (inclusive)
+            end_period: Last period (inclusive)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for key, column in FILTER_COLUMNS.items():
+            values = (filters or {}).get(key)
+            if values:
+                mask &= np.isin(self.columns[column], np.asarray(list(values), dtype=np.int64))
+        if start_period is not None:
+            mask &= self.columns['period'] >= np.datetime64(start_period, 'D')
+        if end_period is not None:
+            mask &= self.columns['period'] <= np.datetime64(end_period, 'D')
+        return self if mask.all() else self.select(mask)
+
+    def totals(self) -> Dict[str, Decimal]:
+        """
+        Aggregate the frame like Payroll.objects.aggregate
+
+        Returns:
+            Dict with total_employees (distinct), record_count, total_<field>
+            for every money and quantity column, average_net_salary, and
+            max/min_net_salary
+        """
+        result = {
+            'total_employees': int(len(np.unique(self.columns['employee_id']))),
+            'record_count': len(self),
+        }
+        for name in MONEY_COLUMNS + QUANTITY_COLUMNS:
+            result[f'total_{name}'] = _cents_to_decimal(self.columns[name].sum())
+
+        net = self.columns['net_salary']
+        if len(net):
+            result['average_net_salary'] = _cents_to_decimal(net.sum()) / len(net)
+            result['max_net_salary'] = _cents_to_decimal(net.max())
+            result['min_net_salary'] = _cents_to_decimal(net.min())
+        else:
+            result['average_net_salary'] = Decimal('0')
+            result['max_net_salary'] = Decimal('0')
+            result['min_net_salary'] = Decimal('0')
+        return result
+
+    def group_by(self, column: str) -> Dict[object, 'PayrollSnapshotFrame']:
+        """Split the frame by the values of a column, in sorted key order"""
+        if not len(self):
+            return {}
+        keys = self.columns[column]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        groups = OrderedDict()
+        for indexes in np.split(order, boundaries):
+            key = keys[indexes[0]]
+            groups[key.item() if hasattr(key, 'item') else key] = self.select(indexes)
+        return groups
+
+    def totals_by(self, column: str) -> Dict[object, Dict[str, Decimal]]:
+        """Totals of each value of a column (e.g. 'period', 'department_name'), in sorted key order"""
+        if not len(self):
+            return OrderedDict()
+        keys = self.columns[column]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        starts = np.concatenate(([0], np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1))
+        counts = np.diff(np.append(starts, len(order)))
+
+        sums = {
+            name: np.add.reduceat(self.columns[name][order], starts)
+            for name in MONEY_COLUMNS + QUANTITY_COLUMNS
+        }
+        net = self.columns['net_salary'][order]
+        maxima = np.maximum.reduceat(net, starts)
+        minima = np.minimum.reduceat(net, starts)
+        group_ids = np.repeat(np.arange(len(starts)), counts)
+        employee_ids = self.columns['employee_id'][order]
+        stride = int(employee_ids.max()) + 1
+        pairs = np.unique(group_ids * stride + employee_ids)
+        employees = np.bincount(pairs // stride, minlength=len(starts))
+
+        result = OrderedDict()
+        for index, start in enumerate(starts):
+            key = sorted_keys[start]
+            totals = {'total_employees': int(employees[index]), 'record_count': int(counts[index])}
+            for name in MONEY_COLUMNS + QUANTITY_COLUMNS:
+                totals[f'total_{name}'] = _cents_to_decimal(sums[name][index])
+            totals['average_net_salary'] = _cents_to_decimal(sums['net_salary'][index]) / int(counts[index])
+            totals['max_net_salary'] = _cents_to_decimal(maxima[index])
+            totals['min_net_salary'] = _cents_to_decimal(minima[index])
+            result[key.item() if hasattr(key, 'item') else key] = totals
+        return result
+
+    def employee_totals(self, limit: int = None) -> List[Dict]:
+        """
+        Per-employee totals ordered by descending net salary
+
+        Returns:
+            List of dicts with employee id, names, department, net and gross
+            totals and the number of periods
+        """
+        if not len(self):
+            return []
+        employee_ids, first_rows, inverse = np.unique(
+            self.columns['employee_id'], return_index=True, return_inverse=True
+        )
+        net = np.zeros(len(employee_ids), dtype=np.int64)
+        gross = np.zeros(len(employee_ids), dtype=np.int64)
+        np.add.at(net, inverse, self.columns['net_salary'])
+        np.add.at(gross, inverse, self.columns['gross_taxable'])
+        periods = np.bincount(inverse, minlength=len(employee_ids))
+
+        order = np.argsort(-net, kind='stable')
+        if limit is not None:
+            order = order[:limit]
+        return [
+            {
+                'employee__id': int(employee_ids[index]),
+                'employee__first_name': str(self.columns['first_name'][first_rows[index]]),
+                'employee__last_name': str(self.columns['last_name'][first_rows[index]]),
+                'employee__department__name': str(self.columns['department_name'][first_rows[index]]) or None,
+                'total_net_salary': _cents_to_decimal(net[index]),
+                'total_gross_taxable': _cents_to_decimal(gross[index]),
+                'periods_worked': int(periods[index]),
+            }
+            for index in order
+        ]
+
+
+class PayrollSnapshotStore:
+    """
+    Append-only store of closed payroll period snapshots
+
+    Files are laid out as <root>/<YYYY-MM>/motif_<id>.npz and never
+    rewritten; the root defaults to settings.PAYROLL_SNAPSHOT_ROOT.
+
+    Usage:
+        store = PayrollSnapshotStore()
+        store.write_period(date(2024, 1, 31))         # at period close
+        frame = store.load(date(2024, 1, 1), date(2024, 12, 31))
+        frame.filter({'department_ids': [3]}).totals_by('period')
+    """
+
+    def __init__(self, root: Optional[str] = None, max_cached_files: int = 512):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("NumPy is required for payroll snapshots")
+        if root is None:
+            from django.conf import settings
+            root = getattr(settings, 'PAYROLL_SNAPSHOT_ROOT',
+                           Path(settings.BASE_DIR) / 'payroll_snapshots')
+        self.root = Path(root)
+        self.max_cached_files = max_cached_files
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ========== WRITING ==========
+
+    def snapshot_path(self, period: date, motif_id: int) -> Path:
+        """Path of the snapshot of a period and motif"""
+        return self.root / f"{period.year:04d}-{period.month:02d}" / f"motif_{motif_id}.npz"
+
+    def write_period(self, period: date, motif_ids: Optional[Iterable[int]] = None) -> List[Path]:
+        """
+        Write the snapshots of a closed period, one file per motif
+
+        Args:
+            period: Any date of the closed month
+            motif_ids: Restrict to these motifs (defaults to every motif of the period)
+
+        Returns:
+            Paths of the written files
+
+        Raises:
+            FileExistsError: If a snapshot of the period/motif already exists
+        """
+        from core.models import Payroll
+
+        month_start = _month_start(period)
+        queryset = Payroll.objects.filter(
+            period__year=month_start.year, period__month=month_start.month
+        )
+        if motif_ids is not None:
+            queryset = queryset.filter(motif_id__in=list(motif_ids))
+
+        fields = (
+            ['employee_id', 'motif_id', 'period', 'employee__cnss_number', 'employee__cnam_number']
+            + list(MONEY_COLUMNS) + list(QUANTITY_COLUMNS)
+            + list(DIMENSION_COLUMNS.values()) + list(TEXT_COLUMNS.values())
+        )
+        rows_by_motif = OrderedDict()
+        for row in queryset.order_by('motif_id', 'employee_id').values(*fields):
+            rows_by_motif.setdefault(row['motif_id'], []).append(row)
+
+        for motif_id in rows_by_motif:
+            if self.snapshot_path(month_start, motif_id).exists():
+                raise FileExistsError(f"Snapshot already written for {month_start:%Y-%m} motif {motif_id}")
+
+        return [
+            self._write_file(self.snapshot_path(month_start, motif_id), self._build_columns(rows))
+            for motif_id, rows in rows_by_motif.items()
+        ]
+
+    def _build_columns(self, rows: List[Dict]) -> Dict[str, 'np.ndarray']:
+        columns = {
+            'employee_id': np.array([row['employee_id'] for row in rows], dtype=np.int64),
+            'motif_id': np.array([row['motif_id'] for row in rows], dtype=np.int64),
+            'period': np.array([row['period'] for row in rows], dtype='datetime64[D]'),
+            'has_cnss_number': np.array([bool(row['employee__cnss_number']) for row in rows], dtype=bool),
+            'has_cnam_number': np.array([bool(row['employee__cnam_number']) for row in rows], dtype=bool),
+        }
+        for name in MONEY_COLUMNS + QUANTITY_COLUMNS:
+            columns[name] = np.array([to_cents(row[name]) for row in rows], dtype=np.int64)
+        for name, field in DIMENSION_COLUMNS.items():
+            columns[name] = np.array([row[field] if row[field] is not None else -1 for row in rows],
+                                     dtype=np.int64)
+        for name, field in TEXT_COLUMNS.items():
+            columns[name] = np.array([row[field] or '' for row in rows], dtype=str)
+        return columns
+
+    def _write_file(self, path: Path, columns: Dict[str, 'np.ndarray']) -> Path:
+        """Write atomically so readers never see a partial snapshot"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=path.parent, suffix='.npz.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as output:
+                np.savez(output, format_version=np.array(SNAPSHOT_FORMAT_VERSION), **columns)
+            os.replace(temporary, path)
+        except Exception:
+            if os.path.exists(temporary):
+                os.unlink(temporary)
+            raise
+        logger.info(f"Payroll snapshot written: {path}")
+        return path
+
+    # ========== READING ==========
+
+    def snapshot_files(self, period: date) -> List[Path]:
+        """Snapshot files of a period, all motifs"""
+        directory = self.root / f"{period.year:04d}-{period.month:02d}"
+        if not directory.is_dir():
+            return []
+        return sorted(directory.glob('motif_*.npz'))
+
+    def covers(self, start_period: date, end_period: date) -> bool:
+        """Check every month of the range has been snapshotted"""
+        return all(self.snapshot_files(month) for month in _months(start_period, end_period))
+
+    def load(self, start_period: date, end_period: date,
+             motif_ids: Optional[Iterable[int]] = None) -> PayrollSnapshotFrame:
+        """
+        Load the snapshots of a period range
+
+        Args:
+            start_period: First period (inclusive)
+            end_period: Last period (inclusive)
+            motif_ids: Restrict to these motifs
+
+        Returns:
+            PayrollSnapshotFrame of the snapshotted rows in the range
+        """
+        wanted = set(motif_ids) if motif_ids is not None else None
+        frames = []
+        for month in _months(start_period, end_period):
+            for path in self.snapshot_files(month):
+                if wanted is not None and int(path.stem.split('_', 1)[1]) not in wanted:
+                    continue
+                frames.append(self._read_file(path))
+        return PayrollSnapshotFrame.concatenate(frames).filter(
+            start_period=start_period, end_period=end_period
+        )
+
+    def _read_file(self, path: Path) -> PayrollSnapshotFrame:
+        """Read a snapshot, keeping recently used files in memory (they never change)"""
+        key = str(path)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+                return frame
+
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != SNAPSHOT_FORMAT_VERSION:
+                raise ValueError(f"Unsupported payroll snapshot format {version}: {path}")
+            frame = PayrollSnapshotFrame({
+                name: data[name] for name in data.files if name != 'format_version'
+            })
+
+        with self._lock:
+            self._frames[key] = frame
+            while len(self._frames) > self.max_cached_files:
+                self._frames.popitem(last=False)
+        return frame
@@ -0,0 +1,357 @@
+# period_aggregates.py
+"""
+Materialized monthly payroll rollup
+Keeps PayrollPeriodAggregate in step with Payroll and answers report totals
+
+A saved or deleted Payroll row moves its own amounts in and out of its
+rollup row (core.signals): counts and totals are updated in place, and the
+row is only re-aggregated from its payrolls when the change drops one of its
+minimums or maximums. refresh_period_aggregates() rebuilds a whole (month,
+motif) slice at period close and for backfills. Payroll runs and bulk
+writers wrap their loop in deferred_aggregate_refresh() (or
+incremental_recalculation.payroll_run_writes()) so every touched slice is
+rebuilt once at the end instead of updated once per saved row.
+
+Report modules read totals over any period range, optionally grouped by
+period, motif, department, direction or expatriate flag, with a single
+query on the rollup instead of one aggregate query per month.
+"""
+
+import logging
+import threading
+from calendar import monthrange
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least, TruncMonth, TruncQuarter, TruncYear
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Payroll amounts rolled up as total_/min_/max_ columns
+AGGREGATE_FIELDS = (
+    'gross_taxable', 'gross_non_taxable', 'net_salary', 'cnss_employee', 'cnam_employee',
+    'its_total', 'rcnss', 'rcnam', 'rits', 'gross_deductions', 'net_deductions',
+    'worked_days', 'overtime_hours',
+)
+
+# Rollup dimensions and the Payroll lookups they come from
+AGGREGATE_DIMENSIONS = {
+    'period': 'period',
+    'motif_id': 'motif_id',
+    'department_id': 'employee__department_id',
+    'direction_id': 'employee__direction_id',
+    'is_expatriate': 'employee__is_expatriate',
+}
+
+# Employee fields denormalized into the rollup dimensions
+AGGREGATE_EMPLOYEE_FIELDS = ('department_id', 'direction_id', 'is_expatriate')
+
+# Payroll fields a rollup row is computed from
+AGGREGATE_PAYROLL_FIELDS = ('period', 'motif_id', 'employee_id') + AGGREGATE_FIELDS
+
+# One payroll's share of the rollup: its row key (AGGREGATE_DIMENSIONS values) and amounts
+AggregateContribution = Tuple[Tuple, Dict[str, Decimal]]
+
+# Report filter keys (CumulativeDataAggregator._apply_filters) the rollup can answer
+AGGREGATE_FILTERS = {
+    'department_ids': 'department_id__in',
+    'direction_ids': 'direction_id__in',
+}
+
+# Bucket sizes of the report period comparisons
+PERIOD_TRUNCATIONS = {
+    'month': TruncMonth,
+    'quarter': TruncQuarter,
+    'year': TruncYear,
+}
+
+_refresh_state = threading.local()
+
+
+def _month_bounds(period: date) -> Tuple[date, date]:
+    return date(period.year, period.month, 1), date(period.year, period.month, monthrange(period.year, period.month)[1])
+
+
+def _aggregate_expressions() -> Dict:
+    """Count and total_/min_/max_ aggregates of the Payroll amounts (missing amounts count as 0)"""
+    aggregates = {'payroll_count': Count('id')}
+    for field in AGGREGATE_FIELDS:
+        amount = Coalesce(field, Value(Decimal('0')))
+        aggregates[f'total_{field}'] = Sum(amount)
+        aggregates[f'min_{field}'] = Min(amount)
+        aggregates[f'max_{field}'] = Max(amount)
+    return aggregates
+
+
+def refresh_period_aggregates(period: date, motif_id: Optional[int] = None) -> int:
+    """
+    Rebuild the rollup of a month from its Payroll rows
+
+    Call at period close, or to backfill; Payroll saves and deletes update
+    their own rollup row through core.signals.
+
+    Args:
+        period: Any date of the month
+        motif_id: Restrict to one motif (defaults to every motif)
+
+    Returns:
+        Number of rollup rows written
+    """
+    from core.models import Payroll, PayrollPeriodAggregate
+
+    month_start, month_end = _month_bounds(period)
+    payrolls = Payroll.objects.filter(period__gte=month_start, period__lte=month_end)
+    existing = PayrollPeriodAggregate.objects.filter(period__gte=month_start, period__lte=month_end)
+    if motif_id is not None:
+        payrolls = payrolls.filter(motif_id=motif_id)
+        existing = existing.filter(motif_id=motif_id)
+
+    aggregates = _aggregate_expressions()
+    rows = []
+    for values in payrolls.order_by().values(*AGGREGATE_DIMENSIONS.values()).annotate(**aggregates):
+        row = PayrollPeriodAggregate(**{
+            dimension: values[lookup] for dimension, lookup in AGGREGATE_DIMENSIONS.items()
+        })
+        row.payroll_count = values['payroll_count']
+        for name in aggregates:
+            if name != 'payroll_count':
+                setattr(row, name, values[name] or Decimal('0'))
+        rows.append(row)
+
+    with transaction.atomic():
+        existing.delete()
+        PayrollPeriodAggregate.objects.bulk_create(rows)
+    return len(rows)
+
+
+def rebuild_period_aggregates(start_period: Optional[date] = None, end_period: Optional[date] = None) -> int:
+    """
+    Rebuild the rollup of every month with payrolls in a range (backfill)
+
+    Returns:
+        Number of rollup rows written
+    """
+    from core.models import Payroll
+
+    payrolls = Payroll.objects.all()
+    if start_period is not None:
+        payrolls = payrolls.filter(period__gte=start_period)
+    if end_period is not None:
+        payrolls = payrolls.filter(period__lte=end_period)
+
+    months = sorted({(period.year, period.month) for period in payrolls.values_list('period', flat=True).distinct()})
+    return sum(refresh_period_aggregates(date(year, month, 1)) for year, month in months)
+
+
+@contextmanager
+def deferred_aggregate_refresh():
+    """Collect the slices touched inside the block and rebuild each once on exit"""
+    if getattr(_refresh_state, 'pending', None) is not None:
+        yield
+        return
+
+    _refresh_state.pending = set()
+    try:
+        yield
+        pending = _refresh_state.pending
+    finally:
+        _refresh_state.pending = None
+    for month_start, motif_id in sorted(pending):
+        refresh_period_aggregates(month_start, motif_id)
+
+
+def schedule_aggregate_refresh(period: date, motif_id: int):
+    """Rebuild a (month, motif) slice now, or at the end of the deferred block"""
+    slice_key = (_month_bounds(period)[0], motif_id)
+    pending = getattr(_refresh_state, 'pending', None)
+    if pending is not None:
+        pending.add(slice_key)
+    else:
+        refresh_period_aggregates(*slice_key)
+
+
+def payroll_aggregate_values(payroll) -> Dict:
+    """The AGGREGATE_PAYROLL_FIELDS of a payroll as the database stores them"""
+    values = {}
+    for name in AGGREGATE_PAYROLL_FIELDS:
+        value = getattr(payroll, name)
+        if name in AGGREGATE_FIELDS and value is not None:
+            field = payroll._meta.get_field(name)
+            value = field.to_python(value).quantize(Decimal(1).scaleb(-field.decimal_places))
+        values[name] = value
+    return values
+
+
+def aggregate_contribution(values: Dict, employee_dimensions: Sequence) -> AggregateContribution:
+    """
+    Rollup row key and amounts of one payroll
+
+    Args:
+        values: AGGREGATE_PAYROLL_FIELDS of the payroll (see payroll_aggregate_values)
+        employee_dimensions: AGGREGATE_EMPLOYEE_FIELDS of its employee
+    """
+    key = (values['period'], values['motif_id']) + tuple(employee_dimensions)
+    return key, {field: values[field] or Decimal('0') for field in AGGREGATE_FIELDS}
+
+
+def _refresh_aggregate_row(key: Tuple):
+    """Re-aggregate one rollup row from its Payroll rows"""
+    from core.models import Payroll, PayrollPeriodAggregate
+
+    lookups = dict(zip(AGGREGATE_DIMENSIONS, key))
+    values = Payroll.objects.filter(**dict(zip(AGGREGATE_DIMENSIONS.values(), key))).aggregate(**_aggregate_expressions())
+    if not values['payroll_count']:
+        PayrollPeriodAggregate.objects.filter(**lookups).delete()
+        return
+    defaults = {name: value or Decimal('0') for name, value in values.items()}
+    PayrollPeriodAggregate.objects.update_or_create(defaults=defaults, **lookups)
+
+
+def _drops_extreme(row, field: str, removed: Decimal, added: Optional[Decimal]) -> bool:
+    """Whether replacing (or removing) an amount can raise the row minimum or lower its maximum"""
+    low, high = getattr(row, f'min_{field}'), getattr(row, f'max_{field}')
+    if low == high:
+        # Every other payroll of the row keeps the same amount
+        return False
+    return (removed == high and (added is None or added < removed)) or \
+        (removed == low and (added is None or added > removed))
+
+
+def _apply_row_delta(key: Tuple, removed: Optional[Dict] = None, added: Optional[Dict] = None):
+    """Take a payroll's old amounts out of a rollup row and put its new amounts in"""
+    from core.models import PayrollPeriodAggregate
+
+    lookups = dict(zip(AGGREGATE_DIMENSIONS, key))
+    rows = PayrollPeriodAggregate.objects.filter(**lookups)
+    row = rows.select_for_update().first()
+
+    if row is None:
+        if removed is not None:
+            # The row is missing a payroll it should hold (not backfilled yet)
+            _refresh_aggregate_row(key)
+            return
+        values = {'payroll_count': 1}
+        for field, amount in added.items():
+            values[f'total_{field}'] = values[f'min_{field}'] = values[f'max_{field}'] = amount
+        try:
+            with transaction.atomic():
+                PayrollPeriodAggregate.objects.create(**lookups, **values)
+        except IntegrityError:
+            # Created concurrently
+            _refresh_aggregate_row(key)
+        return
+
+    if added is None and row.payroll_count <= 1:
+        rows.delete()
+        return
+    if removed is not None and added is not None and row.payroll_count == 1:
+        values = {}
+        for field, amount in added.items():
+            values[f'total_{field}'] = values[f'min_{field}'] = values[f'max_{field}'] = amount
+        rows.update(refreshed_at=timezone.now(), **values)
+        return
+    if removed is not None and any(
+        _drops_extreme(row, field, removed[field], added and added[field]) for field in AGGREGATE_FIELDS
+    ):
+        _refresh_aggregate_row(key)
+        return
+
+    updates = {'refreshed_at': timezone.now()}
+    count_delta = (added is not None) - (removed is not None)
+    if count_delta:
+        updates['payroll_count'] = F('payroll_count') + count_delta
+    for field in AGGREGATE_FIELDS:
+        amount_delta = (added[field] if added else 0) - (removed[field] if removed else 0)
+        if amount_delta:
+            updates[f'total_{field}'] = F(f'total_{field}') + amount_delta
+        if added is not None:
+            updates[f'min_{field}'] = Least(F(f'min_{field}'), Value(added[field]))
+            updates[f'max_{field}'] = Greatest(F(f'max_{field}'), Value(added[field]))
+    rows.update(**updates)
+
+
+def apply_aggregate_delta(previous: Optional[AggregateContribution], current: Optional[AggregateContribution]):
+    """
+    Move one payroll's contribution between rollup rows
+
+    Counts and totals are updated in place; a row is re-aggregated from its
+    payrolls only when the change may drop one of its minimums or maximums.
+
+    Args:
+        previous: Contribution before the write (None for a new payroll)
+        current: Contribution after the write (None for a deleted payroll)
+    """
+    if previous == current:
+        return
+    with transaction.atomic():
+        if previous is not None and current is not None and previous[0] == current[0]:
+            _apply_row_delta(current[0], removed=previous[1], added=current[1])
+            return
+        if previous is not None:
+            _apply_row_delta(previous[0], removed=previous[1])
+        if current is not None:
+            _apply_row_delta(current[0], added=current[1])
+
+
+def schedule_aggregate_delta(previous: Optional[AggregateContribution], current: Optional[AggregateContribution]):
+    """Apply a payroll's rollup delta now, or rebuild its slices at the end of the deferred block"""
+    pending = getattr(_refresh_state, 'pending', None)
+    if pending is None:
+        apply_aggregate_delta(previous, current)
+        return
+    for contribution in (previous, current):
+        if contribution is not None:
+            period, motif_id = contribution[0][:2]
+            pending.add((_month_bounds(period)[0], motif_id))
+
+
+def supports_aggregate_filters(filters: Optional[Dict]) -> bool:
+    """Check report filters only use the rollup dimensions"""
+    return not filters or all(not value for key, value in filters.items() if key not in AGGREGATE_FILTERS)
+
+
+def aggregate_totals(start_period: date, end_period: date, filters: Optional[Dict] = None,
+                     per: Optional[str] = None) -> List[Dict]:
+    """
+    Payroll totals of a period range read from the rollup
+
+    Args:
+        start_period: First period (inclusive)
+        end_period: Last period (inclusive)
+        filters: Report filters (see supports_aggregate_filters)
+        per: Split the range into 'month', 'quarter' or 'year' buckets
+
+    Returns:
+        One dict per bucket (a single dict without per), with the bucket
+        start date under 'bucket', payroll_count and total_/min_/max_ of
+        every AGGREGATE_FIELDS amount
+    """
+    from core.models import PayrollPeriodAggregate
+
+    queryset = PayrollPeriodAggregate.objects.filter(period__gte=start_period, period__lte=end_period)
+    for key, lookup in AGGREGATE_FILTERS.items():
+        if filters and filters.get(key):
+            queryset = queryset.filter(**{lookup: filters[key]})
+
+    aggregates = {'payroll_count': Sum('payroll_count')}
+    for field in AGGREGATE_FIELDS:
+        aggregates[f'total_{field}'] = Sum(f'total_{field}')
+        aggregates[f'min_{field}'] = Min(f'min_{field}')
+        aggregates[f'max_{field}'] = Max(f'max_{field}')
+
+    if per is not None:
+        rows = list(queryset.annotate(bucket=PERIOD_TRUNCATIONS[per]('period'))
+                    .order_by('bucket').values('bucket').annotate(**aggregates))
+    else:
+        rows = [queryset.aggregate(**aggregates)]
+
+    for row in rows:
+        for name in aggregates:
+            if row[name] is None:
+                row[name] = 0 if name == 'payroll_count' else Decimal('0')
+    return rows
@@ -0,0 +1,297 @@
+# report_cache.py
+"""
+Version-aware report cache
+Caches report results until the payroll data they were computed from changes
+
+Each payroll month has a data version token kept in the Django cache. A
+report result is stored under a key made of the report name, a canonical
+fingerprint of its parameters and filters, and the versions of every month
+it reads. Payroll and PayrollLineItem writes bump the version of their month
+(core.signals, incremental recalculation), so the next read of any report
+covering that month misses and recomputes, while reports of untouched months
+stay cached. Inside deferred_report_invalidation() (payroll runs), each
+month is bumped once when the block exits instead of at every write.
+Entries also expire after REPORT_CACHE_TIMEOUT, a backstop for data
+changed without signals (bulk updates, raw SQL).
+
+Works with any Django cache backend: versions are plain cache entries and
+all the months of a range are read with a single get_many().
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, is_dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_PREFIX = "report_cache"
+
+# Default lifetime of a cached report, in seconds
+REPORT_CACHE_TIMEOUT = getattr(settings, 'REPORT_CACHE_TIMEOUT', 24 * 60 * 60)
+
+_MISSING = object()
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form of report parameters that does not depend on ordering"""
+    if is_dataclass(value) and not isinstance(value, type):
+        value = asdict(value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items() if item not in (None, [], (), '')}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_canonical(item) for item in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) or all(
+            isinstance(item, (int, str)) for item in items
+        ) else items
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value.normalize())
+    if hasattr(value, 'pk'):
+        return value.pk
+    return value
+
+
+def filter_fingerprint(params: Any) -> str:
+    """
+    Stable fingerprint of report parameters and filters
+
+    Equal filters give the same fingerprint across processes and restarts:
+    dict keys and id lists are sorted, empty filters are dropped and
+    dataclasses (e.g. FilterCriteria) are compared by their fields.
+    """
+    payload = json.dumps(_canonical(params), sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def month_key(period: date) -> str:
+    """Data version key suffix of the month of a period"""
+    return f"{period.year:04d}-{period.month:02d}"
+
+
+def period_months(start_period: date, end_period: date) -> List[str]:
+    """Month keys of a period range (inclusive)"""
+    months = []
+    year, month = start_period.year, start_period.month
+    while (year, month) <= (end_period.year, end_period.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+class ReportCache:
+    """
+    Report results keyed by parameters and the data versions of their months
+
+    Entries expire after timeout seconds (REPORT_CACHE_TIMEOUT by default);
+    a version bump makes them unreachable sooner and deletes the ones this
+    process stored. The entries and statistics tracked here are those of
+    this process: other processes share the cached results, not the counts.
+    """
+
+    def __init__(self, prefix: str = REPORT_CACHE_PREFIX, timeout: Optional[int] = REPORT_CACHE_TIMEOUT):
+        self.prefix = prefix
+        self.timeout = timeout
+        self._entries = {}
+        self._month_entries = defaultdict(set)
+        self._deadlines = {}
+        self._expiries = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _version_key(self, month: str) -> str:
+        return f"{self.prefix}:version:{month}"
+
+    def get_versions(self, months: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the data version of each month, creating the missing ones
+
+        A missing version (new month, evicted entry, cleared cache) gets a
+        random token, never a reused one, so entries cached under an older
+        version cannot come back.
+        """
+        keys = {self._version_key(month): month for month in months}
+        versions = cache.get_many(list(keys))
+        missing = [key for key in keys if key not in versions]
+        if missing:
+            for key in missing:
+                cache.add(key, uuid.uuid4().hex, None)
+            versions.update(cache.get_many(missing))
+        return {month: versions.get(key, '') for key, month in keys.items()}
+
+    def bump_version(self, period: date):
+        """
+        Invalidate every cached report reading the month of a period
+
+        Bumped at once, and again on commit when inside a transaction so a
+        report computed from the uncommitted rows meanwhile is not kept.
+        """
+        month = month_key(period)
+        self._bump(month)
+        if connection.in_atomic_block:
+            transaction.on_commit(lambda: self._bump(month))
+
+    def _bump(self, month: str):
+        cache.set(self._version_key(month), uuid.uuid4().hex, None)
+        with self._lock:
+            stale = self._month_entries.pop(month, set())
+            for key in stale:
+                self._forget(key)
+            self.invalidations += 1
+        if stale:
+            cache.delete_many(list(stale))
+
+    def _forget(self, key: str):
+        """Stop tracking an entry (called with the lock held)"""
+        self._deadlines.pop(key, None)
+        for month in self._entries.pop(key, ()):
+            self._month_entries.get(month, set()).discard(key)
+
+    def _prune_expired(self):
+        """Stop tracking the entries the cache has expired (called with the lock held)"""
+        now = time.monotonic()
+        while self._expiries and self._expiries[0][0] <= now:
+            deadline, key = heapq.heappop(self._expiries)
+            # Entries stored again since have a later deadline
+            if self._deadlines.get(key) == deadline:
+                self._forget(key)
+
+    def make_key(self, name: str, params: Any, months: List[str]) -> str:
+        """Cache key of a report for its parameters and the current month versions"""
+        versions = self.get_versions(months)
+        digest = hashlib.sha256(
+            '|'.join(f"{month}={versions[month]}" for month in months).encode()
+        ).hexdigest()[:24]
+        return f"{self.prefix}:{name}:{filter_fingerprint(params)}:{digest}"
+
+    def get_or_compute(self, name: str, start_period: date, end_period: date, params: Any,
+                       compute: Callable[[], Any], timeout: Any = _MISSING) -> Any:
+        """
+        Get a cached report, computing and storing it on a miss
+
+        Args:
+            name: Report name
+            start_period: First period the report reads
+            end_period: Last period the report reads
+            params: Report parameters and filters (see filter_fingerprint)
+            compute: Builds the report on a miss
+            timeout: Cache timeout in seconds (defaults to self.timeout, None
+                keeps the result until its data changes, 0 disables caching)
+
+        Returns:
+            Report result
+        """
+        timeout = self.timeout if timeout is _MISSING else timeout
+        if timeout == 0:
+            return compute()
+
+        months = period_months(start_period, end_period)
+        try:
+            cache_key = self.make_key(name, params, months)
+            result = cache.get(cache_key, _MISSING)
+        except Exception as e:
+            logger.warning(f"Report cache unavailable: {str(e)}")
+            return compute()
+
+        if result is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return result
+
+        result = compute()
+        with self._lock:
+            self.misses += 1
+        try:
+            cache.set(cache_key, result, timeout)
+        except Exception as e:
+            logger.warning(f"Cannot store report {name}: {str(e)}")
+            return result
+
+        with self._lock:
+            self._prune_expired()
+            self._entries[cache_key] = months
+            for month in months:
+                self._month_entries[month].add(cache_key)
+            if timeout is None:
+                self._deadlines.pop(cache_key, None)
+            else:
+                deadline = time.monotonic() + timeout
+                self._deadlines[cache_key] = deadline
+                heapq.heappush(self._expiries, (deadline, cache_key))
+        return result
+
+    def clear(self):
+        """Forget the entries of this process and reset the statistics"""
+        with self._lock:
+            stale = list(self._entries)
+            self._entries.clear()
+            self._month_entries.clear()
+            self._deadlines.clear()
+            self._expiries.clear()
+            self.hits = self.misses = self.invalidations = 0
+        if stale:
+            cache.delete_many(stale)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get report cache statistics of this process
+
+        size counts the entries this process stored that are neither
+        invalidated nor expired, not the entries of the shared cache.
+        """
+        with self._lock:
+            self._prune_expired()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'invalidations': self.invalidations,
+            }
+
+
+report_cache = ReportCache()
+
+
+_invalidation_state = threading.local()
+
+
+@contextmanager
+def deferred_report_invalidation():
+    """Collect the months invalidated inside the block and invalidate each once on exit"""
+    if getattr(_invalidation_state, 'pending', None) is not None:
+        yield
+        return
+
+    _invalidation_state.pending = set()
+    try:
+        yield
+    finally:
+        # Also on error: writes made before it may be committed
+        pending, _invalidation_state.pending = _invalidation_state.pending, None
+        for month_start in sorted(pending):
+            report_cache.bump_version(month_start)
+
+
+def invalidate_report_period(period: date):
+    """Invalidate the cached reports reading the month of a period, now or at the end of the deferred block"""
+    pending = getattr(_invalidation_state, 'pending', None)
+    if pending is not None:
+        pending.add(date(period.year, period.month, 1))
+    else:
+        report_cache.bump_version(period)
@@ -0,0 +1,473 @@
+# report_jobs.py
+"""
+Database-backed report job queue
+Runs heavy reports in worker processes instead of web requests
+
+Jobs are ReportJob rows: submit_report_job() queues a registered report type
+with JSON parameters and returns at once, and worker processes
+(run_report_workers(), or the run_report_workers management command) poll
+the table, claim jobs with a conditional UPDATE on their status, and store
+each result as a JSON artifact under settings.REPORT_JOB_ROOT. No broker is
+needed: any database Django supports works as the queue.
+
+- Progress: job handlers get a progress(done, total, message) callback
+  (the ProgressTracker callback signature) that records the percentage and
+  renews the worker's lease on the job.
+- Cancellation: cancel_report_job() cancels a pending job at once and flags
+  a running one; the handler stops at its next progress call.
+- Retries: a failing job is queued again with exponential backoff until it
+  has used max_attempts; jobs of a dead worker are requeued once their lease
+  expires.
+- Deduplication: identical requests (same report type and canonical
+  parameters) made while a job is pending or running get that job back, so
+  concurrent users share one computation. A unique constraint on the active
+  jobs makes this hold across processes.
+
+Usage:
+    job = submit_report_job('cumulative_ytd_report', {'year': 2024}, requested_by=request.user)
+    ...
+    job.refresh_from_db()
+    if job.status == ReportJob.STATUS_SUCCEEDED:
+        report = get_report_job_result(job)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+import traceback
+from dataclasses import asdict, is_dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .report_cache import filter_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Seconds a running job stays claimed without a progress call
+DEFAULT_LEASE_TIMEOUT = 1800
+
+# Delay before the first retry, doubled at each attempt
+DEFAULT_RETRY_DELAY = 30
+
+# Minimum seconds between two progress writes of a job
+PROGRESS_INTERVAL = 1.0
+
+# Registered report job handlers by job type
+REPORT_JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], Callable], Any]] = {}
+
+
+class ReportJobCancelled(Exception):
+    """Raised in a job handler when its job was cancelled or its lease lost"""
+    pass
+
+
+class ReportJobEncoder(DjangoJSONEncoder):
+    """JSON encoder of report results: dataclasses, model instances and other objects"""
+
+    def default(self, o):
+        if is_dataclass(o) and not isinstance(o, type):
+            return asdict(o)
+        if isinstance(o, models.Model):
+            return o.pk
+        if isinstance(o, (set, frozenset)):
+            return list(o)
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def register_report_job(job_type: str):
+    """
+    Register a report job handler
+
+    The handler is called as handler(params, progress) in a worker process
+    and returns the report (anything ReportJobEncoder can serialize).
+    """
+    def decorator(handler):
+        REPORT_JOB_HANDLERS[job_type] = handler
+        return handler
+    return decorator
+
+
+def _job_root() -> Path:
+    from django.conf import settings
+
+    return Path(getattr(settings, 'REPORT_JOB_ROOT', Path(settings.BASE_DIR) / 'report_jobs'))
+
+
+def _dedup_key(job_type: str, params: Dict[str, Any]) -> str:
+    return hashlib.sha256(f"{job_type}:{filter_fingerprint(params)}".encode()).hexdigest()
+
+
+def submit_report_job(job_type: str, params: Dict[str, Any] = None, requested_by=None,
+                      max_attempts: int = 3):
+    """
+    Queue a report job, or return the identical job already pending or running
+
+    Args:
+        job_type: Registered report type (see REPORT_JOB_HANDLERS)
+        params: Report parameters; dates and Decimals are stored as strings
+        requested_by: User requesting the report
+        max_attempts: Runs before the job is marked failed
+
+    Returns:
+        ReportJob
+    """
+    from ..models import ReportJob
+
+    if job_type not in REPORT_JOB_HANDLERS:
+        raise ValueError(f"Unknown report job type: {job_type}")
+
+    params = json.loads(json.dumps(params or {}, cls=ReportJobEncoder))
+    dedup_key = _dedup_key(job_type, params)
+
+    while True:
+        existing = ReportJob.objects.filter(dedup_key=dedup_key, status__in=ReportJob.ACTIVE_STATUSES).first()
+        if existing is not None:
+            return existing
+        try:
+            with transaction.atomic():
+                return ReportJob.objects.create(
+                    job_type=job_type, params=params, dedup_key=dedup_key, max_attempts=max_attempts,
+                    available_at=timezone.now(), requested_by=requested_by
+                )
+        except IntegrityError:
+            # Another request queued the same job meanwhile
+            continue
+
+
+def cancel_report_job(job_id: int) -> bool:
+    """
+    Cancel a job: at once if pending, at its next progress call if running
+
+    Returns:
+        True if the job was still active
+    """
+    from ..models import ReportJob
+
+    now = timezone.now()
+    if ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_PENDING).update(
+        status=ReportJob.STATUS_CANCELLED, cancel_requested=True, finished_at=now
+    ):
+        return True
+    return bool(ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_RUNNING).update(cancel_requested=True))
+
+
+def get_report_job_result(job) -> Any:
+    """Load the result of a succeeded job from its artifact"""
+    if not job.artifact_path:
+        raise ValueError(f"Report job {job.id} has no result ({job.status})")
+    with open(job.artifact_path, encoding='utf-8') as artifact:
+        return json.load(artifact)
+
+
+def requeue_stale_jobs(lease_timeout: int = DEFAULT_LEASE_TIMEOUT) -> int:
+    """
+    Requeue the running jobs whose worker stopped renewing its lease
+
+    Jobs that used all their attempts are marked failed, and cancelled ones
+    cancelled, instead.
+
+    Returns:
+        Number of jobs released
+    """
+    from ..models import ReportJob
+
+    now = timezone.now()
+    stale = ReportJob.objects.filter(status=ReportJob.STATUS_RUNNING,
+                                     heartbeat_at__lt=now - timedelta(seconds=lease_timeout))
+    cancelled = stale.filter(cancel_requested=True).update(status=ReportJob.STATUS_CANCELLED, finished_at=now)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=ReportJob.STATUS_FAILED, error="Worker lease expired", finished_at=now
+    )
+    requeued = stale.update(status=ReportJob.STATUS_PENDING, worker_id='', available_at=now)
+    released = cancelled + failed + requeued
+    if released:
+        logger.warning(f"Released {released} stale report jobs ({failed} failed)")
+    return released
+
+
+def purge_report_jobs(older_than_days: int = 30) -> int:
+    """
+    Delete finished jobs and their artifacts
+
+    Returns:
+        Number of jobs deleted
+    """
+    from ..models import ReportJob
+
+    jobs = ReportJob.objects.filter(
+        status__in=[ReportJob.STATUS_SUCCEEDED, ReportJob.STATUS_FAILED, ReportJob.STATUS_CANCELLED],
+        finished_at__lt=timezone.now() - timedelta(days=older_than_days)
+    )
+    for artifact_path in jobs.exclude(artifact_path='').values_list('artifact_path', flat=True):
+        shutil.rmtree(Path(artifact_path).parent, ignore_errors=True)
+    deleted, _ = jobs.delete()
+    return deleted
+
+
+class ReportJobWorker:
+    """
+    Claims and runs queued report jobs
+
+    Every write to a claimed job is conditioned on this worker still holding
+    it, so a worker whose lease expired cannot overwrite the job's next run.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, poll_interval: float = 1.0,
+                 lease_timeout: int = DEFAULT_LEASE_TIMEOUT, retry_delay: int = DEFAULT_RETRY_DELAY,
+                 root: Optional[str] = None):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_interval = poll_interval
+        self.lease_timeout = lease_timeout
+        self.retry_delay = retry_delay
+        self.root = Path(root) if root is not None else _job_root()
+
+    def _claimed(self, job):
+        from ..models import ReportJob
+
+        return ReportJob.objects.filter(id=job.id, status=ReportJob.STATUS_RUNNING, worker_id=self.worker_id)
+
+    def claim_next(self):
+        """Claim the oldest available job, or return None"""
+        from ..models import ReportJob
+
+        now = timezone.now()
+        candidates = ReportJob.objects.filter(
+            status=ReportJob.STATUS_PENDING, available_at__lte=now
+        ).order_by('id').values_list('id', flat=True)[:10]
+        for job_id in candidates:
+            claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.STATUS_PENDING).update(
+                status=ReportJob.STATUS_RUNNING, worker_id=self.worker_id, attempts=F('attempts') + 1,
+                progress=0, progress_message='', started_at=now, heartbeat_at=now
+            )
+            if claimed:
+                return ReportJob.objects.get(id=job_id)
+        return None
+
+    def _progress_callback(self, job) -> Callable[[int, int, str], None]:
+        last_write = [0.0]
+
+        def progress(done: int, total: int, message: str = ""):
+            now = time.monotonic()
+            if now - last_write[0] < PROGRESS_INTERVAL and done < total:
+                return
+            last_write[0] = now
+            percent = min(100, int(done * 100 / total)) if total else 0
+            if not self._claimed(job).filter(cancel_requested=False).update(
+                progress=percent, progress_message=message[:255], heartbeat_at=timezone.now()
+            ):
+                raise ReportJobCancelled(f"Report job {job.id} was cancelled")
+
+        return progress
+
+    def _write_artifact(self, job, result: Any) -> Path:
+        directory = self.root / str(job.id)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / 'result.json'
+        temporary = directory / f'result.json.{self.worker_id.replace(":", "_")}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as artifact:
+            json.dump(result, artifact, cls=ReportJobEncoder, ensure_ascii=False)
+        os.replace(temporary, path)
+        return path
+
+    def run_job(self, job) -> str:
+        """
+        Run a claimed job and record its outcome
+
+        Returns:
+            Final status of this run (pending when queued for a retry)
+        """
+        from ..models import ReportJob
+
+        try:
+            handler = REPORT_JOB_HANDLERS.get(job.job_type)
+            if handler is None:
+                raise ValueError(f"Unknown report job type: {job.job_type}")
+            result = handler(job.params, self._progress_callback(job))
+            path = self._write_artifact(job, result)
+        except ReportJobCancelled:
+            self._claimed(job).update(status=ReportJob.STATUS_CANCELLED, finished_at=timezone.now())
+            logger.info(f"Report job {job.id} cancelled")
+            return ReportJob.STATUS_CANCELLED
+        except Exception as e:
+            error = traceback.format_exc()
+            if job.attempts < job.max_attempts:
+                delay = self.retry_delay * 2 ** (job.attempts - 1)
+                self._claimed(job).update(
+                    status=ReportJob.STATUS_PENDING, worker_id='', error=error,
+                    available_at=timezone.now() + timedelta(seconds=delay)
+                )
+                logger.warning(f"Report job {job.id} failed (attempt {job.attempts}), retrying in {delay}s: {str(e)}")
+                return ReportJob.STATUS_PENDING
+            self._claimed(job).update(status=ReportJob.STATUS_FAILED, error=error, finished_at=timezone.now())
+            logger.error(f"Report job {job.id} failed: {str(e)}")
+            return ReportJob.STATUS_FAILED
+
+        if not self._claimed(job).update(
+            status=ReportJob.STATUS_SUCCEEDED, progress=100, error='', artifact_path=str(path),
+            artifact_size=path.stat().st_size, finished_at=timezone.now()
+        ):
+            # Lease lost or cancelled while finishing: the result is not published
+            shutil.rmtree(path.parent, ignore_errors=True)
+            return ReportJob.STATUS_CANCELLED
+        return ReportJob.STATUS_SUCCEEDED
+
+    def run_once(self) -> bool:
+        """Run the next available job; returns False when the queue is empty"""
+        job = self.claim_next()
+        if job is None:
+            return False
+        self.run_job(job)
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, stop_event=None, exit_when_idle: bool = False) -> int:
+        """
+        Poll the queue and run jobs
+
+        Args:
+            max_jobs: Stop after this many jobs
+            stop_event: threading/multiprocessing Event ending the loop
+            exit_when_idle: Stop when no job is available
+
+        Returns:
+            Number of jobs run
+        """
+        from django.db import close_old_connections
+
+        count = 0
+        while stop_event is None or not stop_event.is_set():
+            close_old_connections()
+            requeue_stale_jobs(self.lease_timeout)
+            if self.run_once():
+                count += 1
+                if max_jobs is not None and count >= max_jobs:
+                    break
+            elif exit_when_idle:
+                break
+            else:
+                time.sleep(self.poll_interval)
+        return count
+
+
+def _worker_main(options: Dict[str, Any], stop_event):
+    import django
+
+    django.setup()
+    try:
+        ReportJobWorker(**options).run(stop_event=stop_event)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_report_workers(processes: int = 2, **options):
+    """
+    Run report workers in separate processes until interrupted
+
+    Args:
+        processes: Number of worker processes
+        **options: ReportJobWorker options
+    """
+    import multiprocessing
+
+    context = multiprocessing.get_context('spawn')
+    stop_event = context.Event()
+    workers = [context.Process(target=_worker_main, args=(options, stop_event), daemon=True)
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        stop_event.set()
+        for worker in workers:
+            worker.join(timeout=30)
+
+
+# ========== REPORT HANDLERS ==========
+
+def _date(value: Optional[str]) -> Optional[date]:
+    return date.fromisoformat(value[:10]) if value else None
+
+
+def _filter_criteria(filters: Optional[Dict[str, Any]]):
+    from ..reports.payroll_summary import FilterCriteria
+
+    if not filters:
+        return None
+    filters = dict(filters)
+    for key in ('salary_range_min', 'salary_range_max'):
+        if filters.get(key) is not None:
+            filters[key] = Decimal(str(filters[key]))
+    for key in ('start_date', 'end_date'):
+        filters[key] = _date(filters.get(key))
+    return FilterCriteria(**filters)
+
+
+@register_report_job('cumulative_ytd_report')
+def _cumulative_ytd_report(params, progress):
+    from ..reports.cumulative_reports import CumulativeReportManager
+
+    return CumulativeReportManager().generate_ytd_report(
+        params['year'], params.get('filters'), params.get('format_type', 'summary')
+    )
+
+
+@register_report_job('cumulative_comparison_report')
+def _cumulative_comparison_report(params, progress):
+    from ..reports.cumulative_reports import CumulativeReportManager
+
+    return CumulativeReportManager().generate_comparison_report(
+        _date(params['start_period']), _date(params['end_period']),
+        params.get('comparison_type', 'month_over_month'), params.get('filters')
+    )
+
+
+@register_report_job('cumulative_trend_report')
+def _cumulative_trend_report(params, progress):
+    from ..reports.cumulative_reports import CumulativeReportManager
+
+    return CumulativeReportManager().generate_trend_report(
+        params['metric'], _date(params['start_period']), _date(params['end_period']), params.get('filters')
+    )
+
+
+@register_report_job('cumulative_compliance_report')
+def _cumulative_compliance_report(params, progress):
+    from ..reports.cumulative_reports import CumulativeReportManager
+
+    return CumulativeReportManager().generate_compliance_report(params['year'])
+
+
+@register_report_job('annual_payroll_summary')
+def _annual_payroll_summary(params, progress):
+    from ..models import SystemParameters
+    from ..reports.payroll_summary import PayrollSummaryManager
+
+    manager = PayrollSummaryManager(SystemParameters.objects.first())
+    return manager.get_annual_summary(params['year'], filters=_filter_criteria(params.get('filters')))
+
+
+@register_report_job('declaration_package')
+def _declaration_package(params, progress):
+    from ..models import SystemParameters
+    from ..reports.advanced_declarations import AdvancedDeclarationEngine
+
+    engine = AdvancedDeclarationEngine(SystemParameters.objects.first())
+    return engine.generate_comprehensive_declaration_package(
+        _date(params['declaration_period']), params.get('declaration_types'),
+        params.get('employee_filter'), params.get('export_formats'), progress_callback=progress
+    )
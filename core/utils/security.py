@@ -25,8 +25,7 @@ import time
 import re
 import ipaddress
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Union, Tuple, Set
-# Cleaned up imports - removed unused Any
+from typing import Dict, List, Optional, Union, Tuple, Set, Any
 from decimal import Decimal
 from collections import defaultdict, deque
 
@@ -5,10 +5,12 @@ Converted from PaieClass.java tax calculation methods
 Includes all Mauritanian tax calculation logic with proper rates and brackets
 """
 
+from bisect import bisect_right
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Dict, List, Tuple
-# Cleaned up imports - removed unused Optional, Union
+from typing import Dict, List, Optional, Tuple
+# Cleaned up imports - removed unused Union
 import math
+import threading
 
 
 class CNSSCalculator:
@@ -259,47 +261,17 @@ class ITSCalculator:
         # Ensure non-negative
         adjusted_income = max(Decimal('0'), adjusted_income)
         
-        # Get tax brackets
-        brackets = cls.get_tax_brackets(year, is_expatriate, tax_mode)
+        # Precomputed bracket table for the year, expatriate flag and tax mode
+        its = ITSBracketTable.for_year(year, is_expatriate, tax_mode).calculate(adjusted_income, currency_rate)
         
         result = {
-            'total': Decimal('0.00'),
-            'tranche1': Decimal('0.00'),
-            'tranche2': Decimal('0.00'),
-            'tranche3': Decimal('0.00'),
+            'total': its['total'],
+            'tranche1': its['tranche1'],
+            'tranche2': its['tranche2'],
+            'tranche3': its['tranche3'],
             'taxable_income': adjusted_income
         }
         
-        remaining_income = adjusted_income
-        
-        for i, bracket in enumerate(brackets):
-            if remaining_income <= Decimal('0'):
-                break
-                
-            # Calculate taxable amount in this bracket
-            bracket_min = bracket['min']
-            bracket_max = bracket['max']
-            bracket_rate = bracket['rate']
-            
-            if bracket_max is not None:
-                bracket_width = bracket_max - bracket_min
-                taxable_in_bracket = min(remaining_income, bracket_width)
-            else:
-                taxable_in_bracket = remaining_income
-            
-            # Calculate tax for this bracket
-            bracket_tax = (taxable_in_bracket * bracket_rate / currency_rate).quantize(
-                Decimal('0.01'), rounding=ROUND_HALF_UP
-            )
-            
-            # Store in appropriate tranche
-            tranche_key = f'tranche{i + 1}'
-            if tranche_key in result:
-                result[tranche_key] = bracket_tax
-            
-            result['total'] += bracket_tax
-            remaining_income -= taxable_in_bracket
-        
         return result
     
     @classmethod
@@ -369,6 +341,227 @@ class ITSCalculator:
         return total_reimbursement
 
 
+class ITSBracketTable:
+    """
+    Immutable ITS bracket table with precomputed cumulative tax offsets
+    
+    Brackets are applied by width, as in ITSm: income fills each bracket in
+    turn and each bracket's tax is rounded to the cent. The rounded tax of
+    every full bracket is computed once, so ITS for an income is one bisect
+    over the bracket bounds plus one multiply for the partially filled
+    bracket. Tables are shared: use for_year() for the statutory brackets
+    and from_brackets() for brackets coming from system parameters.
+    """
+    
+    __slots__ = ('widths', 'rates', 'bounds', 'full_taxes', 'offsets', 'is_open_ended')
+    
+    _tables = {}
+    _tables_lock = threading.Lock()
+    
+    def __init__(self, widths: Tuple[Optional[Decimal], ...], rates: Tuple[Decimal, ...]):
+        """
+        Args:
+            widths: Width of each bracket, None for an open-ended last bracket
+            rates: Tax rate of each bracket
+        """
+        if len(widths) != len(rates):
+            raise ValueError("widths and rates must have the same length")
+        if any(width is None for width in widths[:-1]):
+            raise ValueError("Only the last ITS bracket can be open-ended")
+        
+        is_open_ended = bool(widths) and widths[-1] is None
+        closed_widths = widths[:-1] if is_open_ended else widths
+        
+        bounds = []
+        full_taxes = []
+        offsets = [Decimal('0.00')]
+        upper = Decimal('0')
+        for width, rate in zip(closed_widths, rates):
+            upper += width
+            bounds.append(upper)
+            full_taxes.append((width * rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP))
+            offsets.append(offsets[-1] + full_taxes[-1])
+        
+        object.__setattr__(self, 'widths', tuple(widths))
+        object.__setattr__(self, 'rates', tuple(rates))
+        object.__setattr__(self, 'bounds', tuple(bounds))
+        object.__setattr__(self, 'full_taxes', tuple(full_taxes))
+        object.__setattr__(self, 'offsets', tuple(offsets))
+        object.__setattr__(self, 'is_open_ended', is_open_ended)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("ITSBracketTable is immutable")
+    
+    def __repr__(self):
+        return f"ITSBracketTable(widths={self.widths}, rates={self.rates})"
+    
+    @classmethod
+    def for_year(cls, year: int = 2018, is_expatriate: bool = False,
+                 tax_mode: str = 'G') -> 'ITSBracketTable':
+        """Get the shared statutory table for a year, expatriate flag and tax mode"""
+        key = ('statutory', year, bool(is_expatriate), tax_mode)
+        table = cls._tables.get(key)
+        if table is None:
+            brackets = ITSCalculator.get_tax_brackets(year, is_expatriate, tax_mode)
+            table = cls._store(key, cls._from_bracket_dicts(brackets))
+        return table
+    
+    @classmethod
+    def from_brackets(cls, brackets: List[Dict], first_rate=None) -> 'ITSBracketTable':
+        """
+        Get the shared table for bracket dicts (e.g. SystemParameters.get_its_brackets)
+        
+        Args:
+            brackets: Dicts with 'min', 'max' (None or inf when open) and 'rate'
+            first_rate: Optional rate replacing the first bracket's rate
+        """
+        key = ('brackets', first_rate, tuple(
+            (bracket['min'], bracket['max'], bracket['rate']) for bracket in brackets
+        ))
+        table = cls._tables.get(key)
+        if table is None:
+            table = cls._store(key, cls._from_bracket_dicts(brackets, first_rate))
+        return table
+    
+    @classmethod
+    def _from_bracket_dicts(cls, brackets: List[Dict], first_rate=None) -> 'ITSBracketTable':
+        widths = []
+        rates = []
+        for i, bracket in enumerate(brackets):
+            bracket_max = bracket['max']
+            if bracket_max is None or bracket_max == float('inf'):
+                widths.append(None)
+            else:
+                widths.append(Decimal(str(bracket_max)) - Decimal(str(bracket['min'])))
+            rate = first_rate if i == 0 and first_rate is not None else bracket['rate']
+            rates.append(Decimal(str(rate)))
+        return cls(tuple(widths), tuple(rates))
+    
+    @classmethod
+    def _store(cls, key, table: 'ITSBracketTable') -> 'ITSBracketTable':
+        with cls._tables_lock:
+            return cls._tables.setdefault(key, table)
+    
+    @property
+    def top_rate(self) -> Decimal:
+        """Highest marginal rate of the table"""
+        return max(self.rates, default=Decimal('0'))
+    
+    def tranche_bases(self, taxable_income: Decimal) -> List[Decimal]:
+        """Income falling in each bracket"""
+        bases = []
+        remaining = max(Decimal('0'), taxable_income)
+        for width in self.widths:
+            in_bracket = remaining if width is None else min(remaining, width)
+            bases.append(in_bracket)
+            remaining -= in_bracket
+        return bases
+    
+    def calculate(self, taxable_income: Decimal, currency_rate: Decimal = Decimal('1.0')) -> Dict[str, Decimal]:
+        """
+        Calculate ITS for one taxable income (after deductions and abatement)
+        
+        Args:
+            taxable_income: Income subject to the brackets
+            currency_rate: Currency conversion rate dividing each bracket tax
+            
+        Returns:
+            Dict with 'total', 'tranche1'..'tranche3' and 'tranches' (every bracket)
+        """
+        tranches = [Decimal('0.00')] * len(self.rates)
+        
+        if taxable_income > 0:
+            full = bisect_right(self.bounds, taxable_income)
+            if currency_rate == 1:
+                tranches[:full] = self.full_taxes[:full]
+            else:
+                tranches[:full] = [
+                    (width * rate / currency_rate).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+                    for width, rate in zip(self.widths[:full], self.rates[:full])
+                ]
+            
+            if full < len(self.rates):
+                lower = self.bounds[full - 1] if full else Decimal('0')
+                in_bracket = taxable_income - lower
+                if in_bracket > 0:
+                    tranches[full] = (in_bracket * self.rates[full] / currency_rate).quantize(
+                        Decimal('0.01'), rounding=ROUND_HALF_UP
+                    )
+        
+        if currency_rate == 1 and taxable_income > 0:
+            total = self.offsets[full] + (tranches[full] if full < len(self.rates) else Decimal('0.00'))
+        else:
+            total = sum(tranches, Decimal('0.00'))
+        
+        result = {'total': total, 'tranches': tranches}
+        for i in range(3):
+            result[f'tranche{i + 1}'] = tranches[i] if i < len(tranches) else Decimal('0.00')
+        return result
+    
+    def calculate_batch(self, taxable_incomes, currency_rate: Decimal = Decimal('1.0')) -> Dict[str, List[Decimal]]:
+        """
+        Calculate ITS for many taxable incomes at once
+        
+        Uses integer-cent NumPy arrays when available (results identical to
+        calculate), otherwise calls calculate for each income.
+        
+        Args:
+            taxable_incomes: Sequence of taxable incomes with at most cent precision
+            currency_rate: Currency conversion rate
+            
+        Returns:
+            Dict with 'total' and 'tranche1'..'tranche3' lists aligned with the input
+        """
+        from .batch_calculations import NUMPY_AVAILABLE, to_cents
+        
+        taxable_incomes = list(taxable_incomes)
+        if NUMPY_AVAILABLE and currency_rate == 1:
+            import numpy as np
+            from .batch_calculations import _array
+            
+            tranches, total = self.calculate_cents_batch(_array([to_cents(x) for x in taxable_incomes]))
+            result = {'total': [Decimal(int(cents)).scaleb(-2) for cents in total]}
+            for i in range(3):
+                values = tranches[i] if i < len(tranches) else np.zeros(len(taxable_incomes), dtype=np.int64)
+                result[f'tranche{i + 1}'] = [Decimal(int(cents)).scaleb(-2) for cents in values]
+            return result
+        
+        results = [self.calculate(Decimal(str(x)), currency_rate) for x in taxable_incomes]
+        return {key: [r[key] for r in results] for key in ('total', 'tranche1', 'tranche2', 'tranche3')}
+    
+    def calculate_cents_batch(self, taxable_cents):
+        """
+        Vectorized calculate over an integer-cent NumPy array
+        
+        Returns:
+            Tuple (list of tax arrays per bracket, total tax array), in cents
+        """
+        import numpy as np
+        from .batch_calculations import _multiply_round, rate_to_fraction, to_cents
+        
+        taxable_cents = np.maximum(taxable_cents, 0)
+        bound_cents = np.array([to_cents(bound) for bound in self.bounds], dtype=np.int64)
+        full = np.searchsorted(bound_cents, taxable_cents, side='right')
+        
+        # Partial bracket: rate of bracket `full` applied above its lower bound
+        fractions = [rate_to_fraction(rate) for rate in self.rates] + [(0, 1)]
+        denominator = max(d for _, d in fractions)
+        numerators = np.array([n * (denominator // d) for n, d in fractions], dtype=np.int64)
+        lower_cents = np.concatenate(([0], bound_cents))
+        in_bracket = np.where(full < len(self.rates), taxable_cents - lower_cents[full], 0)
+        partial = _multiply_round(in_bracket, numerators[full], denominator)
+        
+        full_cents = [to_cents(tax) for tax in self.full_taxes]
+        offset_cents = np.array([to_cents(offset) for offset in self.offsets], dtype=np.int64)
+        total = offset_cents[full] + partial
+        
+        tranches = []
+        for i in range(len(self.rates)):
+            full_tax = full_cents[i] if i < len(full_cents) else 0
+            tranches.append(np.where(full > i, full_tax, np.where(full == i, partial, 0)))
+        return tranches, total
+
+
 class TaxUtilities:
     """
     Additional tax utility functions from PaieClass.java
@@ -386,9 +579,16 @@ class TaxUtilities:
                                system_parameters=None) -> Decimal:
         """
         CRITICAL FIX: BrutDuNet equivalent for gross from net calculation
-        Calculate gross salary from net salary using iterative approach
+        Calculate gross salary from net salary
         Equivalent to BrutDuNet method in PaieClass.java
         
+        BrutDuNet scans candidate gross amounts downward from net * 2 + benefits
+        in steps of 1 MRU and keeps the first one whose net does not exceed the
+        target. Net is non-decreasing in gross whenever the combined marginal
+        rate of CNSS, CNAM and the top ITS bracket stays below 100%, so the
+        same candidate is found by bisection over the step index in
+        O(log net) ITS evaluations; otherwise the scan is used.
+        
         Args:
             net_amount: Target net salary
             benefits_in_kind: Benefits in kind amount
@@ -409,59 +609,81 @@ class TaxUtilities:
         # Get abatement from system parameters
         abatement = getattr(system_parameters, 'tax_abatement', Decimal('0')) if system_parameters else Decimal('0')
         
+        # Only search if net is above abatement
+        steps = int(max_gross - net_amount - benefits_in_kind)
+        if net_amount <= abatement or steps <= 0:
+            return net_amount
+        
+        def net_for_step(step: int) -> Decimal:
+            test_gross = max_gross - Decimal(step)
+            return TaxUtilities._calculate_net_from_gross(
+                test_gross, benefits_in_kind, apply_cnss, apply_cnam, currency_rate,
+                is_expatriate, year, tax_mode, abatement
+            )
+        
+        # Candidates at or below net + benefits are never returned
+        last_step = steps - 1
+        while last_step >= 0 and max_gross - Decimal(last_step) <= net_amount + benefits_in_kind:
+            last_step -= 1
+        if last_step < 0:
+            return net_amount
+        
+        its_table = ITSBracketTable.for_year(year, is_expatriate, tax_mode)
+        # Per 1 MRU step: CNSS 1% + CNAM 4% + ITS, plus one cent of rounding per bracket
+        marginal_rate = Decimal('0.05') + Decimal('0.01') * len(its_table.rates)
+        if currency_rate > 0:
+            marginal_rate += its_table.top_rate / currency_rate
+        
+        if currency_rate <= 0 or marginal_rate >= Decimal('1'):
+            for step in range(last_step + 1):
+                if net_for_step(step) <= net_amount:
+                    return max_gross - Decimal(step)
+            return max_gross - Decimal(last_step)
+        
+        # Smallest step whose net does not exceed the target
+        if net_for_step(last_step) > net_amount:
+            return max_gross - Decimal(last_step)
+        low, high = 0, last_step
+        while low < high:
+            middle = (low + high) // 2
+            if net_for_step(middle) <= net_amount:
+                high = middle
+            else:
+                low = middle + 1
+        
+        return max_gross - Decimal(low)
+    
+    @staticmethod
+    def _calculate_net_from_gross(gross: Decimal, benefits_in_kind: Decimal, apply_cnss: bool,
+                                  apply_cnam: bool, currency_rate: Decimal, is_expatriate: bool,
+                                  year: int, tax_mode: str, abatement: Decimal) -> Decimal:
+        """Net salary of a gross amount with BrutDuNet contribution rules"""
         # CNSS ceiling
         cnss_ceiling = Decimal('15000')
         
-        current_gross = net_amount
-        
-        # Only iterate if net is above abatement
-        if net_amount > abatement:
-            # Iterate from max down to find gross that yields target net
-            for i in range(int(max_gross - net_amount - benefits_in_kind)):
-                test_gross = max_gross - Decimal(str(i))
-                
-                if test_gross <= net_amount + benefits_in_kind:
-                    break
-                    
-                current_gross = test_gross
-                
-                # Calculate CNSS
-                cnss_amount = Decimal('0')
-                if apply_cnss:
-                    if test_gross >= cnss_ceiling:
-                        cnss_amount = cnss_ceiling * Decimal('0.01')
-                    else:
-                        cnss_amount = test_gross * Decimal('0.01')
-                
-                # Calculate CNAM - CRITICAL FIX: Use correct 4% rate
-                cnam_amount = Decimal('0')
-                if apply_cnam:
-                    cnam_amount = test_gross * Decimal('0.04')  # Corrected to 4%
-                
-                # Calculate ITS
-                its_calculator = ITSCalculator()
-                its_result = its_calculator.calculate_its_progressive(
-                    taxable_income=test_gross,
-                    cnss_amount=cnss_amount,
-                    cnam_amount=cnam_amount,
-                    base_salary=test_gross,
-                    benefits_in_kind=benefits_in_kind,
-                    currency_rate=currency_rate,
-                    is_expatriate=is_expatriate,
-                    year=year,
-                    abatement=abatement,
-                    tax_mode=tax_mode
-                )
-                
-                # Calculate net
-                calculated_net = (test_gross - benefits_in_kind - 
-                                its_result['total'] - cnss_amount - cnam_amount)
-                
-                # Return gross if calculated net matches target
-                if calculated_net <= net_amount:
-                    return test_gross
+        cnss_amount = Decimal('0')
+        if apply_cnss:
+            cnss_amount = min(gross, cnss_ceiling) * Decimal('0.01')
+        
+        # CRITICAL FIX: Use correct 4% CNAM rate
+        cnam_amount = Decimal('0')
+        if apply_cnam:
+            cnam_amount = gross * Decimal('0.04')
+        
+        its_result = ITSCalculator.calculate_its_progressive(
+            taxable_income=gross,
+            cnss_amount=cnss_amount,
+            cnam_amount=cnam_amount,
+            base_salary=gross,
+            benefits_in_kind=benefits_in_kind,
+            currency_rate=currency_rate,
+            is_expatriate=is_expatriate,
+            year=year,
+            abatement=abatement,
+            tax_mode=tax_mode
+        )
         
-        return current_gross
+        return gross - benefits_in_kind - its_result['total'] - cnss_amount - cnam_amount
     
     @staticmethod
     def apply_non_taxable_allowance_ceiling(taxable_income: Decimal,
@@ -16,8 +16,7 @@ and implements Mauritanian-specific rules (NNI, phone formats, local compliance)
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
-from typing import Dict, List, Optional, Union, Tuple, Set
-# Cleaned up imports - removed unused Any
+from typing import Dict, List, Optional, Union, Tuple, Set, Any
 import re
 import unicodedata
 import email.utils
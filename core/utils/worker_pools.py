@@ -0,0 +1,72 @@
+# worker_pools.py
+"""
+Process pool setup shared by the parallel payroll and payslip runs
+
+Database connections must never be shared between processes, and a worker
+must have Django set up before it touches a model:
+
+- worker_pool_context() picks the start method: fork where available, so
+  workers inherit the loaded apps and settings, spawn elsewhere.
+- prepare_worker_pool() runs in the parent, before the pool is started:
+  it closes the parent's connections so that no socket is inherited, and
+  refuses to start a pool inside a transaction, whose uncommitted rows the
+  workers could not see.
+- initialize_worker_django() runs first in every worker initializer: it
+  sets Django up when the worker was spawned. Workers open their own
+  connections on first use.
+
+Usage:
+    if prepare_worker_pool():
+        with ProcessPoolExecutor(workers, mp_context=worker_pool_context(), initializer=...) as executor:
+            ...
+    else:
+        ...  # run serially
+"""
+
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def worker_pool_context():
+    """Multiprocessing context of worker pools: fork where available, spawn elsewhere"""
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context('spawn')
+
+
+def prepare_worker_pool() -> bool:
+    """
+    Close the parent's database connections before worker processes are started
+
+    Returns:
+        False when a connection is inside a transaction: the connections are
+        left open and the caller should run serially instead
+    """
+    try:
+        from django.db import connections
+    except ImportError:
+        return True
+
+    for connection in connections.all(initialized_only=True):
+        if connection.in_atomic_block:
+            logger.info("Worker pool not started inside a transaction, running serially")
+            return False
+
+    # Reopened on demand by the parent once the pool is done
+    connections.close_all()
+    return True
+
+
+def initialize_worker_django():
+    """Set Django up in a worker process that did not inherit it (spawn start method)"""
+    try:
+        import django
+        from django.apps import apps
+    except ImportError:
+        return
+
+    if not apps.ready and os.environ.get('DJANGO_SETTINGS_MODULE'):
+        django.setup()
@@ -124,3 +124,20 @@ STATIC_URL = '/static/'
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Columnar snapshots of closed payroll periods (core.utils.payroll_snapshots)
+
+PAYROLL_SNAPSHOT_ROOT = BASE_DIR / 'payroll_snapshots'
+
+# Result artifacts of queued report jobs (core.utils.report_jobs)
+
+REPORT_JOB_ROOT = BASE_DIR / 'report_jobs'
+
+# Lifetime in seconds of cached report results, a backstop to the per-month
+# data versions (core.utils.report_cache)
+
+REPORT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Payslip emails sent per minute to each recipient domain (core.reports.bulletin_management)
+
+PAYSLIP_EMAIL_RATE_LIMITS = {'default': 60}